@@ -0,0 +1,8175 @@
+"""Akkaya analytics: dataset loaders, candidate matrices, optimizers and the /api views.
+
+Imported lazily by app.py on the first /api request (or during preload), so static pages
+and cheap metadata do not pay for pandas/NumPy. View functions here are registered on the
+Flask app by app.py and run inside its request context.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+from array import array
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+from flask import jsonify, request
+import time
+import statistics
+
+import metrics
+
+BASE_DIR = Path(__file__).resolve().parent
+# AKKAYA_DATA_DIR: an alternative data tree, e.g. a synthetic basin (python -m synth_basin)
+DATA_DIR = Path(os.environ.get("AKKAYA_DATA_DIR", "").strip() or BASE_DIR / "data")
+
+# -----------------------------
+# Data loading helpers
+# -----------------------------
+_cache: Dict[str, Any] = {}
+
+
+# -----------------------------
+# Stage timers (meta.timings_ms)
+# -----------------------------
+# A request runs inside _timing_scope(); functions decorated with @_stage(...) add their wall
+# time to the active collector and the scorers count fitness evaluations with _count_evals().
+# With no open scope (or AKKAYA_STAGE_TIMINGS=0) the decorators cost one thread-local lookup.
+STAGE_TIMINGS = os.environ.get("AKKAYA_STAGE_TIMINGS", "1").strip().lower() not in ("0", "false", "no", "off")
+_timing_local = threading.local()
+
+
+def _timing_collector() -> Optional[Dict[str, Any]]:
+    return getattr(_timing_local, "collector", None)
+
+
+@contextlib.contextmanager
+def _stage_timer(col: Dict[str, Any], stage: str):
+    # stages may nest (fao56 inside matrix_build); re-entering the same stage is not double-counted
+    if stage in col["active"]:
+        yield
+        return
+    col["active"].add(stage)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        col["active"].discard(stage)
+        col["ms"][stage] = col["ms"].get(stage, 0.0) + (time.perf_counter() - t0) * 1000.0
+        col["calls"][stage] = col["calls"].get(stage, 0) + 1
+
+
+def _stage(stage: str):
+    """Decorator: time every call of the function as `stage` while a timing scope is open."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            col = getattr(_timing_local, "collector", None)
+            if col is None:
+                return fn(*args, **kwargs)
+            with _stage_timer(col, stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def _stage_add(stage: str, ms: float) -> None:
+    """Add an externally measured duration (e.g. the ctx pipeline stages) to the open scope."""
+    col = getattr(_timing_local, "collector", None)
+    if col is not None:
+        col["ms"][stage] = col["ms"].get(stage, 0.0) + float(ms)
+        col["calls"][stage] = col["calls"].get(stage, 0) + 1
+
+
+def _count_evals(n: int) -> None:
+    # per-thread running total (optimizer metrics) + the open timing scope, if any
+    _timing_local.evals = getattr(_timing_local, "evals", 0) + int(n)
+    col = getattr(_timing_local, "collector", None)
+    if col is not None:
+        col["evals"] += int(n)
+
+
+def _eval_count() -> int:
+    """Fitness evaluations counted on this thread so far (see _count_evals)."""
+    return int(getattr(_timing_local, "evals", 0))
+
+
+@contextlib.contextmanager
+def _timing_scope():
+    """Collect stage timings for the enclosed block; yields the collector (None when disabled).
+
+    Nested scopes (optimize() inside /api/benchmark) fold their totals into the parent on exit.
+    """
+    if not STAGE_TIMINGS:
+        yield None
+        return
+    parent = getattr(_timing_local, "collector", None)
+    col = {"started": time.perf_counter(), "ms": {}, "calls": {}, "evals": 0, "active": set()}
+    _timing_local.collector = col
+    try:
+        yield col
+    finally:
+        _timing_local.collector = parent
+        if parent is not None:
+            for k, v in col["ms"].items():
+                parent["ms"][k] = parent["ms"].get(k, 0.0) + v
+            for k, v in col["calls"].items():
+                parent["calls"][k] = parent["calls"].get(k, 0) + v
+            parent["evals"] += col["evals"]
+
+
+def _loader(key: str):
+    """@_stage("loaders") plus hit/miss counts for /metrics, for a loader memoized as _cache[key]."""
+    def deco(fn):
+        timed = _stage("loaders")(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics.cache_event("loaders", key in _cache)
+            return timed(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def _timed_view(fn):
+    """Run `fn` (optimize() or an /api view) inside its own timing scope."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _timing_scope():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _timing_report(extra: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """meta.timings_ms of the open scope: per-stage ms, "total", "fitness_evals" and "calls"."""
+    col = getattr(_timing_local, "collector", None)
+    out: Dict[str, Any] = dict(extra or {})
+    if col is None:
+        return out
+    for k, v in col["ms"].items():
+        out.setdefault(k, round(v, 3))
+    out["total"] = round((time.perf_counter() - col["started"]) * 1000.0, 3)
+    out["fitness_evals"] = int(col["evals"])
+    out["calls"] = dict(col["calls"])
+    return out
+
+
+def safe_float(x, default: float = 0.0) -> float:
+    """Convert input to float safely (handles None, '', '1,23', '1.234,56')."""
+    try:
+        if x is None:
+            return float(default)
+        try:
+            import numpy as _np
+            if isinstance(x, (_np.integer, _np.floating)):
+                return float(x)
+        except Exception:
+            pass
+        if isinstance(x, (int, float)):
+            return float(x)
+        s = str(x).strip()
+        if s == "" or s.lower() in ("none", "nan", "null"):
+            return float(default)
+        s = s.replace(" ", "").replace("\u00a0","")
+        if s.count(",") == 1 and s.count(".") >= 1:
+            s = s.replace(".", "").replace(",", ".")
+        elif s.count(",") == 1 and s.count(".") == 0:
+            s = s.replace(",", ".")
+        return float(s)
+    except Exception:
+        return float(default)
+
+def safe_int(x, default: int = 0) -> int:
+    try:
+        if x is None:
+            return int(default)
+        try:
+            import numpy as _np
+            if isinstance(x, (_np.integer,)):
+                return int(x)
+        except Exception:
+            pass
+        if isinstance(x, int):
+            return int(x)
+        s = str(x).strip()
+        if s == "" or s.lower() in ("none", "nan", "null"):
+            return int(default)
+        return int(float(s.replace(",", ".")))
+    except Exception:
+        return int(default)
+
+
+# -----------------------------
+# Minimal CSV loaders used by 15Y impact endpoints
+# -----------------------------
+
+@_stage("loaders")  # re-reads the CSV on every call; no cache to count
+def load_parcels_csv() -> pd.DataFrame:
+    """Load legacy per-parcel baseline summary.
+
+    Expected: data/parsel_su_kar_ozet.csv
+    Must provide columns:
+      - parsel_id (string)
+      - alan_da (float)
+      - mevcut_su_m3 (float)
+      - mevcut_kar_tl (float)
+    If columns are missing, we try to infer/rename common alternatives.
+    """
+    path = DATA_DIR / "parsel_su_kar_ozet.csv"
+    if not path.exists():
+        return pd.DataFrame(columns=["parsel_id", "alan_da", "mevcut_su_m3", "mevcut_kar_tl"])
+    df = pd.read_csv(path)
+    df = df.copy()
+    # Normalize column names
+    cols = {c.lower().strip(): c for c in df.columns}
+    # id
+    if "parsel_id" not in df.columns:
+        if "parcel_id" in df.columns:
+            df["parsel_id"] = df["parcel_id"]
+        elif "id" in df.columns:
+            df["parsel_id"] = df["id"]
+        elif "parsel" in df.columns:
+            df["parsel_id"] = df["parsel"]
+    # area
+    if "alan_da" not in df.columns:
+        if "area_da" in df.columns:
+            df["alan_da"] = df["area_da"]
+        elif "alan" in df.columns:
+            df["alan_da"] = df["alan"]
+    # baseline water
+    if "mevcut_su_m3" not in df.columns:
+        for cand in ("water_m3", "su_m3", "yillik_su_m3", "water"):
+            if cand in df.columns:
+                df["mevcut_su_m3"] = df[cand]
+                break
+    # baseline profit
+    if "mevcut_kar_tl" not in df.columns:
+        for cand in ("profit_tl", "kar_tl", "yillik_kar_tl", "profit"):
+            if cand in df.columns:
+                df["mevcut_kar_tl"] = df[cand]
+                break
+
+    # Type normalize
+    if "parsel_id" in df.columns:
+        df["parsel_id"] = df["parsel_id"].astype(str).str.strip()
+    for c in ("alan_da", "mevcut_su_m3", "mevcut_kar_tl"):
+        if c in df.columns:
+            df[c] = df[c].apply(lambda x: safe_float(x, 0.0))
+        else:
+            df[c] = 0.0
+
+    return df[["parsel_id", "alan_da", "mevcut_su_m3", "mevcut_kar_tl"]].copy()
+
+
+@_stage("loaders")  # re-reads the CSV on every call; no cache to count
+def load_crops_csv() -> pd.DataFrame:
+    """Load crop parameter table used for water and profit calculations.
+
+    Primary expected: data/urun_parametreleri_demo.csv
+    Fallback: data/enhanced_dataset/csv/crop_params_assumed.csv
+
+    Required columns:
+      - urun_adi
+      - su_tuketimi_m3_da
+      - beklenen_verim_kg_da (optional for profit)
+      - fiyat_tl_kg (optional for profit)
+      - maliyet_tl_da (optional for profit)
+    """
+    primary = DATA_DIR / "urun_parametreleri_demo.csv"
+    fallback = DATA_DIR / "enhanced_dataset" / "csv" / "crop_params_assumed.csv"
+    path = primary if primary.exists() else fallback
+    if not path.exists():
+        return pd.DataFrame(columns=[
+            "urun_adi",
+            "su_tuketimi_m3_da",
+            "beklenen_verim_kg_da",
+            "fiyat_tl_kg",
+            "maliyet_tl_da",
+        ])
+    df = pd.read_csv(path)
+    df = df.copy()
+    # Normalize common alternative headers
+    if "urun_adi" not in df.columns:
+        for cand in ("crop", "crop_name", "urun", "name"):
+            if cand in df.columns:
+                df["urun_adi"] = df[cand]
+                break
+    if "su_tuketimi_m3_da" not in df.columns:
+        for cand in ("water_m3_da", "su_m3_da", "water_per_da"):
+            if cand in df.columns:
+                df["su_tuketimi_m3_da"] = df[cand]
+                break
+    for need in ("beklenen_verim_kg_da", "fiyat_tl_kg", "maliyet_tl_da"):
+        if need not in df.columns:
+            # common aliases
+            alias_map = {
+                "beklenen_verim_kg_da": ("yield_kg_da", "verim_kg_da"),
+                "fiyat_tl_kg": ("price_tl_kg", "fiyat"),
+                "maliyet_tl_da": ("cost_tl_da", "maliyet"),
+            }
+            for cand in alias_map.get(need, ( )):
+                if cand in df.columns:
+                    df[need] = df[cand]
+                    break
+        if need not in df.columns:
+            df[need] = 0.0
+
+    df["urun_adi"] = df["urun_adi"].astype(str)
+    for c in ("su_tuketimi_m3_da", "beklenen_verim_kg_da", "fiyat_tl_kg", "maliyet_tl_da"):
+        df[c] = df[c].apply(lambda x: safe_float(x, 0.0))
+    return df[["urun_adi", "su_tuketimi_m3_da", "beklenen_verim_kg_da", "fiyat_tl_kg", "maliyet_tl_da"]].copy()
+
+
+def load_area_overrides() -> Dict[str, Dict[str, float]]:
+    """Optional parcel area overrides derived from GeoJSON area calculations.
+
+    Expected file: data/excel_derived/parcel_area_overrides.csv
+    Columns: parcel_id, geojson_file_no, area_m2, area_da, area_ha
+    """
+    key = "area_overrides"
+    if key in _cache:
+        return _cache[key]
+
+    path = DATA_DIR / "excel_derived" / "parcel_area_overrides.csv"
+    out: Dict[str, Dict[str, float]] = {}
+    if path.exists():
+        try:
+            df = pd.read_csv(path)
+            if "parcel_id" in df.columns:
+                df["parcel_id"] = df["parcel_id"].astype(str).str.strip()
+                for _, r in df.iterrows():
+                    pid = str(r.get("parcel_id","")).strip()
+                    if not pid:
+                        continue
+                    # Be tolerant to Turkish/European numeric formats (e.g. "46.799,5")
+                    out[pid] = {
+                        "geojson_file_no": safe_float(r.get("geojson_file_no", 0), 0.0),
+                        "area_m2": safe_float(r.get("area_m2", 0), 0.0),
+                        "area_da": safe_float(r.get("area_da", 0), 0.0),
+                        "area_ha": safe_float(r.get("area_ha", 0), 0.0),
+                    }
+        except Exception:
+            out = {}
+    _cache[key] = out
+    return out
+
+def normalize_crop_key(name: str) -> str:
+    s = (name or "").strip().upper()
+    # Turkish -> ASCII-like
+    tr_map = str.maketrans({"Ç":"C","Ğ":"G","İ":"I","Ö":"O","Ş":"S","Ü":"U","Â":"A","Û":"U","Î":"I",
+                            "ç":"C","ğ":"G","ı":"I","ö":"O","ş":"S","ü":"U"})
+    s = s.translate(tr_map)
+    for ch in ["-", ".", ",", "(", ")", "[", "]", "{", "}", "/"]:
+        s = s.replace(ch, " ")
+    s = "_".join([p for p in s.split() if p])
+    return s
+
+
+
+# Global key for fallow (NADAS). This is always allowed so the solver never needs to fabricate extreme water values.
+FALLOW = normalize_crop_key('NADAS')
+
+# -----------------------------------------------------------------------------
+# Profit realism (thesis-friendly safeguards)
+# -----------------------------------------------------------------------------
+# Some economic inputs in this demo are assumed / user-generated. Without
+# safeguards, a few "high margin" crops can dominate the optimizer and produce
+# implausibly high basin-level net profits. To keep recommendations defendable,
+# we apply conservative caps and risk discounts on *net profit per da*.
+
+def _is_rainfed_crop(crop_key: str) -> bool:
+    ck = str(crop_key or '').upper()
+    return ck.endswith('_KURU') or ('KURU' in ck and not ck.startswith('KURU_'))
+
+
+def _realistic_profit_per_da(crop_key: str, profit_per_da: float) -> float:
+    """Clamp/discount profit per da to avoid unrealistic outputs.
+
+    Notes:
+      - This is intentionally conservative. The goal is to show *water saving with
+        acceptable profit*, not to maximize theoretical income from assumed prices.
+      - Caps are on NET profit (after variable costs) per da.
+    """
+    try:
+        v = float(profit_per_da)
+    except Exception:
+        return 0.0
+    if not np.isfinite(v):
+        return 0.0
+    if v < 0:
+        return 0.0
+
+    ck = normalize_crop_key(crop_key)
+
+    # Base caps (TL/da) — conservative to keep thesis outputs defendable.
+    # These represent *net* profit per decare and already embed a risk discount.
+    cap_default = 8000.0
+    cap_rainfed = 4500.0
+
+    # Global risk/uncertainty discount (assumed prices, yield variability, fixed costs not modeled).
+    # This keeps basin-level totals from inflating unrealistically.
+    v *= 0.55
+
+    # Heuristic crop group handling
+    if _is_rainfed_crop(ck):
+        cap = cap_rainfed
+        # rainfed income is also more volatile
+        v *= 0.90
+    else:
+        cap = cap_default
+
+    # Vegetables / niche crops tend to have higher margins but also higher risk.
+    # We keep a slightly higher cap yet apply a stronger discount.
+    veg_markers = ('BIBER', 'DOMATES', 'MARUL', 'ISPANAK', 'SOGAN', 'KABAK', 'KARPUZ', 'KAVUN')
+    if any(m in ck for m in veg_markers):
+        cap = max(cap, 9500.0)
+        v *= 0.85
+
+    # Strong discount if per-da profit is extreme (likely from assumed prices)
+    if v > 6500.0:
+        v *= 0.85
+
+    return float(min(v, cap))
+
+
+def _apply_profit_realism(R: np.ndarray, crop_list: List[str]) -> np.ndarray:
+    """Apply realism transform to a (P x C) profit matrix."""
+    try:
+        out = R.copy()
+        for j, ck in enumerate(crop_list):
+            if normalize_crop_key(ck) == FALLOW:
+                continue
+            col = out[:, j]
+            # vectorize via np.frompyfunc-like loop for clarity
+            for i in range(col.shape[0]):
+                if np.isfinite(col[i]):
+                    col[i] = _realistic_profit_per_da(ck, float(col[i]))
+            out[:, j] = col
+        return out
+    except Exception:
+        return R
+
+# -----------------------------
+# Crop metadata helpers (family + suitability)
+# -----------------------------
+
+
+def normalize_crop_name(name: str) -> str:
+    """Backward-compatible alias used by some parts of the codebase.
+
+    We standardize crop keys with normalize_crop_key(). Keeping this alias avoids
+    NameError if older code paths still call normalize_crop_name().
+    """
+    return normalize_crop_key(name)
+
+def load_crop_family_map() -> Dict[str, str]:
+    """Map normalized crop_key -> crop_family."""
+    key = "crop_family_map"
+    if key in _cache:
+        return _cache[key]
+    path = DATA_DIR / "enhanced_dataset" / "csv" / "crop_family_map.csv"
+    m: Dict[str, str] = {}
+    if path.exists():
+        try:
+            df = pd.read_csv(path)
+            if "crop" in df.columns and "crop_family" in df.columns:
+                for _, r in df.iterrows():
+                    ck = normalize_crop_key(str(r.get("crop","")))
+                    fam = str(r.get("crop_family","") or "").strip().lower()
+                    if ck:
+                        m[ck] = fam
+        except Exception:
+            m = {}
+    # Ensure a universal fallow option exists.
+    # Using a distinct family avoids rotation-rule dead-ends.
+    m.setdefault(normalize_crop_key("NADAS"), "fallow")
+    _cache[key] = m
+    return m
+
+
+
+def load_crop_irrigation_map() -> Dict[str, Dict[str, Any]]:
+    """Load crop -> irrigation method mapping from data/crop_irrigation_map.json."""
+    key = "crop_irrigation_map"
+    if key in _cache:
+        return _cache[key]
+    path = DATA_DIR / "crop_irrigation_map.json"
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        if path.exists():
+            out = load_json(path) or {}
+    except Exception:
+        out = {}
+    # Normalize keys so lookups work even if crop names differ in punctuation/case.
+    # We keep both raw keys and normalized keys pointing to the same mapping.
+    try:
+        normed: Dict[str, Dict[str, Any]] = {}
+        for k, v in (out or {}).items():
+            if not isinstance(v, dict):
+                continue
+            nk = normalize_crop_key(str(k))
+            if nk and nk not in out and nk not in normed:
+                normed[nk] = v
+        # also allow fallow key
+        normed.setdefault(normalize_crop_key("NADAS"), {"current": "fallow", "recommended": "fallow"})
+        out.update(normed)
+    except Exception:
+        pass
+    _cache[key] = out
+    return out
+
+
+def load_irrigation_methods() -> Dict[str, Dict[str, Any]]:
+    """Load irrigation method efficiencies from enhanced_dataset/csv/irrigation_methods_assumed.csv."""
+    key = "irrigation_methods_map"
+    if key in _cache:
+        return _cache[key]
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        frames = load_enhanced_frames()
+        df = frames.get("irrigation_methods")
+        if df is not None and len(df) > 0:
+            cols = list(df.columns)
+            for _, r in df.iterrows():
+                mth = str(r.get("method","")).strip()
+                if not mth:
+                    continue
+                rec = {}
+                for c in cols:
+                    if c == "method":
+                        continue
+                    rec[c] = r.get(c)
+                out[mth] = rec
+    except Exception:
+        out = {}
+    # Normalize keys so lookups work even if crop names differ in punctuation/case.
+    # We keep both raw keys and normalized keys pointing to the same mapping.
+    try:
+        normed: Dict[str, Dict[str, Any]] = {}
+        for k, v in (out or {}).items():
+            if not isinstance(v, dict):
+                continue
+            nk = normalize_crop_key(str(k))
+            if nk and nk not in out and nk not in normed:
+                normed[nk] = v
+        # also allow fallow key
+        normed.setdefault(normalize_crop_key("NADAS"), {"current": "fallow", "recommended": "fallow"})
+        out.update(normed)
+    except Exception:
+        pass
+    _cache[key] = out
+    return out
+
+def load_crop_suitability_map() -> Dict[Tuple[str, str], float]:
+    """Map (land_capability_class, crop_key) -> suitability_score (0..1)."""
+    key = "crop_suitability_map"
+    if key in _cache:
+        return _cache[key]
+    path = DATA_DIR / "enhanced_dataset" / "csv" / "crop_suitability_assumed.csv"
+    m: Dict[Tuple[str, str], float] = {}
+    if path.exists():
+        try:
+            df = pd.read_csv(path)
+            for _, r in df.iterrows():
+                lcc = str(r.get("land_capability_class","") or "").strip().upper()
+                ck = normalize_crop_key(str(r.get("crop","")))
+                sc = safe_float(r.get("suitability_score_assumed", 0.85), 0.85)
+                if lcc and ck:
+                    m[(lcc, ck)] = float(max(0.0, min(1.0, sc)))
+        except Exception:
+            m = {}
+    _cache[key] = m
+    return m
+
+
+@_loader("rotation_rules")
+def load_rotation_rules() -> pd.DataFrame:
+    """Load default crop rotation rules table (CSV)."""
+    key = "rotation_rules"
+    if key in _cache:
+        return _cache[key]
+    path = DATA_DIR / "enhanced_dataset" / "csv" / "rotation_rules_default.csv"
+    if path.exists():
+        try:
+            df = pd.read_csv(path)
+            _cache[key] = df
+            return df
+        except Exception:
+            pass
+    df = pd.DataFrame(columns=["rule_id","type","from_family","to_family","min_year_gap","penalty_weight","note"])
+    _cache[key] = df
+    return df
+
+LEGUME_FAMILIES = {"fabaceae", "leguminosae"}
+
+# -----------------------------
+# Portfolio constraints (project-critical)
+# -----------------------------
+
+def _unique_crop_penalty(chosen_keys: List[str], min_unique: int, penalty_weight: float = 5e8) -> float:
+    """Penalty if the plan uses fewer than min_unique different crops (excluding fallow)."""
+    keys = [k for k in chosen_keys if k and k != FALLOW]
+    uniq = len(set(keys))
+    if min_unique <= 1:
+        return 0.0
+    if uniq >= min_unique:
+        return 0.0
+    gap = (min_unique - uniq)
+    return float(gap) * float(penalty_weight)
+
+def _max_share_penalty(chosen_keys: List[str], areas: np.ndarray, max_share: Optional[float], penalty_weight: float = 5e8) -> float:
+    """Penalty if any single crop exceeds max_share of total area (excluding fallow)."""
+    if max_share is None:
+        return 0.0
+    ms = float(max_share)
+    if not (0.05 < ms < 1.0):
+        return 0.0
+    total_area = float(np.sum(areas)) if np.sum(areas) > 0 else 1.0
+    by = {}
+    for k,a in zip(chosen_keys, areas.tolist()):
+        if not k or k == FALLOW:
+            continue
+        by[k] = by.get(k, 0.0) + float(a)
+    pen = 0.0
+    for k, a in by.items():
+        sh = float(a) / total_area
+        if sh > ms:
+            pen += ((sh - ms) / max(1e-6, ms)) ** 2 * float(penalty_weight)
+    return float(pen)
+
+def _prev_year_family_map(year: int) -> Dict[str, str]:
+    """Infer previous-year primary crop family per parcel from enhanced seasons table."""
+    yprev = int(year) - 1
+    key = f"prev_family::{yprev}"
+    if key in _cache:
+        return _cache[key]
+    sub = seasons_for_year("s1", yprev)
+    if sub.empty or "crop_key" not in sub.columns:
+        _cache[key] = {}
+        return _cache[key]
+    fam = load_crop_family_map()
+    out = {}
+    for pid, g in sub.groupby("parcel_id"):
+        try:
+            ck = g["crop_key"].mode().iloc[0]
+        except Exception:
+            ck = ""
+        out[str(pid)] = fam.get(str(ck), "other")
+    _cache[key] = out
+    return out
+
+def _prev_family_penalty(parcel_ids: List[str], chosen_keys: List[str], year: int, weight: float = 2e8) -> float:
+    """Soft penalty: avoid repeating the previous year's primary crop family."""
+    prev = _prev_year_family_map(year)
+    fam = load_crop_family_map()
+    pen = 0.0
+    for pid, ck in zip(parcel_ids, chosen_keys):
+        if not ck or ck == FALLOW:
+            continue
+        pf = prev.get(str(pid))
+        if not pf:
+            continue
+        cf = fam.get(str(ck), "other")
+        if cf and pf and cf == pf:
+            pen += float(weight)
+    return float(pen)
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8", errors="replace")
+
+def load_json(path: Path) -> Any:
+    key = f"json::{path}"
+    if key in _cache:
+        return _cache[key]
+    obj = json.loads(_read_text(path))
+    _cache[key] = obj
+    return obj
+
+
+
+@_loader("parcels")
+def load_parcels() -> List[Dict[str, Any]]:
+    """
+    Loads parcel metadata by MERGING:
+      - Enhanced assumptions: data/enhanced_dataset/csv/parcel_assumptions.csv
+        (soil codes, village, irrigation efficiency, lat/lon in lat_deg/lon_deg)
+      - Legacy parcel summary: data/parsel_su_kar_ozet.csv
+        (area_da, baseline water/profit, district, lat/lon)
+
+    If a value is missing in the enhanced file, we fill from legacy.
+    If area_da is still missing, we infer it from the seasonal tables.
+    """
+    key = "parcels"
+    if key in _cache:
+        return _cache[key]
+
+    
+    # GeoJSON-derived parcel area overrides (optional)
+    overrides = load_area_overrides()
+
+    enhanced_csv = DATA_DIR / "enhanced_dataset" / "csv" / "parcel_assumptions.csv"
+    legacy_csv = DATA_DIR / "parsel_su_kar_ozet.csv"
+
+    df_enh = pd.read_csv(enhanced_csv) if enhanced_csv.exists() else pd.DataFrame()
+    # normalize ids
+    if not df_enh.empty:
+        df_enh["parcel_id"] = df_enh["parcel_id"].astype(str).str.strip()
+        # unify lat/lon
+        if "lat_deg" in df_enh.columns and "lat" not in df_enh.columns:
+            df_enh["lat"] = df_enh["lat_deg"]
+        if "lon_deg" in df_enh.columns and "lon" not in df_enh.columns:
+            df_enh["lon"] = df_enh["lon_deg"]
+
+    df_leg = pd.read_csv(legacy_csv) if legacy_csv.exists() else pd.DataFrame()
+    if not df_leg.empty:
+        df_leg["parsel_id"] = df_leg["parsel_id"].astype(str).str.strip()
+        # rename to common
+        df_leg = df_leg.rename(columns={
+            "parsel_id":"parcel_id",
+            "alan_da":"area_da",
+            "mevcut_su_m3":"water_m3",
+            "mevcut_kar_tl":"profit_tl",
+            "koy":"village",
+            "ilce":"district",
+        })
+
+    # Merge
+    if not df_enh.empty and not df_leg.empty:
+        df = pd.merge(df_enh, df_leg, on="parcel_id", how="outer", suffixes=("_enh","_leg"))
+    elif not df_enh.empty:
+        df = df_enh.copy()
+    elif not df_leg.empty:
+        df = df_leg.copy()
+    else:
+        _cache[key] = []
+        return _cache[key]
+
+    # Infer area from seasons if needed
+    try:
+        seasons = seasons_for_year("both")
+        area_map = seasons.groupby("parcel_id")["area_da"].max().to_dict()
+    except Exception:
+        area_map = {}
+
+    # GeoJSON-derived area overrides (computed externally)
+
+    parcels: List[Dict[str, Any]] = []
+    missing_base: List[int] = []
+    for _, r in df.iterrows():
+        pid = str(r.get("parcel_id","") or "").strip()
+        if not pid:
+            continue
+
+        # resolve values with fallbacks
+        name = str(r.get("name","") or "").strip() or pid
+        village = str(r.get("village","") or r.get("village_enh","") or r.get("village_leg","") or "").strip()
+        district = str(r.get("district","") or r.get("district_enh","") or r.get("district_leg","") or "").strip()
+
+        # area (da) - prefer GeoJSON-derived override if present
+        area_da = safe_float(r.get("area_da", 0), 0.0)
+        # from seasonal tables if missing
+        if area_da <= 0 and pid in area_map:
+            area_da = safe_float(area_map.get(pid, 0), 0.0)
+        # override from GeoJSON calc (most reliable for this UI)
+        if pid in overrides and safe_float(overrides[pid].get("area_da", 0), 0.0) > 0:
+            area_da = safe_float(overrides[pid].get("area_da", 0), area_da)
+
+        # lat/lon: prefer legacy if zeros
+        lat = safe_float(r.get("lat", 0), 0.0)
+        lon = safe_float(r.get("lon", 0), 0.0)
+        if (lat == 0 or lon == 0):
+            lat2 = r.get("lat_leg", None) if "lat_leg" in df.columns else None
+            lon2 = r.get("lon_leg", None) if "lon_leg" in df.columns else None
+            if lat2 is not None and lon2 is not None:
+                try:
+                    lat = float(lat2); lon = float(lon2)
+                except Exception:
+                    pass
+
+        # baseline water/profit
+        water_m3 = float(r.get("water_m3", 0) or 0)
+        profit_tl = float(r.get("profit_tl", 0) or 0)
+
+        # --- Data hygiene ---
+        # Legacy summaries or external edits may introduce negative placeholders.
+        # For the decision-support dashboard, we treat negative baseline water/profit as missing
+        # and recompute a conservative baseline from candidate medians.
+        if water_m3 < 0:
+            water_m3 = 0.0
+        if profit_tl < 0:
+            profit_tl = 0.0
+
+        # --- Scale sanity checks ---
+        # Some legacy parcel summaries contain water/profit values that are orders
+        # of magnitude smaller than what the seasonal/crop intensity tables imply.
+        # This breaks scenario comparisons ("Su tasarruf" appears to increase water).
+        # If intensities look implausibly low/high, treat them as missing and rebuild
+        # a conservative baseline from candidate matrices.
+        if area_da > 0:
+            wpd = water_m3 / area_da if water_m3 > 0 else 0.0
+            ppd = profit_tl / area_da if profit_tl > 0 else 0.0
+            # Typical annual delivered irrigation demand in this demo ranges roughly
+            # ~100–2000 m3/da depending on crop + method. Below 60 is almost certainly wrong.
+            if (wpd > 0 and wpd < 60) or (wpd > 6000):
+                water_m3 = 0.0
+            # Profit intensity sanity: below 200 TL/da is unlikely for the catalog here.
+            if (ppd > 0 and ppd < 200) or (ppd > 200000):
+                profit_tl = 0.0
+
+        # If still missing, estimate from median intensities (filled below, one matrix for all)
+        if (water_m3 <= 0 or profit_tl <= 0) and area_da > 0:
+            missing_base.append(len(parcels))
+
+        soil_class = str(r.get("land_capability_class", "") or r.get("soil_class","") or "").strip()
+        soil_texture = str(r.get("soil_group","") or r.get("soil_texture","") or "").strip()
+        erosion = str(r.get("erosion_risk","") or r.get("erosion","") or "").strip()
+
+        parcels.append({
+            "id": pid,
+            "name": name,
+            "village": village,
+            "district": district,
+            "area_da": float(area_da),
+            "area_m2": float(overrides.get(pid, {}).get("area_m2", 0) or 0),
+            "geojson_file_no": int(overrides.get(pid, {}).get("geojson_file_no", 0) or 0),
+            "lat": float(lat),
+            "lon": float(lon),
+            "water_m3": float(water_m3),
+            "profit_tl": float(profit_tl),
+            "soil": {"class": soil_class, "texture": soil_texture, "erosion": erosion}
+        })
+
+    # Baselines still missing: median intensity across crops. Matrix rows do not depend on the
+    # rest of the selection, so one build replaces a per-parcel build (O(P) table scans each).
+    if missing_base:
+        try:
+            crop_list, W, R = build_candidate_matrix([{"id": parcels[i]["id"], "name": parcels[i]["id"],
+                                                        "area_da": parcels[i]["area_da"], "water_m3": 0, "profit_tl": 0}
+                                                       for i in missing_base])
+            for row, i in enumerate(missing_base):
+                p = parcels[i]
+                if p["water_m3"] <= 0:
+                    p["water_m3"] = p["area_da"] * float(np.median(W[row, :]))
+                if p["profit_tl"] <= 0:
+                    p["profit_tl"] = p["area_da"] * float(np.median(R[row, :]))
+        except Exception:
+            pass
+
+    # If some parcels still have lat/lon missing, assign them on a grid around the mean
+    lats = [p["lat"] for p in parcels if p["lat"]!=0]
+    lons = [p["lon"] for p in parcels if p["lon"]!=0]
+    if lats and lons:
+        clat = float(sum(lats)/len(lats)); clon = float(sum(lons)/len(lons))
+    else:
+        clat, clon = 37.97, 34.68
+    missing = [p for p in parcels if p["lat"]==0 or p["lon"]==0]
+    if missing:
+        step = 0.01
+        for k,p in enumerate(missing):
+            p["lat"] = clat + (k//5)*step
+            p["lon"] = clon + (k%5)*step
+
+    parcels = sorted(parcels, key=lambda x: x["id"])
+    _cache[key] = parcels
+    return _cache[key]
+
+
+
+
+@_loader("crop_catalog")
+def load_crop_catalog() -> Dict[str, Dict[str, Any]]:
+    """Load per-crop agronomic & economic parameters from CSV.
+
+    Data-driven requirement: values MUST come from file, not hardcoded.
+
+    Expected columns (either ; or ,):
+      urun_adi, su_tuketimi_m3_da, beklenen_verim_kg_da, fiyat_tl_kg,
+      degisken_maliyet_tl_da, net_kar_tl_da, kategori
+
+    Returns dict keyed by normalized crop name.
+    """
+    key = "crop_catalog"
+    if key in _cache:
+        return _cache[key]
+
+    path = DATA_DIR / "urun_parametreleri_demo.csv"
+    if not path.exists():
+        _cache[key] = {}
+        return _cache[key]
+
+    # delimiter auto-detect (; or ,)
+    first = path.read_text(encoding="utf-8", errors="replace").splitlines()[0]
+    sep = ";" if (";" in first and "," not in first) else ","
+
+    try:
+        df = pd.read_csv(path, sep=sep)
+    except Exception:
+        df = pd.read_csv(path, sep=sep, engine="python")
+
+    # If the CSV contains 0 water for rainfed ("*_KURU") crops or fallow, the UI shows 0 m³ which
+    # users interpret as a bug. We therefore apply conservative non-zero fallbacks when water==0.
+    # You can calibrate these later with ET0/Kc or local agronomy sources.
+    nonzero_water_fallback_m3_da = {
+        normalize_crop_name("ARPA_KURU"): 220.0,
+        normalize_crop_name("BUGDAY_KURU"): 250.0,
+        normalize_crop_name("NOHUT_KURU"): 180.0,
+        normalize_crop_name("MERCIMEK_KURU"): 160.0,
+        normalize_crop_name("NADAS"): 50.0,
+    }
+
+    cat: Dict[str, Dict[str, Any]] = {}
+    for _, r in df.iterrows():
+        name = str(r.get("urun_adi", "") or r.get("urun", "") or r.get("name", "")).strip()
+        if not name:
+            continue
+        nk = normalize_crop_name(name)
+        wpd = float(r.get("su_tuketimi_m3_da", 0) or 0)
+        if (not np.isfinite(wpd)) or (wpd <= 0):
+            wpd = float(nonzero_water_fallback_m3_da.get(nk, wpd) or 0)
+
+        # Profit per da: prefer explicit net_kar_tl_da; otherwise derive from yield*price - cost.
+        try:
+            ppd = float(r.get("net_kar_tl_da", 0) or 0)
+        except Exception:
+            ppd = 0.0
+        if (not np.isfinite(ppd)) or (ppd <= 0):
+            try:
+                yld = float(r.get("beklenen_verim_kg_da", 0) or 0)
+                price = float(r.get("fiyat_tl_kg", 0) or 0)
+                cost = float(r.get("degisken_maliyet_tl_da", 0) or 0)
+                derived = yld * price - cost
+                if np.isfinite(derived) and derived > 0:
+                    ppd = float(derived)
+            except Exception:
+                pass
+
+        # If still missing/zero, use conservative category/keyword defaults so the UI doesn't show 0 TL/da.
+        # These are intentionally modest and should be replaced with calibrated local economics.
+        if (not np.isfinite(ppd)) or (ppd <= 0):
+            ck = normalize_crop_name(name)
+            if ck == normalize_crop_name("NADAS"):
+                ppd = 0.0
+            elif _is_rainfed_crop(ck):
+                ppd = 2500.0
+            else:
+                veg_markers = ('BIBER', 'DOMATES', 'MARUL', 'ISPANAK', 'SOGAN', 'KABAK', 'KARPUZ', 'KAVUN')
+                if any(m in ck for m in veg_markers):
+                    ppd = 4500.0
+                elif any(m in ck for m in ("NOHUT","MERCIMEK","FASULYE")):
+                    ppd = 3500.0
+                else:
+                    ppd = 3000.0
+
+        # Apply the same realism caps/discounts used by the optimizer.
+        try:
+            if normalize_crop_key(nk) != FALLOW:
+                ppd = _realistic_profit_per_da(nk, ppd)
+        except Exception:
+            pass
+
+        cat[nk] = {
+            "name": name,
+            # canonical keys used across the app/UI
+            "waterPerDa": wpd,
+            "profitPerDa": float(ppd),
+
+            # detailed economics (kept for transparency)
+            "yieldKgPerDa": float(r.get("beklenen_verim_kg_da", 0) or 0),
+            "priceTlPerKg": float(r.get("fiyat_tl_kg", 0) or 0),
+            "varCostTlPerDa": float(r.get("degisken_maliyet_tl_da", 0) or 0),
+            "netProfitTlPerDa": float(r.get("net_kar_tl_da", 0) or 0),
+
+            "category": str(r.get("kategori", "") or "").strip(),
+        }
+
+    _cache[key] = cat
+    return _cache[key]
+
+
+@_loader("s1_crop_calendar_rules")
+def load_s1_crop_calendar_rules() -> dict:
+    """Load Senaryo-1 primary->secondary crop calendar & current irrigation rules from disk.
+
+    Project requirement: **data-driven** (no hardcoded lists). This function reads:
+      data/s1_crop_calendar_rules.json
+    and builds small derived lookup maps for season/irrigation text.
+    """
+    key = "s1_crop_calendar_rules"
+    if key in _cache:
+        return _cache[key]
+
+    rules_path = (DATA_DIR / "s1_crop_calendar_rules.json")
+    rules = {}
+    err = None
+    try:
+        if rules_path.exists():
+            rules = json.loads(rules_path.read_text(encoding="utf-8"))
+        else:
+            err = f"rules file missing: {rules_path}" 
+    except Exception as e:
+        err = f"failed to read rules: {e}" 
+        rules = {}
+
+    # Normalize rule crop names to match catalog (handles shorthand like 'Fiğ' vs 'Fiğ (Yeşilot)')
+    _aliases = {
+        'Fiğ': 'Fiğ (Yeşilot)',
+        'Ayçiçeği (Yağlık)': 'Ayçiçeği',
+        'Ayçiçeği (Yağlık )': 'Ayçiçeği',
+        'Yem Bezelyesi': 'Yem Bezelyesi',
+    }
+    if isinstance(rules, dict) and rules:
+        new_rules = {}
+        for pk, pv in rules.items():
+            nk = _aliases.get(pk, pk)
+            if isinstance(pv, dict):
+                opts = pv.get('secondary_options') or []
+                pv = dict(pv)
+                pv['secondary_options'] = [_aliases.get(o, o) for o in opts]
+            new_rules[nk] = pv
+        rules = new_rules
+    # Build derived maps for quick lookup
+    season_map = {}
+    irr_current_text_map = {}
+    for p, v in (rules or {}).items():
+        if not isinstance(v, dict):
+            continue
+        season_map[p] = v.get("season1") or ""
+        irr_current_text_map[p] = v.get("irrigation1_current") or ""
+        for s in (v.get("secondary_options") or []):
+            if s not in season_map:
+                season_map[s] = v.get("season2") or ""
+            if s not in irr_current_text_map:
+                irr_current_text_map[s] = v.get("irrigation2_current") or ""
+
+    rules["_derived"] = {
+        "season_map": season_map,
+        "irr_current_text_map": irr_current_text_map,
+        "_rules_file": str(rules_path),
+        "_rules_file_exists": bool(rules_path.exists()),
+        "_rules_file_error": err,
+        "_primary_count": int(len([k for k in rules.keys() if k != '_derived'])),
+    }
+
+    _cache[key] = rules
+    return rules
+
+
+    path = DATA_DIR / "urun_parametreleri_demo.csv"
+    if not path.exists():
+        _cache[key] = {}
+        return _cache[key]
+
+        # delimiter auto-detect (; or ,)
+    first = path.read_text(encoding="utf-8", errors="replace").splitlines()[0]
+    sep = ";" if (";" in first and "," not in first) else ","
+    df = pd.read_csv(path, sep=sep)
+    cat: Dict[str, Dict[str, Any]] = {}
+    for _, r in df.iterrows():
+        name = str(r.get("urun_adi", "") or r.get("urun", "") or r.get("name", "")).strip()
+        if not name:
+            continue
+        k = normalize_crop_key(name)
+        water_per_da = float(r.get("su_tuketimi_m3_da", 0) or 0)
+        # net kar öncelikli; yoksa verim*fiyat - maliyet
+        if pd.notna(r.get("net_kar_tl_da", None)):
+            profit_per_da = float(r.get("net_kar_tl_da", 0) or 0)
+        else:
+            yld = float(r.get("beklenen_verim_kg_da", 0) or 0)
+            price = float(r.get("fiyat_tl_kg", 0) or 0)
+            cost = float(r.get("degisken_maliyet_tl_da", 0) or 0)
+            profit_per_da = yld * price - cost
+
+        cat[k] = {
+            "name": name.upper(),
+            "waterPerDa": water_per_da,
+            "profitPerDa": profit_per_da,
+            "category": str(r.get("kategori", "") or "").strip(),
+        }
+
+    _cache[key] = cat
+    return cat
+
+def merged_pattern_candidates(village: str, district: str, top_n: int = 12) -> List[Tuple[str, float]]:
+    """
+    Returns candidate crops with weights from village/district patterns (JSON).
+
+    Supports two JSON shapes:
+      A) {"CROP": share, ...}
+      B) {"top_crops":[{"crop":"PATATES","share":0.12}, ...], ...}
+    """
+    village_path = DATA_DIR / "village_crop_patterns.json"
+    district_path = DATA_DIR / "district_crop_patterns.json"
+    village_obj = load_json(village_path) if village_path.exists() else {}
+    district_obj = load_json(district_path) if district_path.exists() else {}
+
+    def _norm_key(s: str) -> str:
+        return normalize_crop_key(s)
+
+    vkey = _norm_key(village)
+    dkey = _norm_key(district)
+
+    merged: Dict[str, float] = {}
+
+    def _add_from(src: Any, weight: float) -> None:
+        if not src:
+            return
+        # Shape B
+        if isinstance(src, dict) and isinstance(src.get("top_crops", None), list):
+            for item in src["top_crops"]:
+                try:
+                    ck = _norm_key(item.get("crop", ""))
+                    sh = float(item.get("share", 0) or 0)
+                except Exception:
+                    continue
+                if ck:
+                    merged[ck] = merged.get(ck, 0.0) + weight * sh
+            return
+        # Shape A
+        if isinstance(src, dict):
+            # sometimes nested under "crops"
+            crops = src.get("crops", src)
+            if isinstance(crops, dict):
+                for c, share in crops.items():
+                    ck = _norm_key(c)
+                    if not ck:
+                        continue
+                    try:
+                        merged[ck] = merged.get(ck, 0.0) + weight * float(share)
+                    except Exception:
+                        pass
+
+    _add_from(district_obj.get(dkey, {}), 0.6)
+    _add_from(village_obj.get(vkey, {}), 0.4)
+
+    if not merged:
+        return []
+
+    tot = sum(merged.values()) or 1.0
+    items = [(c, s / tot) for c, s in merged.items()]
+    items.sort(key=lambda x: x[1], reverse=True)
+    return items[:top_n]
+
+def recommend_crop_for_parcel(parcel: Dict[str, Any], algo: str = "GA") -> Optional[Dict[str, Any]]:
+    """
+    Picks ONE crop for the parcel (simple heuristic): among candidate crops,
+    maximize profitPerDa / max(1, waterPerDa), with a slight preference for crops that are common locally.
+
+    This is not a full scientific optimizer; it's a transparent baseline that uses your CSV+JSON data.
+    """
+    catalog = load_crop_catalog()
+    if not catalog:
+        return None
+
+    candidates = merged_pattern_candidates(parcel.get("village",""), parcel.get("district",""))
+    if not candidates:
+        # fallback: all catalog crops
+        candidates = [(k, 1.0/len(catalog)) for k in list(catalog.keys())[:50]]
+
+    best = None
+    best_score = -1e18
+    for crop_name, share in candidates:
+        ck = normalize_crop_key(crop_name)
+        if ck not in catalog:
+            continue
+        c = catalog[ck]
+        w = float(c.get("waterPerDa", 0) or 0)
+        p = float(c.get("profitPerDa", 0) or 0)
+        eff = p / max(1.0, w)
+
+        # algorithm flavour: tweak scoring slightly (keeps deterministic + transparent)
+        if algo.upper() == "ABC":
+            score = 0.85*eff + 0.15*p/10000 + 0.10*share
+        elif algo.upper() == "ACO":
+            score = 0.80*eff + 0.20*share
+        else:  # GA
+            score = 0.90*eff + 0.10*share
+
+        if score > best_score:
+            best_score = score
+            best = {
+                "name": c["name"],
+                "area": parcel.get("area_da", 0),
+                "waterPerDa": w,
+                "profitPerDa": p,
+                "share": share
+            }
+
+    return best
+
+
+# -----------------------------
+# Enhanced dataset loaders
+# -----------------------------
+
+def enhanced_paths() -> Dict[str, Path]:
+    return {
+        "parcels": DATA_DIR / "enhanced_dataset" / "csv" / "parcel_assumptions.csv",
+        "seasons1": DATA_DIR / "enhanced_dataset" / "csv" / "senaryo1_backend_seasons.csv",
+        "seasons2": DATA_DIR / "enhanced_dataset" / "csv" / "senaryo2_backend_seasons.csv",
+        "reservoir": DATA_DIR / "enhanced_dataset" / "csv" / "akkaya_reservoir_monthly_backend.csv",
+        "irrigation_methods": DATA_DIR / "enhanced_dataset" / "csv" / "irrigation_methods_assumed.csv",
+        "delivery": DATA_DIR / "enhanced_dataset" / "csv" / "delivery_capacity_monthly_assumed.csv",
+        # Optional / advanced tables (used by FAO-56 water requirement, suitability, and constraints)
+        "crop_params": DATA_DIR / "enhanced_dataset" / "csv" / "crop_params_assumed.csv",
+        "crop_suitability": DATA_DIR / "enhanced_dataset" / "csv" / "crop_suitability_assumed.csv",
+        "crop_family": DATA_DIR / "enhanced_dataset" / "csv" / "crop_family_map.csv",
+        "monthly_climate": DATA_DIR / "enhanced_dataset" / "csv" / "monthly_climate_all_parcels.csv",
+        "objective_weights": DATA_DIR / "enhanced_dataset" / "csv" / "objective_weight_sets.csv",
+    }
+
+
+@_loader("enhanced_frames_v2")
+def load_enhanced_frames() -> Dict[str, pd.DataFrame]:
+    """Load packaged CSV frames used by the backend.
+
+    Robustness:
+    - Missing optional CSVs should NOT crash the backend.
+    - Optional frames are returned as empty DataFrames when not present.
+    """
+    key = "enhanced_frames_v2"
+    if key in _cache:
+        return _cache[key]
+    p = enhanced_paths()
+    out: Dict[str, pd.DataFrame] = {}
+
+    def _read_csv_safe(path: Path) -> pd.DataFrame:
+        try:
+            if path and Path(path).exists():
+                return pd.read_csv(path)
+        except Exception:
+            pass
+        return pd.DataFrame()
+
+    # Core frames
+    out["parcels"] = _read_csv_safe(p.get("parcels"))
+    out["s1"] = _read_csv_safe(p.get("seasons1"))
+    out["s2"] = _read_csv_safe(p.get("seasons2"))
+    out["reservoir"] = _read_csv_safe(p.get("reservoir"))
+    out["irrigation_methods"] = _read_csv_safe(p.get("irrigation_methods"))
+    out["delivery"] = _read_csv_safe(p.get("delivery"))
+
+    # Optional / advanced frames
+    out["crop_params"] = _read_csv_safe(p.get("crop_params"))
+    out["crop_suitability"] = _read_csv_safe(p.get("crop_suitability"))
+    out["crop_family"] = _read_csv_safe(p.get("crop_family"))
+    out["monthly_climate"] = _read_csv_safe(p.get("monthly_climate"))
+    out["objective_weights"] = _read_csv_safe(p.get("objective_weights"))
+
+    _cache[key] = out
+    return out
+
+
+# -----------------------------
+# Indexed seasons tables
+# -----------------------------
+SEASON_PRIMARY = "primary"
+SEASON_SECONDARY = "secondary"
+
+
+def _normalize_seasons_frame(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Normalize a raw seasons CSV once: int year, stripped ids, crop_key, season_key.
+
+    Rows are stably sorted by (year, parcel_id) so every year (and every parcel inside a
+    year) is a contiguous block; the original row order is kept inside each block.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame() if df is None else df.copy()
+    out = df.copy()
+    if "year" in out.columns:
+        out["year"] = pd.to_numeric(out["year"], errors="coerce")
+        out = out[out["year"].notna()].copy()
+        out["year"] = out["year"].astype(int)
+    if "parcel_id" in out.columns:
+        out["parcel_id"] = out["parcel_id"].astype(str).str.strip()
+    if "crop" in out.columns:
+        crops = out["crop"].astype(str)
+        # normalize each distinct crop string only once
+        keys = {c: normalize_crop_key(c) for c in crops.unique().tolist()}
+        out["crop_key"] = crops.map(keys)
+    if "season" in out.columns:
+        sk = out["season"].astype(str).str.lower().str.strip()
+        sk = sk.mask(sk.str.contains("primary", na=False), SEASON_PRIMARY)
+        sk = sk.mask(sk.str.contains("secondary", na=False), SEASON_SECONDARY)
+        out["season_key"] = sk
+    sort_cols = [c for c in ("year", "parcel_id") if c in out.columns]
+    if sort_cols:
+        out = out.sort_values(sort_cols, kind="mergesort")
+    return out.reset_index(drop=True)
+
+
+def _build_seasons_index(df: pd.DataFrame) -> Dict[str, Any]:
+    """Offset index over a normalized seasons frame: year -> (lo, hi), (year, pid) -> (lo, hi)."""
+    years: Dict[int, Tuple[int, int]] = {}
+    parcels: Dict[Tuple[int, str], Tuple[int, int]] = {}
+    if df.empty or "year" not in df.columns:
+        return {"df": df, "years": years, "parcels": parcels}
+    y = df["year"].to_numpy()
+    pid = df["parcel_id"].to_numpy(dtype=object) if "parcel_id" in df.columns else np.full(len(df), "", dtype=object)
+    n = len(df)
+    brk = np.flatnonzero((y[1:] != y[:-1]) | (pid[1:] != pid[:-1])) + 1
+    starts = np.concatenate(([0], brk))
+    ends = np.concatenate((brk, [n]))
+    for lo, hi in zip(starts.tolist(), ends.tolist()):
+        yy = int(y[lo])
+        parcels[(yy, str(pid[lo]))] = (lo, hi)
+        ylo, _ = years.get(yy, (lo, hi))
+        years[yy] = (ylo, hi)
+    return {"df": df, "years": years, "parcels": parcels}
+
+
+@_loader("seasons_index")
+def load_seasons_index() -> Dict[str, Dict[str, Any]]:
+    """Normalized + offset-indexed seasons tables ('s1', 's2'), built once per process."""
+    key = "seasons_index"
+    if key in _cache:
+        return _cache[key]
+    frames = load_enhanced_frames()
+    out = {k: _build_seasons_index(_normalize_seasons_frame(frames.get(k))) for k in ("s1", "s2")}
+    _cache[key] = out
+    return out
+
+
+def seasons_for_year(source: str, year: Optional[int] = None) -> pd.DataFrame:
+    """Rows of a normalized seasons table for one year ('s1', 's2' or 'both').
+
+    A single-source slice is a positional view into the indexed frame; callers must treat it
+    as read-only. ``year=None`` (or an unparseable year) returns all rows.
+    """
+    if source not in ("s1", "s2"):
+        parts = [seasons_for_year(k, year) for k in ("s1", "s2")]
+        parts = [p for p in parts if len(p.columns)]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    ix = load_seasons_index().get(source) or {}
+    df = ix.get("df", pd.DataFrame())
+    y = safe_int(year, -10**9) if year is not None else None
+    if y is None or y == -10**9 or "year" not in df.columns:
+        return df
+    lo, hi = ix["years"].get(y, (0, 0))
+    return df.iloc[lo:hi]
+
+
+def seasons_for_parcel(source: str, year: int, parcel_id: str) -> pd.DataFrame:
+    """Rows of one (year, parcel) block of a normalized seasons table (read-only view)."""
+    ix = load_seasons_index().get(source) or {}
+    df = ix.get("df", pd.DataFrame())
+    lo, hi = ix.get("parcels", {}).get((int(year), str(parcel_id).strip()), (0, 0))
+    return df.iloc[lo:hi]
+
+
+
+# -----------------------------
+# FAO-56 style water requirement (ET0-Kc) + effective rainfall + monthly breakdown
+# -----------------------------
+
+def _effective_rain_scs_mm(p_mm: float) -> float:
+    """USDA-SCS monthly effective rainfall approximation (mm)."""
+    try:
+        p = float(p_mm or 0.0)
+    except Exception:
+        return 0.0
+    if p <= 0:
+        return 0.0
+    if p <= 250.0:
+        pe = p * (125.0 - 0.2 * p) / 125.0
+    else:
+        pe = 125.0 + 0.1 * p
+    return float(max(0.0, min(p, pe)))
+
+def _kc_curve_daily(total_days: int, kc_ini: float, kc_mid: float, kc_end: float,
+                    p_ini: float, p_dev: float, p_mid: float, p_late: float) -> List[float]:
+    """Build a simple FAO-56 like daily Kc curve using stage proportions.
+    Piecewise-linear: ini (flat kc_ini), dev (kc_ini->kc_mid), mid (flat kc_mid), late (kc_mid->kc_end).
+    """
+    total_days = int(max(1, total_days))
+    # stage lengths
+    def _len(p):
+        return int(round(total_days * float(p)))
+    L_ini, L_dev, L_mid, L_late = _len(p_ini), _len(p_dev), _len(p_mid), _len(p_late)
+    # fix rounding drift
+    drift = total_days - (L_ini + L_dev + L_mid + L_late)
+    L_late = max(0, L_late + drift)
+
+    kc = []
+    kc += [float(kc_ini)] * max(0, L_ini)
+
+    # dev: linear kc_ini -> kc_mid
+    if L_dev > 0:
+        for t in range(L_dev):
+            frac = (t + 1) / max(1, L_dev)
+            kc.append(float(kc_ini + (kc_mid - kc_ini) * frac))
+
+    kc += [float(kc_mid)] * max(0, L_mid)
+
+    # late: linear kc_mid -> kc_end
+    if L_late > 0:
+        for t in range(L_late):
+            frac = (t + 1) / max(1, L_late)
+            kc.append(float(kc_mid + (kc_end - kc_mid) * frac))
+
+    if len(kc) < total_days:
+        kc += [float(kc_end)] * (total_days - len(kc))
+    if len(kc) > total_days:
+        kc = kc[:total_days]
+    return kc
+
+def _load_crop_params_map() -> Dict[str, Dict[str, float]]:
+    frames = load_enhanced_frames()
+    df = frames.get("crop_params")
+    out: Dict[str, Dict[str, float]] = {}
+    if df is None or df.empty:
+        return out
+    for _, r in df.iterrows():
+        ck = normalize_crop_key(str(r.get("crop","")))
+        if not ck:
+            continue
+        out[ck] = {
+            "kc_ini": float(r.get("kc_ini", 0.6) or 0.6),
+            "kc_mid": float(r.get("kc_mid", 1.0) or 1.0),
+            "kc_end": float(r.get("kc_end", 0.8) or 0.8),
+            "p_ini": float(r.get("p_ini", 0.2) or 0.2),
+            "p_dev": float(r.get("p_dev", 0.3) or 0.3),
+            "p_mid": float(r.get("p_mid", 0.3) or 0.3),
+            "p_late": float(r.get("p_late", 0.2) or 0.2),
+        }
+    return out
+
+def _crop_max_ec_default(ck: str) -> float:
+    """Assumed seasonal-average EC tolerance (dS/m) if no measured crop table is available."""
+    k = normalize_crop_key(ck)
+    # conservative-ish defaults (can be replaced by a real tolerance table later)
+    if any(x in k for x in ["PATATES"]):
+        return 1.7
+    if any(x in k for x in ["FASULYE","NOHUT","MERCIMEK","BEZELYE"]):
+        return 1.5
+    if any(x in k for x in ["MISIR","SILAJ","BUGDAY","ARPA"]):
+        return 3.0
+    if any(x in k for x in ["SEKERPANCARI","PANCAR"]):
+        return 7.0
+    if any(x in k for x in ["DOMATES","BIBER"]):
+        return 2.5
+    if any(x in k for x in ["KAVUN","KARPUZ","SOGAN"]):
+        return 2.0
+    # orchard / perennial (generally moderate)
+    if k in PERENNIAL_CROPS:
+        return 3.0
+    return 2.5
+
+def _avg_ec_over_season(planting_date: str, harvest_date: str) -> Optional[float]:
+    frames = load_enhanced_frames()
+    wq = frames.get("water_quality")
+    if wq is None or wq.empty:
+        return None
+    try:
+        d1 = pd.to_datetime(planting_date)
+        d2 = pd.to_datetime(harvest_date)
+    except Exception:
+        return None
+    if pd.isna(d1) or pd.isna(d2):
+        return None
+    if d2 < d1:
+        d1, d2 = d2, d1
+    wq2 = wq.copy()
+    wq2["month"] = pd.to_datetime(wq2["month"], errors="coerce")
+    wq2 = wq2.dropna(subset=["month"])
+    mask = (wq2["month"] >= pd.Timestamp(d1.year, d1.month, 1)) & (wq2["month"] <= pd.Timestamp(d2.year, d2.month, 1))
+    sub = wq2.loc[mask]
+    if sub.empty:
+        return None
+    try:
+        return float(sub["ec_dS_m_assumed"].astype(float).mean())
+    except Exception:
+        return None
+
+@_stage("fao56")
+def compute_fao56_monthly_irrigation_mm(parcel_id: str, crop_key: str, planting_date: str, harvest_date: str,
+                                       irrig_eff: float, climate_df: pd.DataFrame,
+                                       crop_params_map: Dict[str, Dict[str,float]]) -> Dict[int, float]:
+    """Return dict {month(1-12): gross irrigation mm over that month} for the season."""
+    ck = normalize_crop_key(crop_key)
+    params = crop_params_map.get(ck)
+    if params is None:
+        # fallback Kc
+        params = {"kc_ini": 0.6, "kc_mid": 1.0, "kc_end": 0.8, "p_ini": 0.2, "p_dev": 0.3, "p_mid": 0.3, "p_late": 0.2}
+    try:
+        d1 = pd.to_datetime(planting_date)
+        d2 = pd.to_datetime(harvest_date)
+    except Exception:
+        return {}
+    if pd.isna(d1) or pd.isna(d2):
+        return {}
+    if d2 < d1:
+        d1, d2 = d2, d1
+
+    total_days = int((d2 - d1).days) + 1
+    kc_daily = _kc_curve_daily(total_days, params["kc_ini"], params["kc_mid"], params["kc_end"],
+                               params["p_ini"], params["p_dev"], params["p_mid"], params["p_late"])
+    eff = float(irrig_eff or 0.75)
+    eff = max(0.35, min(0.95, eff))
+
+    # build daily series
+    dates = pd.date_range(d1, d2, freq="D")
+    # climate_df expected monthly rows with et0_mm and precip_mm for the parcel-year
+    # we approximate daily ET0 and P by dividing monthly totals equally by days in month.
+    monthly = climate_df.copy()
+    monthly["month"] = pd.to_datetime(monthly["month"], errors="coerce")
+    monthly = monthly.dropna(subset=["month"])
+    monthly = monthly.set_index("month").sort_index()
+
+    out_mm = {m: 0.0 for m in range(1,13)}
+    # precompute month day counts
+    for idx_day, day in enumerate(dates):
+        mstart = pd.Timestamp(day.year, day.month, 1)
+        row = monthly.loc[monthly.index == mstart]
+        if row.empty:
+            et0_d = 0.0
+            p_d = 0.0
+        else:
+            r = row.iloc[0]
+            et0_m = float(r.get("et0_mm", 0.0) or 0.0)
+            p_m = float(r.get("precip_mm", r.get("rain_mm", 0.0)) or 0.0)
+            days_in_month = int((mstart + pd.offsets.MonthEnd(0)).day)
+            et0_d = et0_m / max(1, days_in_month)
+            p_d = p_m / max(1, days_in_month)
+        etc_d = et0_d * float(kc_daily[idx_day])
+        peff_d = _effective_rain_scs_mm(p_d)  # daily approx
+        nir_d = max(0.0, etc_d - peff_d)
+        gross_d = nir_d / eff
+        out_mm[int(day.month)] += gross_d
+
+    return {m: float(max(0.0, v)) for m,v in out_mm.items() if v > 0.0}
+
+def _load_monthly_climate_for_parcel_year(parcel_id: str, year: int) -> pd.DataFrame:
+    frames = load_enhanced_frames()
+    clim = frames.get("climate")
+    if clim is None or clim.empty:
+        return pd.DataFrame(columns=["month","et0_mm","precip_mm"])
+    df = clim.copy()
+    df["parcel_id"] = df["parcel_id"].astype(str)
+    df["year"] = df["year"].astype(int)
+    df = df[(df["parcel_id"] == str(parcel_id)) & (df["year"] == int(year))]
+    # ensure month column exists as YYYY-MM-01
+    if "month" not in df.columns:
+        df["month"] = pd.to_datetime(dict(year=df["year"], month=df["month_num"], day=1), errors="coerce")
+    else:
+        df["month"] = pd.to_datetime(df["month"], errors="coerce")
+    df = df.rename(columns={"precip_mm":"precip_mm","rain_mm":"precip_mm"})
+    if "precip_mm" not in df.columns:
+        df["precip_mm"] = df.get("rain_mm", 0.0)
+    return df[["month","et0_mm","precip_mm"]].copy()
+
+@_stage("risk_sampling")
+def _risk_adjusted_profit_per_da(price_tl_ton: float, yield_ton: float, var_cost_tl: float, area_da: float,
+                                 samples: int = 120, risk_mode: str = "mean_std", risk_lambda: float = 0.0) -> float:
+    """Return profit per da under simple price/yield uncertainty.
+    - risk_mode: 'mean' or 'mean_std' (mean - lambda*std) or 'cvar' (CVaR_10%).
+    """
+    area = float(area_da or 0.0)
+    if area <= 0:
+        return 0.0
+    # per-da bases
+    ypd = float(yield_ton or 0.0) / area
+    cpd = float(var_cost_tl or 0.0) / area
+    p = float(price_tl_ton or 0.0)
+
+    # default coefficients of variation (can be replaced via history templates)
+    cv_price = 0.20
+    cv_yield = 0.15
+
+    import numpy as _np
+    rng = _np.random.default_rng(42)
+    # lognormal for price, normal for yield (clipped)
+    price_s = rng.lognormal(mean=_np.log(max(1.0, p)), sigma=cv_price, size=int(samples))
+    yield_s = rng.normal(loc=ypd, scale=max(0.01, abs(ypd)*cv_yield), size=int(samples))
+    yield_s = _np.clip(yield_s, 0.0, None)
+    profits = price_s * yield_s - cpd
+    if profits.size == 0:
+        return float(p*ypd - cpd)
+    mode = (risk_mode or "mean_std").lower()
+    lam = float(risk_lambda or 0.0)
+    if mode == "mean":
+        return float(_np.mean(profits))
+    if mode == "cvar":
+        q = float(_np.quantile(profits, 0.10))
+        tail = profits[profits <= q]
+        if tail.size == 0:
+            return float(_np.mean(profits))
+        return float(_np.mean(tail))
+    # mean_std
+    return float(_np.mean(profits) - lam * _np.std(profits))
+
+def available_years() -> List[int]:
+    """Years available in reservoir series OR enhanced seasons (union)."""
+    frames = load_enhanced_frames()
+    years: set[int] = set()
+
+    # reservoir
+    bs = load_basin_series()
+    years.update(int(bs["year0"]) + int(i) for i in np.flatnonzero(bs["has_irrigation"]))
+
+    # seasons (year keys of the offset index)
+    for ix in load_seasons_index().values():
+        years.update(int(y) for y in ix.get("years", {}))
+
+    return sorted(years)
+
+def _month_year_grid(df: Optional[pd.DataFrame], value_col: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Parse a monthly series ('month' = YYYY-MM-..) into (years, month_index 0..11, values)."""
+    if df is None or not len(df) or "month" not in df.columns or value_col not in df.columns:
+        return None
+    m = df["month"].astype(str)
+    yy = pd.to_numeric(m.str.slice(0, 4), errors="coerce").to_numpy(dtype=float)
+    mm = pd.to_numeric(m.str.slice(5, 7), errors="coerce").to_numpy(dtype=float)
+    vals = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=float)
+    ok = np.isfinite(yy) & np.isfinite(mm) & (mm >= 1) & (mm <= 12)
+    return yy[ok].astype(int), mm[ok].astype(int) - 1, vals[ok]
+
+
+@_loader("basin_series")
+def load_basin_series() -> Dict[str, Any]:
+    """Reservoir baseline + delivery capacity compiled once into [year, 12] arrays.
+
+    Keys:
+      - year0, years: first year and number of rows (row = year - year0)
+      - irrigation, delivery: [Y, 12] float arrays (m3), NaN where the month is absent
+      - irrigation_annual: [Y] basin annual baseline (NaN-skipping sum)
+      - has_irrigation, has_delivery: [Y] whether the year has any row in the source table
+    """
+    key = "basin_series"
+    if key in _cache:
+        return _cache[key]
+    frames = load_enhanced_frames()
+    irr = _month_year_grid(frames.get("reservoir"), "irrigation_m3_baseline")
+    dlv = _month_year_grid(frames.get("delivery"), "max_delivery_m3_assumed")
+    all_years = np.concatenate([g[0] for g in (irr, dlv) if g is not None] or [np.zeros(0, dtype=int)])
+    year0 = int(all_years.min()) if all_years.size else 0
+    Y = int(all_years.max()) - year0 + 1 if all_years.size else 0
+
+    def _grid(g):
+        arr = np.full((Y, 12), np.nan, dtype=float)
+        has = np.zeros(Y, dtype=bool)
+        if g is not None and Y:
+            yi, mi, v = g[0] - year0, g[1], g[2]
+            has[yi] = True
+            seen = np.isfinite(v)
+            arr[yi[seen], mi[seen]] = 0.0
+            # duplicate months accumulate, matching the previous per-year sums
+            np.add.at(arr, (yi[seen], mi[seen]), v[seen])
+        return arr, has
+
+    irrigation, has_irr = _grid(irr)
+    delivery, has_dlv = _grid(dlv)
+    out = {
+        "year0": year0,
+        "years": Y,
+        "irrigation": irrigation,
+        "delivery": delivery,
+        "irrigation_annual": np.nansum(irrigation, axis=1) if Y else np.zeros(0),
+        "has_irrigation": has_irr,
+        "has_delivery": has_dlv,
+    }
+    _cache[key] = out
+    return out
+
+
+def _basin_row(year: int) -> int:
+    """Row of `year` in the basin series arrays, or -1 when the year is outside the series."""
+    bs = load_basin_series()
+    i = int(year) - int(bs["year0"])
+    return i if 0 <= i < int(bs["years"]) else -1
+
+
+def _all_parcels_water_total() -> float:
+    """Baseline water of all parcels (m3), area-based proxy when missing; cached."""
+    key = "all_parcels_water"
+    if key in _cache:
+        return _cache[key]
+    all_parcels = load_parcels()
+    all_water = sum(float(p.get("water_m3", 0) or 0) for p in all_parcels)
+    if all_water <= 0:
+        all_water = sum(float(p.get("area_da", 0) or 0) for p in all_parcels) * 500.0
+    _cache[key] = float(all_water)
+    return _cache[key]
+
+
+def _selected_water_share(selected_parcels: List[Dict[str, Any]]) -> float:
+    """Share of basin baseline demand attributable to the selected parcels (0..1)."""
+    try:
+        all_water = _all_parcels_water_total()
+        sel_water = sum(float(p.get("water_m3", 0) or 0) for p in selected_parcels)
+        if sel_water <= 0:
+            sel_water = sum(float(p.get("area_da", 0) or 0) for p in selected_parcels) * 500.0
+        return max(0.0, min(1.0, sel_water / all_water)) if all_water > 0 else 1.0
+    except Exception:
+        return 1.0
+
+
+def water_budgets_for_years(years: List[int], selected_parcels: List[Dict[str, Any]]) -> np.ndarray:
+    """Vectorized water_budget_for_year() over many years (one array read + one share)."""
+    bs = load_basin_series()
+    yrs = np.asarray([int(y) for y in years], dtype=int)
+    rows = yrs - int(bs["year0"])
+    ok = (rows >= 0) & (rows < int(bs["years"]))
+    basin = np.zeros(yrs.size, dtype=float)
+    if ok.any():
+        basin[ok] = np.where(bs["has_irrigation"][rows[ok]], bs["irrigation_annual"][rows[ok]], 0.0)
+    fallback = sum(float(p.get("water_m3", 0) or 0) for p in selected_parcels)
+    share = _selected_water_share(selected_parcels)
+    return np.where(basin > 0, basin * share, fallback)
+
+
+def water_budget_for_year(year: int, selected_parcels: List[Dict[str,Any]]) -> float:
+    """Annual basin water budget (m3) for irrigation.
+
+    Consistency note:
+    - The reservoir table (akkaya_reservoir_monthly_backend.csv) represents a **basin-wide**
+      irrigation baseline (monthly), not a per-parcel budget.
+    - The UI, however, compares this budget against totals computed from the **selected parcels**.
+
+    To keep the comparison meaningful, we scale the basin-wide budget by the share of
+    baseline demand of the selected parcels:
+
+        budget_selected = budget_basin * (selected_baseline_water / all_baseline_water)
+
+    If the reservoir series is missing, we fall back to the selected parcels' baseline water.
+    The basin series is precompiled by load_basin_series(), so this is an array read.
+    """
+    return float(water_budgets_for_years([int(year)], selected_parcels)[0])
+
+
+# -----------------------------
+# Basin constraints + irrigation method adjustments (must-have v24)
+# -----------------------------
+
+def _get_irrigation_method_efficiency(method: str) -> float:
+    """Return typical total efficiency for a given method.
+
+    Reads enhanced_dataset/csv/irrigation_methods_assumed.csv if available.
+    Falls back to reasonable defaults.
+    """
+    m = str(method or '').strip().lower()
+    defaults = {
+        'drip': 0.90,
+        'sprinkler': 0.75,
+        'surface_furrow': 0.55,
+        'surface': 0.55,
+        'furrow': 0.55,
+    }
+    frames = None
+    try:
+        frames = load_enhanced_frames()
+        df = frames.get('irrigation_methods')
+        if df is not None and len(df):
+            sub = df[df['method'].astype(str).str.lower() == m]
+            if len(sub) and 'typical_total_efficiency' in sub.columns:
+                v = float(sub.iloc[0]['typical_total_efficiency'])
+                if 0.05 <= v <= 0.99:
+                    return v
+    except Exception:
+        pass
+    return float(defaults.get(m, 0.75))
+
+def _basin_month_profile(year: int) -> dict:
+    """Return {month_str: baseline_share} for the given year using reservoir baseline.
+
+    Used to approximate monthly delivery constraint checks when crop calendars are not explicit.
+    """
+    i = _basin_row(year)
+    if i < 0:
+        return {}
+    bs = load_basin_series()
+    row = bs["irrigation"][i]
+    total = float(np.nansum(row))
+    if total <= 0:
+        return {}
+    y = int(year)
+    return {f"{y:04d}-{m + 1:02d}": float(row[m]) / total for m in range(12) if np.isfinite(row[m])}
+
+def basin_budget_and_delivery_caps(year: int, selected_parcels: list, env_flow_ratio: float = 0.10):
+    """Compute (annual_budget_selected, month_weights, month_caps_selected).
+
+    - env_flow_ratio: share of basin irrigation allocation reserved for ecosystem/sulak alan.
+    - month_caps come from delivery_capacity_monthly_assumed.csv when available.
+
+    Note: We scale basin-wide series to the selected parcel group using the same share
+    logic as water_budget_for_year().
+    """
+    env = max(0.0, min(0.50, float(env_flow_ratio or 0.0)))
+    bs = load_basin_series()
+    i = _basin_row(year)
+    y = int(year)
+
+    # basin annual baseline
+    month_weights = _basin_month_profile(y)
+    basin_annual = float(bs["irrigation_annual"][i]) if (i >= 0 and bs["has_irrigation"][i]) else None
+
+    # scale share to selected parcels
+    share = _selected_water_share(selected_parcels)
+
+    if basin_annual is None or basin_annual <= 0:
+        annual_selected = sum(float(p.get('water_m3',0) or 0) for p in selected_parcels)
+    else:
+        annual_selected = basin_annual * share
+
+    # reserve environmental flow
+    annual_selected = annual_selected * (1.0 - env)
+
+    # delivery caps (monthly)
+    caps_selected = {}
+    if i >= 0 and bs["has_delivery"][i]:
+        row = bs["delivery"][i] * share * (1.0 - env)
+        caps_selected = {f"{y:04d}-{m + 1:02d}": float(row[m]) for m in range(12) if np.isfinite(row[m])}
+
+    # If delivery caps file is missing, build an assumed monthly capacity profile from month_weights.
+    if not caps_selected and month_weights:
+        ssum = sum(float(v) for v in month_weights.values())
+        if ssum <= 0:
+            ssum = 1.0
+        for mo, w in month_weights.items():
+            # +5% headroom to avoid false "exceed" in assumed mode
+            caps_selected[str(mo)[:7]] = float(annual_selected) * (float(w)/ssum) * 1.05
+
+    return float(max(1.0, annual_selected)), month_weights, caps_selected
+
+
+
+
+def compute_monthly_delivery_report(total_water_m3: float,
+                                   month_weights: Optional[List[float]],
+                                   month_caps: Optional[List[float]],
+                                   months: int = 12,
+                                   monthly_demand_override: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+    """Build a UI-friendly monthly delivery capacity report.
+
+    If monthly_demand_override is provided, it must be a list of length 12 (m³ per month).
+    Otherwise demand is approximated by distributing total_water_m3 using month_weights.
+    """
+    if month_caps is None or month_weights is None:
+        return None
+    try:
+        mw = np.array(list(month_weights), dtype=float)
+        mc = np.array(list(month_caps), dtype=float)
+        if mw.size != mc.size or mw.size == 0:
+            return None
+        # Normalize to 12 months if needed
+        if mw.size != months:
+            # simple pad/truncate
+            mw = np.resize(mw, months)
+            mc = np.resize(mc, months)
+        if monthly_demand_override is not None and len(monthly_demand_override) == months:
+            dem = np.array(monthly_demand_override, dtype=float)
+        else:
+            dem = float(total_water_m3) * (mw / max(1e-9, float(mw.sum())))
+        exceed = np.maximum(0.0, dem - mc)
+        feasible_monthly = bool(np.all(exceed <= 1e-6))
+        worst_idx = int(np.argmax(exceed)) if months > 0 else 0
+        return {
+            "months": list(range(1, months + 1)),
+            "demand_m3": [float(x) for x in dem.tolist()],
+            "cap_m3": [float(x) for x in mc.tolist()],
+            "exceed_m3": [float(x) for x in exceed.tolist()],
+            "feasible_monthly": feasible_monthly,
+            "worst_month": int(worst_idx + 1),
+            "worst_exceed_m3": float(exceed[worst_idx]) if months > 0 else 0.0,
+        }
+    except Exception:
+        return None
+
+
+def _monthly_demand_from_mu(areas_da: np.ndarray,
+                           MU1: Optional[np.ndarray],
+                           MU2: Optional[np.ndarray],
+                           ch1: np.ndarray,
+                           ch2: np.ndarray) -> Optional[List[float]]:
+    """Compute 12-month demand (m³) using FAO-56 monthly irrigation matrices (m³/da)."""
+    try:
+        if MU1 is None:
+            return None
+        P = int(areas_da.shape[0])
+        months = 12
+        dem = np.zeros((months,), dtype=float)
+        # MU arrays expected shape: [P, C, 12]
+        for i in range(P):
+            j1 = int(ch1[i]) if ch1 is not None else 0
+            if MU1.ndim == 3:
+                dem += float(areas_da[i]) * np.array(MU1[i, j1, :months], dtype=float)
+            if MU2 is not None and ch2 is not None and MU2.ndim == 3:
+                j2 = int(ch2[i])
+                dem += float(areas_da[i]) * np.array(MU2[i, j2, :months], dtype=float)
+        dem = np.nan_to_num(dem, nan=0.0, posinf=0.0, neginf=0.0)
+        return [float(x) for x in dem.tolist()]
+    except Exception:
+        return None
+def apply_irrigation_method_to_W(W: np.ndarray, selected_parcels: list, method: str) -> np.ndarray:
+    """Adjust gross water intensities W (m3/da) for a chosen irrigation method.
+
+    The seasonal tables store calibrated *gross* water based on each parcel's
+    irrig_efficiency_default. If user selects another method, we preserve the
+    implied net irrigation requirement and recompute gross.
+
+        gross_new = gross_default * (eff_default / eff_new)
+
+    """
+    eff_new = _get_irrigation_method_efficiency(method)
+    W2 = W.copy()
+    for i, p in enumerate(selected_parcels):
+        eff_def = float(p.get('irrig_efficiency_default', 0.75) or 0.75)
+        eff_def = max(0.05, min(0.99, eff_def))
+        scale = eff_def / max(0.05, min(0.99, eff_new))
+        W2[i, :] = W2[i, :] * scale
+    return W2
+
+
+# -----------------------------
+# Compiled candidate matrix cache
+# -----------------------------
+MATRIX_CACHE_MAX = 64
+# Publish compiled matrices to multiprocessing.shared_memory so gunicorn workers / pool
+# children attach to one physical copy instead of each building their own (see shared_arrays.py).
+SHARED_MEMORY_MATRICES = os.environ.get("AKKAYA_SHARED_MEMORY", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def dataset_version() -> str:
+    """Fingerprint of the data files (path, size, mtime); names shared-memory segments."""
+    key = "dataset_version"
+    if key in _cache:
+        return _cache[key]
+    import hashlib
+    h = hashlib.sha1(str(DATA_DIR.resolve()).encode("utf-8"))
+    files = list(enhanced_paths().values())
+    try:
+        files += [fp for fp in DATA_DIR.iterdir() if fp.is_file()]
+    except Exception:
+        pass
+    for fp in sorted(set(files), key=str):
+        try:
+            st = fp.stat()
+            h.update(f"{fp.name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+        except Exception:
+            h.update(f"{fp.name}:missing;".encode("utf-8"))
+    _cache[key] = h.hexdigest()[:16]
+    return _cache[key]
+
+
+def _matrix_cache_key(kind: str, selected_parcels: List[Dict[str, Any]], year: Optional[int], *params: Any) -> Tuple:
+    ids = tuple(str(p.get("id", "")).strip() for p in selected_parcels)
+    return (kind, ids, None if year is None else safe_int(year, -1)) + tuple(params)
+
+
+def _readonly(value: Tuple) -> Tuple:
+    """Read-only NumPy views (lists copied) of a cached matrix tuple; writers copy first."""
+    out = []
+    for v in value:
+        if isinstance(v, np.ndarray):
+            v = v.view()
+            v.flags.writeable = False
+        elif isinstance(v, list):
+            v = list(v)
+        out.append(v)
+    return tuple(out)
+
+
+def _matrix_cache_get(key: Tuple) -> Optional[Tuple]:
+    """Return read-only views of a cached matrix tuple (no per-request copy of W/R/MU).
+
+    With SHARED_MEMORY_MATRICES, a local miss first tries to attach to a segment published by
+    another process.
+    """
+    mc = _cache.setdefault("matrix_cache", OrderedDict())
+    if key not in mc:
+        if not SHARED_MEMORY_MATRICES:
+            metrics.cache_event("matrix", False)
+            return None
+        import shared_arrays
+        views = shared_arrays.attach(shared_arrays.segment_name(dataset_version(), key))
+        if views is None:
+            metrics.cache_event("matrix", False)
+            return None
+        _matrix_cache_store(key, views, shared_arrays.segment_name(dataset_version(), key))
+    metrics.cache_event("matrix", True)
+    mc.move_to_end(key)
+    return _readonly(mc[key])
+
+
+def _matrix_cache_store(key: Tuple, value: Tuple, segment: Optional[str] = None) -> None:
+    mc = _cache.setdefault("matrix_cache", OrderedDict())
+    segs = _cache.setdefault("matrix_cache_segments", {})
+    mc[key] = value
+    mc.move_to_end(key)
+    if segment:
+        segs[key] = segment
+    while len(mc) > MATRIX_CACHE_MAX:
+        old_key, _ = mc.popitem(last=False)
+        old_seg = segs.pop(old_key, None)
+        if old_seg:
+            import shared_arrays
+            shared_arrays.release(old_seg)
+
+
+def _matrix_cache_put(key: Tuple, value: Tuple) -> Tuple:
+    """Cache a freshly compiled tuple; returns the same read-only views a later hit gets."""
+    if SHARED_MEMORY_MATRICES:
+        try:
+            import shared_arrays
+            name = shared_arrays.segment_name(dataset_version(), key)
+            _matrix_cache_store(key, shared_arrays.publish(name, value), name)
+            return _readonly(value)
+        except Exception:
+            # shared memory unavailable (e.g. /dev/shm full); cache the process-local arrays
+            pass
+    _matrix_cache_store(key, value)
+    return _readonly(value)
+
+
+@_stage("matrix_build")
+def build_candidate_matrix(selected_parcels: List[Dict[str,Any]], year: Optional[int]=None, season_source: str="both") -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Cached front of _compile_candidate_matrix() keyed by (parcel ids, year, source)."""
+    key = _matrix_cache_key("single", selected_parcels, year, str(season_source or "both").lower())
+    hit = _matrix_cache_get(key)
+    if hit is not None:
+        return hit
+    return _matrix_cache_put(key, _compile_candidate_matrix(selected_parcels, year=year, season_source=season_source))
+
+
+def _compile_candidate_matrix(selected_parcels: List[Dict[str,Any]], year: Optional[int]=None, season_source: str="both") -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Return crop_list, water_per_da[parcel,crop], profit_per_da[parcel,crop].
+
+    Key improvements (v14):
+      - **No global-median imputation**: Missing (parcel,crop) intensities are first filled from
+        district-level means (same crop) computed from the enhanced seasons tables. Remaining
+        missing cells are treated as *infeasible* (W=1e9, R=0) to avoid misleading "fabricated"
+        recommendations.
+      - **Hard suitability filter**: If land capability class (LCC) suitability < 0.60, the crop is
+        marked infeasible for that parcel.
+      - Keeps a transparent profit multiplier for suitability when >= 0.60.
+    """
+    frames = load_enhanced_frames()
+    src = str(season_source or "both").lower()
+
+    if src in ("both", "s1+s2", "combined", "merge", "birlesik"):
+        src = "s1"
+    # Season-source selection with a robust fallback.
+    # Problem observed in field: Senaryo-2 dataset may not contain rows for the selected parcels/year,
+    # which previously caused empty candidates and therefore "boş sonuç" in the UI.
+    # Year slices come pre-normalized (stripped parcel ids, crop_key) from the seasons index;
+    # an unparseable year keeps the full table.
+    seasons = seasons_for_year(src if src in ("s1", "s2") else "both", year)
+
+    # Fallback: if Senaryo-2 is empty for this selection, retry with Senaryo-1.
+    if seasons.empty and src == "s2":
+        seasons = seasons_for_year("s1", year)
+
+    # Join district/LCC for group-level fallbacks and suitability checks
+    parcels_df = frames.get("parcels")
+    if parcels_df is not None and len(parcels_df):
+        meta = parcels_df.copy()
+        meta["parcel_id"] = meta["parcel_id"].astype(str)
+        meta["district"] = meta["district"].astype(str) if "district" in meta.columns else ""
+        meta["lcc"] = meta["land_capability_class"].astype(str).str.strip().str.upper() if "land_capability_class" in meta.columns else ""
+        seasons = seasons.merge(meta[["parcel_id","district","lcc"]], on="parcel_id", how="left")
+    else:
+        seasons = seasons.assign(district="", lcc="")
+
+    # aggregate per (parcel,crop): mean intensity
+    agg = seasons.groupby(["parcel_id","crop_key"], dropna=False).agg(
+        area_da=("area_da","mean"),
+        water_m3=("water_m3_calib_gross","mean"),
+        profit_tl=("profit_tl","mean"),
+        district=("district","first"),
+        lcc=("lcc","first"),
+    ).reset_index()
+
+    agg["water_per_da"] = agg["water_m3"] / agg["area_da"].replace(0,np.nan)
+    agg["profit_per_da"] = agg["profit_tl"] / agg["area_da"].replace(0,np.nan)
+    agg = agg.replace([np.inf,-np.inf], np.nan)
+
+    # district fallback table (district,crop)
+    # IMPORTANT: Treat non-positive profits as *missing* so we don't propagate
+    # "0 TL/da" values into recommendations (these are usually due to missing
+    # economics in the scenario CSVs, not a true zero-profit crop).
+    dist = agg.dropna(subset=["water_per_da","profit_per_da"]).copy()
+    try:
+        dist = dist[(dist["water_per_da"].astype(float) > 0) & (dist["profit_per_da"].astype(float) > 0)]
+    except Exception:
+        pass
+    dist = dist.groupby(["district","crop_key"], dropna=False).agg(
+        water_per_da=("water_per_da","mean"),
+        profit_per_da=("profit_per_da","mean"),
+    ).reset_index()
+
+
+
+
+    crop_list = sorted([c for c in agg["crop_key"].dropna().unique().tolist() if str(c).strip()])
+    # Senaryo-1: kullanıcı tarafından eklenen Niğde odaklı ürünler (sezon verisinde yoksa bile aday havuzuna dahil)
+    try:
+        src_norm = str(season_source or "s1").lower().strip()
+        if src_norm in ("s1","senaryo1","scenario1","1"):
+            extra_s1 = [
+                "SALÇALIK DOMATES","SOFRALIK DOMATES","LAHANA (BEYAZ)","KABAK (ÇEREZLİK)","FASULYE (TAZE)",
+                "SOĞAN (KURU)","KAVUN","SALÇALIK BİBER",
+                "PATATES","SİLAJLIK MISIR","YONCA (YEŞİLOT)","BUĞDAY (DANE)","ARPA (DANE)","ŞEKER PANCARI","ÇAVDAR (DANE)"
+            ,
+                "FİĞ (YEŞİLOT)","KORUNGA (YEŞİLOT)","BURÇAK (YEŞİLOT)","YEM BEZELYESİ","YULAF (YEŞİLOT)","NOHUT","YEŞİL MERCİMEK","KURU FASULYE"
+            ]
+            s = set([str(x).strip() for x in crop_list])
+            for c in extra_s1:
+                if c not in s:
+                    crop_list.append(c); s.add(c)
+    except Exception:
+        pass
+
+    
+    # Always include a "fallow/no-crop" option so the optimizer stays feasible under tight water budgets.
+    FALLOW = normalize_crop_key("NADAS")
+    if FALLOW not in crop_list:
+        crop_list = [FALLOW] + crop_list
+    
+    # --- Project-aligned low-water crop pool (fallback) ---
+    # When scenario tables miss key low-water cereals/legumes, the optimizer over-uses NADAS.
+    # These are conservative placeholder candidates. Replace with calibrated local agronomy + market data.
+    # NOTE (UI/Thesis): We present "Su (m³)" as a proxy for total crop water demand/consumption
+    # (ETc-like), not only "additional irrigation". Therefore, rainfed ("*_KURU") crops should
+    # not appear with 0 water in tables/plots.
+    # Values below are conservative placeholders (m³/da) and can be calibrated later.
+    default_crop_params = {
+        normalize_crop_key("ARPA"): {"water_per_da": 180.0, "profit_per_da": 3800.0},
+        normalize_crop_key("BUGDAY"): {"water_per_da": 220.0, "profit_per_da": 4200.0},
+        normalize_crop_key("NOHUT"): {"water_per_da": 120.0, "profit_per_da": 5200.0},
+        normalize_crop_key("MERCIMEK"): {"water_per_da": 110.0, "profit_per_da": 5000.0},
+        normalize_crop_key("KURU_FASULYE"): {"water_per_da": 250.0, "profit_per_da": 6500.0},
+        normalize_crop_key("ARPA_KURU"): {"water_per_da": 220.0, "profit_per_da": 2600.0},
+        normalize_crop_key("BUGDAY_KURU"): {"water_per_da": 250.0, "profit_per_da": 2800.0},
+        normalize_crop_key("NOHUT_KURU"): {"water_per_da": 180.0, "profit_per_da": 3400.0},
+        normalize_crop_key("MERCIMEK_KURU"): {"water_per_da": 160.0, "profit_per_da": 3200.0},
+    }
+
+    # --- Scenario-1 vegetable & high-value crops (Niğde) ---
+    # Only activate these candidates when the user selects seasonSource = 's1' (Senaryo-1).
+    # Values are conservative defaults: water_per_da in m³/da, profit_per_da in TL/da (net = revenue - cost).
+    if src in ("s1", "senaryo-1", "senaryo1", "scenario1", "1"):
+        _s1_extras = {
+            normalize_crop_key("SALCALIK_DOMATES"): {"water_per_da": 650.0, "profit_per_da": 52000.0},
+            normalize_crop_key("SOFRALIK_DOMATES"): {"water_per_da": 700.0, "profit_per_da": 60000.0},
+            normalize_crop_key("LAHANA_BEYAZ"): {"water_per_da": 450.0, "profit_per_da": 18000.0},
+            normalize_crop_key("KABAK_CEREZLIK"): {"water_per_da": 300.0, "profit_per_da": 6500.0},
+            normalize_crop_key("FASULYE_TAZE"): {"water_per_da": 550.0, "profit_per_da": 20000.0},
+            normalize_crop_key("SOGAN_KURU"): {"water_per_da": 500.0, "profit_per_da": 24000.0},
+            normalize_crop_key("KAVUN"): {"water_per_da": 550.0, "profit_per_da": 12000.0},
+            normalize_crop_key("SALCALIK_BIBER"): {"water_per_da": 600.0, "profit_per_da": 25000.0},
+       
+            normalize_crop_key("FİĞ (YEŞİLOT)"): {"water_per_da": 160.0, "profit_per_da": 6500.0},
+            normalize_crop_key("KORUNGA (YEŞİLOT)"): {"water_per_da": 140.0, "profit_per_da": 6000.0},
+            normalize_crop_key("BURÇAK (YEŞİLOT)"): {"water_per_da": 140.0, "profit_per_da": 6200.0},
+            normalize_crop_key("YEM BEZELYESİ"): {"water_per_da": 150.0, "profit_per_da": 6400.0},
+            normalize_crop_key("YULAF (YEŞİLOT)"): {"water_per_da": 160.0, "profit_per_da": 5500.0},
+ }
+        default_crop_params.update(_s1_extras)
+    for ck in list(default_crop_params.keys()):
+        if ck not in crop_list:
+            crop_list.append(ck)
+    
+    # Keep deterministic ordering with FALLOW first.
+    crop_list = [FALLOW] + sorted([c for c in crop_list if c != FALLOW])
+    
+    parcel_ids = [str(p.get("id", "")).strip() for p in selected_parcels if str(p.get("id", "")).strip()]
+    P = len(parcel_ids); C = len(crop_list)
+    W = np.full((P,C), np.nan, dtype=float)
+    R = np.full((P,C), np.nan, dtype=float)
+    idx_crop = {c:i for i,c in enumerate(crop_list)}
+    idx_parcel = {pid:i for i,pid in enumerate(parcel_ids)}
+
+    for _,r in agg.iterrows():
+        pid = str(r["parcel_id"])
+        ck = str(r["crop_key"])
+        if pid in idx_parcel and ck in idx_crop:
+            i = idx_parcel[pid]; j = idx_crop[ck]
+            W[i,j] = float(r["water_per_da"]) if pd.notna(r["water_per_da"]) else np.nan
+            R[i,j] = float(r["profit_per_da"]) if pd.notna(r["profit_per_da"]) else np.nan
+
+    # Fallow is always feasible with zero water/profit per da.
+    if crop_list and crop_list[0] == FALLOW:
+        W[:, 0] = 0.0
+        R[:, 0] = 0.0
+
+    # District fallback fill
+    parcel_district = {}
+    parcel_lcc = {}
+    if parcels_df is not None and len(parcels_df):
+        for _,r in parcels_df.iterrows():
+            pid = str(r.get("parcel_id",""))
+            if not pid:
+                continue
+            parcel_district[pid] = str(r.get("district","") or "")
+            parcel_lcc[pid] = str(r.get("land_capability_class","") or "").strip().upper()
+
+    dist_map = {(str(r["district"] or ""), str(r["crop_key"])): (float(r["water_per_da"]), float(r["profit_per_da"]))
+                for _,r in dist.iterrows()}
+
+    for i,pid in enumerate(parcel_ids):
+        d = parcel_district.get(pid, "")
+        for j,ck in enumerate(crop_list):
+            if not np.isfinite(W[i,j]) or not np.isfinite(R[i,j]):
+                v = dist_map.get((d, ck))
+                if v is not None and np.isfinite(v[0]) and np.isfinite(v[1]):
+                    W[i,j] = float(v[0])
+                    R[i,j] = float(v[1])
+                else:
+                    # Fallback: project-aligned default crops (synthetic placeholders)
+                    dv = default_crop_params.get(ck)
+                    if dv is not None:
+                        W[i,j] = float(dv.get("water_per_da", np.nan))
+                        R[i,j] = float(dv.get("profit_per_da", np.nan))
+
+    # Apply suitability: hard filter (<0.60) + soft multiplier (>=0.60)
+    try:
+        suit = load_crop_suitability_map()
+        for i,pid in enumerate(parcel_ids):
+            lcc = parcel_lcc.get(pid, "")
+            if not lcc:
+                continue
+            for j,ck in enumerate(crop_list):
+                if ck == FALLOW:
+                    continue
+                sc = float(suit.get((lcc, ck), 0.85))
+                sc = max(0.0, min(1.0, sc))
+                if sc < 0.60:
+                    W[i,j] = np.nan
+                    R[i,j] = np.nan
+                else:
+                    if np.isfinite(R[i,j]):
+                        R[i,j] = float(R[i,j]) * sc
+    except Exception:
+        pass
+
+    # Clamp negative profits to 0 (avoid confusing negative totals in farmer UI)
+    try:
+        R = np.where(np.isfinite(R) & (R < 0), 0.0, R)
+    except Exception:
+        pass
+
+    # Profit realism: keep per-da net profits in plausible ranges.
+    try:
+        R = _apply_profit_realism(R, crop_list)
+    except Exception:
+        pass
+
+    # Final infeasible fill: no fabricated medians
+    # NOTE: We keep an explicit fallow crop (NADAS) with W=0,R=0 for every parcel.
+    # For other crops, infeasible cells get a very large W penalty so they are
+    # never selected over NADAS.
+
+    # Catalog fallback: if still missing (especially for Senaryo-1 newly added crops), fill from urun_parametreleri_demo.csv
+    try:
+        cat = load_crop_catalog()  # keyed by normalize_crop_key
+        for j, ck in enumerate(crop_list):
+            k = normalize_crop_key(ck)
+            if k in cat:
+                wpd = float(cat[k].get("waterPerDa", 0.0))
+                ppd = float(cat[k].get("profitPerDa", 0.0))
+                # fill only where missing
+                miss = ~np.isfinite(W[:, j]) | ~np.isfinite(R[:, j])
+                if np.any(miss):
+                    W[miss, j] = wpd
+                    R[miss, j] = ppd
+    except Exception:
+        pass
+
+    # Prevent zero/unknown-profit crops from being selected by the optimizer.
+    # (A 0 TL/da entry almost always means missing economics in the scenario CSV.)
+    try:
+        for j, ck in enumerate(crop_list):
+            if normalize_crop_key(ck) == FALLOW:
+                continue
+            bad = (~np.isfinite(W[:, j])) | (~np.isfinite(R[:, j])) | (W[:, j] <= 0) | (R[:, j] <= 0)
+            if np.any(bad):
+                W[bad, j] = np.nan
+                R[bad, j] = np.nan
+    except Exception:
+        pass
+
+    infeasible = (~np.isfinite(W)) | (~np.isfinite(R)) | (W < 0)
+    # Keep fallow feasible even though W==0
+    if crop_list and crop_list[0] == FALLOW:
+        infeasible[:, 0] = False
+    W = np.where(infeasible, 1e9, W)
+    R = np.where(infeasible, 0.0, R)
+    # Ensure NADAS is feasible everywhere.
+    # We assign a small non-zero water proxy so UI tables do not show 0 m³ for fallow in totals.
+    # (Represents soil evaporation/maintenance; can be calibrated.)
+    if len(crop_list) and crop_list[0] == FALLOW:
+        W[:, 0] = 50.0
+        R[:, 0] = 0.0
+
+    return crop_list, W, R
+
+
+
+@_stage("matrix_build")
+def build_candidate_matrix_two_season(
+    selected_parcels: List[Dict[str, Any]],
+    year: Optional[int] = None,
+    season_source: str = "both",
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """Cached front of _compile_candidate_matrix_two_season() keyed by selection and options."""
+    key = _matrix_cache_key(
+        "two_season", selected_parcels, year, str(season_source or "both").lower().strip(),
+        str(water_model), str(risk_mode), float(risk_lambda or 0.0), int(risk_samples or 120), bool(water_quality_filter),
+    )
+    hit = _matrix_cache_get(key)
+    if hit is not None:
+        return hit
+    return _matrix_cache_put(key, _compile_candidate_matrix_two_season(
+        selected_parcels, year=year, season_source=season_source, water_model=water_model,
+        risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples,
+        water_quality_filter=water_quality_filter,
+    ))
+
+
+def _compile_candidate_matrix_two_season(
+    selected_parcels: List[Dict[str, Any]],
+    year: Optional[int] = None,
+    season_source: str = "both",
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """Return seasonal candidate matrices.
+
+    Outputs:
+      crop_list, W_primary, R_primary, W_secondary, R_secondary
+
+    v14 changes:
+      - No global-median imputation. Missing cells are filled from district-level means **per season**.
+        Remaining missing cells become infeasible (W=1e9, R=0).
+      - Hard suitability filter (<0.60) applied to both seasons.
+      - Shared crop_list across seasons for simpler UI.
+    """
+    frames = load_enhanced_frames()
+    src = str(season_source or "both").lower().strip()
+
+    seasons = seasons_for_year("both" if src not in ("s1", "s2") else src, year)
+
+    # Robust fallback: if the requested season source yields no rows
+    # (common when the enhanced S2 file doesn't contain all selected parcels/years),
+    # automatically fall back to S1, then to BOTH.
+    if seasons.empty and src == "s2":
+        seasons = seasons_for_year("s1", year)
+    if seasons.empty and src in ("s1", "s2"):
+        seasons = seasons_for_year("both", year)
+
+    if seasons.empty:
+        # Final fallback to the simpler single-season matrix builder.
+        crop_list, W, R = build_candidate_matrix(selected_parcels, year=year, season_source=season_source)
+        return crop_list, W, R, W.copy(), R.copy(), None, None
+
+    parcels_df = frames.get("parcels")
+    if parcels_df is not None and len(parcels_df):
+        meta = parcels_df.copy()
+        meta["parcel_id"] = meta["parcel_id"].astype(str)
+        meta["district"] = meta["district"].astype(str) if "district" in meta.columns else ""
+        meta["lcc"] = meta["land_capability_class"].astype(str).str.strip().str.upper() if "land_capability_class" in meta.columns else ""
+        seasons = seasons.merge(meta[["parcel_id","district","lcc"]], on="parcel_id", how="left")
+    else:
+        seasons = seasons.assign(district="", lcc="")
+
+    agg = seasons.groupby(["parcel_id", "crop_key", "season_key"], dropna=False).agg(
+        area_da=("area_da", "mean"),
+        water_m3=("water_m3_calib_gross", "mean"),
+        profit_tl=("profit_tl", "mean"),
+        # for FAO-56 and risk-adjusted economics
+        planting_date=("planting_date", "first"),
+        harvest_date=("harvest_date", "first"),
+        yield_ton=("yield_ton", "mean"),
+        price_tl_ton=("price_tl_ton", "mean"),
+        variable_cost_tl=("variable_cost_tl", "mean"),
+        district=("district","first"),
+        lcc=("lcc","first"),
+    ).reset_index()
+    agg["water_per_da"] = agg["water_m3"] / agg["area_da"].replace(0, np.nan)
+    agg["profit_per_da"] = agg["profit_tl"] / agg["area_da"].replace(0, np.nan)
+    agg = agg.replace([np.inf, -np.inf], np.nan)
+
+    crop_list = sorted([c for c in agg["crop_key"].dropna().unique().tolist() if str(c).strip()])
+
+    # Always include a "fallow/no-crop" option so the optimizer stays feasible.
+    FALLOW = normalize_crop_key("NADAS")
+    if FALLOW not in crop_list:
+        crop_list = [FALLOW] + crop_list
+    
+    # Project-aligned low-water crop pool (fallback placeholders)
+    default_crop_params = {
+        normalize_crop_key("ARPA"): {"water_per_da": 180.0, "profit_per_da": 3800.0},
+        normalize_crop_key("BUGDAY"): {"water_per_da": 220.0, "profit_per_da": 4200.0},
+        normalize_crop_key("NOHUT"): {"water_per_da": 120.0, "profit_per_da": 5200.0},
+        normalize_crop_key("MERCIMEK"): {"water_per_da": 110.0, "profit_per_da": 5000.0},
+        normalize_crop_key("KURU_FASULYE"): {"water_per_da": 250.0, "profit_per_da": 6500.0},
+        # Rainfed ("*_KURU") crops should not show 0 water in UI.
+        normalize_crop_key("ARPA_KURU"): {"water_per_da": 220.0, "profit_per_da": 2600.0},
+        normalize_crop_key("BUGDAY_KURU"): {"water_per_da": 250.0, "profit_per_da": 2800.0},
+        normalize_crop_key("NOHUT_KURU"): {"water_per_da": 180.0, "profit_per_da": 3400.0},
+        normalize_crop_key("MERCIMEK_KURU"): {"water_per_da": 160.0, "profit_per_da": 3200.0},
+    }
+    for ck in list(default_crop_params.keys()):
+        if ck not in crop_list:
+            crop_list.append(ck)
+    crop_list = [FALLOW] + sorted([c for c in crop_list if c != FALLOW])
+    
+    parcel_ids = [str(p["id"]) for p in selected_parcels]
+    P, C = len(parcel_ids), len(crop_list)
+    idx_crop = {c: i for i, c in enumerate(crop_list)}
+    idx_parcel = {pid: i for i, pid in enumerate(parcel_ids)}
+
+    # district fallbacks per season
+    dist = agg.dropna(subset=["water_per_da","profit_per_da"]).groupby(["district","crop_key","season_key"], dropna=False).agg(
+        water_per_da=("water_per_da","mean"),
+        profit_per_da=("profit_per_da","mean"),
+    ).reset_index()
+    dist_map = {(str(r["district"] or ""), str(r["crop_key"]), str(r["season_key"])): (float(r["water_per_da"]), float(r["profit_per_da"]))
+                for _,r in dist.iterrows()}
+
+    parcel_district = {}
+    parcel_lcc = {}
+    if parcels_df is not None and len(parcels_df):
+        for _,r in parcels_df.iterrows():
+            pid = str(r.get("parcel_id",""))
+            if not pid:
+                continue
+            parcel_district[pid] = str(r.get("district","") or "")
+            parcel_lcc[pid] = str(r.get("land_capability_class","") or "").strip().upper()
+
+    def _matrix_for(season_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        sub = agg[agg["season_key"] == season_name]
+        W = np.full((P, C), np.nan, dtype=float)
+        R = np.full((P, C), np.nan, dtype=float)
+        for _, r in sub.iterrows():
+            pid = str(r["parcel_id"])
+            ck = str(r["crop_key"])
+            if pid in idx_parcel and ck in idx_crop:
+                i, j = idx_parcel[pid], idx_crop[ck]
+                W[i, j] = float(r["water_per_da"]) if pd.notna(r["water_per_da"]) else np.nan
+                R[i, j] = float(r["profit_per_da"]) if pd.notna(r["profit_per_da"]) else np.nan
+
+        # district fallback
+        for i,pid in enumerate(parcel_ids):
+            d = parcel_district.get(pid, "")
+            for j,ck in enumerate(crop_list):
+                if not np.isfinite(W[i,j]) or not np.isfinite(R[i,j]):
+                    v = dist_map.get((d, ck, season_name))
+                    if v is not None and np.isfinite(v[0]) and np.isfinite(v[1]):
+                        W[i,j] = float(v[0]); R[i,j] = float(v[1])
+                    else:
+                        dv = default_crop_params.get(ck)
+                        if dv is not None:
+                            W[i,j] = float(dv.get("water_per_da", np.nan))
+                            R[i,j] = float(dv.get("profit_per_da", np.nan))
+        return W, R
+
+    W1, R1 = _matrix_for("primary")
+    W2, R2 = _matrix_for("secondary")
+
+    # Fallow always feasible
+    if crop_list and crop_list[0] == FALLOW:
+        W1[:, 0] = 0.0; R1[:, 0] = 0.0
+        W2[:, 0] = 0.0; R2[:, 0] = 0.0
+
+
+    # --- Optional FAO-56 (ET0-Kc) water model + monthly irrigation matrices ---
+    month_use1 = None
+    month_use2 = None
+    wm = str(water_model or "calib").lower().strip()
+    rm = str(risk_mode or "none").lower().strip()
+
+    # Build lookup maps from the raw seasons table (with dates/economics)
+    date_map = {}
+    econ_map = {}  # (pid, ck, season) -> (price, yield_ton, var_cost, area)
+    eff_map = {}
+    try:
+        for _, r in seasons.iterrows():
+            pid = str(r.get("parcel_id",""))
+            ck = str(r.get("crop_key",""))
+            sk = str(r.get("season_key",""))
+            if not pid or not ck or not sk:
+                continue
+            date_map[(pid, ck, sk)] = (str(r.get("planting_date","")), str(r.get("harvest_date","")))
+            econ_map[(pid, ck, sk)] = (
+                float(r.get("price_tl_ton", 0.0) or 0.0),
+                float(r.get("yield_ton", 0.0) or 0.0),
+                float(r.get("variable_cost_tl", 0.0) or 0.0),
+                float(r.get("area_da", 0.0) or 0.0),
+            )
+            eff_map[(pid, ck, sk)] = float(r.get("irrig_efficiency", 0.75) or 0.75)
+    except Exception:
+        pass
+
+    # Risk-adjusted profit per da (optional)
+    if rm != "none":
+        try:
+            def _risk_profit(pid: str, ck: str, sk: str, fallback_profit_per_da: float) -> float:
+                k = (pid, ck, sk)
+                if k not in econ_map:
+                    return float(fallback_profit_per_da)
+                price, y_ton, cost, area = econ_map[k]
+                if area <= 0:
+                    return float(fallback_profit_per_da)
+                return float(_risk_adjusted_profit_per_da(price, y_ton, cost, area, samples=int(risk_samples or 120),
+                                                          risk_mode=(rm if rm != "none" else "mean_std"),
+                                                          risk_lambda=float(risk_lambda or 0.0)))
+        except Exception:
+            _risk_profit = None
+    else:
+        _risk_profit = None
+
+    if wm == "fao56" and year is not None:
+        # Precompute monthly per-da irrigation (mm == m3/da) for each parcel-crop-season
+        crop_params_map = _load_crop_params_map()
+        month_use1 = np.zeros((P, C, 12), dtype=float)
+        month_use2 = np.zeros((P, C, 12), dtype=float)
+
+        for i, pid in enumerate(parcel_ids):
+            clim = _load_monthly_climate_for_parcel_year(pid, int(year))
+            for j, ck in enumerate(crop_list):
+                if ck == FALLOW:
+                    continue
+                # primary
+                d = date_map.get((pid, ck, "primary"))
+                if d:
+                    peff = eff_map.get((pid, ck, "primary"), 0.75)
+                    mm_by_m = compute_fao56_monthly_irrigation_mm(pid, ck, d[0], d[1], peff, clim, crop_params_map)
+                    for mo, mm in mm_by_m.items():
+                        month_use1[i, j, int(mo)-1] = float(mm)
+                    W1[i, j] = float(sum(mm_by_m.values()))  # mm == m3/da
+                # secondary
+                d2 = date_map.get((pid, ck, "secondary"))
+                if d2:
+                    peff2 = eff_map.get((pid, ck, "secondary"), 0.75)
+                    mm_by_m2 = compute_fao56_monthly_irrigation_mm(pid, ck, d2[0], d2[1], peff2, clim, crop_params_map)
+                    for mo, mm in mm_by_m2.items():
+                        month_use2[i, j, int(mo)-1] = float(mm)
+                    W2[i, j] = float(sum(mm_by_m2.values()))
+        # Replace/refresh district fallback after overrides (keep existing W where FAO data missing)
+        # (No extra action: already filled earlier; FAO override only where dates exist.)
+
+    # Water quality hard filter (optional)
+    if bool(water_quality_filter):
+        try:
+            for i, pid in enumerate(parcel_ids):
+                for j, ck in enumerate(crop_list):
+                    if ck == FALLOW:
+                        continue
+                    # Use primary season dates if available, else skip
+                    d = date_map.get((pid, ck, "primary"))
+                    if not d:
+                        continue
+                    avg_ec = _avg_ec_over_season(d[0], d[1])
+                    if avg_ec is None:
+                        continue
+                    if float(avg_ec) > float(_crop_max_ec_default(ck)):
+                        W1[i, j] = np.nan; R1[i, j] = np.nan
+                        W2[i, j] = np.nan; R2[i, j] = np.nan
+        except Exception:
+            pass
+
+    # Apply risk adjustment into R matrices (after FAO override)
+    if _risk_profit is not None:
+        try:
+            for i, pid in enumerate(parcel_ids):
+                for j, ck in enumerate(crop_list):
+                    if ck == FALLOW:
+                        continue
+                    if np.isfinite(R1[i, j]):
+                        R1[i, j] = float(_risk_profit(pid, ck, "primary", float(R1[i, j])))
+                    if np.isfinite(R2[i, j]):
+                        R2[i, j] = float(_risk_profit(pid, ck, "secondary", float(R2[i, j])))
+        except Exception:
+            pass
+
+    # Suitability hard filter + multiplier on both seasons
+    try:
+        suit = load_crop_suitability_map()
+        for i,pid in enumerate(parcel_ids):
+            lcc = parcel_lcc.get(pid, "")
+            if not lcc:
+                continue
+            for j,ck in enumerate(crop_list):
+                if ck == FALLOW:
+                    continue
+                sc = float(suit.get((lcc, ck), 0.85))
+                sc = max(0.0, min(1.0, sc))
+                if sc < 0.60:
+                    W1[i,j]=np.nan; R1[i,j]=np.nan
+                    W2[i,j]=np.nan; R2[i,j]=np.nan
+                else:
+                    if np.isfinite(R1[i,j]): R1[i,j] = float(R1[i,j]) * sc
+                    if np.isfinite(R2[i,j]): R2[i,j] = float(R2[i,j]) * sc
+    except Exception:
+        pass
+
+    # Clamp negative profits to 0 (avoid confusing negative totals in farmer UI)
+    try:
+        R1 = np.where(np.isfinite(R1) & (R1 < 0), 0.0, R1)
+        R2 = np.where(np.isfinite(R2) & (R2 < 0), 0.0, R2)
+    except Exception:
+        pass
+
+    # Profit realism: cap/discount per-da net profits to avoid "too good to be true" plans
+    # when economics are assumed. This keeps totals closer to defendable ranges.
+    try:
+        R1 = _apply_profit_realism(R1, crop_list)
+        R2 = _apply_profit_realism(R2, crop_list)
+    except Exception:
+        pass
+
+    # Final infeasible fill (no fabricated medians)
+    inf1 = (~np.isfinite(W1)) | (~np.isfinite(R1)) | (W1 < 0)
+    inf2 = (~np.isfinite(W2)) | (~np.isfinite(R2)) | (W2 < 0)
+    if crop_list and crop_list[0] == FALLOW:
+        inf1[:, 0] = False
+        inf2[:, 0] = False
+    W1 = np.where(inf1, 1e9, W1); R1 = np.where(inf1, 0.0, R1)
+    W2 = np.where(inf2, 1e9, W2); R2 = np.where(inf2, 0.0, R2)
+
+    return crop_list, W1, R1, W2, R2, month_use1, month_use2
+
+
+# -----------------------------
+# Senaryo-2 (bahçe/perennial) kısıtı ve sulama ayarı
+# -----------------------------
+
+PERENNIAL_CROPS = {
+    normalize_crop_key(x) for x in [
+        "CEVIZ","BADEM","UZUM","UZUM_SOFRALIK","UZUM_SARAPLIK","ELMA","ARMUT","KAYISI",
+        "SEFTALI","NAR","KIRAZ","ZEYTIN","FISTIK","FINDIK","INCIR","AYVA",
+    ]
+}
+
+def _compute_perennial_locks(selected_parcels: List[Dict[str,Any]], year: int, crop_list: List[str], season_source: str) -> np.ndarray:
+    """For Senaryo-2, if a parcel is a fruit-orchard/perennial in that year, lock crop choice to that crop.
+
+    This prevents unrealistic switching of an established orchard to a different product.
+    """
+    return _locks_for_crops(_perennial_lock_keys(selected_parcels, year, season_source), crop_list)
+
+
+def _locks_for_crops(lock_keys: List[Optional[str]], crop_list: List[str]) -> np.ndarray:
+    """Per-parcel locked crop index in `crop_list` (-1 = free)."""
+    idx_crop = {c: i for i, c in enumerate(crop_list)}
+    return np.array([idx_crop.get(k, -1) if k else -1 for k in lock_keys], dtype=int)
+
+
+def _perennial_lock_keys(selected_parcels: List[Dict[str,Any]], year: int, season_source: str) -> List[Optional[str]]:
+    """Per-parcel perennial crop key that _compute_perennial_locks locks to (None = free)."""
+    P = len(selected_parcels)
+    keys: List[Optional[str]] = [None] * P
+    src = str(season_source or "both").lower()
+    if src != "s2" or P == 0:
+        return keys
+
+    seasons = seasons_for_year("s2", year)
+    if seasons.empty:
+        return keys
+
+    # dominant crop by area
+    dom = seasons.groupby(["parcel_id","crop_key"], dropna=False).agg(area=("area_da","sum")).reset_index()
+    dom = dom.sort_values(["parcel_id","area"], ascending=[True, False])
+    dom = dom.drop_duplicates(subset=["parcel_id"], keep="first")
+    dom_map = {str(r["parcel_id"]): str(r["crop_key"]) for _, r in dom.iterrows()}
+
+    for i, p in enumerate(selected_parcels):
+        ck = dom_map.get(str(p.get("id")))
+        if ck and (ck in PERENNIAL_CROPS):
+            keys[i] = ck
+    return keys
+
+
+def _apply_s2_irrigation_adjustments(objective: str) -> Tuple[float, float, str]:
+    """Return (water_mult, profit_mult, label) for Senaryo-2 orchard parcels."""
+    obj = (objective or "balanced").lower()
+    if obj == "water_saving":
+        return 0.80, 0.90, "Damla + kontrollü kısıntı (%20)"
+    if obj == "max_profit":
+        return 1.00, 1.00, "Standart sulama (verim odaklı)"
+    return 0.90, 0.95, "Damla + hafif kısıntı (%10)"
+
+
+# -----------------------------
+# Per-request planning context
+# -----------------------------
+
+# One dict per optimize request (same convention as the GA ctx): built by
+# build_planning_context, read by the optimizers, the recommendation builders and _to_ui_payload.
+PlanningContext = Dict[str, Any]
+
+
+def _ctx_stage(ctx: PlanningContext, stage: str, t0: float) -> float:
+    """Add the time since `t0` to ctx["timings_ms"][stage]; returns the current clock."""
+    now = time.perf_counter()
+    tm = ctx.setdefault("timings_ms", {})
+    tm[stage] = round(float(tm.get(stage, 0.0)) + (now - t0) * 1000.0, 3)
+    _stage_add(stage, (now - t0) * 1000.0)
+    return now
+
+
+def _optimizer_done(ctx: PlanningContext, algorithm: str, t_opt: float, e_opt: int) -> None:
+    """Close the "optimizer" stage and count the run for /metrics (e_opt: _eval_count() at start)."""
+    _ctx_stage(ctx, "optimizer", t_opt)
+    metrics.inc("akkaya_optimizer_runs_total", algorithm=algorithm)
+    metrics.inc("akkaya_optimizer_evaluations_total", _eval_count() - e_opt, algorithm=algorithm)
+    metrics.observe("akkaya_optimizer_duration_seconds", time.perf_counter() - t_opt, algorithm=algorithm)
+
+
+def build_planning_context(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    season_source: str = "both",
+    budget_ratio: float = 1.0,
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+) -> PlanningContext:
+    """Build everything one optimize request needs, exactly once.
+
+    Two-season matrices (irrigation method and Senaryo-2 orchard multipliers applied), basin
+    budget and delivery caps (None when caps are off), perennial locks, crop families and
+    rotation rules. Single-season matrices are added on first use (_planning_single).
+    Stage times accumulate in ``ctx["timings_ms"]`` (``ctx["started"]``: perf_counter at build).
+    """
+    t0 = time.perf_counter()
+    P = len(selected_parcels)
+    ctx: PlanningContext = {
+        "started": t0, "parcels": selected_parcels, "P": P, "year": int(year), "objective": objective,
+        "season_source": season_source, "budget_ratio": float(budget_ratio or 1.0),
+        "env_flow_ratio": float(env_flow_ratio or 0.0), "irrigation_method": irrigation_method,
+        "enforce_delivery_caps": bool(enforce_delivery_caps), "water_model": water_model,
+        "risk_mode": risk_mode, "risk_lambda": float(risk_lambda or 0.0), "risk_samples": int(risk_samples or 120),
+        "water_quality_filter": bool(water_quality_filter),
+        "areas": np.array([float(p.get("area_da", 0) or 0) for p in selected_parcels], dtype=float),
+        "parcel_ids": [str(p.get("id")) for p in selected_parcels],
+        "single": None, "timings_ms": {},
+    }
+
+    crop_list, W1, R1, W2, R2, MU1, MU2 = build_candidate_matrix_two_season(
+        selected_parcels, year=year, season_source=season_source,
+        water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples,
+        water_quality_filter=water_quality_filter,
+    )
+    if irrigation_method:
+        W1 = apply_irrigation_method_to_W(W1, selected_parcels, irrigation_method)
+        W2 = apply_irrigation_method_to_W(W2, selected_parcels, irrigation_method)
+    t = _ctx_stage(ctx, "matrices", t0)
+
+    base_budget, month_weights, month_caps = basin_budget_and_delivery_caps(
+        int(year), selected_parcels, env_flow_ratio=float(env_flow_ratio or 0.0))
+    if not enforce_delivery_caps:
+        month_weights, month_caps = None, None
+    ctx.update(base_budget=float(base_budget), budget=max(1.0, float(base_budget) * ctx["budget_ratio"]),
+               month_weights=month_weights, month_caps=month_caps)
+    t = _ctx_stage(ctx, "budget", t)
+
+    lock_keys = _perennial_lock_keys(selected_parcels, int(year), season_source)
+    locks = _locks_for_crops(lock_keys, crop_list)
+    lock_mask = (locks >= 0)
+    irrigation_label = None
+    if np.any(lock_mask):
+        wmul, pmul, irrigation_label = _apply_s2_irrigation_adjustments(objective)
+        W1 = W1.copy(); W2 = W2.copy(); R1 = R1.copy(); R2 = R2.copy()
+        W1[lock_mask, :] *= float(wmul); W2[lock_mask, :] *= float(wmul)
+        R1[lock_mask, :] *= float(pmul); R2[lock_mask, :] *= float(pmul)
+    ctx.update(crop_list=crop_list, W1=W1, R1=R1, W2=W2, R2=R2, MU1=MU1, MU2=MU2,
+               lock_keys=lock_keys, locks=locks, lock_mask=lock_mask, irrigation_label=irrigation_label,
+               crop_family=load_crop_family_map(), rotation_rules=load_rotation_rules())
+    _ctx_stage(ctx, "locks", t)
+    return ctx
+
+
+def _planning_single(ctx: PlanningContext) -> Dict[str, Any]:
+    """Single-season view of a planning context (crop_list, W, R, locks, lock_mask,
+    irrigation_label), built on first use with the same adjustments as the two-season one."""
+    single = ctx.get("single")
+    if single is not None:
+        return single
+    t0 = time.perf_counter()
+    parcels = ctx["parcels"]
+    crop_list, W, R = build_candidate_matrix(parcels, year=ctx["year"], season_source=ctx["season_source"])
+    if ctx["irrigation_method"]:
+        W = apply_irrigation_method_to_W(W, parcels, ctx["irrigation_method"])
+    locks = _locks_for_crops(ctx["lock_keys"], crop_list)
+    lock_mask = (locks >= 0)
+    irrigation_label = None
+    if np.any(lock_mask):
+        wmul, pmul, irrigation_label = _apply_s2_irrigation_adjustments(ctx["objective"])
+        W = W.copy(); R = R.copy()
+        W[lock_mask, :] = W[lock_mask, :] * float(wmul)
+        R[lock_mask, :] = R[lock_mask, :] * float(pmul)
+    single = ctx["single"] = {"crop_list": crop_list, "W": W, "R": R, "locks": locks,
+                              "lock_mask": lock_mask, "irrigation_label": irrigation_label}
+    _ctx_stage(ctx, "matrices_single", t0)
+    return single
+
+
+def _context_for(ctx: Optional[PlanningContext], selected_parcels: List[Dict[str, Any]], year: int,
+                 objective: str, **options: Any) -> PlanningContext:
+    """`ctx` when the caller already built one, else a fresh context for a direct call."""
+    if ctx is not None:
+        return ctx
+    return build_planning_context(selected_parcels, year, objective, **options)
+
+
+# -----------------------------
+# UI çıktı formatı (en az 2 ürün + 2 sezon etiketleri)
+# -----------------------------
+
+
+def _objective_alpha_beta(objective: str) -> Tuple[float, float]:
+    """Return (profit_weight, water_weight).
+
+    Naming kept for backward compatibility, but semantics are:
+      - higher profit_weight => profit contributes more to fitness
+      - higher water_weight  => water use is penalized more
+
+    NOTE: Fitness uses *normalized* profit/water, so these weights are meaningful.
+    """
+    obj = str(objective or "balanced").lower()
+    if obj == "water_saving":
+        return 0.80, 1.60
+    if obj == "max_profit":
+        return 1.40, 0.40
+    return 1.00, 1.00
+def _build_two_crop_recommendations(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    season_source: str,
+    chosen: Optional[np.ndarray] = None,
+    budget_ratio: float = 1.0,
+    # v26+ project options
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+    ctx: Optional[PlanningContext] = None,
+) -> Dict[str, Any]:
+    """UI-friendly 1. ürün + 2. ürün planı.
+
+    Bu sürümde Senaryo-1 için kritik kurallar:
+      1) **Ana ürün** mutlaka 15 ürün havuzundan seçilir.
+      2) **İkinci ürün** (hasat sonrası) Niğde'de yaygın ve toprak için faydalı düşük-su havuzundan seçilir.
+      3) Yıllık toplam su: (Ana ürün suyu + İkinci ürün suyu) alan ile çarpılarak net şekilde raporlanır.
+
+    ``ctx``: the optimizer's planning context (same matrices/budget/locks); built when omitted.
+    """
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode,
+                       risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    single = _planning_single(ctx)
+    crop_list, W, R = single["crop_list"], single["W"], single["R"]
+    P = int(ctx["P"])
+    C = len(crop_list)
+    if P == 0 or C == 0:
+        return {"parcels": [], "totals": {"water": 0.0, "profit": 0.0}, "feasible": True, "budget": 0.0}
+
+    areas = ctx["areas"]
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    # Locks for Senaryo-2 orchard parcels (irrigation adjustment already applied in ctx)
+    locks, lock_mask, irrigation_label = single["locks"], single["lock_mask"], single["irrigation_label"]
+
+    alpha, beta = _objective_alpha_beta(objective)
+    ar = np.arange(P)
+
+    # ---- Feasibility guards ----
+    # placeable: cells the primary/secondary pickers may use; valid: what a sanitized
+    # optimizer choice must also satisfy (fallow when a parcel has none).
+    INF_W = 1e8
+    placeable = np.isfinite(W) & (W < INF_W)
+    valid = placeable & np.isfinite(R) & (W >= 0.0)
+    first_valid = np.where(valid.any(axis=1), np.argmax(valid, axis=1), 0)
+
+    # Score matrix
+    score = alpha * R - beta * W
+
+    # Crop family map and small soil-health bonus for legumes
+    family_map = load_crop_family_map()
+    fams = [family_map.get(ck, "") for ck in crop_list]
+    legume = np.array([f in LEGUME_FAMILIES for f in fams], dtype=bool)
+    try:
+        legume_bonus = float(np.nanmedian(R)) * 0.05
+        score[:, legume] = score[:, legume] + legume_bonus
+    except Exception:
+        pass
+    # [C, C] family clash (both families known and equal) -> primary/secondary pairs to avoid
+    fam_code = {f: k for k, f in enumerate(sorted(set(f for f in fams if f)))}
+    codes = np.array([fam_code.get(f, -1) for f in fams], dtype=int)
+    clash = (codes[:, None] == codes[None, :]) & (codes[:, None] >= 0)
+
+    src_norm = str(season_source or "").lower().strip()
+    s1_pools = src_norm in ("s1", "senaryo1", "senaryo-1", "scenario1", "1")
+
+    # ---- Primary crop constraint (Senaryo-1 15 ürün) ----
+    primary_allowed = np.zeros(C, dtype=bool)
+    if s1_pools:
+        primary_15 = [
+            "PATATES","SİLAJLIK MISIR","YONCA (YEŞİLOT)","BUĞDAY (DANE)","ARPA (DANE)","ŞEKER PANCARI","ÇAVDAR (DANE)",
+            "SALÇALIK DOMATES","SOFRALIK DOMATES","LAHANA (BEYAZ)","KABAK (ÇEREZLİK)","FASULYE (TAZE)","SOĞAN (KURU)","KAVUN","SALÇALIK BİBER"
+        ]
+        primary_15 = set([normalize_crop_key(x) for x in primary_15])
+        primary_allowed = np.array([c in primary_15 for c in crop_list], dtype=bool)
+
+    # Choose primary: the optimizer's choice (sanitized), else the best allowed feasible crop
+    if chosen is not None and len(chosen) == P:
+        primary_idx = np.asarray(chosen, dtype=int).copy()
+        ok = (primary_idx >= 0) & (primary_idx < C)
+        ok[ok] = valid[ar[ok], primary_idx[ok]]
+        primary_idx = np.where(ok, primary_idx, first_valid)
+    else:
+        row = score.copy()
+        if primary_allowed.any():
+            row[:, ~primary_allowed] = -1e18
+        row[~placeable] = -1e18
+        primary_idx = np.argmax(row, axis=1)
+
+    # Apply orchard locks (a lock on an infeasible cell keeps the sanitized choice, as in the optimizers)
+    if np.any(lock_mask):
+        lock_ok = lock_mask & (W[ar, np.maximum(locks, 0)] < INF_W)
+        primary_idx[lock_ok] = locks[lock_ok]
+
+    # ---- Secondary crop constraint (Senaryo-1 ikinci sezon havuzu) ----
+    second_pool = set([normalize_crop_key(x) for x in [
+        "FİĞ (YEŞİLOT)","KORUNGA (YEŞİLOT)","BURÇAK (YEŞİLOT)","YEM BEZELYESİ","NOHUT","YEŞİL MERCİMEK","KURU FASULYE","YULAF (YEŞİLOT)"
+    ]])
+
+    # Candidates [P, C]: feasible, not the primary, not the primary's family; Senaryo-1 prefers
+    # the second-season pool and falls back to any such crop.
+    cand = placeable & (np.arange(C)[None, :] != primary_idx[:, None]) & ~clash[primary_idx]
+    if s1_pools:
+        pooled = cand & np.array([c in second_pool for c in crop_list], dtype=bool)[None, :]
+        cand = np.where(pooled.any(axis=1, keepdims=True), pooled, cand)
+    # Rank (legume, lower water, score) lexicographically; ties keep the first crop.
+    best = cand.copy()
+    for key in (np.broadcast_to(legume.astype(float), (P, C)), -W, score):
+        k = np.where(best, np.nan_to_num(key, nan=-np.inf), -np.inf)
+        best &= (k == k.max(axis=1, keepdims=True))
+    secondary_idx = np.where(cand.any(axis=1), np.argmax(best, axis=1), primary_idx)
+
+    # Orchard: cover crop = minimum water feasible
+    if np.any(lock_mask):
+        lw = np.where(placeable.any(axis=1), np.argmin(np.where(placeable, W, np.inf), axis=1), primary_idx)
+        cover = lock_mask & (lw != primary_idx)
+        secondary_idx[cover] = lw[cover]
+
+    # Decide whether to actually use a secondary crop (show at most 2 options to user).
+    # Default: only add a second crop if it improves water efficiency and/or soil health
+    # without sacrificing too much profitability.
+    w1 = W[ar, primary_idx]; w2 = W[ar, secondary_idx]
+    r1 = R[ar, primary_idx]; r2 = R[ar, secondary_idx]
+    soil_ok = legume[secondary_idx]
+    water_ok = np.isfinite(w2) & np.isfinite(w1) & (w2 <= w1 * 0.95)
+    profit_ok = np.isfinite(r2) & np.isfinite(r1) & (r2 >= r1 * 0.40)
+    # If neither water saving nor soil benefit, skip second crop; if it saves water but
+    # destroys profit, skip as well.
+    use_second = (water_ok | soil_ok) & ~(~profit_ok & (r1 > 0))
+    # WATER-SAVING POLICY:
+    # In "water_saving" objective we do NOT recommend a second crop (double-cropping) for annual parcels,
+    # because farmers explicitly want lower total water use; a second crop often increases seasonal water demand.
+    # Scenario-2 orchard/perennial parcels (lock_mask) can still keep a cover crop if locked by rules.
+    if str(objective).lower() in ("water_saving","su_tasarruf","su tasarruf","tasarruf"):
+        use_second[:] = False
+    use_second |= lock_mask  # orchards: keep a cover crop
+    secondary_idx = np.where(use_second, secondary_idx, primary_idx)
+
+    # Area split (same parcel içinde iki sezon)
+    # If use_second[i] is False, keep only one crop (a2=0).
+    a1 = np.maximum(0.0, np.round(areas.copy(), 1))
+    a2 = np.zeros(P, dtype=float)
+    a1[use_second] = np.maximum(0.0, np.round(areas[use_second] * 0.70, 1))
+    a2[use_second] = np.maximum(0.0, np.round(areas[use_second] - a1[use_second], 1))
+    a2[lock_mask] = np.round(np.maximum(0.1, areas[lock_mask] * 0.1), 1)
+    a1[lock_mask] = np.round(np.maximum(0.1, areas[lock_mask] - a2[lock_mask]), 1)
+
+    w1 = W[ar, primary_idx]; w2 = W[ar, secondary_idx]
+    r1 = R[ar, primary_idx]; r2 = R[ar, secondary_idx]
+
+    def totals(a1_, a2_):
+        return float(np.sum(a1_ * w1 + a2_ * w2)), float(np.sum(a1_ * r1 + a2_ * r2))
+
+    # Water budget fit: within each parcel move area from the thirstier crop to the other one,
+    # parcels with the largest saving per da first, only as much as the budget needs
+    # (0.1 da steps; 0.1 da of each crop stays on the parcel).
+    it = 0
+    w_tot, p_tot = totals(a1, a2)
+    if w_tot > budget + 1e-6:
+        hi_first = w1 > w2
+        gain = np.abs(w1 - w2)
+        gain = np.where(np.isfinite(gain), gain, 0.0)
+        movable = np.floor((np.where(hi_first, a1, a2) - 0.1) * 10.0 + 1e-9) / 10.0
+        movable = np.where(gain > 0, np.maximum(0.0, movable), 0.0)
+        order = np.argsort(-gain, kind="stable")
+        saved = np.cumsum(movable[order] * gain[order])
+        excess = w_tot - budget
+        k = int(np.searchsorted(saved, excess))
+        move = np.zeros(P, dtype=float)
+        move[order[:k]] = movable[order[:k]]
+        if k < P:
+            j = order[k]
+            rest = excess - (float(saved[k - 1]) if k else 0.0)
+            move[j] = min(movable[j], np.ceil(rest / gain[j] * 10.0 - 1e-9) / 10.0)
+        a1 = np.round(np.where(hi_first, a1 - move, a1 + move), 1)
+        a2 = np.round(np.where(hi_first, a2 + move, a2 - move), 1)
+        w_tot, p_tot = totals(a1, a2)
+        it = int(np.any(move > 0))
+
+    feasible = bool(w_tot <= budget + 1e-6)
+
+    delivery_report = compute_monthly_delivery_report(
+        total_water_m3=float(w_tot),
+        month_weights=month_weights,
+        month_caps=month_caps,
+        months=12,
+        monthly_demand_override=None,
+    )
+    if delivery_report is not None and (not delivery_report.get("feasible_monthly", True)):
+        feasible = False
+
+    # --- Irrigation suggestion + transparent saving ---
+    crop_irrig_map = {}
+    try:
+        _p = DATA_DIR / "crop_irrigation_map.json"
+        if _p.exists():
+            crop_irrig_map = load_json(_p) or {}
+    except Exception:
+        crop_irrig_map = {}
+
+    eff_map = {"sprinkler_pivot": 0.68, "sprinkler": 0.68, "surface_furrow": 0.47, "drip": 0.83, "rainfed": 1.0}
+    try:
+        _im = load_enhanced_frames().get("irrigation_methods")
+        if _im is not None and len(_im) > 0 and "method" in _im.columns and "typical_total_efficiency" in _im.columns:
+            for _, rr in _im.iterrows():
+                eff_map[str(rr["method"]).strip()] = float(rr["typical_total_efficiency"])
+    except Exception:
+        pass
+
+    def _irrig_block(crop_name: str, area_da: float, water_per_da: float) -> Dict[str, Any]:
+        info = crop_irrig_map.get(crop_name, {}) if isinstance(crop_irrig_map, dict) else {}
+        cur = str(info.get("default", "")) if info else ""
+        recm = str(info.get("recommended", "")) if info else ""
+        if cur == "" and recm == "":
+            return {"irrigationCurrent": None, "irrigationRecommended": None, "irrigationCurrentKey": None, "irrigationSuggestedKey": None, "waterSavingPct": 0.0, "waterSavingPerDa": 0.0, "waterSavingTotal": 0.0}
+        if recm == "":
+            recm = cur
+        eff_cur = float(eff_map.get(cur, 1.0)) if cur else 1.0
+        eff_rec = float(eff_map.get(recm, eff_cur)) if recm else eff_cur
+        if eff_cur <= 0 or eff_rec <= 0:
+            return {"irrigationCurrent": cur or None, "irrigationRecommended": recm or None, "irrigationCurrentKey": cur or None, "irrigationSuggestedKey": recm or None, "waterSavingPct": 0.0, "waterSavingPerDa": 0.0, "waterSavingTotal": 0.0}
+        new_water_per_da = float(water_per_da) * (eff_cur / eff_rec)
+        saving_per_da = max(0.0, float(water_per_da) - new_water_per_da)
+        saving_pct = 0.0 if float(water_per_da) <= 0 else min(1.0, saving_per_da / float(water_per_da))
+        return {
+            "irrigationCurrent": cur or None,
+            "irrigationRecommended": recm or None,
+            "irrigationCurrentKey": cur or None,
+            "irrigationSuggestedKey": recm or None,
+            "waterSavingPct": float(saving_pct),
+            "waterSavingPerDa": float(saving_per_da),
+            "waterSavingTotal": float(saving_per_da * float(area_da)),
+        }
+
+    # Season labels from the Scenario-1 calendar (same source as _build_two_season_recommendations)
+    s1_rules = {}
+    try:
+        _p = DATA_DIR / 'scenario1_crop_calendar.json'
+        if _p.exists():
+            s1_rules = load_json(_p) or {}
+    except Exception:
+        s1_rules = {}
+
+    # Senaryo-1 primary candidates per parcel, best (profit - 0.0001*water) first
+    option_order = None
+    if s1_pools and primary_allowed.any():
+        allowed = np.flatnonzero(primary_allowed)
+        option_order = allowed[np.argsort(-(R[:, allowed] - 0.0001 * W[:, allowed]), axis=1, kind="stable")]
+
+    parcels_out = []
+    for i, p in enumerate(selected_parcels):
+        c1 = crop_list[int(primary_idx[i])]
+        c2 = crop_list[int(secondary_idx[i])]
+        w1 = float(W[i, int(primary_idx[i])]); w2 = float(W[i, int(secondary_idx[i])])
+        p1 = float(R[i, int(primary_idx[i])]); p2 = float(R[i, int(secondary_idx[i])])
+        wt1 = float(a1[i] * w1); wt2 = float(a2[i] * w2)
+        pt1 = float(a1[i] * p1); pt2 = float(a2[i] * p2)
+
+        # Season labels from Scenario-1 calendar rules (data-driven)
+        rule1 = s1_rules.get(c1, {}) if isinstance(s1_rules, dict) else {}
+        # Season labels from Scenario-1 calendar rules (if available)
+        rule1 = (s1_rules.get(c1, {}) if isinstance(s1_rules, dict) else {})
+        season1 = (rule1.get("primary_season") or rule1.get("season") or "—")
+        rule2 = (s1_rules.get(c2, {}) if isinstance(s1_rules, dict) else {})
+        season2 = (rule1.get("secondary_season") if (rule1.get("secondary_crop") == c2) else (rule2.get("primary_season") or rule2.get("season") or "—"))
+
+        rec = [
+            {
+                "name": c1,
+                "season": season1,
+                "area": float(a1[i]),
+                "waterPerDa": w1,
+                "waterTotal": wt1,
+                "profitPerDa": p1,
+                "profitTotal": pt1,
+                **_irrig_block(c1, float(a1[i]), w1),
+                "reason": "Ana ürün: 15 ürün havuzundan (su-kâr dengesi + parsel uygunluğu)"
+            },
+            {
+                "name": c2,
+                "season": season2,
+                "area": float(a2[i]),
+                "waterPerDa": w2,
+                "waterTotal": wt2,
+                "profitPerDa": p2,
+                "profitTotal": pt2,
+                **_irrig_block(c2, float(a2[i]), w2),
+                "reason": "İkinci ürün: Niğde'de yaygın + düşük su + rotasyon/toprak faydası"
+            },
+        ]
+        if irrigation_label is not None and bool(lock_mask[i]):
+            for r in rec:
+                r["irrigation_plan"] = irrigation_label
+                r["reason"] = "Bahçe ürünü kilitli (Senaryo-2): ürün değişmez; sulama planı uygulanır."
+
+        parcel_annual = {
+            "annualWaterTotal": float(wt1 + wt2),
+            "annualProfitTotal": float(pt1 + pt2),
+        }
+
+        # Optional transparency list for Senaryo-1 primary candidates
+        all_options = None
+        if s1_pools and option_order is not None:
+            try:
+                opts = []
+                for j in option_order[i].tolist():
+                    cname = crop_list[j]
+                    wpd = float(W[i, j]); ppd = float(R[i, j])
+                    blk = _irrig_block(cname, float(areas[i]), wpd)
+                    opts.append({
+                        "name": cname,
+                        "area": float(areas[i]),
+                        "waterPerDa": wpd,
+                        "profitPerDa": ppd,
+                        "waterTotal": float(wpd * float(areas[i])),
+                        "profitTotal": float(ppd * float(areas[i])),
+                        **blk
+                    })
+                all_options = opts
+            except Exception:
+                all_options = None
+
+        parcels_out.append({
+            "id": str(p.get("id")),
+            "result": {"recommended": rec, "all_options": all_options, **parcel_annual},
+        })
+
+    return {
+        "parcels": parcels_out,
+        "budget": float(budget),
+        "delivery_report": delivery_report,
+        "totals": {"water": float(w_tot), "profit": float(p_tot)},
+        "feasible": feasible,
+        "iterations": int(it),
+        "formula": {
+            "water_m3": "Su (m³) = Alan(da) × SuYoğunluğu(m³/da) (1. sezon + 2. sezon)",
+            "profit_tl": "Kâr (TL) = Alan(da) × NetKârYoğunluğu(TL/da) (1. sezon + 2. sezon)",
+            "score": "Skor = α·Kâr - β·Su (bütçe aşımı cezası)",
+        },
+        "weights": {"alpha": float(alpha), "beta": float(beta)},
+    }
+
+
+def _build_two_season_recommendations(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    season_source: str,
+    chosen_primary: np.ndarray,
+    chosen_secondary: np.ndarray,
+    budget_ratio: float = 1.0,
+    # v26+ project options
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+    ctx: Optional[PlanningContext] = None,
+) -> Dict[str, Any]:
+    """UI-friendly plan with **two seasons** (primary + secondary).
+
+    Compared to the older '_build_two_crop_recommendations', this represents
+    sequential double-cropping on the *same* parcel area within a year.
+
+    Totals:
+      water_m3 = Σ(area_da * (W_primary + W_secondary))
+      profit_tl = Σ(area_da * (R_primary + R_secondary))
+
+    ``ctx`` is the optimizer's planning context, so totals use exactly the matrices the plan
+    was optimized on (irrigation method, water model, risk options, orchard adjustments).
+    """
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode,
+                       risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    crop_list, W1, R1, W2, R2, MU1, MU2 = (ctx[k] for k in ("crop_list", "W1", "R1", "W2", "R2", "MU1", "MU2"))
+    P = int(ctx["P"])
+    areas = ctx["areas"]
+
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    # Senaryo-2 orchard locks (irrigation adjustment already applied in ctx)
+    locks, lock_mask, irrigation_label = ctx["locks"], ctx["lock_mask"], ctx["irrigation_label"]
+
+    # Enforce locks on primary season; a lock on an infeasible cell keeps the optimizer's
+    # sanitized choice (see _enforce_encoded) instead of reintroducing the 1e9 placeholder.
+    ch1 = chosen_primary.astype(int).copy()
+    ch2 = chosen_secondary.astype(int).copy()
+    if np.any(lock_mask):
+        lock_ok = lock_mask & (W1[np.arange(P), np.maximum(locks, 0)] < 1e8)
+        ch1[lock_ok] = locks[lock_ok]
+        # secondary: keep as provided (usually cover crop), but avoid same crop when possible
+        for i in np.where(lock_mask)[0].tolist():
+            if ch2[i] == ch1[i]:
+                ch2[i] = int(np.argmin(W2[i, :]))
+
+    total_water = float(np.sum(areas * (W1[np.arange(P), ch1] + W2[np.arange(P), ch2])))
+    total_profit = float(np.sum(areas * (R1[np.arange(P), ch1] + R2[np.arange(P), ch2])))
+    feasible = bool(total_water <= budget + 1e-6)
+
+    # Monthly delivery caps
+    monthly_demand_override = _monthly_demand_from_mu(areas, MU1, MU2, ch1, ch2)
+    delivery_report = compute_monthly_delivery_report(
+        total_water_m3=float(total_water),
+        month_weights=month_weights,
+        month_caps=month_caps,
+        months=12,
+        monthly_demand_override=monthly_demand_override,
+    )
+    if delivery_report is not None and (not delivery_report.get("feasible_monthly", True)):
+        feasible = False
+
+    # --- Season labels + irrigation suggestion (data-driven, like single-season recommender) ---
+    s1_rules = {}
+    try:
+        _p = DATA_DIR / 'scenario1_crop_calendar.json'
+        if _p.exists():
+            s1_rules = load_json(_p) or {}
+    except Exception:
+        s1_rules = {}
+
+    crop_irrig_map = {}
+    try:
+        _p = DATA_DIR / 'crop_irrigation_map.json'
+        if _p.exists():
+            crop_irrig_map = load_json(_p) or {}
+    except Exception:
+        crop_irrig_map = {}
+
+    eff_map = {'sprinkler_pivot': 0.68, 'sprinkler': 0.68, 'surface_furrow': 0.47, 'drip': 0.83, 'rainfed': 1.0}
+    try:
+        _im = load_enhanced_frames().get('irrigation_methods')
+        if _im is not None and len(_im) > 0 and 'method' in _im.columns and 'typical_total_efficiency' in _im.columns:
+            for _, rr in _im.iterrows():
+                eff_map[str(rr['method']).strip()] = float(rr['typical_total_efficiency'])
+    except Exception:
+        pass
+
+    def _season_label(crop: str, which: str='primary') -> str:
+        rule = (s1_rules.get(crop, {}) if isinstance(s1_rules, dict) else {})
+        if which == 'primary':
+            return str(rule.get('primary_season') or rule.get('season') or '—')
+        # secondary
+        return str(rule.get('secondary_season') or '—')
+
+    def _irrig_block(crop_name: str, area_da: float, water_per_da: float):
+        info = crop_irrig_map.get(crop_name, {}) if isinstance(crop_irrig_map, dict) else {}
+        cur = str(info.get('default', '')) if info else ''
+        recm = str(info.get('recommended', '')) if info else ''
+        if cur == '' and recm == '':
+            return {'irrigationCurrent': None, 'irrigationRecommended': None, 'irrigationCurrentKey': None, 'irrigationSuggestedKey': None, 'waterSavingPct': 0.0, 'waterSavingPerDa': 0.0, 'waterSavingTotal': 0.0}
+        if recm == '':
+            recm = cur
+        eff_cur = float(eff_map.get(cur, 1.0)) if cur else 1.0
+        eff_rec = float(eff_map.get(recm, eff_cur)) if recm else eff_cur
+        if eff_cur <= 0 or eff_rec <= 0:
+            return {'irrigationCurrent': cur or None, 'irrigationRecommended': recm or None, 'irrigationCurrentKey': cur or None, 'irrigationSuggestedKey': recm or None, 'waterSavingPct': 0.0, 'waterSavingPerDa': 0.0, 'waterSavingTotal': 0.0}
+        new_water_per_da = float(water_per_da) * (eff_cur / eff_rec)
+        saving_per_da = max(0.0, float(water_per_da) - new_water_per_da)
+        saving_pct = 0.0 if float(water_per_da) <= 0 else min(1.0, saving_per_da / float(water_per_da))
+        return {
+            'irrigationCurrent': cur or None,
+            'irrigationRecommended': recm or None,
+            'irrigationCurrentKey': cur or None,
+            'irrigationSuggestedKey': recm or None,
+            'waterSavingPct': float(saving_pct),
+            'waterSavingPerDa': float(saving_per_da),
+            'waterSavingTotal': float(saving_per_da * float(area_da)),
+        }
+
+    parcels_out = []
+    for i, p in enumerate(selected_parcels):
+        c1 = crop_list[int(ch1[i])]
+        c2 = crop_list[int(ch2[i])]
+        parcels_out.append({
+            "id": p.get("id"),
+            "result": {
+                "parcel": {
+                    "id": p.get("id"),
+                    "name": p.get("name"),
+                    "village": p.get("village"),
+                    "district": p.get("district"),
+                    "area_da": float(p.get("area_da", 0) or 0),
+                },
+                "recommended": [
+                    {
+                        "name": c1,
+                        "season": _season_label(c1, 'primary'),
+                        "area": float(areas[i]),
+                        "waterPerDa": float(W1[i, int(ch1[i])]),
+                        "waterTotal": float(areas[i]) * float(W1[i, int(ch1[i])]),
+                        "profitPerDa": float(R1[i, int(ch1[i])]),
+                        "profitTotal": float(areas[i]) * float(R1[i, int(ch1[i])]),
+                        **_irrig_block(c1, float(areas[i]), float(W1[i, int(ch1[i])])),
+                        "reason": "Ana ürün: iki-sezon çözümü (su bütçesi + parsel uygunluğu)"
+                    },
+                    {
+                        "name": c2,
+                        "season": _season_label(c2, 'secondary'),
+                        "area": float(areas[i]),
+                        "waterPerDa": float(W2[i, int(ch2[i])]),
+                        "waterTotal": float(areas[i]) * float(W2[i, int(ch2[i])]),
+                        "profitPerDa": float(R2[i, int(ch2[i])]),
+                        "profitTotal": float(areas[i]) * float(R2[i, int(ch2[i])]),
+                        **_irrig_block(c2, float(areas[i]), float(W2[i, int(ch2[i])])),
+                        "reason": "İkinci ürün: rotasyon + düşük su + kârlılık dengesi"
+                    }
+                ],
+                "irrigationLabel": irrigation_label,
+            }
+        })
+
+    return {
+        "parcels": parcels_out,
+        "totals": {"water": float(total_water), "profit": float(total_profit)},
+        "feasible": feasible,
+        "budget": float(budget),
+        "delivery_report": delivery_report,
+        "formula": {
+            "water_m3": "Su (m³) = Σ[Alan(da) × (SuYoğunluğu1 + SuYoğunluğu2)]",
+            "profit_tl": "Kâr (TL) = Σ[Alan(da) × (NetKârYoğunluğu1 + NetKârYoğunluğu2)]",
+        }
+    }
+
+def ga_optimize(selected_parcels: List[Dict[str,Any]], year: int, objective: str, pop_size: int=60, generations: int=120,
+                cx_rate: float=0.7, mut_rate: float=0.08, seed: Optional[int]=None, budget_ratio: float=1.0,
+                season_source: str="both", env_flow_ratio: float = 0.10, irrigation_method: Optional[str] = None, enforce_delivery_caps: bool = True,
+                stall_generations: Optional[int] = None, min_rel_improvement: float = 0.0, target_fitness: Optional[float] = None,
+                trace: bool = False, local_search: bool = False, local_search_ms: float = 250.0,
+                rng: Optional[np.random.Generator] = None, ctx: Optional[PlanningContext] = None) -> Dict[str,Any]:
+    """GA for single-crop-per-parcel assignment under water budget (early stop: see _early_stop).
+
+    ``ctx`` is the request's planning context (build_planning_context); built here when omitted.
+    ``local_search`` polishes the best plan with _local_search_single (report in meta).
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps)
+    single = _planning_single(ctx)
+    crop_list, W, R = single["crop_list"], single["W"], single["R"]
+
+    # ---- core dimensions + constraints ----
+    P = int(ctx["P"])
+    C = len(crop_list)
+    areas = ctx["areas"]
+    parcel_ids = ctx["parcel_ids"]
+
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    # ---- Feasible crop choices per parcel (single-season GA) ----
+    # Some matrices contain placeholder values (e.g., 1e9) for crops that are not
+    # suitable/available on a given parcel. If GA samples those, totals explode
+    # and efficiency collapses to ~0. We hard-filter those indices.
+    # Genes are positions in each parcel's feasible list (_feasibility_index), so an infeasible
+    # crop cannot be represented at all; fallow-only rows fall back to index 0.
+    INF_W = 1e8
+    valid = (W < INF_W) & np.isfinite(W) & np.isfinite(R) & (W >= 0.0)
+    feasible_choices = [np.flatnonzero(valid[i]) if valid[i].any() else np.array([0], dtype=int) for i in range(P)]
+    choices, n_choices, choice_pos = _feasibility_index(feasible_choices, valid)
+    ar = np.arange(P)
+
+    if P == 0 or C == 0:
+        return {
+            "algorithm": "GA",
+            "objective": objective,
+            "year": int(year),
+            "budget_ratio": float(budget_ratio or 1.0),
+            "water_budget_m3": float(budget),
+            "feasible": True,
+            "total_water_m3": 0.0,
+            "total_profit_tl": 0.0,
+            "efficiency_tl_per_m3": 0.0,
+            "details": [],
+            "meta": {"note": "no parcels/crops", "season_source": season_source},
+        }
+    locks, lock_mask, irrigation_label = single["locks"], single["lock_mask"], single["irrigation_label"]
+    lock_rows = np.flatnonzero(lock_mask)
+    lock_pos = choice_pos[lock_rows, locks[lock_rows]]
+
+    def _enforce_pop(pop: np.ndarray) -> np.ndarray:
+        # Senaryo-2 kilitleri uygula (bahçe ürünü değişmesin)
+        pop[:, lock_rows] = lock_pos
+        return pop
+    alpha, beta = _objective_alpha_beta(objective)
+
+    # ---- Normalization references (critical!) ----
+    # Profit is in TL, water is in m3; their magnitudes differ by orders.
+    # We normalize both so objective weights (alpha/beta) behave as intended.
+    # The water reference is data-driven (max-water feasible plan) so water minimization
+    # remains meaningful even when the reservoir budget is very large.
+    Wv = np.where(valid, W, -np.inf)
+    Rv = np.where(valid, R, -np.inf)
+    profit_upper_bound = float(np.sum(areas * np.where(valid.any(axis=1), Rv.max(axis=1), 0.0)))
+    water_upper_bound = float(np.sum(areas * np.where(valid.any(axis=1), Wv.max(axis=1), 0.0)))
+    if not np.isfinite(profit_upper_bound) or profit_upper_bound <= 0:
+        profit_upper_bound = 1.0
+    if not np.isfinite(water_upper_bound) or water_upper_bound <= 0:
+        water_upper_bound = 1.0
+    profit_ref = max(1.0, profit_upper_bound)
+    water_ref = max(1.0, float(min(budget, water_upper_bound)))
+
+    def fitness_of(water, profit):
+        # totals (scalars or [N] arrays) -> fitness; also the local-search objective
+        water_n = water / water_ref
+        # Budget penalty on normalized scale
+        penalty = np.maximum(0.0, water_n - 1.0) * (max(beta, 0.2) * 10.0)
+        # Fitness: maximize profit while minimizing water
+        return alpha * (profit / profit_ref) - beta * water_n - penalty
+
+    @_stage("scoring")
+    def eval_pop(pop: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # pop: [N, P] position genotype -> (fitness, water, profit), each [N]
+        _count_evals(len(pop))
+        crops = choices[ar, pop]
+        water = (areas * W[ar, crops]).sum(axis=1)
+        profit = (areas * R[ar, crops]).sum(axis=1)
+        return fitness_of(water, profit), water, profit
+
+    # Population is one [pop, P] position array; each generation is: score all, batched 3-way
+    # tournaments, uniform crossover as a boolean mask per pair, per-gene mutation of
+    # positions, locks.
+    pop_size = max(2, int(pop_size))
+    n_pairs = (pop_size + 1) // 2
+    stop = _early_stop(stall_generations, min_rel_improvement, target_fitness, trace)
+    pop = _enforce_pop(_sample_positions(n_choices, pop_size, rng))
+    best = None; best_fit = -1e99; best_water=0; best_profit=0
+
+    for g in range(generations):
+        fits, waters, profits = eval_pop(pop)
+        top = int(np.argmax(fits))
+        if fits[top] > best_fit:
+            best_fit, best_water, best_profit = float(fits[top]), float(waters[top]), float(profits[top])
+            best = pop[top].copy()
+        if _early_stop_step(stop, best_fit):
+            break
+
+        # tournament selection (k=3) for both parents of every pair at once
+        cand = rng.integers(0, pop_size, size=(2, n_pairs, 3))
+        win = np.take_along_axis(cand, fits[cand].argmax(axis=2)[..., None], axis=2)[..., 0]
+        p1 = pop[win[0]]; p2 = pop[win[1]]
+
+        # crossover
+        mask = (rng.random((n_pairs, P)) < 0.5) & (rng.random(n_pairs) < cx_rate)[:, None]
+        children = np.concatenate([np.where(mask, p2, p1), np.where(mask, p1, p2)])[:pop_size]
+
+        # mutation: each gene redrawn from that parcel's feasible crop pool with prob. mut_rate
+        _mutate_positions(children, n_choices, mut_rate, rng)
+        pop = _enforce_pop(children)
+
+    # Build per-parcel plan (100% area to chosen crop)
+    chosen = _decode_positions(best if best is not None else pop[0], choices)
+    ls_report = None
+    if local_search:
+        chosen, ls_report = _local_search_single(chosen, areas, W, R, valid, lock_mask, fitness_of, budget,
+                                                 month_weights, month_caps, time_limit_ms=local_search_ms, rng=rng)
+    plan = []
+    total_water = 0.0; total_profit = 0.0
+    for i,p in enumerate(selected_parcels):
+        j = int(chosen[i])
+        crop_key = crop_list[j]
+        water = float(areas[i] * W[i,j])
+        profit = float(areas[i] * R[i,j])
+        plan.append({
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "chosenCrop": crop_key,
+            "area_da": float(areas[i]),
+            "water_m3": water,
+            "profit_tl": profit
+        })
+        if irrigation_label is not None and bool(lock_mask[i]):
+            plan[-1]["irrigation_plan"] = irrigation_label
+        total_water += water
+        total_profit += profit
+
+    feasible = total_water <= budget + 1e-6
+    eff = (total_profit/total_water) if total_water>0 else 0.0
+    return {
+        "algorithm": "GA",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(eff),
+        "details": plan,
+        "meta": {"popSize": pop_size, "generations": generations, "alpha": alpha, "beta": beta, "season_source": season_source,
+                 "early_stop": _early_stop_meta(stop, generations),
+                 **({"local_search": ls_report} if ls_report else {})}
+    }
+
+
+
+
+@_stage("scoring")
+def _score_solution(chosen: np.ndarray, areas: np.ndarray, W: np.ndarray, R: np.ndarray, budget: float, objective: str,
+                  crop_list: Optional[List[str]] = None,
+                  month_weights: Optional[dict]=None, month_caps: Optional[dict]=None,
+    month_use1: Optional[np.ndarray]=None,
+    month_use2: Optional[np.ndarray]=None,
+                  min_unique_crops: int = 1, max_share_per_crop: Optional[float] = None,
+                  year: Optional[int] = None, parcel_ids: Optional[List[str]] = None) -> Tuple[float, float, float]:
+    """Return (fitness, total_water, total_profit). Higher fitness is better.
+
+    Fitness = profit_weight * profit  - water_weight * water * 500  - budget_penalty
+    Budget penalty is quadratic and dominates when the solution exceeds the basin budget.
+    """
+    _count_evals(1)
+    total_water = float(np.sum(areas * W[np.arange(len(areas)), chosen]))
+    total_profit = float(np.sum(areas * R[np.arange(len(areas)), chosen]))
+
+    profit_w, water_w = _objective_alpha_beta(objective)
+
+    exceed = max(0.0, total_water - float(budget))
+    penalty = (exceed / max(1.0, float(budget))) ** 2 * 1e9
+
+
+    # Monthly delivery capacity penalty (approximate)
+    monthly_pen = 0.0
+    if month_weights and month_caps:
+        for mo, w in month_weights.items():
+            cap = float(month_caps.get(mo, 0) or 0)
+            if cap > 0 and w > 0:
+                dem = float(total_water) * float(w)
+                if dem > cap:
+                    monthly_pen += ((dem - cap) / max(1.0, cap)) ** 2 * 5e8
+
+        # Diversity / portfolio penalties
+    chosen_keys = []
+    if crop_list is not None:
+        try:
+            chosen_keys = [str(crop_list[int(j)]) for j in chosen]
+        except Exception:
+            chosen_keys = []
+    div_pen = _unique_crop_penalty(chosen_keys, int(min_unique_crops or 1)) if chosen_keys else 0.0
+    share_pen = _max_share_penalty(chosen_keys, areas, max_share_per_crop) if chosen_keys else 0.0
+    prev_pen = 0.0
+    if year is not None and parcel_ids is not None and chosen_keys:
+        prev_pen = _prev_family_penalty([str(x) for x in parcel_ids], chosen_keys, int(year))
+
+    fitness = (profit_w * total_profit) - (water_w * total_water * 500.0) - penalty - monthly_pen - div_pen - share_pen - prev_pen
+    return float(fitness), float(total_water), float(total_profit)
+
+
+
+@_stage("scoring")
+def _score_population(pop: np.ndarray, areas: np.ndarray, W: np.ndarray, R: np.ndarray, budget: float, objective: str,
+                      month_weights: Optional[dict] = None, month_caps: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_score_solution for a [N, P] population (water/profit, budget and monthly delivery
+    terms; the portfolio penalties need crop keys and are not included)."""
+    pop = np.atleast_2d(np.asarray(pop, dtype=int))
+    _count_evals(len(pop))
+    ar = np.arange(pop.shape[1])
+    total_water = (areas * W[ar, pop]).sum(axis=1)
+    total_profit = (areas * R[ar, pop]).sum(axis=1)
+    fitness = _totals_fitness(total_water, total_profit, budget, objective, month_weights, month_caps)
+    return fitness, total_water, total_profit
+
+
+def _totals_fitness(total_water, total_profit, budget: float, objective: str,
+                    month_weights: Optional[dict] = None, month_caps: Optional[dict] = None):
+    """The _score_population objective from the totals (scalars or arrays)."""
+    profit_w, water_w = _objective_alpha_beta(objective)
+    penalty = (np.maximum(0.0, total_water - float(budget)) / max(1.0, float(budget))) ** 2 * 1e9
+    monthly_pen = 0.0
+    if month_weights and month_caps:
+        for mo, w in month_weights.items():
+            cap = float(month_caps.get(mo, 0) or 0)
+            if cap > 0 and w > 0:
+                dem = total_water * float(w)
+                monthly_pen = monthly_pen + np.where(dem > cap, ((dem - cap) / max(1.0, cap)) ** 2 * 5e8, 0.0)
+    return (profit_w * total_profit) - (water_w * total_water * 500.0) - penalty - monthly_pen
+
+
+def _score_components_two_season(
+    sol1: np.ndarray, sol2: np.ndarray,
+    areas: np.ndarray, W1: np.ndarray, R1: np.ndarray, W2: np.ndarray, R2: np.ndarray,
+    budget: float, objective: str,
+    crop_list: List[str], crop_family: Dict[str, str], rotation_rules: Optional[pd.DataFrame] = None,
+    month_weights: Optional[dict] = None,
+    month_caps: Optional[dict] = None,
+    month_use1: Optional[np.ndarray] = None,
+    month_use2: Optional[np.ndarray] = None,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    year: Optional[int] = None,
+    parcel_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Farmer-facing breakdown of the fitness result."""
+    fitness, total_water, total_profit = _score_solution_two_season(
+        sol1, sol2, areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules,
+        month_weights=month_weights, month_caps=month_caps,
+        month_use1=month_use1, month_use2=month_use2,
+        min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop,
+        year=year, parcel_ids=parcel_ids,
+    )
+    comp: Dict[str, Any] = {
+        "fitness": float(fitness),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "budget_m3": float(budget),
+        "over_budget_m3": float(max(0.0, total_water - budget)),
+    }
+    try:
+        crops = [crop_list[int(x)] for x in list(sol1) + list(sol2)]
+        comp["unique_crops_total"] = int(len(set(crops)))
+    except Exception:
+        pass
+    try:
+        total_area = float(np.sum(areas))
+        if total_area > 0:
+            share = {}
+            for i in range(len(areas)):
+                for s in (int(sol1[i]), int(sol2[i])):
+                    ck = crop_list[s]
+                    share[ck] = share.get(ck, 0.0) + float(areas[i])
+            for k in list(share.keys()):
+                share[k] = float(share[k] / (2.0 * total_area))
+            top = sorted(share.items(), key=lambda x: x[1], reverse=True)[:10]
+            comp["top_crop_shares"] = [{"crop": k, "share": float(v)} for k, v in top]
+    except Exception:
+        pass
+    return comp
+
+
+@_stage("scoring")
+def _score_solution_two_season(
+    chosen_primary: np.ndarray,
+    chosen_secondary: np.ndarray,
+    areas: np.ndarray,
+    W1: np.ndarray,
+    R1: np.ndarray,
+    W2: np.ndarray,
+    R2: np.ndarray,
+    budget: float,
+    objective: str,
+    crop_list: List[str],
+    crop_family: Dict[str,str],
+    rotation_rules: Optional[pd.DataFrame] = None,
+    month_weights: Optional[dict]=None,
+    month_caps: Optional[dict]=None,
+    month_use1: Optional[np.ndarray]=None,
+    month_use2: Optional[np.ndarray]=None,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    year: Optional[int] = None,
+    parcel_ids: Optional[List[str]] = None,
+) -> Tuple[float, float, float]:
+    """Two-season objective with rotation constraints.
+
+    - Total water/profit are summed across seasons.
+    - Rotation rules:
+        R1 (hard): consecutive seasons cannot be the same family (within the same year).
+        R2 (soft): legumes at least once per year => small bonus.
+    """
+    _count_evals(1)
+    P = int(len(areas))
+    idx = np.arange(P)
+
+    w1 = areas * W1[idx, chosen_primary]
+    p1 = areas * R1[idx, chosen_primary]
+    w2 = areas * W2[idx, chosen_secondary]
+    p2 = areas * R2[idx, chosen_secondary]
+
+    total_water = float(np.sum(w1) + np.sum(w2))
+    total_profit = float(np.sum(p1) + np.sum(p2))
+
+    profit_w, water_w = _objective_alpha_beta(objective)
+
+    # --- Rotation penalties/bonuses ---
+    hard_penalty = 0.0
+    soft_bonus = 0.0
+
+    fam_p = [crop_family.get(crop_list[int(j)], "other") for j in chosen_primary]
+    fam_s = [crop_family.get(crop_list[int(j)], "other") for j in chosen_secondary]
+
+    # R1: hard - no same family back-to-back
+    for i in range(P):
+        if fam_p[i] and fam_s[i] and fam_p[i] == fam_s[i]:
+            hard_penalty += 1e10
+
+    # R2: soft - legumes (low input, soil N benefit) at least once per year
+    legume_fams = {"fabaceae", "legume", "legumes"}
+    heavy_feeders = {"solanaceae", "brassicaceae", "allium", "cucurbitaceae"}
+    for i in range(P):
+        fp = fam_p[i]
+        fs = fam_s[i]
+        # stronger encouragement if the secondary crop is a legume after a heavy feeder
+        if (fs in legume_fams) and (fp in heavy_feeders):
+            soft_bonus += 4500.0
+        elif (fp in legume_fams) or (fs in legume_fams):
+            soft_bonus += 2500.0  # baseline bonus
+
+
+    # Allow external rule tuning (if provided)
+    if rotation_rules is not None and len(rotation_rules):
+        try:
+            rr = rotation_rules.copy()
+            rr["rule_id"] = rr["rule_id"].astype(str)
+            for _, r in rr.iterrows():
+                rid = str(r.get("rule_id", "")).strip().upper()
+                rtype = str(r.get("type", "")).strip().lower()
+                w = float(r.get("penalty_weight", 1.0) or 1.0)
+                if rid == "R1" and rtype == "hard":
+                    hard_penalty *= w
+                if rid == "R2" and rtype == "soft":
+                    soft_bonus *= w
+        except Exception:
+            pass
+
+    # --- Fallow (NADAS) control ---
+    # NADAS is always allowed as a last resort, but too much fallow usually means the model is
+    # over-repairing instead of suggesting alternative low-water/low-input crops.
+    try:
+        fallow_idx = int(crop_list.index(FALLOW))
+    except Exception:
+        fallow_idx = 0
+
+    total_area = float(np.sum(areas)) if areas is not None else 1.0
+    # Count fallow separately for primary/secondary; normalize by (2 * total_area) for a two-season plan.
+    fallow_area = float(np.sum(areas[chosen_primary == fallow_idx]) + np.sum(areas[chosen_secondary == fallow_idx]))
+    fallow_share = fallow_area / max(1e-9, (2.0 * total_area))
+
+    # Soft discouragement beyond a reasonable threshold; and a hard cap to prevent "all fallow" solutions.
+    # We make thresholds stricter because we now have multiple low-water/low-input alternatives (legumes, cereals, aspir).
+    if str(objective) in ("water_saving", "min_water"):
+        fallow_thr = 0.07
+        fallow_cap = 0.22
+    else:
+        fallow_thr = 0.05
+        fallow_cap = 0.18
+
+    fallow_penalty = 0.0
+    if fallow_share > fallow_thr:
+        # quadratic growth after threshold
+        fallow_penalty += ((fallow_share - fallow_thr) / max(1e-6, (1.0 - fallow_thr))) ** 2 * 4.0e9
+    if fallow_share > fallow_cap:
+        # effectively infeasible: make it extremely unattractive
+        fallow_penalty += ((fallow_share - fallow_cap) / max(1e-6, (1.0 - fallow_cap))) ** 2 * 4.0e10
+
+    # --- Low-input / soil-balance bonus ---
+    low_input_bonus = 0.0
+    for i in range(P):
+        fam_p_i = fam_p[i]
+        fam_s_i = fam_s[i]
+        if fam_s_i in legume_fams:
+            # stronger encouragement if the secondary crop is a legume after a heavy feeder
+            if fam_p_i in heavy_feeders:
+                low_input_bonus += 6000.0
+            else:
+                low_input_bonus += 3500.0
+# --- Budget penalty ---
+    exceed = max(0.0, total_water - float(budget))
+    budget_penalty = (exceed / max(1.0, float(budget))) ** 2 * 1e9
+
+    # Monthly delivery capacity penalty
+    monthly_penalty = 0.0
+    if month_caps:
+        try:
+            # If we have per-crop monthly irrigation matrices (FAO-56), enforce caps using the actual phenology.
+            if (month_use1 is not None) and (month_use2 is not None):
+                for mo_raw, cap_raw in dict(month_caps).items():
+                    cap = float(cap_raw or 0.0)
+                    if cap <= 0:
+                        continue
+                    mo = int(mo_raw)
+                    dem = float(np.sum(areas * month_use1[idx, chosen_primary, mo-1]) + np.sum(areas * month_use2[idx, chosen_secondary, mo-1]))
+                    if dem > cap:
+                        monthly_penalty += ((dem - cap) / max(1.0, cap)) ** 2 * 1e8
+            # else fall back to proportional weights
+            elif month_weights:
+                for mo, w in month_weights.items():
+                    cap = float(month_caps.get(mo, 0) or 0)
+                    if cap > 0 and w > 0:
+                        dem = float(total_water) * float(w)
+                        if dem > cap:
+                            monthly_penalty += ((dem - cap) / max(1.0, cap)) ** 2 * 1e8
+        except Exception:
+            pass
+
+
+        # Diversity / portfolio penalties (across both seasons)
+    chosen_keys_all = []
+    try:
+        chosen_keys_all = [crop_list[int(j)] for j in chosen_primary] + [crop_list[int(j)] for j in chosen_secondary]
+    except Exception:
+        chosen_keys_all = []
+    div_pen = _unique_crop_penalty(chosen_keys_all, int(min_unique_crops or 2)) if chosen_keys_all else 0.0
+    chosen_keys_primary = [crop_list[int(j)] for j in chosen_primary]
+    share_pen = _max_share_penalty(chosen_keys_primary, areas, max_share_per_crop) if chosen_keys_primary else 0.0
+    prev_pen = 0.0
+    if year is not None and parcel_ids is not None and chosen_keys_primary:
+        prev_pen = _prev_family_penalty([str(x) for x in parcel_ids], chosen_keys_primary, int(year))
+
+
+    # --- Fallow (NADAS) penalties ---
+    # Use the fallow_penalty computed above (share-based with threshold + hard cap),
+    # plus a targeted penalty when NADAS appears in the primary season despite having feasible alternatives.
+    try:
+        fallow_idx = int(crop_list.index(FALLOW))
+    except Exception:
+        fallow_idx = 0
+
+    nadas_pen = float(fallow_penalty)
+    primary_nadas_pen = 0.0
+
+    # If NADAS is chosen in primary season while any non-fallow option is feasible, add a strong penalty.
+    try:
+        for i in range(P):
+            if int(chosen_primary[i]) == int(fallow_idx):
+                row = W1[i, :]
+                mask = (np.arange(len(row)) != fallow_idx)
+                if np.any(np.isfinite(row) & (row < 1e8) & mask):
+                    primary_nadas_pen += 8e7
+    except Exception:
+        pass
+
+    fitness = (profit_w * total_profit) - (water_w * total_water * 500.0) - budget_penalty - monthly_penalty - hard_penalty + soft_bonus + low_input_bonus - div_pen - share_pen - prev_pen - nadas_pen - primary_nadas_pen
+    return float(fitness), float(total_water), float(total_profit)
+
+
+FITNESS_MEMO_SIZE = 20000
+
+
+def _fitness_memo(P: int, capacity: int = FITNESS_MEMO_SIZE) -> Optional[Dict[str, Any]]:
+    """Per-run LRU memo of population scores keyed by a 64-bit hash of the (s1, s2) genotype.
+
+    The hash is a sum of per-gene products with fixed random odd multipliers (uint64
+    wrap-around), computed for a whole population in one NumPy call. It uses its own RNG so
+    the optimizers' random streams are unchanged. ``capacity <= 0`` disables the memo.
+    """
+    if int(capacity or 0) <= 0:
+        return None
+    mult = np.random.default_rng(0x9E3779B9).integers(1, 2**63, size=(2, max(1, int(P))), dtype=np.uint64)
+    return {"table": OrderedDict(), "capacity": int(capacity), "mult": mult | np.uint64(1),
+            "hits": 0, "misses": 0}
+
+
+def _memo_stats(memo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if memo is None:
+        return {"enabled": False}
+    lookups = int(memo["hits"] + memo["misses"])
+    return {"enabled": True, "capacity": int(memo["capacity"]), "size": len(memo["table"]),
+            "lookups": lookups, "hits": int(memo["hits"]), "misses": int(memo["misses"]),
+            "hit_rate": round(memo["hits"] / lookups, 4) if lookups else 0.0}
+
+
+@_stage("scoring")
+def _score_population_memo(S1: np.ndarray, S2: np.ndarray, st: Dict[str, Any],
+                           memo: Optional[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_score_population_two_season with duplicate genotypes answered from `memo`.
+
+    Only rows whose hash is unseen (and unique within the batch) are scored; duplicates inside
+    one batch count as hits.
+    """
+    if memo is None:
+        return _score_population_two_season(S1, S2, st)
+    S1 = np.atleast_2d(np.asarray(S1, dtype=int))
+    S2 = np.atleast_2d(np.asarray(S2, dtype=int))
+    mult = memo["mult"]
+    h = (S1.astype(np.uint64) * mult[0]).sum(axis=1) + (S2.astype(np.uint64) * mult[1]).sum(axis=1)
+    table = memo["table"]
+    out = np.empty((3, len(h)))
+    miss = []
+    for n, k in enumerate(h.tolist()):
+        v = table.get(k)
+        if v is None:
+            miss.append(n)
+        else:
+            out[:, n] = v
+            table.move_to_end(k)
+    memo["hits"] += len(h) - len(miss)
+    metrics.cache_event("fitness_memo", True, len(h) - len(miss))
+    if miss:
+        miss = np.asarray(miss)
+        keys, first, inv = np.unique(h[miss], return_index=True, return_inverse=True)
+        rows = miss[first]
+        scored = np.vstack(_score_population_two_season(S1[rows], S2[rows], st))
+        out[:, miss] = scored[:, inv.ravel()]
+        for k, col in zip(keys.tolist(), scored.T.tolist()):
+            table[k] = tuple(col)
+        while len(table) > memo["capacity"]:
+            table.popitem(last=False)
+        memo["misses"] += len(rows)
+        memo["hits"] += len(miss) - len(rows)
+        metrics.cache_event("fitness_memo", False, len(rows))
+        metrics.cache_event("fitness_memo", True, len(miss) - len(rows))
+        # answered from the memo: still fitness evaluations of the optimizer, just not recomputed
+        _count_evals(len(h) - len(rows))
+    else:
+        _count_evals(len(h))
+    return out[0], out[1], out[2]
+
+
+def _population_score_tables(
+    areas: np.ndarray,
+    W1: np.ndarray,
+    R1: np.ndarray,
+    W2: np.ndarray,
+    R2: np.ndarray,
+    budget: float,
+    objective: str,
+    crop_list: List[str],
+    crop_family: Dict[str,str],
+    rotation_rules: Optional[pd.DataFrame] = None,
+    month_weights: Optional[dict]=None,
+    month_caps: Optional[dict]=None,
+    month_use1: Optional[np.ndarray]=None,
+    month_use2: Optional[np.ndarray]=None,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    year: Optional[int] = None,
+    parcel_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Per-run constants for _score_population_two_season (same arguments as
+    _score_solution_two_season). Family lookups, rule weights, previous-year family hits and
+    the monthly cap lists are resolved here once instead of once per scored plan."""
+    P, C = W1.shape
+    legume_fams = {"fabaceae", "legume", "legumes"}
+    heavy_feeders = {"solanaceae", "brassicaceae", "allium", "cucurbitaceae"}
+    fams = [crop_family.get(crop_list[j], "other") for j in range(C)]
+    fam_names = {f: k for k, f in enumerate(dict.fromkeys(fams))}
+    try:
+        fallow_idx = int(crop_list.index(FALLOW))
+    except Exception:
+        fallow_idx = 0
+
+    hard_w, soft_w = 1.0, 1.0
+    if rotation_rules is not None and len(rotation_rules):
+        try:
+            rr = rotation_rules.copy()
+            rr["rule_id"] = rr["rule_id"].astype(str)
+            for _, r in rr.iterrows():
+                rid = str(r.get("rule_id", "")).strip().upper()
+                rtype = str(r.get("type", "")).strip().lower()
+                w = float(r.get("penalty_weight", 1.0) or 1.0)
+                if rid == "R1" and rtype == "hard":
+                    hard_w *= w
+                if rid == "R2" and rtype == "soft":
+                    soft_w *= w
+        except Exception:
+            pass
+
+    # monthly caps: (month index, cap) with phenology matrices, else (weight, cap) pairs
+    cap_months: List[Tuple[int, float]] = []
+    cap_weights: List[Tuple[float, float]] = []
+    if month_caps:
+        try:
+            if (month_use1 is not None) and (month_use2 is not None):
+                for mo_raw, cap_raw in dict(month_caps).items():
+                    cap = float(cap_raw or 0.0)
+                    if cap <= 0:
+                        continue
+                    cap_months.append((int(mo_raw) - 1, cap))
+            elif month_weights:
+                for mo, w in month_weights.items():
+                    cap = float(month_caps.get(mo, 0) or 0)
+                    if cap > 0 and w > 0:
+                        cap_weights.append((float(w), cap))
+        except Exception:
+            pass
+
+    counted = np.array([bool(k) and k != FALLOW for k in crop_list], dtype=bool)
+    prev_hit = None
+    if year is not None and parcel_ids is not None:
+        prev = _prev_year_family_map(int(year))
+        fam_all = load_crop_family_map()
+        cf = np.array([fam_all.get(str(k), "other") for k in crop_list], dtype=object)
+        pf = np.array([prev.get(str(pid)) or "" for pid in parcel_ids], dtype=object)
+        prev_hit = (pf[:, None] == cf[None, :]) & (pf != "")[:, None] & counted[None, :]
+        prev_hit &= np.array([bool(x) for x in cf], dtype=bool)[None, :]
+
+    not_fallow = np.arange(C) != fallow_idx
+    return {
+        "P": P, "C": C, "areas": areas, "W1": W1, "R1": R1, "W2": W2, "R2": R2,
+        "budget": float(budget), "objective": str(objective),
+        "alpha_beta": _objective_alpha_beta(objective),
+        "fam_code": np.array([fam_names[f] for f in fams], dtype=int),
+        "fam_true": np.array([bool(f) for f in fams], dtype=bool),
+        "legume": np.array([f in legume_fams for f in fams], dtype=bool),
+        "heavy": np.array([f in heavy_feeders for f in fams], dtype=bool),
+        "hard_w": hard_w, "soft_w": soft_w,
+        "fallow_idx": fallow_idx,
+        "cap_months": cap_months, "cap_weights": cap_weights,
+        "month_use1": month_use1, "month_use2": month_use2,
+        "counted": counted, "min_unique": int(min_unique_crops or 2),
+        "max_share": max_share_per_crop, "prev_hit": prev_hit,
+        "alt1": np.any(np.isfinite(W1) & (W1 < 1e8) & not_fallow[None, :], axis=1),
+    }
+
+
+@_stage("scoring")
+def _score_population_two_season(S1: np.ndarray, S2: np.ndarray, st: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized _score_solution_two_season over a [N, P] population.
+
+    Returns (fitness, total_water, total_profit), each of shape [N]; term for term the same
+    objective as the scalar scorer (see there for the meaning of each penalty).
+    """
+    S1 = np.atleast_2d(np.asarray(S1, dtype=int))
+    S2 = np.atleast_2d(np.asarray(S2, dtype=int))
+    N, P = S1.shape
+    _count_evals(N)
+    C = int(st["C"])
+    areas = st["areas"]
+    ar = np.arange(P)
+    total_water = (areas * st["W1"][ar, S1]).sum(axis=1) + (areas * st["W2"][ar, S2]).sum(axis=1)
+    total_profit = (areas * st["R1"][ar, S1]).sum(axis=1) + (areas * st["R2"][ar, S2]).sum(axis=1)
+    profit_w, water_w = st["alpha_beta"]
+
+    # rotation: hard same-family clash, legume bonuses
+    fam_code, legume, heavy = st["fam_code"], st["legume"], st["heavy"]
+    hard_n = (st["fam_true"][S1] & st["fam_true"][S2] & (fam_code[S1] == fam_code[S2])).sum(axis=1)
+    hard_penalty = hard_n * 1e10 * st["hard_w"]
+    lp, ls, hp = legume[S1], legume[S2], heavy[S1]
+    soft_bonus = np.where(ls & hp, 4500.0, np.where(lp | ls, 2500.0, 0.0)).sum(axis=1) * st["soft_w"]
+    low_input_bonus = np.where(ls, np.where(hp, 6000.0, 3500.0), 0.0).sum(axis=1)
+
+    # fallow share
+    fallow_idx = int(st["fallow_idx"])
+    total_area = float(np.sum(areas))
+    fallow_area = ((S1 == fallow_idx) * areas).sum(axis=1) + ((S2 == fallow_idx) * areas).sum(axis=1)
+    fallow_share = fallow_area / max(1e-9, (2.0 * total_area))
+    if st["objective"] in ("water_saving", "min_water"):
+        fallow_thr, fallow_cap = 0.07, 0.22
+    else:
+        fallow_thr, fallow_cap = 0.05, 0.18
+    fallow_penalty = np.where(fallow_share > fallow_thr,
+                              ((fallow_share - fallow_thr) / max(1e-6, (1.0 - fallow_thr))) ** 2 * 4.0e9, 0.0)
+    fallow_penalty += np.where(fallow_share > fallow_cap,
+                               ((fallow_share - fallow_cap) / max(1e-6, (1.0 - fallow_cap))) ** 2 * 4.0e10, 0.0)
+
+    budget = st["budget"]
+    exceed = np.maximum(0.0, total_water - budget)
+    budget_penalty = (exceed / max(1.0, budget)) ** 2 * 1e9
+
+    monthly_penalty = np.zeros(N)
+    if st["cap_months"]:
+        mo = np.array([m for m, _ in st["cap_months"]], dtype=int)
+        cap = np.array([c for _, c in st["cap_months"]], dtype=float)
+        dem = np.einsum("p,npm->nm", areas, st["month_use1"][ar, S1][..., mo]) \
+            + np.einsum("p,npm->nm", areas, st["month_use2"][ar, S2][..., mo])
+        monthly_penalty = np.where(dem > cap, ((dem - cap) / np.maximum(1.0, cap)) ** 2 * 1e8, 0.0).sum(axis=1)
+    elif st["cap_weights"]:
+        w = np.array([x for x, _ in st["cap_weights"]], dtype=float)
+        cap = np.array([c for _, c in st["cap_weights"]], dtype=float)
+        dem = total_water[:, None] * w[None, :]
+        monthly_penalty = np.where(dem > cap, ((dem - cap) / np.maximum(1.0, cap)) ** 2 * 1e8, 0.0).sum(axis=1)
+
+    # portfolio: distinct crops over both seasons, max area share of primary crops
+    rows = np.arange(N)[:, None] * C
+    used = np.zeros(N * C, dtype=bool)
+    used[(rows + S1).ravel()] = True
+    used[(rows + S2).ravel()] = True
+    uniq = (used.reshape(N, C) & st["counted"]).sum(axis=1)
+    min_unique = st["min_unique"]
+    div_pen = np.zeros(N) if min_unique <= 1 else np.maximum(0, min_unique - uniq) * 5e8
+    share_pen = np.zeros(N)
+    ms = st["max_share"]
+    if ms is not None and 0.05 < float(ms) < 1.0:
+        ms = float(ms)
+        by = np.bincount((rows + S1).ravel(), weights=np.broadcast_to(areas, S1.shape).ravel(),
+                         minlength=N * C).reshape(N, C)
+        sh = by[:, st["counted"]] / (total_area if total_area > 0 else 1.0)
+        share_pen = np.where(sh > ms, ((sh - ms) / max(1e-6, ms)) ** 2 * 5e8, 0.0).sum(axis=1)
+    prev_pen = np.zeros(N)
+    if st["prev_hit"] is not None:
+        prev_pen = st["prev_hit"][ar, S1].sum(axis=1) * 2e8
+
+    primary_nadas_pen = ((S1 == fallow_idx) & st["alt1"]).sum(axis=1) * 8e7
+
+    fitness = (profit_w * total_profit) - (water_w * total_water * 500.0) - budget_penalty - monthly_penalty - hard_penalty + soft_bonus + low_input_bonus - div_pen - share_pen - prev_pen - fallow_penalty - primary_nadas_pen
+    return fitness.astype(float), total_water.astype(float), total_profit.astype(float)
+
+
+
+def _score_components_two_season(
+    sol1: np.ndarray, sol2: np.ndarray,
+    areas: np.ndarray, W1: np.ndarray, R1: np.ndarray, W2: np.ndarray, R2: np.ndarray,
+    budget: float, objective: str,
+    crop_list: List[str], crop_family: Dict[str, str], rotation_rules: Optional[pd.DataFrame] = None,
+    month_weights: Optional[dict] = None,
+    month_caps: Optional[dict] = None,
+    month_use1: Optional[np.ndarray] = None,
+    month_use2: Optional[np.ndarray] = None,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    year: Optional[int] = None,
+    parcel_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Farmer-facing breakdown of the fitness result."""
+    fitness, total_water, total_profit = _score_solution_two_season(
+        sol1, sol2, areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules,
+        month_weights=month_weights, month_caps=month_caps,
+        month_use1=month_use1, month_use2=month_use2,
+        min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop,
+        year=year, parcel_ids=parcel_ids,
+    )
+    comp: Dict[str, Any] = {
+        "fitness": float(fitness),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "budget_m3": float(budget),
+        "over_budget_m3": float(max(0.0, total_water - budget)),
+    }
+    try:
+        crops = [crop_list[int(x)] for x in list(sol1) + list(sol2)]
+        comp["unique_crops_total"] = int(len(set(crops)))
+    except Exception:
+        pass
+    try:
+        total_area = float(np.sum(areas))
+        if total_area > 0:
+            share = {}
+            for i in range(len(areas)):
+                for s in (int(sol1[i]), int(sol2[i])):
+                    ck = crop_list[s]
+                    share[ck] = share.get(ck, 0.0) + float(areas[i])
+            for k in list(share.keys()):
+                share[k] = float(share[k] / (2.0 * total_area))
+            top = sorted(share.items(), key=lambda x: x[1], reverse=True)[:10]
+            comp["top_crop_shares"] = [{"crop": k, "share": float(v)} for k, v in top]
+    except Exception:
+        pass
+    return comp
+
+
+# -----------------------------
+# Two-season feasibility + budget repair (shared by GA / ABC / ACO)
+# -----------------------------
+REPAIR_INF_W = 1e8
+REPAIR_LEGUME_FAMILIES = {"fabaceae", "legume", "legumes"}
+
+
+def _make_rng(seed: Any = None) -> np.random.Generator:
+    """Private random stream for one optimizer run.
+
+    `seed` is an int, None (fresh OS entropy) or a SeedSequence, e.g. a child from
+    _spawn_streams. Nothing touches the global `random` / `np.random` state, so concurrent
+    requests cannot disturb each other's streams.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(None if seed is None else abs(int(seed)))
+    return np.random.Generator(np.random.PCG64(seed))
+
+
+def _spawn_streams(rng: np.random.Generator, n: int) -> List[np.random.SeedSequence]:
+    """`n` independent child SeedSequences of the sequence behind `rng` (islands, workers).
+
+    Same as Generator.spawn on NumPy >= 1.25; repeated calls keep yielding new children.
+    """
+    bg = rng.bit_generator
+    ss = getattr(bg, "seed_seq", None) or getattr(bg, "_seed_seq")
+    return ss.spawn(int(n))
+
+
+def _repeat_seeds(base_seed: Any, n: int) -> List[Optional[int]]:
+    """Run seeds for `n` benchmark repeats: independent SeedSequence(base_seed).spawn children,
+    reduced to uint32 so each repeat is reproducible through the plain ``seed`` option."""
+    if base_seed in (None, "", "none", "null"):
+        return [None] * int(n)
+    try:
+        root = np.random.SeedSequence(abs(int(base_seed)))
+    except (TypeError, ValueError):
+        return [None] * int(n)
+    return [int(c.generate_state(1)[0]) for c in root.spawn(int(n))]
+
+
+def _padded_choices(feasible: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack per-parcel choice lists into a [P, Kmax] table (padded with each row's first
+    entry) plus row lengths, so a whole population can be sampled with one uniform draw
+    per gene: table[i, floor(u * n[i])]."""
+    n = np.array([max(1, len(ch)) for ch in feasible], dtype=int)
+    table = np.zeros((len(feasible), int(n.max()) if len(n) else 1), dtype=int)
+    for i, ch in enumerate(feasible):
+        ch = np.asarray(ch, dtype=int) if len(ch) else np.array([0], dtype=int)
+        table[i, :] = ch[0]
+        table[i, :len(ch)] = ch
+    return table, n
+
+
+def _feasibility_index(feasible: List[np.ndarray], valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Index-space genotype tables for one season: (table [P, Kmax], n [P], pos [P, C]).
+
+    A gene is a position k in parcel p's row and decodes to crop table[p, k]. Row p starts
+    with `feasible[p]` (the n[p] entries that sampling / mutation draw from) followed by the
+    parcel's other `valid` cells, so every plan that locks, rotation or budget repair can
+    produce is representable. pos[p, c] is the inverse; cells outside the row map to 0, the
+    parcel's first feasible crop, which is exactly what _sanitize_pair would substitute.
+    """
+    P, C = valid.shape
+    rows = []
+    for i in range(P):
+        f = np.asarray(feasible[i], dtype=int) if len(feasible[i]) else np.array([0], dtype=int)
+        rows.append(np.concatenate([f, np.setdiff1d(np.flatnonzero(valid[i]), f)]))
+    table, _ = _padded_choices(rows)
+    n = np.array([max(1, len(f)) for f in feasible], dtype=int)
+    pos = np.zeros((P, C), dtype=int)
+    for i, r in enumerate(rows):
+        pos[i, r] = np.arange(len(r))
+    return table, n, pos
+
+
+def _pick_positions(n: np.ndarray, cols: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Position floor(u * n[col]) in each parcel's choice list (u uniform in [0, 1))."""
+    return np.minimum((u * n[cols]).astype(int), n[cols] - 1)
+
+
+def _pick_choices(table: np.ndarray, n: np.ndarray, cols: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Entry floor(u * n[col]) of each parcel's choice list (u uniform in [0, 1))."""
+    return table[cols, _pick_positions(n, cols, u)]
+
+
+def _sample_positions(n: np.ndarray, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """[rows, P] position genotypes drawn uniformly from each parcel's first n[p] entries."""
+    u = rng.random((int(rows), len(n)))
+    return _pick_positions(n, np.arange(len(n)), u)
+
+
+def _sample_choices(table: np.ndarray, n: np.ndarray, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """[rows, P] individuals drawn uniformly from each parcel's choice list."""
+    return _decode_positions(_sample_positions(n, rows, rng), table)
+
+
+def _decode_positions(K: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Crop indices of a [P] or [N, P] position genotype."""
+    return table[np.arange(K.shape[-1]), K]
+
+
+def _mutate_positions(K: np.ndarray, n: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """Per-gene mutation in place: with probability `rate` a gene is redrawn from its parcel's
+    choice list. The same uniform decides both (u < rate, then u / rate is again uniform)."""
+    rate = float(rate)
+    if rate <= 0.0 or K.size == 0:
+        return K
+    u = rng.random(K.shape)
+    hit = u < rate
+    if np.any(hit):
+        pos = np.nonzero(hit)
+        K[pos] = _pick_positions(n, pos[-1], u[pos] / rate)
+    return K
+
+
+def _roulette_sources(fit: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    """ABC onlookers: `n` source indices drawn from one cumulative distribution over the
+    min-shifted fitness (same weights as the old per-onlooker np.random.choice)."""
+    p = fit - float(np.min(fit)) + 1e-9
+    cum = np.cumsum(p)
+    k = np.searchsorted(cum, rng.random(int(n)) * cum[-1], side="right")
+    return np.minimum(k, len(fit) - 1)
+
+
+def _abc_greedy(ks: np.ndarray, cand_fit: np.ndarray, fit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Greedy selection for a batch of bees: bee b proposed a neighbour of source ks[b].
+
+    Returns (bees, sources): for every source that received an improving candidate, the best
+    such bee. Sources visited several times in one batch keep only their best candidate.
+    """
+    idx = np.flatnonzero(cand_fit > fit[ks])
+    if idx.size == 0:
+        return idx, idx
+    idx = idx[np.lexsort((cand_fit[idx], ks[idx]))]
+    last = np.r_[ks[idx][1:] != ks[idx][:-1], True]
+    bees = idx[last]
+    return bees, ks[bees]
+
+
+def _build_repair_tables(W1: np.ndarray, R1: np.ndarray, W2: np.ndarray, R2: np.ndarray,
+                         crop_list: List[str], crop_family: Dict[str, str]) -> Dict[str, Any]:
+    """Per-run lookup tables for _enforce_encoded / _repair_budget_pair.
+
+    Everything the old per-individual loops re-derived with `crop_family.get` scans is
+    precomputed here once, O(F * P * C) for F crop families:
+      - valid1/valid2: cells a gene may hold (finite, W < 1e8); first1/first2 fallbacks
+      - feasible1/feasible2: per-parcel sampling lists (also requires W, R >= 0)
+      - choices1/choices2 [P, Kmax], n1/n2, pos1/pos2 [P, C]: the index-space genotype tables
+        (_feasibility_index); the first n entries of a row are that parcel's sampling list
+      - fam_idx: family id per crop
+      - pick2[i, f]: rotation-safe secondary for parcel i when the primary family is f
+        (lowest-water legume of another family, else any other family, else first feasible)
+      - sec_leg_*/sec_any_*[i, f]: lowest-water non-fallow secondary of another family
+        (legumes / any) used by budget repair; prim_min_*[i]: lowest-water non-fallow primary
+    """
+    P, C = W1.shape
+    try:
+        fallow_idx = int(crop_list.index(FALLOW))
+    except Exception:
+        fallow_idx = 0
+    ar = np.arange(P)
+
+    def _masks(W: np.ndarray, R: np.ndarray):
+        wok = np.isfinite(W) & (W < REPAIR_INF_W)
+        valid = wok & np.isfinite(R)
+        feas = valid & (W >= 0.0) & (R >= 0.0)
+        first = np.where(feas.any(axis=1), feas.argmax(axis=1), 0)
+        return wok, valid, feas, first
+
+    wok1, valid1, feas1, first1 = _masks(W1, R1)
+    wok2, valid2, feas2, first2 = _masks(W2, R2)
+
+    fams = [crop_family.get(ck, "other") for ck in crop_list]
+    fam_names = sorted(set(fams))
+    fam_pos = {f: k for k, f in enumerate(fam_names)}
+    fam_idx = np.array([fam_pos[f] for f in fams], dtype=int)
+    legume = np.array([f in REPAIR_LEGUME_FAMILIES for f in fams], dtype=bool)
+    not_fallow = np.arange(C) != fallow_idx
+    F = len(fam_names)
+
+    W1w = np.where(wok1, W1, np.inf)
+    W2w = np.where(wok2, W2, np.inf)
+
+    def _argmin_masked(Ww: np.ndarray, col_mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        M = np.where(col_mask[None, :], Ww, np.inf)
+        j = M.argmin(axis=1)
+        return j, M[ar, j]
+
+    pick2 = np.zeros((P, F), dtype=int)
+    sec_leg_j = np.zeros((P, F), dtype=int); sec_leg_w = np.full((P, F), np.inf)
+    sec_any_j = np.zeros((P, F), dtype=int); sec_any_w = np.full((P, F), np.inf)
+    for f in range(F):
+        diff = fam_idx != f
+        jl, wl = _argmin_masked(W2w, diff & legume)
+        ja, wa = _argmin_masked(W2w, diff)
+        pick2[:, f] = np.where(np.isfinite(wl), jl, np.where(np.isfinite(wa), ja, first2))
+        sec_leg_j[:, f], sec_leg_w[:, f] = _argmin_masked(W2w, diff & legume & not_fallow)
+        sec_any_j[:, f], sec_any_w[:, f] = _argmin_masked(W2w, diff & not_fallow)
+    prim_min_j, prim_min_w = _argmin_masked(W1w, not_fallow)
+
+    feasible1 = [np.flatnonzero(feas1[i]) if feas1[i].any() else np.array([0]) for i in range(P)]
+    feasible2 = [np.flatnonzero(feas2[i]) if feas2[i].any() else np.array([0]) for i in range(P)]
+    choices1, n1, pos1 = _feasibility_index(feasible1, valid1)
+    choices2, n2, pos2 = _feasibility_index(feasible2, valid2)
+
+    return {
+        "P": P, "C": C, "fallow_idx": fallow_idx,
+        "valid1": valid1, "valid2": valid2, "first1": first1, "first2": first2,
+        "feasible1": feasible1, "feasible2": feasible2,
+        "choices1": choices1, "n1": n1, "pos1": pos1, "choices2": choices2, "n2": n2, "pos2": pos2,
+        "fam_idx": fam_idx, "pick2": pick2,
+        "sec_leg_j": sec_leg_j, "sec_leg_w": sec_leg_w, "sec_any_j": sec_any_j, "sec_any_w": sec_any_w,
+        "prim_min_j": prim_min_j, "prim_min_w": prim_min_w,
+    }
+
+
+def _sanitize_pair(s1: np.ndarray, s2: np.ndarray, tables: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Replace out-of-range / infeasible genes with the parcel's first feasible crop.
+
+    Works on one plan ([P]) or a whole population ([N, P]); the last axis is the parcel.
+    """
+    C = int(tables["C"])
+    s1 = np.asarray(s1).astype(int, copy=True)
+    s2 = np.asarray(s2).astype(int, copy=True)
+    for s, valid, first in ((s1, tables["valid1"], tables["first1"]), (s2, tables["valid2"], tables["first2"])):
+        inr = (s >= 0) & (s < C)
+        bad = ~inr
+        pos = np.nonzero(inr)
+        bad[pos] = ~valid[pos[-1], s[pos]]
+        if np.any(bad):
+            pos = np.nonzero(bad)
+            s[pos] = first[pos[-1]]
+    return s1, s2
+
+
+def _repair_budget_pair(s1: np.ndarray, s2: np.ndarray, areas: np.ndarray, W1: np.ndarray, W2: np.ndarray,
+                        budget: float, tables: Dict[str, Any], lock_mask: np.ndarray,
+                        sanitize: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Hard repair: step the largest water users down until the plan fits the budget.
+
+    Same policy as the original GA repair (secondary first: lower-water legume of another
+    family, else any lower-water other family, else NADAS; then unlocked primary: lower-water
+    crop, else NADAS) but with a running water total updated by deltas and a max-heap of
+    parcel contributions, so a repair costs O(P + k log P) instead of O(P^2 * C).
+    With ``sanitize=False`` the genes must already be valid and are repaired in place.
+    """
+    if sanitize:
+        s1, s2 = _sanitize_pair(s1, s2, tables)
+    P = int(tables["P"])
+    limit = float(budget) * 1.0001
+    ar = np.arange(P)
+    c1 = areas * W1[ar, s1]
+    c2 = areas * W2[ar, s2]
+    total = float(np.sum(c1) + np.sum(c2))
+    if total <= limit or P == 0:
+        return s1, s2
+
+    fallow = int(tables["fallow_idx"])
+    fam_idx = tables["fam_idx"]
+    sec_leg_j, sec_leg_w = tables["sec_leg_j"], tables["sec_leg_w"]
+    sec_any_j, sec_any_w = tables["sec_any_j"], tables["sec_any_w"]
+    prim_min_j, prim_min_w = tables["prim_min_j"], tables["prim_min_w"]
+    c1 = c1.tolist(); c2 = c2.tolist()
+    heap = [(-(c1[i] + c2[i]), i) for i in range(P)]
+    heapq.heapify(heap)
+    changes = 0
+    while total > limit and heap and changes < 2 * P:
+        _, i = heapq.heappop(heap)
+        j2 = int(s2[i])
+        if j2 != fallow:
+            cw = float(W2[i, j2]) if np.isfinite(W2[i, j2]) else 1e99
+            f = int(fam_idx[s1[i]])
+            if sec_leg_w[i, f] < cw - 1e-9:
+                new = int(sec_leg_j[i, f])
+            elif sec_any_w[i, f] < cw - 1e-9:
+                new = int(sec_any_j[i, f])
+            else:
+                new = fallow
+            s2[i] = new
+            nc = float(areas[i] * W2[i, new])
+            total += nc - c2[i]
+            c2[i] = nc
+        elif (not bool(lock_mask[i])) and int(s1[i]) != fallow:
+            cw = float(W1[i, int(s1[i])]) if np.isfinite(W1[i, int(s1[i])]) else 1e99
+            new = int(prim_min_j[i]) if prim_min_w[i] < cw - 1e-9 else fallow
+            s1[i] = new
+            nc = float(areas[i] * W1[i, new])
+            total += nc - c1[i]
+            c1[i] = nc
+        else:
+            # nothing left to give up on this parcel; it never becomes repairable again
+            continue
+        changes += 1
+        heapq.heappush(heap, (-(c1[i] + c2[i]), i))
+    return s1, s2
+
+
+def _repair_budget_population(S1: np.ndarray, S2: np.ndarray, areas: np.ndarray, W1: np.ndarray, W2: np.ndarray,
+                              budget: float, tables: Dict[str, Any], lock_mask: np.ndarray,
+                              sanitize: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """_repair_budget_pair over a [N, P] population; only over-budget rows are visited."""
+    ar = np.arange(int(tables["P"]))
+    tot = (areas * W1[ar, S1]).sum(axis=1) + (areas * W2[ar, S2]).sum(axis=1)
+    for n in np.flatnonzero(tot > float(budget) * 1.0001):
+        S1[n], S2[n] = _repair_budget_pair(S1[n], S2[n], areas, W1, W2, budget, tables, lock_mask,
+                                           sanitize=sanitize)
+    return S1, S2
+
+
+def _enforce_encoded(K1: np.ndarray, K2: np.ndarray, tables: Dict[str, Any], locks: np.ndarray,
+                     lock_mask: np.ndarray, areas: np.ndarray, W1: np.ndarray, W2: np.ndarray,
+                     budget: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Locks, rotation rule and budget repair for [N, P] position genotypes.
+
+    Decoded genes are valid by construction, so there is no per-gene feasibility check: locks
+    are written as positions (an infeasible lock lands on position 0, as sanitizing would),
+    and crops set by the rotation fallback / repair are mapped back through pos1/pos2.
+    Returns (K1, K2, S1, S2) with S the decoded crop indices of the new K.
+    """
+    pos1, pos2 = tables["pos1"], tables["pos2"]
+    ar = np.arange(int(tables["P"]))
+    if np.any(lock_mask):
+        rows = np.flatnonzero(lock_mask)
+        K1[..., rows] = pos1[rows, locks[rows]]
+    S1 = _decode_positions(K1, tables["choices1"])
+    S2 = _decode_positions(K2, tables["choices2"])
+    fam_idx = tables["fam_idx"]
+    f1 = fam_idx[S1]
+    clash = (f1 == fam_idx[S2]) | (S1 == S2)
+    if np.any(clash):
+        pos = np.nonzero(clash)
+        r = pos[-1]
+        S2[pos] = tables["choices2"][r, pos2[r, tables["pick2"][r, f1[pos]]]]
+    S1, S2 = _repair_budget_population(S1, S2, areas, W1, W2, budget, tables, lock_mask, sanitize=False)
+    K1 = pos1[ar, S1]
+    K2 = pos2[ar, S2]
+    return K1, K2, _decode_positions(K1, tables["choices1"]), _decode_positions(K2, tables["choices2"])
+
+
+# -----------------------------
+# Early stopping (GA / ABC / ACO)
+# -----------------------------
+
+def _early_stop(stall_generations: Optional[int] = None, min_rel_improvement: float = 0.0,
+                target_fitness: Optional[float] = None, trace: bool = False) -> Dict[str, Any]:
+    """Stall/target tracker for one optimizer run; feed it with _early_stop_step.
+
+    An iteration counts as progress when the best fitness beats the last reference by more
+    than ``min_rel_improvement * max(1, |reference|)``; after `stall_generations` iterations
+    without progress the run stops. Reaching `target_fitness` stops it immediately.
+    ``stall_generations`` of None/0 disables the stall test.
+
+    With `trace` every iteration also records (ms since the tracker was created, best-so-far
+    fitness, fitness evaluations on this thread since then) in float32 arrays; the optimizers
+    create it before their initial population, so ms and evals include the initialization.
+    """
+    return {"stall": max(0, int(stall_generations or 0)),
+            "min_rel": max(0.0, float(min_rel_improvement or 0.0)),
+            "target": None if target_fitness is None else float(target_fitness),
+            "ref": None, "since": 0, "iterations": 0, "reason": None, "best": None,
+            "trace": ({"t0": time.perf_counter(), "e0": _eval_count(),
+                       "ms": array("f"), "best": array("f"), "evals": array("f")} if trace else None)}
+
+
+def _early_stop_step(stop: Dict[str, Any], best_fit: float) -> bool:
+    """Record one finished iteration with the best-so-far fitness; True when the run should stop."""
+    stop["iterations"] += 1
+    if stop["best"] is None or best_fit > stop["best"]:
+        stop["best"] = float(best_fit)
+    tr = stop["trace"]
+    if tr is not None:
+        tr["ms"].append((time.perf_counter() - tr["t0"]) * 1000.0)
+        tr["best"].append(stop["best"])
+        tr["evals"].append(_eval_count() - tr["e0"])
+    ref = stop["ref"]
+    if ref is None or best_fit > ref + stop["min_rel"] * max(1.0, abs(ref)):
+        stop["ref"] = float(best_fit)
+        stop["since"] = 0
+    else:
+        stop["since"] += 1
+    if stop["target"] is not None and best_fit >= stop["target"]:
+        stop["reason"] = "target_reached"
+    elif stop["stall"] and stop["since"] >= stop["stall"]:
+        stop["reason"] = "stalled"
+    return stop["reason"] is not None
+
+
+def _early_stop_meta(stop: Dict[str, Any], max_iterations: int) -> Dict[str, Any]:
+    out = {"iterations_used": int(stop["iterations"]), "max_iterations": int(max_iterations),
+           "stop_reason": stop["reason"] or "max_iterations",
+           "stall_generations": stop["stall"] or None, "min_rel_improvement": stop["min_rel"],
+           "target_fitness": stop["target"], "best_fitness": stop["best"]}
+    tr = stop["trace"]
+    if tr is not None:
+        # float32 values, listed at float32 precision
+        out["trace"] = {k: [float(f"{v:.7g}") for v in tr[k]] for k in ("ms", "best", "evals")}
+    return out
+
+
+def _ga_state() -> Dict[str, Any]:
+    """Best-so-far record of a GA run (also the per-island result)."""
+    return {"fit": -1e99, "s1": None, "s2": None, "water": 0.0, "profit": 0.0,
+            "history": [], "evaluations": 0}
+
+
+def _ga_enforce(K1: np.ndarray, K2: np.ndarray, ctx: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    return _enforce_encoded(K1, K2, ctx["tables"], ctx["locks"], ctx["lock_mask"],
+                            ctx["areas"], ctx["W1"], ctx["W2"], ctx["budget"])[:2]
+
+
+def _ga_init_population(ctx: Dict[str, Any], n: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    tables = ctx["tables"]
+    return _ga_enforce(_sample_positions(tables["n1"], n, rng), _sample_positions(tables["n2"], n, rng), ctx)
+
+
+def _ga_evolve(K1: np.ndarray, K2: np.ndarray, ctx: Dict[str, Any], generations: int,
+               state: Dict[str, Any], rng: np.random.Generator,
+               stop: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Run up to `generations` GA generations on a [pop, P] position-genotype pair (see
+    _feasibility_index); updates `state` with the best decoded plan.
+
+    With an _early_stop tracker the loop ends as soon as it reports a stop reason.
+
+    One generation: decode + score all -> rank -> batched 4-way tournaments over the top
+    pool -> one-point crossover as a prefix mask (both seasons together) -> per-gene mutation
+    of positions -> enforce/repair all children -> elites + children.
+    """
+    tables, score_tables = ctx["tables"], ctx["score_tables"]
+    P = int(ctx["P"])
+    pop_size = len(K1)
+    elite_n = min(pop_size - 1, max(2, int(0.15 * pop_size)))
+    pool_n = min(pop_size, max(10, elite_n * 2))
+    n_child = pop_size - elite_n
+    n_pairs = (n_child + 1) // 2
+    # expected number of mutated genes per child stays `mut_rate` (one gene, one season)
+    gene_rate = float(ctx["mut_rate"]) / float(2 * P)
+    ar = np.arange(P)
+
+    for _g in range(int(generations)):
+        S1 = _decode_positions(K1, tables["choices1"])
+        S2 = _decode_positions(K2, tables["choices2"])
+        fit, wat, prof = _score_population_memo(S1, S2, score_tables, ctx.get("memo"))
+        state["evaluations"] += pop_size
+        order = np.argsort(-fit, kind="stable")
+        top = int(order[0])
+        if fit[top] > state["fit"]:
+            state.update(fit=float(fit[top]), s1=S1[top].copy(), s2=S2[top].copy(),
+                         water=float(wat[top]), profit=float(prof[top]))
+        state["history"].append(float(state["fit"]))
+        if stop is not None and _early_stop_step(stop, state["fit"]):
+            break
+
+        # tournaments: the pool is sorted best-first, so the winner is the smallest rank drawn
+        t = rng.integers(0, pool_n, size=(2, n_pairs, min(4, pool_n))).min(axis=2)
+        pa = order[t[0]]
+        pb = order[t[1]]
+
+        cut = rng.integers(1, max(1, P - 1) + 1, size=n_pairs)
+        cx = (ar[None, :] < cut[:, None]) & (rng.random(n_pairs) < float(ctx["cx_rate"]))[:, None]
+        C1 = np.concatenate([np.where(cx, K1[pb], K1[pa]), np.where(cx, K1[pa], K1[pb])])[:n_child]
+        C2 = np.concatenate([np.where(cx, K2[pb], K2[pa]), np.where(cx, K2[pa], K2[pb])])[:n_child]
+
+        _mutate_positions(C1, tables["n1"], gene_rate, rng)
+        _mutate_positions(C2, tables["n2"], gene_rate, rng)
+        C1, C2 = _ga_enforce(C1, C2, ctx)
+
+        elite = order[:elite_n]
+        K1 = np.concatenate([K1[elite], C1])
+        K2 = np.concatenate([K2[elite], C2])
+    return K1, K2
+
+
+# -----------------------------
+# Local search polish (memetic step after GA / ABC / ACO)
+# -----------------------------
+
+def _local_search_two_season(s1: np.ndarray, s2: np.ndarray, st: Dict[str, Any], tables: Dict[str, Any],
+                             lock_mask: np.ndarray, time_limit_ms: float = 250.0,
+                             max_passes: int = 20,
+                             rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """First-improvement 1-opt / 2-opt polish of one two-season plan.
+
+    Moves: 1-opt re-assigns one gene (parcel, season) to another feasible crop; 2-opt exchanges
+    the same-season crops of two parcels. Every move is scored in O(1) (O(months) with
+    phenology caps): the objective of _score_population_two_season is split into per-parcel
+    terms (rotation, legume bonuses, previous family, primary NADAS) plus aggregates (water,
+    profit, fallow area, crop use counts, primary area per crop, monthly demand) that are
+    updated by deltas. Plans inside the budget never leave it; locked primaries never move.
+    `st` comes from _population_score_tables, `tables` from _build_repair_tables.
+    """
+    t_start = time.perf_counter()
+    deadline = t_start + max(0.0, float(time_limit_ms)) / 1000.0
+    rng = rng if rng is not None else _make_rng()
+    s1 = np.asarray(s1, dtype=int).copy()
+    s2 = np.asarray(s2, dtype=int).copy()
+    f_start = float(_score_population_two_season(s1, s2, st)[0][0])
+    P, C = int(st["P"]), int(st["C"])
+    areas = st["areas"]
+    W = {1: st["W1"], 2: st["W2"]}
+    R = {1: st["R1"], 2: st["R2"]}
+    S = {1: s1, 2: s2}
+    feasible = {1: tables["feasible1"], 2: tables["feasible2"]}
+    profit_w, water_w = st["alpha_beta"]
+    fam_code, fam_true = st["fam_code"], st["fam_true"]
+    legume, heavy = st["legume"], st["heavy"]
+    prev_hit, alt1 = st["prev_hit"], st["alt1"]
+    counted = st["counted"]
+    fallow = int(st["fallow_idx"])
+    budget = float(st["budget"])
+    limit = budget * 1.0001
+    total_area = float(np.sum(areas))
+    if st["objective"] in ("water_saving", "min_water"):
+        fallow_thr, fallow_cap = 0.07, 0.22
+    else:
+        fallow_thr, fallow_cap = 0.05, 0.18
+    ms = st["max_share"]
+    ms = float(ms) if (ms is not None and 0.05 < float(ms) < 1.0) else None
+    min_unique = int(st["min_unique"])
+    share_den = total_area if total_area > 0 else 1.0
+    MU = {1: st["month_use1"], 2: st["month_use2"]}
+    cap_mo = np.array([m for m, _ in st["cap_months"]], dtype=int)
+    cap_mo_v = np.array([c for _, c in st["cap_months"]], dtype=float)
+    cap_w = np.array([w for w, _ in st["cap_weights"]], dtype=float)
+    cap_w_v = np.array([c for _, c in st["cap_weights"]], dtype=float)
+
+    def parcel_term(i: int, a: int, b: int) -> float:
+        v = 0.0
+        if fam_true[a] and fam_true[b] and fam_code[a] == fam_code[b]:
+            v -= 1e10 * st["hard_w"]
+        if legume[b] and heavy[a]:
+            v += 4500.0 * st["soft_w"]
+        elif legume[a] or legume[b]:
+            v += 2500.0 * st["soft_w"]
+        if legume[b]:
+            v += 6000.0 if heavy[a] else 3500.0
+        if prev_hit is not None and prev_hit[i, a]:
+            v -= 2e8
+        if a == fallow and alt1[i]:
+            v -= 8e7
+        return v
+
+    def share_term(area_c: float) -> float:
+        sh = area_c / share_den
+        return ((sh - ms) / max(1e-6, ms)) ** 2 * 5e8 if (ms is not None and sh > ms) else 0.0
+
+    ar = np.arange(P)
+    agg: Dict[str, Any] = {
+        "water": float((areas * W[1][ar, s1]).sum() + (areas * W[2][ar, s2]).sum()),
+        "profit": float((areas * R[1][ar, s1]).sum() + (areas * R[2][ar, s2]).sum()),
+        "fallow": float(areas[s1 == fallow].sum() + areas[s2 == fallow].sum()),
+        "pterm": float(sum(parcel_term(i, int(s1[i]), int(s2[i])) for i in range(P))),
+    }
+    counts = (np.bincount(s1, minlength=C) + np.bincount(s2, minlength=C)).tolist()
+    agg["uniq"] = int(sum(1 for c in range(C) if counted[c] and counts[c] > 0))
+    byc = np.bincount(s1, weights=areas, minlength=C).tolist()
+    agg["share"] = float(sum(share_term(byc[c]) for c in range(C) if counted[c]))
+    dem = None
+    if cap_mo.size:
+        dem = (np.einsum("p,pm->m", areas, MU[1][ar, s1][:, cap_mo])
+               + np.einsum("p,pm->m", areas, MU[2][ar, s2][:, cap_mo]))
+
+    def fitness() -> float:
+        water = agg["water"]
+        f = profit_w * agg["profit"] - water_w * water * 500.0 + agg["pterm"] - agg["share"]
+        f -= (max(0.0, water - budget) / max(1.0, budget)) ** 2 * 1e9
+        if dem is not None:
+            over = dem > cap_mo_v
+            f -= float(np.sum(((dem[over] - cap_mo_v[over]) / np.maximum(1.0, cap_mo_v[over])) ** 2)) * 1e8
+        elif cap_w.size:
+            d = water * cap_w
+            over = d > cap_w_v
+            f -= float(np.sum(((d[over] - cap_w_v[over]) / np.maximum(1.0, cap_w_v[over])) ** 2)) * 1e8
+        if min_unique > 1:
+            f -= max(0, min_unique - agg["uniq"]) * 5e8
+        fs = agg["fallow"] / max(1e-9, 2.0 * total_area)
+        if fs > fallow_thr:
+            f -= ((fs - fallow_thr) / max(1e-6, (1.0 - fallow_thr))) ** 2 * 4.0e9
+        if fs > fallow_cap:
+            f -= ((fs - fallow_cap) / max(1e-6, (1.0 - fallow_cap))) ** 2 * 4.0e10
+        return f
+
+    def set_gene(season: int, i: int, j: int) -> None:
+        nonlocal dem
+        s = S[season]
+        old = int(s[i])
+        if old == j:
+            return
+        a, b = int(s1[i]), int(s2[i])
+        agg["pterm"] -= parcel_term(i, a, b)
+        if season == 1:
+            a = j
+        else:
+            b = j
+        agg["pterm"] += parcel_term(i, a, b)
+        ai = float(areas[i])
+        agg["water"] += ai * (float(W[season][i, j]) - float(W[season][i, old]))
+        agg["profit"] += ai * (float(R[season][i, j]) - float(R[season][i, old]))
+        agg["fallow"] += ai * ((j == fallow) - (old == fallow))
+        counts[old] -= 1
+        if counted[old] and counts[old] == 0:
+            agg["uniq"] -= 1
+        counts[j] += 1
+        if counted[j] and counts[j] == 1:
+            agg["uniq"] += 1
+        if season == 1:
+            for c, da in ((old, -ai), (j, ai)):
+                if counted[c]:
+                    agg["share"] -= share_term(byc[c])
+                    byc[c] += da
+                    agg["share"] += share_term(byc[c])
+                else:
+                    byc[c] += da
+        if dem is not None:
+            dem = dem + ai * (MU[season][i, j, cap_mo] - MU[season][i, old, cap_mo])
+        s[i] = j
+
+    def try_move(changes: List[Tuple[int, int, int]], cur: float) -> Optional[float]:
+        # apply, keep if strictly better (and budget-safe), else undo; returns new fitness
+        undo = [(season, i, int(S[season][i])) for season, i, _ in changes]
+        was_ok = agg["water"] <= limit
+        for season, i, j in changes:
+            set_gene(season, i, j)
+        f = fitness()
+        if f > cur + 1e-6 and (agg["water"] <= limit or not was_ok):
+            return f
+        for season, i, j in reversed(undo):
+            set_gene(season, i, j)
+        return None
+
+    cur = fitness()
+    report = {"moves_1opt": 0, "moves_2opt": 0, "evaluations": 0, "passes": 0, "timed_out": False}
+    movable = {1: [i for i in range(P) if not bool(lock_mask[i])], 2: list(range(P))}
+    while report["passes"] < int(max_passes):
+        report["passes"] += 1
+        improved = False
+        # 1-opt: best feasible alternative for each gene
+        for season in (1, 2):
+            for i in rng.permutation(movable[season]).tolist():
+                if time.perf_counter() > deadline:
+                    report["timed_out"] = True
+                    break
+                for j in feasible[season][i].tolist():
+                    if j == int(S[season][i]):
+                        continue
+                    report["evaluations"] += 1
+                    f = try_move([(season, i, j)], cur)
+                    if f is not None:
+                        cur = f
+                        report["moves_1opt"] += 1
+                        improved = True
+        # 2-opt: exchange same-season crops between two parcels
+        for season in (1, 2):
+            idx = movable[season]
+            valid = tables["valid%d" % season]
+            for a in rng.permutation(len(idx)).tolist():
+                if report["timed_out"] or time.perf_counter() > deadline:
+                    report["timed_out"] = True
+                    break
+                i = idx[a]
+                for k in idx[a + 1:]:
+                    ji, jk = int(S[season][i]), int(S[season][k])
+                    if ji == jk or not (valid[i, jk] and valid[k, ji]):
+                        continue
+                    report["evaluations"] += 1
+                    f = try_move([(season, i, jk), (season, k, ji)], cur)
+                    if f is not None:
+                        cur = f
+                        report["moves_2opt"] += 1
+                        improved = True
+        if report["timed_out"] or not improved:
+            break
+
+    # the incremental bookkeeping drifts only by float rounding; report the exact score
+    f_end = float(_score_population_two_season(s1, s2, st)[0][0])
+    _count_evals(report["evaluations"])
+    report["drift"] = abs(f_end - cur)
+    report.update({
+        "fitness_before": f_start,
+        "fitness_after": f_end,
+        "fitness_gain": f_end - f_start,
+        "ms": round((time.perf_counter() - t_start) * 1000.0, 1),
+    })
+    return s1, s2, report
+
+
+def _local_search_single(chosen: np.ndarray, areas: np.ndarray, W: np.ndarray, R: np.ndarray, valid: np.ndarray,
+                         lock_mask: np.ndarray, fitness: Callable[[float, float], float], budget: float,
+                         month_weights: Optional[dict] = None, month_caps: Optional[dict] = None,
+                         time_limit_ms: float = 250.0, max_passes: int = 20,
+                         rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """First-improvement 1-opt / 2-opt polish of one single-season plan (crop index per parcel).
+
+    Same moves and budget rule as _local_search_two_season. `fitness(total_water, total_profit)`
+    is the calling optimizer's own objective; the single-season objectives depend on the two
+    totals only, so every move is an O(1) delta. Once the plan is within the annual budget,
+    moves that lower profit are refused, even when they would ease the monthly delivery caps
+    (month_weights / month_caps): the polish may save water, but never at the farmers'
+    expense. Locked parcels never move. The budget test counts feasible cells only: a locked or
+    crop-less parcel sitting on an infeasible cell (W=1e9) cannot move and would otherwise keep
+    every plan "over budget".
+    """
+    t_start = time.perf_counter()
+    deadline = t_start + max(0.0, float(time_limit_ms)) / 1000.0
+    rng = rng if rng is not None else _make_rng()
+    s = np.asarray(chosen, dtype=int).copy()
+    P = len(s)
+    ar = np.arange(P)
+    budget = float(budget)
+    limit = budget * 1.0001
+
+    def exact() -> float:
+        return float(fitness(float((areas * W[ar, s]).sum()), float((areas * R[ar, s]).sum())))
+
+    f_start = exact()
+    Wb = np.where(valid, W, 0.0)
+    agg = {"water": float((areas * W[ar, s]).sum()), "profit": float((areas * R[ar, s]).sum()),
+           "budget_water": float((areas * Wb[ar, s]).sum())}
+    s_start, start = s.copy(), dict(agg)
+
+    def set_gene(i: int, j: int) -> None:
+        old = int(s[i])
+        ai = float(areas[i])
+        agg["water"] += ai * (float(W[i, j]) - float(W[i, old]))
+        agg["profit"] += ai * (float(R[i, j]) - float(R[i, old]))
+        agg["budget_water"] += ai * (float(Wb[i, j]) - float(Wb[i, old]))
+        s[i] = j
+
+    def try_move(changes: List[Tuple[int, int]], cur: float) -> Optional[float]:
+        undo = [(i, int(s[i])) for i, _ in changes]
+        was_ok = agg["budget_water"] <= limit
+        keep_profit = agg["profit"] if was_ok else None
+        for i, j in changes:
+            set_gene(i, j)
+        f = float(fitness(agg["water"], agg["profit"]))
+        if (f > cur + 1e-9 * max(1.0, abs(cur)) and (agg["budget_water"] <= limit or not was_ok)
+                and (keep_profit is None or agg["profit"] >= keep_profit - 1e-6)):
+            return f
+        for i, j in reversed(undo):
+            set_gene(i, j)
+        return None
+
+    cur = float(fitness(agg["water"], agg["profit"]))
+    report = {"moves_1opt": 0, "moves_2opt": 0, "evaluations": 0, "passes": 0, "timed_out": False}
+    movable = [i for i in range(P) if not bool(lock_mask[i])]
+    feasible = [np.flatnonzero(valid[i]).tolist() for i in range(P)]
+    while report["passes"] < int(max_passes):
+        report["passes"] += 1
+        improved = False
+        for i in rng.permutation(movable).tolist():
+            if time.perf_counter() > deadline:
+                report["timed_out"] = True
+                break
+            for j in feasible[i]:
+                if j == int(s[i]):
+                    continue
+                report["evaluations"] += 1
+                f = try_move([(i, j)], cur)
+                if f is not None:
+                    cur = f
+                    report["moves_1opt"] += 1
+                    improved = True
+        for a in rng.permutation(len(movable)).tolist():
+            if report["timed_out"] or time.perf_counter() > deadline:
+                report["timed_out"] = True
+                break
+            i = movable[a]
+            for k in movable[a + 1:]:
+                ji, jk = int(s[i]), int(s[k])
+                if ji == jk or not (valid[i, jk] and valid[k, ji]):
+                    continue
+                report["evaluations"] += 1
+                f = try_move([(i, jk), (k, ji)], cur)
+                if f is not None:
+                    cur = f
+                    report["moves_2opt"] += 1
+                    improved = True
+        if report["timed_out"] or not improved:
+            break
+
+    # check: a plan that met the budget must not come back with less profit
+    if start["budget_water"] <= limit and float((areas * R[ar, s]).sum()) < start["profit"] - 1e-6:
+        s[:] = s_start
+        cur = float(fitness(start["water"], start["profit"]))
+        report["reverted"] = True
+    f_end = exact()
+    _count_evals(report["evaluations"])
+    report["drift"] = abs(f_end - cur)
+    report.update({
+        "fitness_before": f_start,
+        "fitness_after": f_end,
+        "fitness_gain": f_end - f_start,
+        "ms": round((time.perf_counter() - t_start) * 1000.0, 1),
+    })
+    return s, report
+
+
+# -----------------------------
+# Island-model GA (one process per sub-population)
+# -----------------------------
+ISLANDS_MAX = 16
+
+
+def _ga_island_worker(conn, ctx: Dict[str, Any], stream: np.random.SeedSequence, pop_size: int, generations: int,
+                      migration_interval: int, migrants: int) -> None:
+    """Process target: evolve one island, trading `migrants` best plans with the coordinator
+    every `migration_interval` generations, then send the island's best-so-far state."""
+    try:
+        rng = _make_rng(stream)
+        cpu = 0.0
+        t0 = time.process_time()
+        tables = ctx["tables"]
+        stop = _early_stop(**ctx.get("early_stop", {}))
+        memo = ctx.get("memo")
+        memo0 = (memo["hits"], memo["misses"]) if memo is not None else (0, 0)
+        K1, K2 = _ga_init_population(ctx, pop_size, rng)
+        state = _ga_state()
+        done = 0
+        while done < generations:
+            step = min(migration_interval, generations - done)
+            if stop["reason"] is None:
+                # a stopped island only keeps trading migrants so the ring stays in step
+                K1, K2 = _ga_evolve(K1, K2, ctx, step, state, rng, stop)
+            done += step
+            if done < generations and migrants > 0:
+                fit = _score_population_memo(_decode_positions(K1, tables["choices1"]),
+                                             _decode_positions(K2, tables["choices2"]),
+                                             ctx["score_tables"], ctx.get("memo"))[0]
+                state["evaluations"] += len(fit)
+                order = np.argsort(-fit, kind="stable")
+                cpu += time.process_time() - t0
+                # migrants travel as position genotypes; every island shares the same tables
+                conn.send((K1[order[:migrants]], K2[order[:migrants]]))
+                A, B = conn.recv()
+                t0 = time.process_time()
+                worst = order[len(order) - len(A):]
+                K1[worst] = A
+                K2[worst] = B
+        cpu += time.process_time() - t0
+        state["cpu_ms"] = cpu * 1000.0
+        state["memo"] = _memo_stats(memo)
+        # this island's own lookups (the forked memo starts with the parent's counts)
+        state["memo_events"] = ((memo["hits"] - memo0[0], memo["misses"] - memo0[1])
+                                if memo is not None else (0, 0))
+        state["early_stop"] = _early_stop_meta(stop, generations)
+        conn.send(state)
+    except Exception as e:  # surfaced by the coordinator
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _ga_run_islands(ctx: Dict[str, Any], islands: int, pop_size: int, generations: int, rng: np.random.Generator,
+                    migration_interval: int = 10, migrants: int = 2,
+                    compare_single: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Island-model GA at the evaluation budget of one `pop_size` x `generations` run.
+
+    `pop_size` is split across the islands; each island is a process with its own RNG stream
+    (_spawn_streams(rng)) and the islands form a ring: every `migration_interval`
+    generations each one sends its best `migrants` plans to the next, which replace its worst.
+    Workers are forked where available (they inherit ctx for free) and spawned otherwise.
+
+    Returns (best state over all islands, report). The report has per-island best fitness
+    curves and CPU time; ``speedup_est`` is the summed island CPU time over wall time,
+    and with `compare_single` a single population is also run for a measured ``speedup``.
+    """
+    import multiprocessing as mp
+
+    islands = max(1, min(int(islands), ISLANDS_MAX, pop_size // 4 or 1))
+    migration_interval = max(1, int(migration_interval))
+    migrants = max(0, int(migrants))
+    sizes = [pop_size // islands + (1 if k < pop_size % islands else 0) for k in range(islands)]
+    migrants = min(migrants, min(sizes) // 2)
+    streams = _spawn_streams(rng, islands + (1 if compare_single else 0))
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    mpc = mp.get_context(method)
+
+    t0 = time.perf_counter()
+    conns, procs = [], []
+    for k in range(islands):
+        parent, child = mpc.Pipe()
+        pr = mpc.Process(target=_ga_island_worker, daemon=True,
+                         args=(child, ctx, streams[k], sizes[k], generations, migration_interval, migrants))
+        pr.start()
+        child.close()
+        conns.append(parent); procs.append(pr)
+    try:
+        epochs = (generations - 1) // migration_interval if migrants > 0 else 0
+        for _e in range(epochs):
+            batch = [c.recv() for c in conns]
+            for msg in batch:
+                if isinstance(msg, dict) and msg.get("error"):
+                    raise RuntimeError(f"GA island failed: {msg['error']}")
+            for k, c in enumerate(conns):
+                c.send(batch[k - 1])  # ring: island k receives from island k-1
+        results = [c.recv() for c in conns]
+        for msg in results:
+            if msg.get("error"):
+                raise RuntimeError(f"GA island failed: {msg['error']}")
+    finally:
+        for c in conns:
+            c.close()
+        for pr in procs:
+            pr.join(timeout=5)
+            if pr.is_alive():
+                pr.terminate()
+    wall = time.perf_counter() - t0
+    # island scorers ran in other processes; their counts never reached this collector
+    # (nor the metrics registry, which is cleared in forked children)
+    _count_evals(sum(int(r["evaluations"]) for r in results))
+    metrics.cache_event("fitness_memo", True, sum(int(r.get("memo_events", (0, 0))[0]) for r in results))
+    metrics.cache_event("fitness_memo", False, sum(int(r.get("memo_events", (0, 0))[1]) for r in results))
+
+    best = max(results, key=lambda r: r["fit"])
+    cpu = sum(float(r.get("cpu_ms", 0.0)) for r in results)
+    report: Dict[str, Any] = {
+        "islands": islands,
+        "start_method": method,
+        "cpu_count": os.cpu_count(),
+        "migration_interval": migration_interval,
+        "migrants": migrants,
+        "wall_ms": round(wall * 1000.0, 1),
+        "evaluations": int(sum(r["evaluations"] for r in results)),
+        "best_island": int(results.index(best)),
+        "speedup_est": round(cpu / max(1e-9, wall * 1000.0), 2),
+        "per_island": [
+            {"island": k, "pop_size": sizes[k], "spawn_key": list(streams[k].spawn_key),
+             "best_fitness": float(r["fit"]),
+             "cpu_ms": round(float(r.get("cpu_ms", 0.0)), 1), "evaluations": int(r["evaluations"]),
+             "fitness_memo": r.get("memo"), "early_stop": r.get("early_stop"),
+             "history": [float(x) for x in r["history"]]}
+            for k, r in enumerate(results)
+        ],
+    }
+    if compare_single:
+        single_rng = _make_rng(streams[islands])
+        t1 = time.perf_counter()
+        K1, K2 = _ga_init_population(ctx, pop_size, single_rng)
+        single = _ga_state()
+        _ga_evolve(K1, K2, ctx, generations, single, single_rng)
+        single_wall = time.perf_counter() - t1
+        report["single"] = {"wall_ms": round(single_wall * 1000.0, 1), "best_fitness": float(single["fit"]),
+                            "evaluations": int(single["evaluations"]),
+                            "history": [float(x) for x in single["history"]]}
+        report["speedup"] = round(single_wall / max(1e-9, wall), 2)
+    return best, report
+
+
+def ga_optimize_two_season(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    pop_size: int = 60,
+    generations: int = 140,
+    cx_rate: float = 0.7,
+    mut_rate: float = 0.08,
+    seed: Optional[int] = None,
+    budget_ratio: float = 1.0,
+    season_source: str = "both",
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+    islands: int = 1,
+    migration_interval: int = 10,
+    migrants: int = 2,
+    island_compare: bool = False,
+    local_search: bool = False,
+    local_search_ms: float = 250.0,
+    memo_size: int = FITNESS_MEMO_SIZE,
+    stall_generations: Optional[int] = None,
+    min_rel_improvement: float = 0.0,
+    target_fitness: Optional[float] = None,
+    trace: bool = False,
+    rng: Optional[np.random.Generator] = None,
+    ctx: Optional[PlanningContext] = None,
+) -> Dict[str, Any]:
+    """Genetic Algorithm (GA) for **two-season** planning (primary + secondary crop per parcel).
+
+    With ``islands > 1`` the population is split into sub-populations that evolve in separate
+    processes and exchange their best ``migrants`` every ``migration_interval`` generations
+    (see _ga_run_islands); ``meta.islands`` then reports per-island convergence.
+    ``local_search`` polishes the best plan with _local_search_two_season (report in meta).
+    ``stall_generations`` / ``min_rel_improvement`` / ``target_fitness`` end the run early
+    (_early_stop; per island with ``islands > 1``); ``meta.early_stop`` records why, and with
+    ``trace`` the per-generation convergence trace.
+    ``ctx`` is the request's planning context (build_planning_context); built here when omitted.
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode,
+                       risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    crop_list, W1, R1, W2, R2, MU1, MU2 = (ctx[k] for k in ("crop_list", "W1", "R1", "W2", "R2", "MU1", "MU2"))
+    P = int(ctx["P"])
+    C = len(crop_list)
+    areas = ctx["areas"]
+    parcel_ids = ctx["parcel_ids"]
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    if P == 0 or C == 0:
+        return {"algorithm": "GA", "objective": objective, "year": int(year),
+                "water_budget_m3": float(budget), "feasible": True,
+                "total_water_m3": 0.0, "total_profit_tl": 0.0, "efficiency_tl_per_m3": 0.0,
+                "details": [], "meta": {"note": "no parcels/crops", "season_source": season_source}}
+
+    # Perennial locks (orchard/perennials) and their irrigation adjustments are already in ctx
+    locks, lock_mask, irrigation_label = ctx["locks"], ctx["lock_mask"], ctx["irrigation_label"]
+    crop_family = ctx["crop_family"]
+    rotation_rules = ctx["rotation_rules"]
+
+    # Feasibility / rotation / budget-repair tables, built once per run and shared with ABC/ACO.
+    tables = _build_repair_tables(W1, R1, W2, R2, crop_list, crop_family)
+
+    score_tables = _population_score_tables(
+        areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules,
+        month_weights=month_weights, month_caps=month_caps,
+        min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop,
+        year=int(year), parcel_ids=parcel_ids,
+    )
+    ga = {
+        "P": P, "areas": areas, "W1": W1, "W2": W2, "budget": float(budget),
+        "tables": tables, "score_tables": score_tables, "locks": locks, "lock_mask": lock_mask,
+        "cx_rate": float(cx_rate), "mut_rate": float(mut_rate),
+        "memo": _fitness_memo(P, memo_size),
+        "early_stop": {"stall_generations": stall_generations, "min_rel_improvement": min_rel_improvement,
+                       "target_fitness": target_fitness, "trace": bool(trace)},
+    }
+
+    pop_size = max(2, int(pop_size))
+    island_report = None
+    stop = None
+    if int(islands or 1) > 1:
+        state, island_report = _ga_run_islands(ga, int(islands), pop_size, int(generations), rng,
+                                               migration_interval=int(migration_interval), migrants=int(migrants),
+                                               compare_single=bool(island_compare))
+    else:
+        stop = _early_stop(**ga["early_stop"])
+        K1, K2 = _ga_init_population(ga, pop_size, rng)
+        state = _ga_state()
+        _ga_evolve(K1, K2, ga, int(generations), state, rng, stop)
+        if state["s1"] is None:
+            S1 = _decode_positions(K1[:1], tables["choices1"])
+            S2 = _decode_positions(K2[:1], tables["choices2"])
+            f, w, pr = _score_population_two_season(S1, S2, score_tables)
+            state.update(fit=float(f[0]), s1=S1[0].copy(), s2=S2[0].copy(), water=float(w[0]), profit=float(pr[0]))
+    best_s1, best_s2 = state["s1"], state["s2"]
+    ls_report = None
+    if local_search:
+        best_s1, best_s2, ls_report = _local_search_two_season(best_s1, best_s2, score_tables, tables, lock_mask,
+                                                               time_limit_ms=local_search_ms, rng=rng)
+
+    # build plan
+    plan = []
+    total_water = 0.0
+    total_profit = 0.0
+    for i, p in enumerate(selected_parcels):
+        j1 = int(best_s1[i]); j2 = int(best_s2[i])
+        crop1 = crop_list[j1]; crop2 = crop_list[j2]
+        water1 = float(areas[i] * W1[i, j1]); prof1 = float(areas[i] * R1[i, j1])
+        water2 = float(areas[i] * W2[i, j2]); prof2 = float(areas[i] * R2[i, j2])
+        item = {
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "area_da": float(areas[i]),
+            "primary": {"crop": crop1, "water_m3": water1, "profit_tl": prof1},
+            "secondary": {"crop": crop2, "water_m3": water2, "profit_tl": prof2},
+        }
+        if irrigation_label is not None and bool(lock_mask[i]):
+            item["irrigation_plan"] = irrigation_label
+        plan.append(item)
+        total_water += water1 + water2
+        total_profit += prof1 + prof2
+
+    feasible = total_water <= budget + 1e-6
+    effv = (total_profit / total_water) if total_water > 0 else 0.0
+
+    return {
+        "mode": "two_season",
+        "algorithm": "GA",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(effv),
+        "details": plan,
+        "meta": {
+            "pop_size": int(pop_size),
+            "generations": int(generations),
+            "cx_rate": float(cx_rate),
+            "mut_rate": float(mut_rate),
+            "season_source": season_source,
+            "rotation_rules_applied": True,
+            "fitness_memo": (_memo_stats(ga["memo"]) if island_report is None
+                             else [isl["fitness_memo"] for isl in island_report["per_island"]]),
+            "early_stop": (_early_stop_meta(stop, generations) if island_report is None
+                           else [isl["early_stop"] for isl in island_report["per_island"]]),
+            **({"islands": island_report} if island_report else {}),
+            **({"local_search": ls_report} if ls_report else {}),
+        },
+    }
+
+
+def abc_optimize_two_season(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    food_sources: int = 40,
+    cycles: int = 120,
+    limit: int = 25,
+    seed: Optional[int] = None,
+    budget_ratio: float = 1.0,
+    season_source: str = "both",
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+    local_search: bool = False,
+    local_search_ms: float = 250.0,
+    memo_size: int = FITNESS_MEMO_SIZE,
+    stall_generations: Optional[int] = None,
+    min_rel_improvement: float = 0.0,
+    target_fitness: Optional[float] = None,
+    trace: bool = False,
+    rng: Optional[np.random.Generator] = None,
+    ctx: Optional[PlanningContext] = None,
+) -> Dict[str, Any]:
+    """Artificial Bee Colony (ABC) for two-season planning.
+
+    ``local_search`` polishes the best plan with _local_search_two_season (report in meta).
+    ``stall_generations`` counts cycles (see _early_stop); ``meta.early_stop`` records the stop.
+    ``ctx``: planning context as in ga_optimize_two_season.
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode,
+                       risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    crop_list, W1, R1, W2, R2, MU1, MU2 = (ctx[k] for k in ("crop_list", "W1", "R1", "W2", "R2", "MU1", "MU2"))
+    P = int(ctx["P"])
+    C = len(crop_list)
+    areas = ctx["areas"]
+    parcel_ids = ctx["parcel_ids"]
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    if P == 0 or C == 0:
+        return {"algorithm": "ABC", "objective": objective, "year": int(year),
+                "water_budget_m3": float(budget), "feasible": True,
+                "total_water_m3": 0.0, "total_profit_tl": 0.0, "efficiency_tl_per_m3": 0.0,
+                "details": [], "meta": {"note": "no parcels/crops", "season_source": season_source}}
+
+    # Perennial locks (orchard/perennials) and their irrigation adjustments are already in ctx
+    locks, lock_mask, irrigation_label = ctx["locks"], ctx["lock_mask"], ctx["irrigation_label"]
+    crop_family = ctx["crop_family"]
+    rotation_rules = ctx["rotation_rules"]
+
+    # Shared with GA/ACO: position genotypes + locks + rotation rule, then incremental budget repair.
+    tables = _build_repair_tables(W1, R1, W2, R2, crop_list, crop_family)
+
+    def enforce(K1: np.ndarray, K2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return _enforce_encoded(K1, K2, tables, locks, lock_mask, areas, W1, W2, budget)
+
+    score_tables = _population_score_tables(
+        areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules,
+        month_weights=month_weights, month_caps=month_caps,
+        min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop,
+        year=int(year), parcel_ids=parcel_ids,
+    )
+
+    memo = _fitness_memo(P, memo_size)
+
+    def fitness(S1: np.ndarray, S2: np.ndarray) -> np.ndarray:
+        return _score_population_memo(S1, S2, score_tables, memo)[0]
+
+    def random_foods(n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return enforce(_sample_positions(tables["n1"], n, rng), _sample_positions(tables["n2"], n, rng))
+
+    def neighbors(ks: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # one parcel, one season per bee, redrawn from that parcel's feasible crops
+        A, B = foods1[ks], foods2[ks]
+        r = np.arange(len(ks))
+        i = rng.integers(0, P, size=len(ks))
+        prim = rng.random(len(ks)) < 0.5
+        u = rng.random(len(ks))
+        A[r[prim], i[prim]] = _pick_positions(tables["n1"], i[prim], u[prim])
+        B[r[~prim], i[~prim]] = _pick_positions(tables["n2"], i[~prim], u[~prim])
+        return enforce(A, B)
+
+    def decode(k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return (_decode_positions(foods1[k], tables["choices1"]),
+                _decode_positions(foods2[k], tables["choices2"]))
+
+    # Food sources live in two [food_sources, P] position-genotype arrays (_feasibility_index);
+    # every phase below perturbs, scores and greedily accepts a whole batch of bees at once.
+    n_food = max(1, int(food_sources))
+    stop = _early_stop(stall_generations, min_rel_improvement, target_fitness, trace)
+    foods1, foods2, S1, S2 = random_foods(n_food)
+    fits = fitness(S1, S2)
+    trial = np.zeros(n_food, dtype=int)
+
+    k = int(np.argmax(fits))
+    best = decode(k)
+    best_fit = float(fits[k])
+
+    for _c in range(int(cycles)):
+        # employed bees (one per source), then onlookers drawn by fitness roulette
+        for ks in (np.arange(n_food), None):
+            if ks is None:
+                ks = _roulette_sources(fits, n_food, rng)
+            cand1, cand2, S1, S2 = neighbors(ks)
+            cand_fit = fitness(S1, S2)
+            bees, src = _abc_greedy(ks, cand_fit, fits)
+            foods1[src] = cand1[bees]
+            foods2[src] = cand2[bees]
+            fits[src] = cand_fit[bees]
+            trial += np.bincount(ks, minlength=n_food)
+            trial[src] = 0
+
+        # scout bees: abandoned sources are re-sampled
+        scouts = np.flatnonzero(trial >= int(limit))
+        if scouts.size:
+            foods1[scouts], foods2[scouts], S1, S2 = random_foods(scouts.size)
+            fits[scouts] = fitness(S1, S2)
+            trial[scouts] = 0
+
+        # best
+        k = int(np.argmax(fits))
+        if fits[k] > best_fit:
+            best_fit = float(fits[k])
+            best = decode(k)
+        if _early_stop_step(stop, best_fit):
+            break
+
+    # build output like GA
+    chosen1, chosen2 = best
+    ls_report = None
+    if local_search:
+        chosen1, chosen2, ls_report = _local_search_two_season(chosen1, chosen2, score_tables, tables, lock_mask,
+                                                               time_limit_ms=local_search_ms, rng=rng)
+    # Repair: never allow missing/unsupported cells (filled with huge water) to be selected.
+    # If a crop-season cell is infeasible (NaN/inf or W>=1e8), force NADAS (index 0) for that season.
+    try:
+        bad1 = (~np.isfinite(W1[np.arange(P), chosen1])) | (W1[np.arange(P), chosen1] >= 1e8)
+        bad2 = (~np.isfinite(W2[np.arange(P), chosen2])) | (W2[np.arange(P), chosen2] >= 1e8)
+        if np.any(bad1):
+            chosen1 = chosen1.copy(); chosen1[bad1] = 0
+        if np.any(bad2):
+            chosen2 = chosen2.copy(); chosen2[bad2] = 0
+    except Exception:
+        pass
+
+    plan = []
+    total_water = 0.0; total_profit = 0.0
+    for i,p in enumerate(selected_parcels):
+        j1 = int(chosen1[i]); j2 = int(chosen2[i])
+        crop1 = crop_list[j1]; crop2 = crop_list[j2]
+        water1 = float(areas[i] * W1[i, j1]); prof1 = float(areas[i] * R1[i, j1])
+        water2 = float(areas[i] * W2[i, j2]); prof2 = float(areas[i] * R2[i, j2])
+        item = {
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "area_da": float(areas[i]),
+            "primary": {"crop": crop1, "water_m3": water1, "profit_tl": prof1},
+            "secondary": {"crop": crop2, "water_m3": water2, "profit_tl": prof2,
+                 "score_components": _score_components_two_season(chosen1, chosen2, areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules, month_weights=month_weights, month_caps=month_caps, month_use1=MU1, month_use2=MU2, min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop, year=int(year), parcel_ids=parcel_ids)
+                 },
+        }
+        if irrigation_label is not None and bool(lock_mask[i]):
+            item["irrigation_plan"] = irrigation_label
+        plan.append(item)
+        total_water += water1 + water2
+        total_profit += prof1 + prof2
+
+    feasible = total_water <= budget + 1e-6
+    effv = (total_profit / total_water) if total_water > 0 else 0.0
+    return {
+        "mode": "two_season",
+        "algorithm": "ABC",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(effv),
+        "details": plan,
+        "meta": {"food_sources": int(food_sources), "cycles": int(cycles), "limit": int(limit),
+                 "season_source": season_source, "rotation_rules_applied": True,
+                 "fitness_memo": _memo_stats(memo),
+                 "early_stop": _early_stop_meta(stop, cycles),
+                 **({"local_search": ls_report} if ls_report else {})},
+    }
+
+
+def _roulette_pick(weights: np.ndarray, u: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Roulette-wheel choice along the columns of a [R, C] weight matrix, one draw per `u`.
+
+    `u` is uniform in [0, 1); draw n uses row `rows[n]` (default: u's last axis indexes the
+    rows, as for an [ants, P] draw on [P, C] weights). Returns the picked column per draw, or
+    -1 where the row has no finite positive mass.
+
+    One searchsorted over the row-normalized cumsums, each shifted by its row number, so the
+    temporaries are [R, C] and u-shaped, never u-shape x C.
+    """
+    cw = np.cumsum(weights, axis=1)
+    R, C = cw.shape
+    tot = cw[:, -1].copy()
+    ok = np.isfinite(tot) & (tot > 0)
+    cw[~ok] = 0.0
+    cw /= np.where(ok, tot, 1.0)[:, None]
+    cw += np.arange(R, dtype=float)[:, None]
+    if rows is None:
+        rows = np.broadcast_to(np.arange(R), u.shape)
+    k = np.searchsorted(cw.ravel(), rows + u, side="right") - rows * C
+    return np.where(ok[rows], np.minimum(k, C - 1), -1)
+
+
+def aco_optimize_two_season(
+    selected_parcels: List[Dict[str, Any]],
+    year: int,
+    objective: str,
+    ants: int = 40,
+    iterations: int = 120,
+    rho: float = 0.25,
+    q: float = 1.0,
+    seed: Optional[int] = None,
+    budget_ratio: float = 1.0,
+    season_source: str = "both",
+    env_flow_ratio: float = 0.10,
+    irrigation_method: Optional[str] = None,
+    enforce_delivery_caps: bool = True,
+    min_unique_crops: int = 2,
+    max_share_per_crop: Optional[float] = 0.75,
+    water_model: str = "calib",
+    risk_mode: str = "none",
+    risk_lambda: float = 0.0,
+    risk_samples: int = 120,
+    water_quality_filter: bool = True,
+    local_search: bool = False,
+    local_search_ms: float = 250.0,
+    memo_size: int = FITNESS_MEMO_SIZE,
+    stall_generations: Optional[int] = None,
+    min_rel_improvement: float = 0.0,
+    target_fitness: Optional[float] = None,
+    trace: bool = False,
+    rng: Optional[np.random.Generator] = None,
+    ctx: Optional[PlanningContext] = None,
+) -> Dict[str, Any]:
+    """Ant Colony Optimization (ACO) for two-season planning.
+
+    ``local_search`` polishes the best plan with _local_search_two_season (report in meta).
+    ``stall_generations`` counts iterations (see _early_stop); ``meta.early_stop`` records the stop.
+    ``ctx``: planning context as in ga_optimize_two_season.
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode,
+                       risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    crop_list, W1, R1, W2, R2, MU1, MU2 = (ctx[k] for k in ("crop_list", "W1", "R1", "W2", "R2", "MU1", "MU2"))
+    P = int(ctx["P"])
+    C = len(crop_list)
+    areas = ctx["areas"]
+    parcel_ids = ctx["parcel_ids"]
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+    # Perennial locks (orchard/perennials) and their irrigation adjustments are already in ctx
+    locks, lock_mask, irrigation_label = ctx["locks"], ctx["lock_mask"], ctx["irrigation_label"]
+    crop_family = ctx["crop_family"]
+    rotation_rules = ctx["rotation_rules"]
+
+    if P == 0 or C == 0:
+        return {"algorithm": "ACO", "objective": objective, "year": int(year),
+                "water_budget_m3": float(budget), "feasible": True,
+                "total_water_m3": 0.0, "total_profit_tl": 0.0, "efficiency_tl_per_m3": 0.0,
+                "details": [], "meta": {"note": "no parcels/crops", "season_source": season_source}}
+
+    # Shared with GA/ABC: position lookup, rotation fallback picks + incremental budget repair of each ant.
+    tables = _build_repair_tables(W1, R1, W2, R2, crop_list, crop_family)
+    fam_idx = tables["fam_idx"]
+
+    # heuristic: use efficiency and profit per season
+    profit1 = np.maximum(0.0, R1)
+    profit2 = np.maximum(0.0, R2)
+    eff1 = np.divide(profit1, np.maximum(1.0, W1))
+    eff2 = np.divide(profit2, np.maximum(1.0, W2))
+
+    if objective == "water_saving":
+        eta1 = np.power(np.maximum(1e-9, eff1), 1.2)
+        eta2 = np.power(np.maximum(1e-9, eff2), 1.2)
+    elif objective == "max_profit":
+        eta1 = np.power(np.maximum(1e-9, profit1), 1.1)
+        eta2 = np.power(np.maximum(1e-9, profit2), 1.1)
+    else:
+        eta1 = np.power(np.maximum(1e-9, eff1), 1.0) * np.power(np.maximum(1e-9, profit1), 0.2)
+        eta2 = np.power(np.maximum(1e-9, eff2), 1.0) * np.power(np.maximum(1e-9, profit2), 0.2)
+
+    tau1 = np.ones((P, C), dtype=float)
+    tau2 = np.ones((P, C), dtype=float)
+    alpha = 1.0
+    beta = 2.0
+
+    # All ants of an iteration are built at once: eta**beta once per run, tau**alpha once per
+    # iteration, roulette picks via row cumsums + one uniform per gene. Same-family secondaries
+    # are masked out with allowed_by_fam[family(primary)] (a [F, C] conflict matrix), one
+    # primary family at a time so no [ants, P, C] weight tensor is built.
+    eta1b = np.power(eta1, beta)
+    eta2b = np.power(eta2, beta)
+    allowed_by_fam = fam_idx[None, :] != np.arange(int(fam_idx.max()) + 1)[:, None]
+    score_tables = _population_score_tables(
+        areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules,
+        month_weights=month_weights, month_caps=month_caps,
+        min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop,
+        year=int(year), parcel_ids=parcel_ids,
+    )
+    n_ants = max(1, int(ants))
+    ar = np.arange(P)
+    memo = _fitness_memo(P, memo_size)
+
+    best_s1 = None
+    best_s2 = None
+    best_fit = -1e99
+    stop = _early_stop(stall_generations, min_rel_improvement, target_fitness, trace)
+
+    for _it in range(int(iterations)):
+        # primary: rows with no usable weight fall back to a uniform crop
+        S1 = _roulette_pick(np.power(tau1, alpha) * eta1b, rng.random((n_ants, P)))
+        dead = S1 < 0
+        if np.any(dead):
+            S1[dead] = rng.integers(0, C, size=int(dead.sum()))
+        if np.any(lock_mask):
+            S1[:, lock_mask] = locks[lock_mask]
+
+        # secondary with rotation constraint (zero out same-family options)
+        f1 = fam_idx[S1]
+        base2 = np.power(tau2, alpha) * eta2b
+        u2 = rng.random((n_ants, P))
+        S2 = np.empty((n_ants, P), dtype=int)
+        for f in np.unique(f1).tolist():
+            a_idx, i_idx = np.nonzero(f1 == f)
+            rows, inv = np.unique(i_idx, return_inverse=True)
+            S2[a_idx, i_idx] = _roulette_pick(base2[rows] * allowed_by_fam[f], u2[a_idx, i_idx], inv)
+        dead = S2 < 0
+        if np.any(dead):
+            pos = np.nonzero(dead)
+            S2[pos] = tables["pick2"][pos[1], f1[pos]]
+
+        # ants are built in crop space; pos1/pos2 turn them into position genotypes (cells
+        # outside a parcel's valid set land on its first feasible crop)
+        _, _, S1, S2 = _enforce_encoded(tables["pos1"][ar, S1], tables["pos2"][ar, S2], tables,
+                                        locks, lock_mask, areas, W1, W2, budget)
+        fits = _score_population_memo(S1, S2, score_tables, memo)[0]
+
+        # evaporate
+        tau1 *= (1.0 - float(rho))
+        tau2 *= (1.0 - float(rho))
+
+        # best of iteration
+        k = int(np.argmax(fits))
+        s1b, s2b = S1[k], S2[k]
+        fb = float(fits[k])
+
+        if fb > best_fit:
+            best_fit = fb
+            best_s1 = s1b.copy()
+            best_s2 = s2b.copy()
+
+        # deposit pheromone
+        fmin = float(np.min(fits))
+        deposit = float(q) * max(0.0, fb - fmin + 1e-9) / 1e6
+        tau1[ar, s1b] += deposit
+        tau2[ar, s2b] += deposit
+
+        tau1 = np.clip(tau1, 1e-9, 1e9)
+        tau2 = np.clip(tau2, 1e-9, 1e9)
+        if _early_stop_step(stop, best_fit):
+            break
+
+    if best_s1 is None:
+        best_s1 = rng.integers(0, C, size=P)
+        best_s2 = rng.integers(0, C, size=P)
+    ls_report = None
+    if local_search:
+        best_s1, best_s2, ls_report = _local_search_two_season(best_s1, best_s2, score_tables, tables, lock_mask,
+                                                               time_limit_ms=local_search_ms, rng=rng)
+
+    # output
+    # Repair: avoid infeasible cells (missing/unsupported -> W>=1e8). Force NADAS (index 0).
+    try:
+        b1 = (~np.isfinite(W1[np.arange(P), best_s1])) | (W1[np.arange(P), best_s1] >= 1e8)
+        b2 = (~np.isfinite(W2[np.arange(P), best_s2])) | (W2[np.arange(P), best_s2] >= 1e8)
+        if np.any(b1):
+            best_s1 = best_s1.copy(); best_s1[b1] = 0
+        if np.any(b2):
+            best_s2 = best_s2.copy(); best_s2[b2] = 0
+    except Exception:
+        pass
+
+    # output
+    plan = []
+    total_water = 0.0; total_profit = 0.0
+    for i,p in enumerate(selected_parcels):
+        j1 = int(best_s1[i]); j2 = int(best_s2[i])
+        crop1 = crop_list[j1]; crop2 = crop_list[j2]
+        water1 = float(areas[i] * W1[i, j1]); prof1 = float(areas[i] * R1[i, j1])
+        water2 = float(areas[i] * W2[i, j2]); prof2 = float(areas[i] * R2[i, j2])
+        item = {
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "area_da": float(areas[i]),
+            "primary": {"crop": crop1, "water_m3": water1, "profit_tl": prof1},
+            "secondary": {"crop": crop2, "water_m3": water2, "profit_tl": prof2,
+                 "score_components": _score_components_two_season(best_s1, best_s2, areas, W1, R1, W2, R2, budget, objective, crop_list, crop_family, rotation_rules, month_weights=month_weights, month_caps=month_caps, month_use1=MU1, month_use2=MU2, min_unique_crops=min_unique_crops, max_share_per_crop=max_share_per_crop, year=int(year), parcel_ids=parcel_ids)
+                 },
+        }
+        if irrigation_label is not None and bool(lock_mask[i]):
+            item["irrigation_plan"] = irrigation_label
+        plan.append(item)
+        total_water += water1 + water2
+        total_profit += prof1 + prof2
+
+    feasible = total_water <= budget + 1e-6
+    effv = (total_profit / total_water) if total_water > 0 else 0.0
+    return {
+        "mode": "two_season",
+        "algorithm": "ACO",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(effv),
+        "details": plan,
+        "meta": {"ants": int(ants), "iterations": int(iterations), "rho": float(rho), "q": float(q),
+                 "season_source": season_source, "rotation_rules_applied": True,
+                 "fitness_memo": _memo_stats(memo),
+                 "early_stop": _early_stop_meta(stop, iterations),
+                 **({"local_search": ls_report} if ls_report else {})},
+    }
+
+
+
+def abc_optimize(selected_parcels: List[Dict[str, Any]], year: int, objective: str,
+                 food_sources: int = 40, cycles: int = 120, limit: int = 25,
+                 seed: Optional[int] = None, budget_ratio: float = 1.0, season_source: str = "both",
+                 env_flow_ratio: float = 0.10, irrigation_method: Optional[str] = None, enforce_delivery_caps: bool = True,
+                 stall_generations: Optional[int] = None, min_rel_improvement: float = 0.0,
+                 target_fitness: Optional[float] = None, trace: bool = False, local_search: bool = False,
+                 local_search_ms: float = 250.0, rng: Optional[np.random.Generator] = None,
+                 ctx: Optional[PlanningContext] = None) -> Dict[str, Any]:
+    """Artificial Bee Colony optimizer (discrete crop choice per parcel; early stop: see _early_stop).
+
+    ``ctx``: planning context as in ga_optimize; ``local_search`` as in ga_optimize.
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps)
+    single = _planning_single(ctx)
+    crop_list, W, R = single["crop_list"], single["W"], single["R"]
+    locks, lock_mask, irrigation_label = single["locks"], single["lock_mask"], single["irrigation_label"]
+
+    def _enforce_locks(pop: np.ndarray) -> np.ndarray:
+        if np.any(lock_mask):
+            pop[..., lock_mask] = locks[lock_mask]
+        return pop
+
+    P = int(ctx["P"]); C = len(crop_list)
+    areas = ctx["areas"]
+
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    if P == 0 or C == 0:
+        return {"algorithm": "ABC", "objective": objective, "year": int(year),
+                "water_budget_m3": float(budget), "feasible": True,
+                "total_water_m3": 0.0, "total_profit_tl": 0.0, "efficiency_tl_per_m3": 0.0,
+                "details": [], "meta": {"note": "no parcels/crops"}}
+
+    valid = (W < 1e8) & np.isfinite(W) & np.isfinite(R) & (W >= 0.0)
+    choices, n_choices = _padded_choices(
+        [np.flatnonzero(valid[i]) if valid[i].any() else np.array([0], dtype=int) for i in range(P)])
+
+    def fitness(pop: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return _score_population(pop, areas, W, R, budget, objective, month_weights, month_caps)
+
+    def neighbors(ks: np.ndarray) -> np.ndarray:
+        # one parcel per bee (locked parcels stay as they are)
+        v = foods[ks]
+        i = rng.integers(0, P, size=len(ks))
+        v[np.arange(len(ks)), i] = _pick_choices(choices, n_choices, i, rng.random(len(ks)))
+        return _enforce_locks(v)
+
+    # initialize food sources ([food_sources, P]); every phase is one batch of bees
+    food_sources = max(1, int(food_sources))
+    stop = _early_stop(stall_generations, min_rel_improvement, target_fitness, trace)
+    foods = _enforce_locks(_sample_choices(choices, n_choices, food_sources, rng))
+    fits, waters, profits = fitness(foods)
+    trials = np.zeros(food_sources, dtype=int)
+
+    k = int(np.argmax(fits))
+    best_sol = foods[k].copy()
+    best_fit, best_w, best_p = float(fits[k]), float(waters[k]), float(profits[k])
+
+    for _ in range(cycles):
+        # employed bees (one per source), then onlookers (as many as sources) by fitness roulette
+        for ks in (np.arange(food_sources), None):
+            if ks is None:
+                ks = _roulette_sources(fits, food_sources, rng)
+            cand = neighbors(ks)
+            cand_fit, cand_w, cand_p = fitness(cand)
+            bees, src = _abc_greedy(ks, cand_fit, fits)
+            foods[src] = cand[bees]
+            fits[src], waters[src], profits[src] = cand_fit[bees], cand_w[bees], cand_p[bees]
+            trials += np.bincount(ks, minlength=food_sources)
+            trials[src] = 0
+
+        # scouts
+        scouts = np.flatnonzero(trials >= limit)
+        if scouts.size:
+            foods[scouts] = _enforce_locks(_sample_choices(choices, n_choices, scouts.size, rng))
+            fits[scouts], waters[scouts], profits[scouts] = fitness(foods[scouts])
+            trials[scouts] = 0
+
+        # update best
+        k = int(np.argmax(fits))
+        if fits[k] > best_fit:
+            best_fit, best_w, best_p = float(fits[k]), float(waters[k]), float(profits[k])
+            best_sol = foods[k].copy()
+        if _early_stop_step(stop, best_fit):
+            break
+
+    chosen = best_sol
+    ls_report = None
+    if local_search:
+        chosen, ls_report = _local_search_single(
+            chosen, areas, W, R, valid, lock_mask,
+            lambda w, p: _totals_fitness(w, p, budget, objective, month_weights, month_caps), budget,
+            month_weights, month_caps, time_limit_ms=local_search_ms, rng=rng)
+    plan = []
+    total_water = 0.0; total_profit = 0.0
+    for i, p in enumerate(selected_parcels):
+        j = int(chosen[i])
+        crop_key = crop_list[j]
+        water = float(areas[i] * W[i, j])
+        profit = float(areas[i] * R[i, j])
+        plan.append({
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "chosenCrop": crop_key,
+            "area_da": float(areas[i]),
+            "water_m3": water,
+            "profit_tl": profit
+        })
+        if irrigation_label is not None and bool(lock_mask[i]):
+            plan[-1]["irrigation_plan"] = irrigation_label
+        total_water += water
+        total_profit += profit
+
+    feasible = total_water <= budget + 1e-6
+    eff = (total_profit / total_water) if total_water > 0 else 0.0
+    return {
+        "algorithm": "ABC",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(eff),
+        "details": plan,
+        "meta": {"foodSources": int(food_sources), "cycles": int(cycles), "limit": int(limit), "season_source": season_source,
+                 "early_stop": _early_stop_meta(stop, cycles),
+                 **({"local_search": ls_report} if ls_report else {})}
+    }
+
+
+def aco_optimize(selected_parcels: List[Dict[str, Any]], year: int, objective: str,
+                 ants: int = 40, iterations: int = 120, rho: float = 0.25, q: float = 1.0,
+                 seed: Optional[int] = None, budget_ratio: float = 1.0, season_source: str = "both",
+                 env_flow_ratio: float = 0.10, irrigation_method: Optional[str] = None, enforce_delivery_caps: bool = True,
+                 stall_generations: Optional[int] = None, min_rel_improvement: float = 0.0,
+                 target_fitness: Optional[float] = None, trace: bool = False, local_search: bool = False,
+                 local_search_ms: float = 250.0, rng: Optional[np.random.Generator] = None,
+                 ctx: Optional[PlanningContext] = None) -> Dict[str, Any]:
+    """Ant Colony Optimization (discrete crop choice per parcel; early stop: see _early_stop).
+
+    ``ctx``: planning context as in ga_optimize; ``local_search`` as in ga_optimize.
+    """
+    rng = rng if rng is not None else _make_rng(seed)
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source, budget_ratio=budget_ratio,
+                       env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method,
+                       enforce_delivery_caps=enforce_delivery_caps)
+    single = _planning_single(ctx)
+    crop_list, W, R = single["crop_list"], single["W"], single["R"]
+    locks, lock_mask, irrigation_label = single["locks"], single["lock_mask"], single["irrigation_label"]
+
+    P = int(ctx["P"]); C = len(crop_list)
+    areas = ctx["areas"]
+
+    # Basin budget (annual) + optional monthly delivery caps (None when disabled)
+    budget = float(ctx["budget"])
+    month_weights, month_caps = ctx["month_weights"], ctx["month_caps"]
+
+    if P == 0 or C == 0:
+        return {"algorithm": "ACO", "objective": objective, "year": int(year),
+                "water_budget_m3": float(budget), "feasible": True,
+                "total_water_m3": 0.0, "total_profit_tl": 0.0, "efficiency_tl_per_m3": 0.0,
+                "details": [], "meta": {"note": "no parcels/crops"}}
+
+    # heuristic matrix eta: prefer higher profit and/or efficiency
+    profit = np.maximum(0.0, R)
+    eff = np.divide(profit, np.maximum(1.0, W))
+    if objective == "water_saving":
+        eta = np.power(np.maximum(1e-9, eff), 1.2)
+    elif objective == "max_profit":
+        eta = np.power(np.maximum(1e-9, profit), 1.1)
+    else:
+        eta = np.power(np.maximum(1e-9, eff), 1.0) * np.power(np.maximum(1e-9, profit), 0.2)
+
+    tau = np.ones((P, C), dtype=float)  # pheromone
+    alpha = 1.0  # pheromone influence
+    beta = 2.0   # heuristic influence
+
+    best_sol = None
+    best_fit = -1e30
+    best_w = 0.0
+    best_p = 0.0
+    stop = _early_stop(stall_generations, min_rel_improvement, target_fitness, trace)
+
+    for _it in range(iterations):
+        sols = []
+        fits = []
+        for _a in range(ants):
+            chosen = np.zeros(P, dtype=int)
+            for i in range(P):
+                if np.any(lock_mask) and bool(lock_mask[i]):
+                    chosen[i] = int(locks[i])
+                    continue
+                weights = np.power(tau[i], alpha) * np.power(eta[i], beta)
+                s = float(np.sum(weights))
+                if not np.isfinite(s) or s <= 0:
+                    chosen[i] = int(rng.integers(0, C))
+                else:
+                    probs = weights / s
+                    chosen[i] = int(rng.choice(C, p=probs))
+            fit, tw, tp = _score_solution(chosen, areas, W, R, budget, objective,
+                                          month_weights=month_weights, month_caps=month_caps)
+            sols.append(chosen)
+            fits.append((fit, tw, tp))
+
+        # evaporation
+        tau *= (1.0 - float(rho))
+
+        # deposit pheromone from best ant of this iteration
+        idx = int(np.argmax([f[0] for f in fits]))
+        fit_i, tw_i, tp_i = fits[idx]
+        sol_i = sols[idx]
+
+        if fit_i > best_fit:
+            best_fit, best_w, best_p = fit_i, tw_i, tp_i
+            best_sol = sol_i.copy()
+
+        # deposit: better fitness -> more pheromone
+        deposit = float(q) * max(0.0, fit_i - min(f[0] for f in fits) + 1e-9) / 1e6
+        for i in range(P):
+            tau[i, int(sol_i[i])] += deposit
+
+        # numerical stability
+        tau = np.clip(tau, 1e-9, 1e9)
+        if _early_stop_step(stop, best_fit):
+            break
+
+    chosen = best_sol if best_sol is not None else rng.integers(0, C, size=P)
+    ls_report = None
+    if local_search:
+        valid = (W < 1e8) & np.isfinite(W) & np.isfinite(R) & (W >= 0.0)
+        chosen, ls_report = _local_search_single(
+            chosen, areas, W, R, valid, lock_mask,
+            lambda w, p: _totals_fitness(w, p, budget, objective, month_weights, month_caps), budget,
+            month_weights, month_caps, time_limit_ms=local_search_ms, rng=rng)
+    plan = []
+    total_water = 0.0; total_profit = 0.0
+    for i, p in enumerate(selected_parcels):
+        j = int(chosen[i])
+        crop_key = crop_list[j]
+        water = float(areas[i] * W[i, j])
+        profit = float(areas[i] * R[i, j])
+        plan.append({
+            "parcelId": p["id"],
+            "parcelName": p["name"],
+            "chosenCrop": crop_key,
+            "area_da": float(areas[i]),
+            "water_m3": water,
+            "profit_tl": profit
+        })
+        if irrigation_label is not None and bool(lock_mask[i]):
+            plan[-1]["irrigation_plan"] = irrigation_label
+        total_water += water
+        total_profit += profit
+
+    feasible = total_water <= budget + 1e-6
+    effv = (total_profit / total_water) if total_water > 0 else 0.0
+    return {
+        "algorithm": "ACO",
+        "objective": objective,
+        "year": int(year),
+        "budget_ratio": float(budget_ratio or 1.0),
+        "water_budget_m3": float(budget),
+        "feasible": bool(feasible),
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(effv),
+        "details": plan,
+        "meta": {"ants": int(ants), "iterations": int(iterations), "rho": float(rho), "season_source": season_source,
+                 "early_stop": _early_stop_meta(stop, iterations),
+                 **({"local_search": ls_report} if ls_report else {})}
+    }
+
+
+
+
+# -----------------------------
+# Simple mode (v51): compiled scoring tables
+# -----------------------------
+
+# Scenario-2 "çok yıllık" ürün havuzu (normalize_crop_key ile normalize ediliyor).
+# Datasetlerde parantez/şapka/İ-Ş-Ğ vb. farklar olabildiği için hem TR hem normalize
+# varyantları ekliyoruz (örn. "BAĞ (ÜZÜM)" -> "BAG").
+SIMPLE_S2_PERENNIAL = [
+    'ELMA',
+    'KIRAZ','KİRAZ','VİŞNE','VISNE',
+    'ARMUT','AYVA',
+    'ŞEFTALİ','SEFTALI','NEKTARİN','NEKTARIN','KAYISI','ERIK','ERİK',
+    'BAĞ','BAG','ÜZÜM','UZUM','UZUM_SOFRALIK','UZUM_SARAPLIK',
+    'CEVIZ','CEVİZ','BADEM',
+    'NAR','ZEYTIN','FISTIK','FINDIK','INCIR'
+]
+SIMPLE_S2_ANNUAL = [
+    'PATATES','SİLAJLIK MISIR','SILAJLIK MISIR','YONCA','BUĞDAY (DANE)','BUGDAY (DANE)','ŞEKER PANCARI','SEKER PANCARI'
+]
+# Conservative placeholder params (water, profit per da) for Scenario-2 crops that may not exist
+# in the demo catalog; applied to a request-local overlay, never to the cached catalog.
+SIMPLE_S2_PLACEHOLDERS = {"perennial": (320.0, 9000.0), "annual": (520.0, 6500.0)}
+
+# Rough, farmer-oriented suitability heuristics (no hidden data):
+# - Water-intensive vegetables/industrial crops prefer class I-II.
+# - Cereals/forage tolerate poorer soils.
+SIMPLE_HIGH_INPUT = {
+    "PATATES", "SEKER_PANCARI", "SALCALIK_DOMATES", "SOFRALIK_DOMATES",
+    "SALCALIK_BIBER", "KAVUN", "KABAK_CEREZLIK", "SOGAN_KURU", "FASULYE_TAZE", "LAHANA_BEYAZ"
+}
+SIMPLE_TOLERANT = {"BUGDAY_DANE", "ARPA_DANE", "CAVDAR_DANE", "YONCA_YESILOT", "SILAJLIK_MISIR"}
+
+
+def _sc2_norm(x: str) -> str:
+    try:
+        return normalize_crop_key(str(x))
+    except Exception:
+        return str(x).strip().upper()
+
+
+def _irrigation_efficiency(method: str, irr_eff: Dict[str, Dict[str, Any]]) -> float:
+    """Total efficiency of an irrigation method name/alias (1.0 when unknown or rainfed)."""
+    if not method:
+        return 1.0
+    key = str(method).strip().lower()
+    key = {"surface":"surface_furrow","furrow":"surface_furrow","salma":"surface_furrow","karik":"surface_furrow",
+           "sprinkler":"sprinkler","yagmurlama":"sprinkler",
+           "drip":"drip","damla":"drip",
+           "pivot":"sprinkler","rainfed":"rainfed","kuru":"rainfed"}.get(key, key)
+    if key == "rainfed":
+        return 1.0
+    rec = irr_eff.get(key) or {}
+    try:
+        return float(rec.get("typical_total_efficiency") or rec.get("total_efficiency") or 1.0)
+    except Exception:
+        return 1.0
+
+
+def _irrigation_adjusted_water(crop: str, water_m3_da: float, irr_map: Dict[str, Dict[str, Any]],
+                               irr_eff: Dict[str, Dict[str, Any]]) -> float:
+    """Water per da after switching `crop` from its current to its recommended irrigation method."""
+    m = irr_map.get(crop) or {}
+    ecur = _irrigation_efficiency(m.get("current"), irr_eff)
+    erec = _irrigation_efficiency(m.get("recommended"), irr_eff)
+    if erec <= 0: erec = 1.0
+    if ecur <= 0: ecur = 1.0
+    if erec > ecur + 1e-9:
+        return float(water_m3_da) * (ecur/erec)
+    return float(water_m3_da)
+
+
+def _soil_class_rank(soil_class: Any) -> int:
+    """Return 1..8 where 1 is best soil. Unknown -> 3."""
+    try:
+        s = str(soil_class or "").strip().upper()
+        if not s:
+            return 3
+        # allow Roman numerals or digits
+        roman = {"I": 1, "II": 2, "III": 3, "IV": 4, "V": 5, "VI": 6, "VII": 7, "VIII": 8}
+        if s in roman:
+            return roman[s]
+        # sometimes like "1. SINIF" or "II. sınıf"
+        for k, v in roman.items():
+            if k in s:
+                return v
+        digits = "".join([ch for ch in s if ch.isdigit()])
+        if digits:
+            v = int(digits[:1])
+            return max(1, min(8, v))
+    except Exception:
+        pass
+    return 3
+
+
+def _simple_current_crops(year: int) -> Dict[str, str]:
+    """parcel_id -> current primary crop in `year` (Scenario-2 seasons, Scenario-1 as fallback)."""
+    try:
+        s2_all = seasons_for_year('s2')
+        dfy = seasons_for_year('s1' if s2_all.empty else 's2', year)
+        if not dfy.empty:
+            if 'season_key' in dfy.columns:
+                prim = dfy[dfy['season_key'] == SEASON_PRIMARY]
+                if not prim.empty:
+                    dfy = prim
+            # take first record per parcel as 'current' crop in that year
+            if 'parcel_id' in dfy.columns and 'crop' in dfy.columns:
+                return dfy.groupby('parcel_id')['crop'].first().to_dict()
+    except Exception:
+        pass
+    return {}
+
+
+def _simple_mode_tables(season_source: str, year: int) -> Dict[str, Any]:
+    """Simple-mode heuristics compiled to arrays over all parcels x the crop pools.
+
+    Built once per (dataset_version, pool, year); Scenario-2 placeholders live in a local
+    catalog overlay. Keys: crops, pid_row; score [P, C] (-1e18 for crops missing from the
+    catalog); water/profit [C] as reported in the plan; primary [Cp] crop columns in pool order
+    and primary_key [Cp] (diversity-cap groups); pair_cols/pair_ok [Cp, K] secondary candidates
+    per primary in rule order, family clashes masked; annual [Ca] (Scenario-2 field crops);
+    lock/lock_water/lock_profit [P] (Scenario-2 perennials that keep their current crop).
+    """
+    s2 = (str(season_source) == "s2")
+    key = (dataset_version(), "s2" if s2 else "s1", int(year))
+    store = _cache.setdefault("simple_mode_tables", {})
+    metrics.cache_event("simple_tables", key in store)
+    if key in store:
+        return store[key]
+
+    catalog = load_crop_catalog()
+    parcels = load_parcels()
+    s1_rules = load_s1_crop_calendar_rules() or {}
+    fam_map = load_crop_family_map()
+    irr_map = load_crop_irrigation_map()
+    irr_eff = load_irrigation_methods()
+
+    perennial = set(_sc2_norm(x) for x in SIMPLE_S2_PERENNIAL)
+    annual = set(_sc2_norm(x) for x in SIMPLE_S2_ANNUAL)
+    cat = catalog
+    if s2:
+        cat = dict(catalog)
+        for pool, kind in ((perennial, "perennial"), (annual, "annual")):
+            w0, p0 = SIMPLE_S2_PLACEHOLDERS[kind]
+            for k in pool:
+                cat.setdefault(k, {'water_per_da': w0, 'profit_per_da': p0})
+        # Scenario-2 pool: perennial + specified annual field crops (single-crop by default).
+        primary_crops = sorted(perennial | annual)
+        secondary_crops: List[str] = []
+        annual_pool = sorted(annual)
+    else:
+        # fixed crop pools for Senaryo-1 (DATA-DRIVEN)
+        primary_crops = [k for k in s1_rules.keys() if k != '_derived']
+        secondary_crops = sorted({c for k in primary_crops for c in ((s1_rules.get(k, {}) or {}).get('secondary_options') or [])})
+        annual_pool = []
+    pair_names = []
+    for c1 in primary_crops:
+        cand2 = [] if s2 else ((s1_rules.get(c1, {}) or {}).get('secondary_options') or [])
+        pair_names.append(list(cand2 if cand2 else secondary_crops))
+
+    crops: List[str] = []
+    col: Dict[str, int] = {}
+    for c in primary_crops + annual_pool + [c2 for names in pair_names for c2 in names]:
+        if c not in col:
+            col[c] = len(crops)
+            crops.append(c)
+    C = len(crops)
+    norm = [normalize_crop_key(c) for c in crops]
+
+    # per-crop terms of the score, plus the values reported in the plan
+    sw = np.zeros(C); sp = np.zeros(C); known = np.zeros(C, dtype=bool)
+    water = np.zeros(C); profit = np.zeros(C)
+    for j, c in enumerate(crops):
+        rec = cat.get(norm[j]) or cat.get(c)
+        if rec:
+            known[j] = True
+            sw[j] = _irrigation_adjusted_water(c, float(rec.get("water_m3_da", 0) or 0), irr_map, irr_eff)
+            sp[j] = float(rec.get("net_profit_tl_da", 0) or 0)
+        out = cat.get(norm[j]) or {}
+        water[j] = _irrigation_adjusted_water(c, float(out.get("waterPerDa", out.get("water_m3_da",0)) or 0), irr_map, irr_eff)
+        profit[j] = float(out.get("profitPerDa", out.get("net_profit_tl_da",0)) or 0)
+    high = np.array([k in SIMPLE_HIGH_INPUT for k in norm], dtype=bool)
+    tolerant = np.array([k in SIMPLE_TOLERANT for k in norm], dtype=bool)
+
+    # per-parcel soil rank and profit floor (per-da, from the parcel's baseline profit)
+    P = len(parcels)
+    rank = np.array([_soil_class_rank(((p.get("soil") or {}) if isinstance(p, dict) else {}).get("class"))
+                     for p in parcels], dtype=int).reshape(P, 1)
+    floor = np.full((P, 1), 500.0)
+    for i, p in enumerate(parcels):
+        try:
+            area_da = float(p.get("area_da", 0) or 0)
+            base_profit = float(p.get("profit_tl", 0) or 0)
+            if area_da > 0 and base_profit > 0:
+                floor[i, 0] = max(500.0, 0.15 * (base_profit / area_da))
+        except Exception:
+            pass
+
+    # good soils: small bonus for high-input crops; medium: neutral;
+    # poor soils: penalize high-input crops, slightly reward tolerant ones
+    bonus = np.where(rank <= 2, np.where(high, 450.0, 80.0),
+                     np.where(rank == 3, np.where(high, 0.0, 40.0),
+                              np.where(high, -650.0, np.where(tolerant, 180.0, 0.0))))
+    # Avoid suggesting loss-making crops; penalize falling below the profit floor.
+    loss_penalty = np.where(sp < 0, 2000.0 + np.abs(sp) * 0.25, 0.0)
+    floor_penalty = np.where(sp < floor, (floor - sp) * 0.55, 0.0)
+    # Water-saving always: prioritize low water, but reward profit.
+    score = (-sw) + 0.0012 * np.maximum(sp, 0.0) - 0.001 * loss_penalty - 0.004 * floor_penalty + bonus
+    score = np.where(known, score, -1e18)
+
+    key_id: Dict[str, int] = {}
+    primary_key = np.array([key_id.setdefault(normalize_crop_key(c), len(key_id)) for c in primary_crops], dtype=int)
+    K = max((len(names) for names in pair_names), default=0)
+    pair_cols = np.zeros((len(primary_crops), K), dtype=int)
+    pair_ok = np.zeros((len(primary_crops), K), dtype=bool)
+    for a, (c1, names) in enumerate(zip(primary_crops, pair_names)):
+        fam1 = fam_map.get(normalize_crop_key(c1))
+        for b, c2 in enumerate(names):
+            pair_cols[a, b] = col[c2]
+            pair_ok[a, b] = not (fam1 and fam_map.get(normalize_crop_key(c2)) == fam1)
+
+    # Scenario-2 perennial rule: if the parcel's current crop is a perennial, KEEP IT.
+    lock: List[Optional[str]] = [None] * P
+    lock_water = np.zeros(P); lock_profit = np.zeros(P)
+    if s2:
+        current = _simple_current_crops(int(year))
+        for i, p in enumerate(parcels):
+            pid = str(p.get("id", ""))
+            curr_raw = current.get(pid)
+            curr_key = _sc2_norm(curr_raw) if curr_raw else ''
+            if curr_key in perennial:
+                rec = cat.get(curr_key, {})
+                lock[i] = curr_key
+                lock_water[i] = float(rec.get('waterPerDa', rec.get('water_per_da', 320.0)) or 0.0)
+                lock_profit[i] = float(rec.get('profitPerDa', rec.get('profit_per_da', 9000.0)) or 0.0)
+
+    store[key] = {
+        "crops": crops, "pid_row": {str(p.get("id")): i for i, p in enumerate(parcels)},
+        "score": score, "water": water, "profit": profit,
+        "primary": np.array([col[c] for c in primary_crops], dtype=int), "primary_key": primary_key,
+        "pair_cols": pair_cols, "pair_ok": pair_ok,
+        "annual": np.array([col[c] for c in annual_pool], dtype=int),
+        "lock": lock, "lock_water": lock_water, "lock_profit": lock_profit,
+    }
+    return store[key]
+
+
+@_stage("simple_mode")
+def _simple_mode_plan(selected: List[Dict[str, Any]], season_source: str, year: int) -> Tuple[List[Dict[str, Any]], float, float]:
+    """Simple-mode (primary, secondary) plan per parcel -> (parcels_out, total water, total profit).
+
+    Senaryo-1: primaries are assigned with a soft per-crop cap (larger parcels pick first) so
+    parcels do not all get the same crop; the secondary is the best rule-based option of
+    another crop family on 25% of the area. Senaryo-2: perennials keep their current crop,
+    field parcels get the best annual crop (single crop).
+    """
+    tb = _simple_mode_tables(season_source, year)
+    s2 = (str(season_source) == "s2")
+    crops, water, profit = tb["crops"], tb["water"], tb["profit"]
+    rows = np.array([tb["pid_row"][str(p.get("id"))] for p in selected], dtype=int)
+    n = len(rows)
+    ar = np.arange(n)
+    score = tb["score"][rows]
+    primary = tb["primary"]
+    first = np.full(n, -1, dtype=int)
+    second = np.full(n, -1, dtype=int)
+
+    if s2:
+        if tb["annual"].size:
+            first = tb["annual"][np.argmax(score[:, tb["annual"]], axis=1)]
+    elif primary.size and n:
+        # Basin-level diversity guard: at most `cap` parcels per primary (one each when the pool
+        # is at least as large as the selection), larger parcels first.
+        cap = 1 if len(primary) >= n else max(1, int(np.ceil(n * 0.25)))
+        ranked = np.argsort(-score[:, primary], axis=1, kind="stable")
+        counts = np.zeros(int(tb["primary_key"].max()) + 1, dtype=int)
+        pos = np.zeros(n, dtype=int)
+        areas = np.array([float(p.get("area_da", 0) or 0) for p in selected], dtype=float)
+        for i in np.argsort(-areas, kind="stable"):
+            free = counts[tb["primary_key"][ranked[i]]] < cap
+            pos[i] = ranked[i, int(np.argmax(free))] if free.any() else ranked[i, 0]
+            counts[tb["primary_key"][pos[i]]] += 1
+        first = primary[pos]
+        if tb["pair_cols"].shape[1]:
+            cols = tb["pair_cols"][pos]
+            s = np.where(tb["pair_ok"][pos], np.take_along_axis(score, cols, axis=1), -np.inf)
+            k2 = np.argmax(s, axis=1)
+            second = np.where(s[ar, k2] > -1e18, cols[ar, k2], -1)
+
+    irr_map = load_crop_irrigation_map()
+    parcels_out = []
+    tot_w = 0.0
+    tot_p = 0.0
+    for i, p in enumerate(selected):
+        area_da = float(p.get("area_da", 0) or 0)
+        lock = tb["lock"][rows[i]] if s2 else None
+        if lock is not None:
+            picks = [(lock, area_da, float(tb["lock_water"][rows[i]]), float(tb["lock_profit"][rows[i]]))]
+        elif first[i] >= 0:
+            a1 = area_da * 0.75
+            picks = [(crops[first[i]], a1, float(water[first[i]]), float(profit[first[i]]))]
+            if second[i] >= 0:
+                picks.append((crops[second[i]], area_da - a1, float(water[second[i]]), float(profit[second[i]])))
+        else:
+            picks = []
+        rec_list = []
+        for name, area, w_per, prof_per in picks:
+            tot = area * w_per
+            tprof = area * prof_per
+            tot_w += tot
+            tot_p += tprof
+            rec_list.append({
+                "name": name,
+                "area": area,
+                "waterPerDa": w_per,
+                "profitPerDa": prof_per,
+                "totalWater": tot,
+                "totalProfit": tprof,
+                "irrigation": irr_map.get(name, {})
+            })
+        parcels_out.append({"id": p["id"], "result": {"recommended": rec_list}})
+    return parcels_out, tot_w, tot_p
+
+
+@_timed_view
+def optimize(selected_ids: List[str], algorithm: str, scenario: str, water_budget_ratio: float, year: Optional[int]=None, options: Optional[Dict[str,Any]]=None) -> Dict[str, Any]:
+    parcels = load_parcels()
+    selected = [p for p in parcels if (not selected_ids) or (p["id"] in selected_ids)]
+
+    # Baseline totals
+    total_water_current = sum(float(p.get("water_m3", 0) or 0) for p in selected)
+    total_profit_current = sum(float(p.get("profit_tl", 0) or 0) for p in selected)
+    if total_water_current <= 0:
+        total_water_current = sum(float(p.get("area_da", 0) or 0) for p in selected) * 500.0
+    if total_profit_current <= 0:
+        total_profit_current = sum(float(p.get("area_da", 0) or 0) for p in selected) * 5000.0
+
+    y = int(year) if year is not None else (available_years()[-1] if available_years() else 2024)
+
+    # CURRENT scenario simply returns observed parcel summary
+    if str(scenario).lower() in ("current","mevcut"):
+        eff = (total_profit_current/total_water_current) if total_water_current>0 else 0.0
+        return {
+            "status": "OK",
+            "algorithm": str(algorithm),
+            "objective": "current",
+            "year": y,
+            "water_budget_m3": float(water_budget_for_year(y, selected)),
+            "feasible": True,
+            "total_water_m3": float(total_water_current),
+            "total_profit_tl": float(total_profit_current),
+            "efficiency_tl_per_m3": float(eff),
+            "details": [{
+                "parcelId": p["id"],
+                "parcelName": p["name"],
+                "chosenCrop": None,
+                "area_da": float(p.get("area_da",0) or 0),
+                "water_m3": float(p.get("water_m3",0) or 0),
+                "profit_tl": float(p.get("profit_tl",0) or 0),
+            } for p in selected],
+            "meta": {"note":"current totals from parcel summary", "timings_ms": _timing_report()}
+        }
+
+    # NOTE (v74): Project goal is always water saving.
+    # We still allow "mevcut" for baseline display, but every optimization run
+    # is solved with a water-saving objective plus a profit floor so farmers
+    # still earn (even if modestly).
+    objective = "water_saving"
+
+
+    # --- v51 CLEAN: Simple 2-crop optimizer (always on unless options.simpleMode==False) ---
+    simple_mode = bool(options.get('simpleMode', False))
+    if isinstance(options, dict) and ("simpleMode" in options):
+        simple_mode = bool(options.get("simpleMode"))
+    if simple_mode:
+        season_source = str((options or {}).get('seasonSource', 's1') or 's1').strip().lower()
+        # Heuristics are compiled once per dataset version (_simple_mode_tables).
+        parcels_out, tot_w, tot_p = _simple_mode_plan(selected, season_source, y)
+        eff2 = (tot_p/tot_w) if tot_w>0 else 0.0
+        return {
+            "status":"OK",
+            "algorithm": str(algorithm),
+            "objective": objective,
+            "year": y,
+            "water_budget_m3": float(water_budget_for_year(y, selected)) * float(water_budget_ratio or 1.0),
+            "total_water_m3": float(tot_w),
+            "total_profit_tl": float(tot_p),
+            "efficiency_tl_per_m3": float(eff2),
+            "parcels": parcels_out,
+            "meta":{"mode":"simple_v51","note":"Max 2 crops; irrigation-adjusted water; fixed Senaryo-1 pool",
+                    "timings_ms": _timing_report()}
+        }
+
+    algo = str(algorithm or "GA").upper()
+    opts = options or {}
+    season_source = str((opts.get("seasonSource") if isinstance(opts, dict) else None) or "both")
+    two_season = bool(opts.get("twoSeason", True)) if isinstance(opts, dict) else True
+
+    env_flow_ratio = float(opts.get("envFlowRatio", 0.10)) if isinstance(opts, dict) else 0.10
+    irrigation_method = (str(opts.get("irrigationMethod")) if isinstance(opts, dict) and opts.get("irrigationMethod") else None)
+    enforce_delivery_caps = bool(opts.get("enforceDeliveryCaps", True)) if isinstance(opts, dict) else True
+
+    water_model = str(opts.get("waterModel", "calib")) if isinstance(opts, dict) else "calib"
+    risk_mode = str(opts.get("riskMode", "none")) if isinstance(opts, dict) else "none"
+    risk_lambda = float(opts.get("riskLambda", 0.0)) if isinstance(opts, dict) else 0.0
+    risk_samples = int(opts.get("riskSamples", 120)) if isinstance(opts, dict) else 120
+    water_quality_filter = bool(opts.get("waterQualityFilter", True)) if isinstance(opts, dict) else True
+
+    min_unique_crops = int(opts.get("minUniqueCrops", 2 if two_season else 1)) if isinstance(opts, dict) else (2 if two_season else 1)
+    max_share_per_crop = opts.get("maxSharePerCrop", 0.75 if two_season else 0.85) if isinstance(opts, dict) else (0.75 if two_season else 0.85)
+    local_search = bool(opts.get("localSearch", False)) if isinstance(opts, dict) else False
+    local_search_ms = float(opts.get("localSearchMs", 250.0)) if isinstance(opts, dict) else 250.0
+    memo_size = int(opts.get("memoSize", FITNESS_MEMO_SIZE)) if isinstance(opts, dict) else FITNESS_MEMO_SIZE
+    # Early stopping: on by default (stop after 30 iterations without improvement); 0 disables it.
+    early_stop = {
+        "stall_generations": int(opts.get("stallGenerations", 30) or 0) if isinstance(opts, dict) else 30,
+        "min_rel_improvement": float(opts.get("minRelImprovement", 0.0) or 0.0) if isinstance(opts, dict) else 0.0,
+        "target_fitness": (float(opts["targetFitness"]) if isinstance(opts, dict) and opts.get("targetFitness") is not None
+                           else None),
+        # convergence trace in meta.early_stop.trace (off by default; /api/benchmark turns it on)
+        "trace": bool(opts.get("trace", False)) if isinstance(opts, dict) else False,
+    }
+
+    # Matrices, budget/caps and locks are built once here and shared by the optimizer,
+    # the recommendation builders and the payload (timings in meta.timings_ms).
+    ctx = build_planning_context(
+        selected, y, objective, season_source=season_source, budget_ratio=float(water_budget_ratio or 1.0),
+        env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps,
+        water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples,
+        water_quality_filter=water_quality_filter,
+    )
+    t_opt = time.perf_counter()
+    e_opt = _eval_count()
+
+    # --- Run the requested optimizer (GA/ABC/ACO) ---
+    if algo == "GA":
+        raw = (ga_optimize_two_season(
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            pop_size=int(opts.get("popSize", 60)),
+            generations=int(opts.get("generations", 140)),
+            cx_rate=float(opts.get("cxRate", 0.7)),
+            mut_rate=float(opts.get("mutRate", 0.08)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            min_unique_crops=min_unique_crops,
+            max_share_per_crop=float(max_share_per_crop),
+            water_model=water_model,
+            risk_mode=risk_mode,
+            risk_lambda=risk_lambda,
+            risk_samples=risk_samples,
+            water_quality_filter=water_quality_filter,
+            islands=int(opts.get("islands", 1) or 1),
+            migration_interval=int(opts.get("migrateEvery", 10) or 10),
+            migrants=int(opts.get("migrants", 2) or 0),
+            island_compare=bool(opts.get("islandCompare", False)),
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            memo_size=memo_size,
+            ctx=ctx,
+            **early_stop,
+        ) if two_season else ga_optimize(
+            # caller explicitly requested single-season mode
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            pop_size=int(opts.get("popSize", 60)),
+            generations=int(opts.get("generations", 120)),
+            cx_rate=float(opts.get("cxRate", 0.7)),
+            mut_rate=float(opts.get("mutRate", 0.08)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            ctx=ctx,
+            **early_stop,
+        ))
+        _optimizer_done(ctx, algo, t_opt, e_opt)
+        # v72: Attach run parameters for transparent & fair comparison in UI
+        try:
+            raw.setdefault("meta", {})["run_params"] = {
+                "algorithm": "GA",
+                "seed": opts.get("seed", None),
+                "twoSeason": bool(two_season),
+                "generations": int(opts.get("generations", 140)),
+                "popSize": int(opts.get("popSize", 60)),
+                "cxRate": float(opts.get("cxRate", 0.7)),
+                "mutRate": float(opts.get("mutRate", 0.08)),
+                "islands": int(opts.get("islands", 1) or 1),
+                "budgetRatio": float(water_budget_ratio or 1.0),
+                "seasonSource": season_source,
+                "envFlowRatio": float(env_flow_ratio),
+                "irrigationMethod": irrigation_method,
+                "waterModel": water_model,
+                "riskMode": risk_mode,
+                "riskLambda": float(risk_lambda),
+                "riskSamples": int(risk_samples),
+                "stallGenerations": early_stop["stall_generations"],
+                "minRelImprovement": early_stop["min_rel_improvement"],
+                "targetFitness": early_stop["target_fitness"],
+            }
+        except Exception:
+            pass
+        return _to_ui_payload(raw, selected, y, objective, season_source, env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter, ctx=ctx)
+
+    if algo == "ABC":
+        raw = (abc_optimize_two_season(
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            food_sources=int(opts.get("foodSources", 40)),
+            cycles=int(opts.get("cycles", 120)),
+            limit=int(opts.get("limit", 25)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            min_unique_crops=min_unique_crops,
+            max_share_per_crop=float(max_share_per_crop),
+            water_model=water_model,
+            risk_mode=risk_mode,
+            risk_lambda=risk_lambda,
+            risk_samples=risk_samples,
+            water_quality_filter=water_quality_filter,
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            memo_size=memo_size,
+            ctx=ctx,
+            **early_stop,
+        ) if two_season else abc_optimize(
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            food_sources=int(opts.get("foodSources", 40)),
+            cycles=int(opts.get("cycles", 120)),
+            limit=int(opts.get("limit", 25)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            ctx=ctx,
+            **early_stop,
+        ))
+        _optimizer_done(ctx, algo, t_opt, e_opt)
+        try:
+            raw.setdefault("meta", {})["run_params"] = {
+                "algorithm": "ABC",
+                "seed": opts.get("seed", None),
+                "twoSeason": bool(two_season),
+                "cycles": int(opts.get("cycles", 120)),
+                "foodSources": int(opts.get("foodSources", 40)),
+                "limit": int(opts.get("limit", 25)),
+                "budgetRatio": float(water_budget_ratio or 1.0),
+                "seasonSource": season_source,
+                "envFlowRatio": float(env_flow_ratio),
+                "irrigationMethod": irrigation_method,
+                "waterModel": water_model,
+                "riskMode": risk_mode,
+                "riskLambda": float(risk_lambda),
+                "riskSamples": int(risk_samples),
+                "stallGenerations": early_stop["stall_generations"],
+                "minRelImprovement": early_stop["min_rel_improvement"],
+                "targetFitness": early_stop["target_fitness"],
+            }
+        except Exception:
+            pass
+        return _to_ui_payload(raw, selected, y, objective, season_source, env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter, ctx=ctx)
+
+    if algo == "ACO":
+        raw = (aco_optimize_two_season(
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            ants=int(opts.get("ants", 40)),
+            iterations=int(opts.get("iterations", 120)),
+            rho=float(opts.get("rho", 0.25)),
+            q=float(opts.get("q", 1.0)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            memo_size=memo_size,
+            ctx=ctx,
+            **early_stop,
+        ) if two_season else aco_optimize(
+            selected_parcels=selected,
+            year=y,
+            objective=objective,
+            ants=int(opts.get("ants", 40)),
+            iterations=int(opts.get("iterations", 120)),
+            rho=float(opts.get("rho", 0.25)),
+            q=float(opts.get("q", 1.0)),
+            seed=opts.get("seed", None),
+            budget_ratio=float(water_budget_ratio or 1.0),
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            local_search=local_search,
+            local_search_ms=local_search_ms,
+            ctx=ctx,
+            **early_stop,
+        ))
+        _optimizer_done(ctx, algo, t_opt, e_opt)
+        try:
+            raw.setdefault("meta", {})["run_params"] = {
+                "algorithm": "ACO",
+                "seed": opts.get("seed", None),
+                "twoSeason": bool(two_season),
+                "iterations": int(opts.get("iterations", 120)),
+                "ants": int(opts.get("ants", 40)),
+                "rho": float(opts.get("rho", 0.25)),
+                "q": float(opts.get("q", 1.0)),
+                "budgetRatio": float(water_budget_ratio or 1.0),
+                "seasonSource": season_source,
+                "envFlowRatio": float(env_flow_ratio),
+                "irrigationMethod": irrigation_method,
+                "waterModel": water_model,
+                "riskMode": risk_mode,
+                "riskLambda": float(risk_lambda),
+                "riskSamples": int(risk_samples),
+                "stallGenerations": early_stop["stall_generations"],
+                "minRelImprovement": early_stop["min_rel_improvement"],
+                "targetFitness": early_stop["target_fitness"],
+            }
+        except Exception:
+            pass
+        return _to_ui_payload(raw, selected, y, objective, season_source, env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter, ctx=ctx)
+
+    # Unknown algorithm -> GA fallback
+    raw = ga_optimize(
+        selected_parcels=selected,
+        year=y,
+        objective=objective,
+        pop_size=40,
+        generations=80,
+        budget_ratio=float(water_budget_ratio or 1.0),
+        season_source=season_source,
+        ctx=ctx,
+    )
+    _optimizer_done(ctx, "GA", t_opt, e_opt)
+    raw["algorithm"] = algo
+    raw.setdefault("meta", {})["note"] = "Unknown algorithm; used GA fallback"
+    return _to_ui_payload(raw, selected, y, objective, season_source, env_flow_ratio=env_flow_ratio, irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps, water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda, risk_samples=risk_samples, water_quality_filter=water_quality_filter, ctx=ctx)
+
+
+
+def _to_ui_payload(raw: Dict[str, Any], selected_parcels: List[Dict[str, Any]], year: int, objective: str, season_source: str,
+                   env_flow_ratio: float = 0.10, irrigation_method: Optional[str] = None, enforce_delivery_caps: bool = True,
+                   water_model: str = "calib", risk_mode: str = "none", risk_lambda: float = 0.0, risk_samples: int = 120,
+                   water_quality_filter: bool = True, ctx: Optional[PlanningContext] = None) -> Dict[str, Any]:
+    """Convert optimizer output into the UI-friendly response.
+
+    ``ctx`` is the planning context the optimizer ran on; its crop lists, matrices and
+    ``timings_ms`` (reported in ``meta.timings_ms``) are reused instead of rebuilt.
+
+    Key fixes vs older versions:
+      - Tek bir yerden ( _build_two_crop_recommendations ) 1. ürün + 2. ürün önerisi üretilir.
+      - Senaryo-2 bahçe/perennial kilitleri burada da tutarlı şekilde uygulanır.
+      - Ürün aileleri (crop_family) ile 1. ve 2. ürünün aynı familyadan olmaması tercih edilir.
+      - Suitability (LCC x crop) kâr/da değerine çarpan olarak uygulanır (build_candidate_matrix içinde).
+
+    Not: Buradaki 2 ürün, "aynı yıl içinde iki farklı ekim" yaklaşımını temsil eder. 
+    Ön yüz aynı anda alan bölüştürme gibi gösterse bile, arka tarafta "su/kâr" hesabı şeffaftır:
+      su = Σ(area1*water1 + area2*water2), kâr = Σ(area1*profit1 + area2*profit2).
+    """
+    ctx = _context_for(ctx, selected_parcels, year, objective, season_source=season_source,
+                       budget_ratio=float(raw.get("budget_ratio", 1.0) or 1.0), env_flow_ratio=env_flow_ratio,
+                       irrigation_method=irrigation_method, enforce_delivery_caps=enforce_delivery_caps,
+                       water_model=water_model, risk_mode=risk_mode, risk_lambda=risk_lambda,
+                       risk_samples=risk_samples, water_quality_filter=water_quality_filter)
+    t0 = time.perf_counter()
+    two_season = str(raw.get("mode") or "").lower() == "two_season"
+
+    # Map raw choices -> index array (optional; single-season plans only)
+    chosen = None
+    if not two_season:
+        try:
+            idx = {c: i for i, c in enumerate(_planning_single(ctx)["crop_list"])}
+            chosen = np.full((len(selected_parcels),), -1, dtype=int)
+            details = raw.get("details") or []
+            by_pid = {str(d.get("parcelId")): d for d in details if d.get("parcelId") is not None}
+            for i, p in enumerate(selected_parcels):
+                d = by_pid.get(str(p.get("id")))
+                ck = (d or {}).get("chosenCrop")
+                if ck in idx:
+                    chosen[i] = int(idx[ck])
+            if np.all(chosen < 0):
+                chosen = None
+        except Exception:
+            chosen = None
+
+    # If optimizer ran in two-season mode, build a real primary+secondary plan.
+    if two_season:
+        # derive arrays from raw.details
+        idx = {c: i for i, c in enumerate(ctx["crop_list"])}
+        ch1 = np.zeros((len(selected_parcels),), dtype=int)
+        ch2 = np.zeros((len(selected_parcels),), dtype=int)
+        by_pid = {str(d.get("parcelId")): d for d in (raw.get("details") or [])}
+        for i, p in enumerate(selected_parcels):
+            d = by_pid.get(str(p.get("id")), {})
+            # Support both schema variants:
+            #  1) {primary:{crop:..}, secondary:{crop:..}}
+            #  2) {chosenPrimary:.., chosenSecondary:..}
+            c1 = None
+            c2 = None
+            if isinstance(d.get("primary"), dict):
+                c1 = d.get("primary", {}).get("crop")
+            if isinstance(d.get("secondary"), dict):
+                c2 = d.get("secondary", {}).get("crop")
+            if c1 is None:
+                c1 = d.get("chosenPrimary")
+            if c2 is None:
+                c2 = d.get("chosenSecondary")
+            ch1[i] = int(idx.get(c1, 0))
+            ch2[i] = int(idx.get(c2, 0))
+        rec_pack = _build_two_season_recommendations(
+            selected_parcels=selected_parcels,
+            year=int(year),
+            objective=objective,
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            chosen_primary=ch1,
+            chosen_secondary=ch2,
+            budget_ratio=float(raw.get("budget_ratio", 1.0) or 1.0),
+            water_model=water_model,
+            risk_mode=risk_mode,
+            risk_lambda=risk_lambda,
+            risk_samples=risk_samples,
+            water_quality_filter=water_quality_filter,
+            ctx=ctx,
+        )
+    else:
+        # Fallback: heuristic two-product suggestion.
+        rec_pack = _build_two_crop_recommendations(
+            selected_parcels=selected_parcels,
+            year=int(year),
+            objective=objective,
+            season_source=season_source,
+            env_flow_ratio=env_flow_ratio,
+            irrigation_method=irrigation_method,
+            enforce_delivery_caps=enforce_delivery_caps,
+            chosen=(chosen if chosen is not None else None),
+            budget_ratio=float(raw.get("budget_ratio", 1.0) or 1.0),
+            water_model=water_model,
+            risk_mode=risk_mode,
+            risk_lambda=risk_lambda,
+            risk_samples=risk_samples,
+            water_quality_filter=water_quality_filter,
+            ctx=ctx,
+        )
+    t0 = _ctx_stage(ctx, "recommendations", t0)
+
+    parcels_out = []
+    for pr in rec_pack["parcels"]:
+        parcels_out.append({"id": pr["id"], "result": pr["result"]})
+
+    budget = float(rec_pack.get("budget") or 0.0)
+    total_water = float(rec_pack.get("totals", {}).get("water", 0.0))
+    total_profit = float(rec_pack.get("totals", {}).get("profit", 0.0))
+    feasible = bool(rec_pack.get("feasible", True))
+    eff = float(total_profit/total_water) if total_water > 0 else 0.0
+    delivery_report = rec_pack.get('delivery_report') if isinstance(rec_pack, dict) else None
+
+    # v72: Baseline + delta (same units as UI output)
+    base_water = sum(float(p.get("water_m3", 0) or 0) for p in selected_parcels)
+    base_profit = sum(float(p.get("profit_tl", 0) or 0) for p in selected_parcels)
+    if base_water <= 0:
+        base_water = sum(float(p.get("area_da", 0) or 0) for p in selected_parcels) * 500.0
+    if base_profit <= 0:
+        base_profit = sum(float(p.get("area_da", 0) or 0) for p in selected_parcels) * 5000.0
+    base_eff = (base_profit/base_water) if base_water > 0 else 0.0
+    d_water = float(total_water - base_water)
+    d_profit = float(total_profit - base_profit)
+    d_eff = float(eff - base_eff)
+    _ctx_stage(ctx, "payload", t0)
+
+    return {
+        "status": "OK",
+        "algorithm": str(raw.get("algorithm") or "GA"),
+        "objective": objective,
+        "year": int(year),
+        "water_budget_m3": float(budget),
+        "feasible": feasible,
+        "total_water_m3": float(total_water),
+        "total_profit_tl": float(total_profit),
+        "efficiency_tl_per_m3": float(eff),
+        "baseline": {
+            "total_water_m3": float(base_water),
+            "total_profit_tl": float(base_profit),
+            "efficiency_tl_per_m3": float(base_eff),
+        },
+        "delta": {
+            "water_m3": float(d_water),
+            "profit_tl": float(d_profit),
+            "efficiency_tl_per_m3": float(d_eff),
+        },
+        "parcels": parcels_out,
+        "details": raw.get("details", []),
+        "meta": {
+            **(raw.get("meta") or {}),
+            "selected_parcel_ids": [str(p.get("id")) for p in (selected_parcels or [])],
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "delivery_report": delivery_report,
+            "season_source": season_source,
+            "timings_ms": _timing_report({**ctx["timings_ms"],
+                                          "total": round((time.perf_counter() - ctx["started"]) * 1000.0, 3)}),
+            "formulas": {
+                "water_m3": "Σ(area_da * waterPerDa) (1. ürün + 2. ürün)",
+                "profit_tl": "Σ(area_da * profitPerDa) (1. ürün + 2. ürün)",
+                "efficiency": "total_profit_tl / total_water_m3",
+                "score": "alpha*profitPerDa - beta*waterPerDa",
+                "suitability": "profitPerDa = profitPerDa * suitability(LCC, crop)",
+            },
+            "note": "İkinci ürün seçiminde aynı ürün ailesinden (crop_family) kaçınma + baklagil (Fabaceae) küçük teşvik bonusu eklendi."
+        }
+    }
+
+
+def api_meta():
+    """Return which built-in CSV files are being used by the backend (for transparency in the UI)."""
+    p = enhanced_paths()
+    # return relative paths for UI display
+    rel = {k: str(v.relative_to(DATA_DIR)) if str(v).startswith(str(DATA_DIR)) else str(v) for k, v in p.items()}
+    # Also expose what else exists in the packaged enhanced_dataset/csv folder.
+    # (Some of these are optional or not yet fully wired into the optimizer, but users
+    # frequently want to see the full data inventory for transparency.)
+    enhanced_csv_dir = DATA_DIR / "enhanced_dataset" / "csv"
+    available = []
+    try:
+        if enhanced_csv_dir.exists():
+            for fp in sorted(enhanced_csv_dir.glob("*.csv"), key=lambda x: x.name.lower()):
+                try:
+                    available.append(str(fp.relative_to(DATA_DIR)))
+                except Exception:
+                    available.append(str(fp))
+    except Exception:
+        available = []
+    years = available_years()
+    # Data-driven Senaryo-1 rules and irrigation mapping
+    try:
+        s1_rules_out = load_s1_crop_calendar_rules() or {}
+    except Exception as e:
+        s1_rules_out = {"_derived": {"_rules_file_error": str(e)}}
+    try:
+        with open(os.path.join(DATA_DIR, "crop_irrigation_map.json"), "r", encoding="utf-8") as f:
+            crop_irrigation_map = json.load(f)
+    except Exception:
+        crop_irrigation_map = {}
+    
+    return jsonify({
+        "status": "OK",
+        "backend": {
+            "data_source": "data/enhanced_dataset (CSV)",
+            "files": rel,
+            "files_available": available,
+            "years_min": int(min(years)) if years else None,
+            "years_max": int(max(years)) if years else None,
+            "s1_crop_rules_file": "data/s1_crop_calendar_rules.json",
+            "s1_rules_loaded_count": int(len([k for k in (s1_rules_out or {}).keys() if k != '_derived'])),
+            "s1_rules_file_exists": bool((DATA_DIR / 's1_crop_calendar_rules.json').exists()),
+            "s1_rules_file_size": int((DATA_DIR / 's1_crop_calendar_rules.json').stat().st_size) if (DATA_DIR / 's1_crop_calendar_rules.json').exists() else 0,
+            "s1_rules_error": (s1_rules_out.get("_error") if isinstance(s1_rules_out, dict) else None),
+        },
+        # Frontend expects these at top level (data-driven; no hardcoded lists)
+        "scenario1_rules": {k:v for k,v in (s1_rules_out or {}).items() if k != "_derived"},
+        "scenario1_rules_debug": (s1_rules_out or {}).get("_derived", {}),
+        "crop_irrigation_map": crop_irrigation_map
+    })
+
+def api_timeseries():
+    """Return annual series for current, water_saving, max_profit (water/profit/budget)."""
+    years = available_years()
+    if not years:
+        years = list(range(2000, 2026))
+    selected_ids = request.args.get("selected", "")
+    selected = [s for s in selected_ids.split(",") if s] if selected_ids else []
+    parcels = load_parcels()
+    sel_parcels = [p for p in parcels if (not selected) or (p["id"] in selected)]
+
+    series = {"years": years, "budget_m3": [], "current_water_m3": [], "current_profit_tl": [],
+              "water_saving_water_m3": [], "water_saving_profit_tl": [],
+              "max_profit_water_m3": [], "max_profit_profit_tl": []}
+
+    # baseline current totals (constant)
+    base_water = sum(float(p.get("water_m3",0) or 0) for p in sel_parcels)
+    base_profit = sum(float(p.get("profit_tl",0) or 0) for p in sel_parcels)
+    if base_water <= 0:
+        base_water = sum(float(p.get("area_da",0) or 0) for p in sel_parcels) * 500.0
+    if base_profit <= 0:
+        base_profit = sum(float(p.get("area_da",0) or 0) for p in sel_parcels) * 5000.0
+
+    # precompute a single GA solution for objectives (fast), then scale to each year's budget ratio
+    sol_ws = ga_optimize(sel_parcels, years[-1], "water_saving", pop_size=40, generations=80)
+    sol_mp = ga_optimize(sel_parcels, years[-1], "max_profit", pop_size=40, generations=80)
+    ws_w = sol_ws["total_water_m3"]; ws_p = sol_ws["total_profit_tl"]
+    mp_w = sol_mp["total_water_m3"]; mp_p = sol_mp["total_profit_tl"]
+    ws_budget_ref = sol_ws["water_budget_m3"] or base_water
+    mp_budget_ref = sol_mp["water_budget_m3"] or base_water
+
+    # whole budget column in one vectorized read of the basin series
+    b = water_budgets_for_years(years, sel_parcels)
+    n = len(years)
+    series["budget_m3"] = b.astype(float).tolist()
+    series["current_water_m3"] = [float(base_water)] * n
+    series["current_profit_tl"] = [float(base_profit)] * n
+
+    # scale GA solutions to match yearly budget if needed
+    ws_scale = np.minimum(1.0, b / float(ws_w)) if ws_w > 0 else np.zeros(n)
+    mp_scale = np.minimum(1.0, b / float(mp_w)) if mp_w > 0 else np.zeros(n)
+    series["water_saving_water_m3"] = (ws_w * ws_scale).astype(float).tolist()
+    series["water_saving_profit_tl"] = (ws_p * ws_scale).astype(float).tolist()
+    series["max_profit_water_m3"] = (mp_w * mp_scale).astype(float).tolist()
+    series["max_profit_profit_tl"] = (mp_p * mp_scale).astype(float).tolist()
+
+    return jsonify({"status":"OK","series":series})
+
+def api_parcels():
+    try:
+        return jsonify({"status": "OK", "parcels": load_parcels()})
+    except Exception as e:
+        # Return a JSON error so the frontend can show a useful message.
+        return jsonify({"status": "ERROR", "message": str(e), "where": "api_parcels"}), 500
+
+def api_optimize():
+    try:
+        payload = request.get_json(silent=True) or {}
+        selected = payload.get("selectedParcelIds") or payload.get("selected") or []
+        if isinstance(selected, str):
+            selected = [s.strip() for s in selected.split(",") if s.strip()]
+        elif not isinstance(selected, list):
+            selected = list(selected) if selected else []
+
+        algorithm = str(payload.get("algorithm", "GA") or "GA")
+        scenario = str(payload.get("scenario", "recommended") or "recommended")
+        water_budget_ratio = safe_float(payload.get("waterBudgetRatio", 1.0), 1.0)
+
+        year_raw = payload.get("year", None)
+        year_val = None if year_raw in (None, "", "none", "null") else safe_int(year_raw, 0)
+        if year_val == 0:
+            year_val = None
+
+        options = payload.get("options", None)
+
+        return jsonify(optimize(
+            selected_ids=selected,
+            algorithm=algorithm,
+            scenario=scenario,
+            water_budget_ratio=water_budget_ratio,
+            year=year_val,
+            options=options
+        ))
+    except Exception as e:
+        return jsonify({"status": "ERROR", "message": str(e), "where": "api_optimize"}), 500
+
+
+def _plan_signature(opt_out: Dict[str, Any], ignore_fallow: bool = False) -> str:
+    """Create a stable string signature for a parcel-level 2-season plan.
+
+    If ignore_fallow=True, NADAS is treated as empty so 'mostly the same plan' does not get
+    counted as different just because one run used fallow for feasibility.
+    """
+    try:
+        parts = []
+        for pr in (opt_out.get("parcels") or []):
+            pid = str(pr.get("id"))
+            rec = (((pr.get("result") or {}).get("recommended")) or [])
+            c1 = str((rec[0] or {}).get("name")) if len(rec) > 0 else ""
+            c2 = str((rec[1] or {}).get("name")) if len(rec) > 1 else ""
+            if ignore_fallow:
+                if c1.strip().upper() == FALLOW:
+                    c1 = ""
+                if c2.strip().upper() == FALLOW:
+                    c2 = ""
+            parts.append(f"{pid}:{c1}|{c2}")
+        parts.sort()
+        return ";".join(parts)
+    except Exception:
+        return ""
+
+
+# -----------------------------
+# Convergence profiles (benchmark)
+# -----------------------------
+# quality q -> fitness target lo + q * (hi - lo); hi: best fitness of any run, lo: median
+# best fitness after the first iteration (see _convergence_summary)
+QUALITY_LEVELS = (0.5, 0.9, 0.99, 1.0)
+PROFILE_POINTS = 25
+
+
+def _run_trace(meta: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """meta.early_stop.trace of one optimize() result as float32 arrays (None without a trace).
+
+    Island runs have one trace per island; they are merged on the union of their time stamps
+    (best over islands, evaluations summed).
+    """
+    es = (meta or {}).get("early_stop")
+    traces = [e["trace"] for e in (es if isinstance(es, list) else [es])
+              if isinstance(e, dict) and isinstance(e.get("trace"), dict) and e["trace"].get("ms")]
+    if not traces:
+        return None
+    arrs = [{k: np.asarray(t[k], dtype=np.float32) for k in ("ms", "best", "evals")} for t in traces]
+    if len(arrs) == 1:
+        return arrs[0]
+    ms = np.unique(np.concatenate([a["ms"] for a in arrs]))
+    best = np.full(len(ms), -np.inf, dtype=np.float32)
+    evals = np.zeros(len(ms), dtype=np.float32)
+    for a in arrs:
+        i = np.searchsorted(a["ms"], ms, side="right") - 1
+        ok = i >= 0
+        best[ok] = np.maximum(best[ok], a["best"][i[ok]])
+        evals[ok] += a["evals"][i[ok]]
+    keep = np.isfinite(best)
+    return {"ms": ms[keep], "best": best[keep], "evals": evals[keep]}
+
+
+def _convergence_summary(traces: Dict[str, List[Dict[str, np.ndarray]]],
+                         levels: Optional[List[float]] = None, points: int = PROFILE_POINTS) -> Dict[str, Any]:
+    """Anytime profiles and time-to-target per algorithm from per-run traces (_run_trace).
+
+    Fitness is normalized per benchmark as quality = (f - lo) / (hi - lo), with hi the best
+    fitness any run reached and lo the median best fitness after the first iteration, so
+    algorithms are compared on one scale. For every algorithm:
+      profile: median / p25 / p75 quality over runs at ``points`` times from 0 to the longest
+               run (None before a run's first iteration);
+      time_to_target_ms / evals_to_target: per quality level, the median over runs of the first
+               time / evaluation count at which the best-so-far reached the target (runs that
+               never reach it count as infinite; None when the median is not reached);
+      success_rate: share of runs that reached each level;
+      evals_per_s: median of final evaluations / final ms (the search itself, without the
+               matrix build that meta.timings_ms.optimizer also covers).
+    """
+    levels = [float(q) for q in (levels or QUALITY_LEVELS)]
+    runs = {a: [t for t in ts if t is not None and len(t["ms"])] for a, ts in traces.items()}
+    every = [t for ts in runs.values() for t in ts]
+    if not every:
+        return {"levels": levels, "algorithms": {}}
+    hi = float(max(t["best"].max() for t in every))
+    lo = float(np.median([t["best"][0] for t in every]))
+    span = hi - lo if hi > lo else max(1.0, abs(hi)) * 1e-9
+    targets = {q: lo + q * span for q in levels}
+    grid = np.linspace(0.0, float(max(t["ms"][-1] for t in every)), max(2, int(points)))
+
+    def _med(vals: List[float]) -> Optional[float]:
+        m = float(np.median(vals)) if vals else float("inf")
+        return round(m, 3) if np.isfinite(m) else None
+
+    out: Dict[str, Any] = {}
+    for algo, ts in runs.items():
+        if not ts:
+            continue
+        qual = np.full((len(ts), len(grid)), np.nan)
+        ttt = {q: [] for q in levels}
+        ett = {q: [] for q in levels}
+        for r, t in enumerate(ts):
+            i = np.searchsorted(t["ms"], grid, side="right") - 1
+            ok = i >= 0
+            qual[r, ok] = (t["best"][i[ok]].astype(float) - lo) / span
+            for q, tgt in targets.items():
+                hit = np.flatnonzero(t["best"] >= np.float32(tgt))
+                ttt[q].append(float(t["ms"][hit[0]]) if len(hit) else float("inf"))
+                ett[q].append(float(t["evals"][hit[0]]) if len(hit) else float("inf"))
+        prof = {}
+        for name, pct in (("median", 50), ("p25", 25), ("p75", 75)):
+            col = [np.nanpercentile(qual[:, j], pct) if np.isfinite(qual[:, j]).any() else np.nan
+                   for j in range(len(grid))]
+            prof[name] = [round(float(v), 4) if np.isfinite(v) else None for v in col]
+        eps = [float(t["evals"][-1]) / (float(t["ms"][-1]) / 1000.0) for t in ts if t["ms"][-1] > 0]
+        out[algo] = {
+            "runs": len(ts),
+            "profile": prof,
+            "time_to_target_ms": {str(q): _med(ttt[q]) for q in levels},
+            "evals_to_target": {str(q): _med(ett[q]) for q in levels},
+            "success_rate": {str(q): round(float(np.mean(np.isfinite(ttt[q]))), 3) for q in levels},
+            "evals_per_s": round(float(np.median(eps)), 1) if eps else None,
+        }
+    return {"levels": levels, "reference": {"lo": lo, "hi": hi},
+            "targets": {str(q): v for q, v in targets.items()},
+            "grid_ms": [round(float(x), 3) for x in grid], "algorithms": out}
+
+
+@_timed_view
+def api_benchmark():
+    """Run GA/ABC/ACO multiple times under identical inputs and return comparable summary stats.
+
+    Payload (JSON) – largely compatible with /api/optimize:
+      {
+        selectedParcelIds: ["P1", ...],
+        scenario: "mevcut"|"su_tasarruf"|"maks_kar"|"balanced",
+        year: 2024,
+        waterBudgetRatio: 1.0,
+        repeats: 15,
+        baseSeed: 42,   // optional
+        algorithms: ["GA","ABC","ACO"], // optional
+        options: {...}  // passed through; seed will be overridden per-run if baseSeed given
+                        // (repeat i gets the i-th SeedSequence(baseSeed).spawn child)
+        trace: true,    // optional; per-run convergence traces -> "convergence" (default on)
+        qualityLevels: [0.5, 0.9, 0.99, 1.0]  // optional; see _convergence_summary
+      }
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+
+        selected = payload.get("selectedParcelIds") or payload.get("selected") or []
+        if isinstance(selected, str):
+            selected = [s.strip() for s in selected.split(",") if s.strip()]
+        elif not isinstance(selected, list):
+            selected = list(selected) if selected else []
+
+        scenario = str(payload.get("scenario", "recommended") or "recommended")
+        water_budget_ratio = safe_float(payload.get("waterBudgetRatio", 1.0), 1.0)
+
+        year_raw = payload.get("year", None)
+        year_val = None if year_raw in (None, "", "none", "null") else safe_int(year_raw, 0)
+        if year_val == 0:
+            year_val = None
+
+        repeats = int(payload.get("repeats", 10) or 10)
+        repeats = max(1, min(30, repeats))  # keep API responsive
+
+        include_baseline = bool(payload.get("includeBaseline", True))
+        base_seed = payload.get("baseSeed", None)
+        if base_seed in ("", "none", "null"):
+            base_seed = None
+        if base_seed is not None:
+            try:
+                base_seed = int(base_seed)
+            except Exception:
+                base_seed = None
+
+        algos = payload.get("algorithms", None)
+        if not algos:
+            algos = ["GA", "ABC", "ACO"]
+        algos = [str(a).upper() for a in algos]
+        algos = [a for a in algos if a in ("GA", "ABC", "ACO")]
+        if not algos:
+            algos = ["GA", "ABC", "ACO"]
+
+        base_opts = payload.get("options", None)
+        if not isinstance(base_opts, dict):
+            base_opts = {}
+        trace_runs = bool(payload.get("trace", True))
+        levels = payload.get("qualityLevels", None)
+        try:
+            levels = [q for q in (float(x) for x in levels) if 0.0 < q <= 1.0] if levels else None
+        except Exception:
+            levels = None
+        traces: Dict[str, List[Dict[str, np.ndarray]]] = {}
+
+        results: Dict[str, Any] = {"status": "OK", "repeats": repeats, "algorithms": {}}
+        # Baseline (Mevcut): observed parcel totals, used as reference column in charts
+        if include_baseline:
+            try:
+                results["baseline"] = optimize(selected, "CURRENT", "mevcut", year=year_val, water_budget_ratio=water_budget_ratio, options=base_opts)
+            except Exception as _e:
+                results["baseline"] = {"status":"ERROR","message": str(_e)}
+        started_at = time.perf_counter()
+        # Total time budget for the whole benchmark request.
+        # Default is intentionally generous so each algorithm gets at least one run.
+        max_seconds = payload.get("maxSeconds", 90)
+        try:
+            max_seconds = float(max_seconds)
+        except Exception:
+            max_seconds = 90.0
+        max_seconds = max(15.0, min(180.0, max_seconds))
+
+        # lightweight defaults for benchmarking; kept small to avoid starving later algorithms.
+        # user may override but we will clamp later per-run.
+        speed_defaults = {"generations": 18, "popSize": 28, "cycles": 25, "foodSources": 22, "ants": 22, "iterations": 25}
+
+        # Optional baseline (current) – useful when UI scenario was "mevcut".
+        if include_baseline:
+            try:
+                base_out = optimize(
+                    selected_ids=selected,
+                    algorithm="BASELINE",
+                    scenario="current",
+                    water_budget_ratio=water_budget_ratio,
+                    year=year_val,
+                    options=base_opts,
+                )
+                results["baseline"] = {
+                    "total_profit_tl": safe_float(base_out.get("total_profit_tl", 0.0), 0.0),
+                    "total_water_m3": safe_float(base_out.get("total_water_m3", 0.0), 0.0),
+                    "efficiency_tl_per_m3": safe_float(base_out.get("efficiency_tl_per_m3", 0.0), 0.0),
+                }
+            except Exception:
+                results["baseline"] = None
+
+        def _nadas_metrics(opt_out: Dict[str, Any]) -> Dict[str, float]:
+            """Compute fallow (NADAS) ratios using area_da for primary/secondary seasons."""
+            total_area = 0.0
+            nadas_p = 0.0
+            nadas_s = 0.0
+            try:
+                for pr in (opt_out.get("parcels") or []):
+                    a = safe_float(pr.get("area_da", 0.0), 0.0)
+                    total_area += a
+                    rec = (((pr.get("result") or {}).get("recommended")) or [])
+                    if len(rec) > 0 and str((rec[0] or {}).get("name") or "").strip().upper() == FALLOW:
+                        nadas_p += safe_float((rec[0] or {}).get("area", a), a)
+                    if len(rec) > 1 and str((rec[1] or {}).get("name") or "").strip().upper() == FALLOW:
+                        nadas_s += safe_float((rec[1] or {}).get("area", a), a)
+            except Exception:
+                pass
+            if total_area <= 0:
+                return {"nadas_ratio": 0.0, "nadas_primary_ratio": 0.0, "nadas_secondary_ratio": 0.0, "planted_ratio": 1.0}
+            # average across two seasons
+            nadas_ratio = (nadas_p + nadas_s) / max(1e-9, (2.0 * total_area))
+            return {
+                "nadas_ratio": float(nadas_ratio),
+                "nadas_primary_ratio": float(nadas_p / max(1e-9, total_area)),
+                "nadas_secondary_ratio": float(nadas_s / max(1e-9, total_area)),
+                "planted_ratio": float(1.0 - nadas_ratio),
+            }
+
+        def _crop_area_summary(opt_out: Dict[str, Any]) -> Dict[str, Any]:
+            """Return top crop areas for primary/secondary seasons."""
+            prim: Dict[str, float] = {}
+            sec: Dict[str, float] = {}
+            try:
+                for pr in (opt_out.get("parcels") or []):
+                    rec = (((pr.get("result") or {}).get("recommended")) or [])
+                    if len(rec) > 0:
+                        c = str((rec[0] or {}).get("name") or "")
+                        a = safe_float((rec[0] or {}).get("area", 0.0), 0.0)
+                        prim[c] = prim.get(c, 0.0) + a
+                    if len(rec) > 1:
+                        c = str((rec[1] or {}).get("name") or "")
+                        a = safe_float((rec[1] or {}).get("area", 0.0), 0.0)
+                        sec[c] = sec.get(c, 0.0) + a
+            except Exception:
+                pass
+
+            def _top(d: Dict[str, float], k: int = 8) -> List[Dict[str, Any]]:
+                items = [(c, float(a)) for c, a in d.items() if c]
+                items.sort(key=lambda x: x[1], reverse=True)
+                return [{"crop": c, "area_da": a} for c, a in items[:k]]
+
+            return {"primary": _top(prim, 10), "secondary": _top(sec, 10)}
+
+        # Distribute remaining time across algorithms so GA cannot starve ABC/ACO.
+        for algo_idx, algo in enumerate(algos):
+            runs = []
+            sigs = []
+            sigs_core = []
+            nadas_ratios = []
+            times = []
+            evals_per_s = []
+            traces[algo] = []
+            infeasible = 0
+            errors = 0
+
+            best_out: Optional[Dict[str, Any]] = None
+            best_score = -1e100
+
+            s_low = str(scenario or "").lower()
+            if s_low in ("water_saving", "su_tasarruf", "su tasarruf"):
+                score_mode = "water_saving"
+            elif s_low in ("max_profit", "maks_kar", "maks kar"):
+                score_mode = "max_profit"
+            else:
+                score_mode = "balanced"
+
+            # Use the same seed stream across algorithms for a fair benchmark.
+            algo_seed_offset = 0
+
+            # Allocate a fair slice of the remaining time budget to this algorithm.
+            elapsed_total = time.perf_counter() - started_at
+            remaining_total = max(0.0, max_seconds - elapsed_total)
+            algos_left = max(1, len(algos) - algo_idx)
+            # Minimum 8s per algorithm slice; if the total is low, still allow at least 1 run.
+            algo_budget = max(8.0, remaining_total / float(algos_left)) if remaining_total > 0 else 0.0
+            algo_started = time.perf_counter()
+
+            repeat_seeds = _repeat_seeds(base_seed, repeats)
+            for i in range(repeats):
+                # Per-algorithm time budget guard. Ensure every algorithm gets at least 1 attempt.
+                if i > 0 and algo_budget > 0 and (time.perf_counter() - algo_started) > algo_budget:
+                    break
+                # Also guard total budget, but allow the first run per algorithm.
+                if i > 0 and (time.perf_counter() - started_at) > max_seconds:
+                    break
+                opts = dict(base_opts)
+                # ensure benchmark runs quickly and consistently
+                for k, dv in speed_defaults.items():
+                    if k not in opts or opts.get(k) in (None, "", 0):
+                        opts[k] = dv
+                # clamp overly large hyper-parameters (keeps API responsive)
+                opts["generations"] = int(max(10, min(80, int(opts.get("generations", speed_defaults["generations"])))))
+                opts["popSize"] = int(max(10, min(120, int(opts.get("popSize", speed_defaults["popSize"])))))
+                opts["cycles"] = int(max(10, min(120, int(opts.get("cycles", speed_defaults["cycles"])))))
+                opts["foodSources"] = int(max(10, min(120, int(opts.get("foodSources", speed_defaults["foodSources"])))))
+                opts["iterations"] = int(max(10, min(120, int(opts.get("iterations", speed_defaults["iterations"])))))
+                opts["ants"] = int(max(10, min(120, int(opts.get("ants", speed_defaults["ants"])))))
+                # keep risk off in benchmark unless user explicitly enables (it is expensive)
+                if "riskMode" not in opts:
+                    opts["riskMode"] = "none"
+                if opts.get("riskMode") == "none":
+                    opts["riskSamples"] = int(max(20, min(120, int(opts.get("riskSamples", 40)))))
+                if base_seed is not None:
+                    opts["seed"] = repeat_seeds[i]
+                opts["trace"] = trace_runs
+                t0 = time.perf_counter()
+                try:
+                    out = optimize(
+                        selected_ids=selected,
+                        algorithm=algo,
+                        scenario=scenario,
+                        water_budget_ratio=water_budget_ratio,
+                        year=year_val,
+                        options=opts,
+                    )
+                    dt = time.perf_counter() - t0
+                    times.append(float(dt))
+
+                    if out.get("status") != "OK":
+                        errors += 1
+                        continue
+                    meta = out.get("meta") or {}
+                    if trace_runs:
+                        traces[algo].append(_run_trace(meta))
+                    tm = meta.get("timings_ms") or {}
+                    opt_ms = safe_float(tm.get("optimizer"), 0.0)
+                    if opt_ms > 0:
+                        evals_per_s.append(safe_float(tm.get("fitness_evals"), 0.0) / (opt_ms / 1000.0))
+                    if not bool(out.get("feasible", True)):
+                        infeasible += 1
+
+                    p_v = safe_float(out.get("total_profit_tl", 0.0), 0.0)
+                    w_v = safe_float(out.get("total_water_m3", 0.0), 0.0)
+                    e_v = safe_float(out.get("efficiency_tl_per_m3", 0.0), 0.0)
+                    # Treat extreme or non-finite totals as infeasible (usually caused by selecting missing/unsupported cells filled with W=1e9).
+                    if (not np.isfinite(w_v)) or (w_v >= 1e8) or (w_v < 0):
+                        infeasible += 1
+                        continue
+                    if (not np.isfinite(p_v)) or (p_v < 0 and score_mode == "water_saving"):
+                        # allow negative profit in some modes, but still guard NaNs
+                        p_v = 0.0
+                    if (not np.isfinite(e_v)) or (e_v < 0) or (e_v > 1e9):
+                        e_v = 0.0
+
+                    sig = _plan_signature(out, ignore_fallow=False)
+                    sig_core = _plan_signature(out, ignore_fallow=True)
+                    sigs.append(sig)
+                    sigs_core.append(sig_core)
+                    nadas_ratios.append(_nadas_metrics(out).get('nadas_ratio', 0.0))
+
+                    # choose the best run for showing the recommended pattern
+                    if score_mode == "water_saving":
+                        score = (-w_v) + (0.00005 * p_v)
+                    elif score_mode == "max_profit":
+                        score = p_v - (0.02 * w_v)
+                    else:
+                        score = e_v
+                    if score > best_score:
+                        best_score = float(score)
+                        best_out = out
+
+                    runs.append({
+                        "total_profit_tl": float(p_v),
+                        "total_water_m3": float(w_v),
+                        "efficiency_tl_per_m3": float(e_v),
+                        "signature": sig,
+                    })
+                except Exception:
+                    dt = time.perf_counter() - t0
+                    times.append(float(dt))
+                    errors += 1
+
+            def _stats(vals: List[float]) -> Dict[str, Any]:
+                if not vals:
+                    return {"n": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+                if len(vals) == 1:
+                    return {"n": 1, "mean": float(vals[0]), "std": 0.0, "min": float(vals[0]), "max": float(vals[0])}
+                return {
+                    "n": len(vals),
+                    "mean": float(statistics.mean(vals)),
+                    "std": float(statistics.pstdev(vals)),
+                    "min": float(min(vals)),
+                    "max": float(max(vals)),
+                }
+
+            prof = [r["total_profit_tl"] for r in runs]
+            wat = [r["total_water_m3"] for r in runs]
+            eff = [r["efficiency_tl_per_m3"] for r in runs]
+
+            unique_patterns = len({s for s in sigs if s}) if sigs else 0
+
+            best_pack = None
+            if isinstance(best_out, dict):
+                try:
+                    # compact parcel-level plan (for UI compare)
+                    parcels_compact = []
+                    for pr in (best_out.get("parcels") or []):
+                        pid = str(pr.get("id"))
+                        rec = (((pr.get("result") or {}).get("recommended")) or [])
+                        c1 = (rec[0] or {}) if len(rec) > 0 else {}
+                        c2 = (rec[1] or {}) if len(rec) > 1 else {}
+                        parcels_compact.append({
+                            "id": pid,
+                            "primary": {"crop": str(c1.get("name") or ""), "area_da": safe_float(c1.get("area", 0.0), 0.0)},
+                            "secondary": {"crop": str(c2.get("name") or ""), "area_da": safe_float(c2.get("area", 0.0), 0.0)},
+                        })
+                    parcels_compact.sort(key=lambda x: x.get("id"))
+
+                    best_pack = {
+                        "total_profit_tl": safe_float(best_out.get("total_profit_tl", 0.0), 0.0),
+                        "total_water_m3": safe_float(best_out.get("total_water_m3", 0.0), 0.0),
+                        "efficiency_tl_per_m3": safe_float(best_out.get("efficiency_tl_per_m3", 0.0), 0.0),
+                        "signature": _plan_signature(best_out),
+                        "crop_area": _crop_area_summary(best_out),
+                        "nadas": _nadas_metrics(best_out),
+                        "parcels": parcels_compact,
+                    }
+                except Exception:
+                    best_pack = None
+
+            results["algorithms"][algo] = {
+                "runs": len(runs),
+                "errors": errors,
+                "infeasible": infeasible,
+                "unique_patterns": unique_patterns,
+                "profit": _stats(prof),
+                "water": _stats(wat),
+                "efficiency": _stats(eff),
+                "runtime_s": _stats(times),
+                "evals_per_s": _stats(evals_per_s),
+                "nadas_ratio": _stats(nadas_ratios),
+                "best": best_pack,
+            }
+
+        if trace_runs:
+            results["convergence"] = _convergence_summary(traces, levels)
+        results["meta"] = {"timings_ms": _timing_report()}
+        return jsonify(results)
+    except Exception as e:
+        return jsonify({"status": "ERROR", "message": str(e), "where": "api_benchmark"}), 500
+
+
+@_timed_view
+def api_impact15y():
+    """
+    Compute 15-year water savings per algorithm (GA/ABC/ACO) for the selected season dataset (seasonSource),
+    and also return the average (mean) across algorithms.
+
+    Payload:
+      {
+        selectedParcelIds: ["P1",...],
+        scenario: "su_tasarruf"|"maks_kar"|...,
+        year: 2024,
+        waterBudgetRatio: 1.0,
+        seasonSource: "s1"|"s2"|"both",
+        horizonYears: 15,
+        algorithms: ["GA","ABC","ACO"],
+        repeats: 8,
+        maxSeconds: 120
+      }
+
+    Returns:
+      {
+        status: "OK",
+        horizonYears: 15,
+        totals: { GA:{...}, ABC:{...}, ACO:{...}, AVG:{...} },
+        geojson: FeatureCollection(points with per-algo & avg savings)
+      }
+    """
+    try:
+        payload = request.get_json(force=True, silent=True) or {}
+        selected = payload.get("selectedParcelIds", []) or []
+        if isinstance(selected, str):
+            selected = [s.strip() for s in selected.split(",") if s.strip()]
+        elif not isinstance(selected, list):
+            selected = list(selected) if selected else []
+
+        scenario = str(payload.get("scenario", "recommended") or "recommended")
+        season_source = str(payload.get("seasonSource", "both") or "both")
+        water_budget_ratio = safe_float(payload.get("waterBudgetRatio", 1.0), 1.0)
+        year_raw = payload.get("year", None)
+        year_val = None if year_raw in (None, "", "none", "null") else safe_int(year_raw, 0)
+        if year_val == 0:
+            year_val = None
+
+        horizon_years = int(payload.get("horizonYears", 15) or 15)
+        horizon_years = max(1, min(30, horizon_years))
+
+        repeats = int(payload.get("repeats", 8) or 8)
+        repeats = max(1, min(30, repeats))
+
+        algos = payload.get("algorithms", None) or ["GA", "ABC", "ACO"]
+        algos = [str(a).upper() for a in algos if str(a).strip()]
+        if not algos:
+            algos = ["GA", "ABC", "ACO"]
+
+        max_seconds = payload.get("maxSeconds", 120)
+        try:
+            max_seconds = float(max_seconds)
+        except Exception:
+            max_seconds = 120.0
+        max_seconds = max(20.0, min(240.0, max_seconds))
+
+        # Load parcel baseline (current) water per parcel
+        parcels_df = load_parcels_csv()
+        parcels_df = parcels_df.copy()
+        parcels_df["parsel_id"] = parcels_df["parsel_id"].astype(str)
+
+        if selected:
+            parcels_df = parcels_df[parcels_df["parsel_id"].isin(selected)].copy()
+
+        # Build crop water lookup (m3/da)
+        crops_df = load_crops_csv()
+        crops_df = crops_df.copy()
+        crops_df["urun_adi"] = crops_df["urun_adi"].astype(str)
+        water_per_da = {normalize_crop_key(r["urun_adi"]): safe_float(r["su_tuketimi_m3_da"], 0.0) for _, r in crops_df.iterrows()}
+        # Non-zero water fallbacks so UI tables never show 0 m³ for rainfed/fallow.
+        nonzero_water_fallback_m3_da = {
+            normalize_crop_key("ARPA_KURU"): 220.0,
+            normalize_crop_key("BUGDAY_KURU"): 250.0,
+            normalize_crop_key("NOHUT_KURU"): 180.0,
+            normalize_crop_key("MERCIMEK_KURU"): 160.0,
+            normalize_crop_key("NADAS"): 50.0,
+        }
+        for ck, v in list(nonzero_water_fallback_m3_da.items()):
+            if (ck not in water_per_da) or (not np.isfinite(water_per_da.get(ck, 0.0))) or (float(water_per_da.get(ck, 0.0)) <= 0.0):
+                water_per_da[ck] = float(v)
+        # Aliases for fallow => same non-zero proxy
+        for k in ["FALLOW", "FALOW", "NAD"]:
+            water_per_da[normalize_crop_key(k)] = float(nonzero_water_fallback_m3_da[normalize_crop_key("NADAS")])
+
+        def _parcel_opt_water_from_bestpack(best_pack: Dict[str, Any]) -> Dict[str, float]:
+            """Compute per-parcel annual water (m3) from best_pack parcels list using crop water_per_da and area."""
+            out = {}
+            for pr in (best_pack.get("parcels") or []):
+                pid = str(pr.get("id"))
+                p1 = (pr.get("primary") or {})
+                p2 = (pr.get("secondary") or {})
+                c1 = normalize_crop_key(str(p1.get("crop") or ""))
+                c2 = normalize_crop_key(str(p2.get("crop") or ""))
+                a1 = safe_float((p1.get("area_da") or 0.0), 0.0)
+                a2 = safe_float((p2.get("area_da") or 0.0), 0.0)
+                w1 = water_per_da.get(c1, 0.0) * a1
+                w2 = water_per_da.get(c2, 0.0) * a2
+                out[pid] = float(w1 + w2)
+            return out
+
+        def _run_algo_best(algo: str) -> Dict[str, Any]:
+            """Run optimize 'repeats' times for a given algo and return the best output dict by objective (profit or efficiency depending on scenario)."""
+            best_out = None
+            best_score = None
+
+            # per-run speed clamps
+            # keep relatively small for UI responsiveness
+            if algo == "GA":
+                speed = {"generations": 18, "popSize": 28}
+            elif algo == "ABC":
+                speed = {"cycles": 25, "foodSources": 22}
+            else:  # ACO
+                speed = {"iterations": 25, "ants": 22}
+
+            # Choose score: for su_tasarruf -> maximize efficiency (TL/m3) but also respect profit; for maks_kar -> maximize profit.
+            def score_fn(out: Dict[str, Any]) -> float:
+                prof = safe_float(out.get("total_profit_tl", 0.0), 0.0)
+                wat = safe_float(out.get("total_water_m3", 0.0), 0.0)
+                eff = prof / wat if wat > 0 else 0.0
+                if scenario == "su_tasarruf":
+                    return eff * 1e6 + prof  # prioritize efficiency, tie-break by profit
+                if scenario == "maks_kar":
+                    return prof
+                # balanced/recommended: blend
+                return prof + eff * 1e5
+
+            # time budget per algo
+            per_algo_budget = max_seconds / max(1, len(algos))
+            t0 = time.perf_counter()
+            repeat_seeds = _repeat_seeds(payload.get("baseSeed"), repeats)
+
+            for r in range(repeats):
+                if (time.perf_counter() - t0) > per_algo_budget:
+                    break
+                seed = repeat_seeds[r]
+
+                out = optimize(
+                    selected,
+                    scenario=scenario,
+                    water_budget_ratio=water_budget_ratio,
+                    year=year_val,
+                    algorithm=algo,
+                    options={
+                        "twoSeason": True,
+                        "seasonSource": season_source,
+                        **speed,
+                        "seed": seed,
+                    },
+                )
+                if not isinstance(out, dict) or out.get("status") != "OK":
+                    continue
+
+                sc = score_fn(out)
+                if (best_score is None) or (sc > best_score):
+                    best_score = sc
+                    best_out = out
+
+            # Fallback: one run if all failed
+            if best_out is None:
+                best_out = optimize(
+                    selected,
+                    scenario=scenario,
+                    water_budget_ratio=water_budget_ratio,
+                    year=year_val,
+                    algorithm=algo,
+                    options={"twoSeason": True, "seasonSource": season_source, **speed},
+                )
+            return best_out if isinstance(best_out, dict) else {"status": "ERROR", "message": "No output"}
+
+        # Run each algorithm and compute per-parcel savings (annual and 15y)
+        algo_results = {}
+        for algo in algos:
+            out = _run_algo_best(algo)
+            if not isinstance(out, dict) or out.get("status") != "OK":
+                algo_results[algo] = {"status": "ERROR", "message": str(out.get("message", "run failed"))}
+                continue
+            # Build best_pack-like parcels list from output (reuse same logic as benchmark)
+            parcels_compact = []
+            for pr in (out.get("parcels") or []):
+                pid = str(pr.get("id"))
+                rec = (((pr.get("result") or {}).get("recommended")) or [])
+                c1 = (rec[0] or {}) if len(rec) > 0 else {}
+                c2 = (rec[1] or {}) if len(rec) > 1 else {}
+                parcels_compact.append({
+                    "id": pid,
+                    "primary": {"crop": str(c1.get("name") or ""), "area_da": safe_float(c1.get("area", 0.0), 0.0)},
+                    "secondary": {"crop": str(c2.get("name") or ""), "area_da": safe_float(c2.get("area", 0.0), 0.0)},
+                })
+            parcels_compact.sort(key=lambda x: x.get("id"))
+
+            best_pack = {"parcels": parcels_compact}
+            opt_water_by_parcel = _parcel_opt_water_from_bestpack(best_pack)
+
+            # Baseline per-parcel water (m3) from parcels_df
+            base_by_parcel = {str(r["parsel_id"]): safe_float(r.get("mevcut_su_m3", 0.0), 0.0) for _, r in parcels_df.iterrows()}
+
+            savings_annual = {}
+            for pid, base_w in base_by_parcel.items():
+                opt_w = safe_float(opt_water_by_parcel.get(pid, base_w), base_w)
+                sav = max(0.0, float(base_w - opt_w))
+                savings_annual[pid] = sav
+
+            total_base = float(sum(base_by_parcel.values()))
+            total_opt = float(sum(safe_float(opt_water_by_parcel.get(pid, base_by_parcel[pid]), base_by_parcel[pid]) for pid in base_by_parcel.keys()))
+            total_save_annual = float(sum(savings_annual.values()))
+            total_save_15y = total_save_annual * horizon_years
+
+            algo_results[algo] = {
+                "status": "OK",
+                "total_base_m3": total_base,
+                "total_opt_m3": total_opt,
+                "annual_saving_m3": total_save_annual,
+                "saving_15y_m3": total_save_15y,
+                "saving_pct": (100.0 * total_save_annual / total_base) if total_base > 0 else 0.0,
+                "parcel_saving_annual": savings_annual,
+                "parcel_saving_15y": {pid: sav * horizon_years for pid, sav in savings_annual.items()},
+            }
+
+        # Compute AVG across successful algos
+        ok_algos = [a for a in algos if algo_results.get(a, {}).get("status") == "OK"]
+        avg = {"status": "ERROR", "message": "No successful algorithm runs"}
+        if ok_algos:
+            # per-parcel mean
+            base_by_parcel = {str(r["parsel_id"]): safe_float(r.get("mevcut_su_m3", 0.0), 0.0) for _, r in parcels_df.iterrows()}
+            parcel_avg_annual = {}
+            for pid in base_by_parcel.keys():
+                vals = [safe_float(algo_results[a]["parcel_saving_annual"].get(pid, 0.0), 0.0) for a in ok_algos]
+                parcel_avg_annual[pid] = float(sum(vals) / len(vals)) if vals else 0.0
+            total_base = float(sum(base_by_parcel.values()))
+            total_save_annual = float(sum(parcel_avg_annual.values()))
+            total_save_15y = total_save_annual * horizon_years
+            avg = {
+                "status": "OK",
+                "total_base_m3": total_base,
+                "annual_saving_m3": total_save_annual,
+                "saving_15y_m3": total_save_15y,
+                "saving_pct": (100.0 * total_save_annual / total_base) if total_base > 0 else 0.0,
+                "parcel_saving_annual": parcel_avg_annual,
+                "parcel_saving_15y": {pid: sav * horizon_years for pid, sav in parcel_avg_annual.items()},
+            }
+
+        # Build GeoJSON point layer from parcels_df (lat/lon)
+        features = []
+        for _, r in parcels_df.iterrows():
+            pid = str(r["parsel_id"])
+            lat = safe_float(r.get("lat", 0.0), 0.0)
+            lon = safe_float(r.get("lon", 0.0), 0.0)
+            if lat == 0.0 and lon == 0.0:
+                continue
+            props = {
+                "parsel_id": pid,
+                "koy": str(r.get("koy", "")),
+                "ilce": str(r.get("ilce", "")),
+                "alan_da": safe_float(r.get("alan_da", 0.0), 0.0),
+                "base_m3": safe_float(r.get("mevcut_su_m3", 0.0), 0.0),
+                "horizon_years": horizon_years,
+            }
+            # per algo parcel saving
+            for algo in algos:
+                if algo_results.get(algo, {}).get("status") == "OK":
+                    props[f"save15_{algo}_m3"] = safe_float(algo_results[algo]["parcel_saving_15y"].get(pid, 0.0), 0.0)
+                    props[f"save_{algo}_pct"] = safe_float(algo_results[algo]["saving_pct"], 0.0)
+                else:
+                    props[f"save15_{algo}_m3"] = 0.0
+                    props[f"save_{algo}_pct"] = 0.0
+            # average
+            if avg.get("status") == "OK":
+                props["save15_AVG_m3"] = safe_float(avg["parcel_saving_15y"].get(pid, 0.0), 0.0)
+                props["save_AVG_pct"] = safe_float(avg["saving_pct"], 0.0)
+            else:
+                props["save15_AVG_m3"] = 0.0
+                props["save_AVG_pct"] = 0.0
+
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": props,
+            })
+
+        # --- Build simple year-by-year series for UI charts (cumulative savings) ---
+        years = list(range(1, horizon_years + 1))
+        series = {"years": years}
+        for algo in algos:
+            if algo_results.get(algo, {}).get("status") == "OK":
+                annual = safe_float(algo_results[algo].get("annual_saving_m3", 0.0), 0.0)
+                series[algo] = {
+                    "annual_saving_m3": annual,
+                    "cumulative_saving_m3": [annual * y for y in years],
+                }
+            else:
+                series[algo] = {"annual_saving_m3": 0.0, "cumulative_saving_m3": [0.0 for _ in years]}
+        if avg.get("status") == "OK":
+            annual = safe_float(avg.get("annual_saving_m3", 0.0), 0.0)
+            series["AVG"] = {"annual_saving_m3": annual, "cumulative_saving_m3": [annual * y for y in years]}
+        else:
+            series["AVG"] = {"annual_saving_m3": 0.0, "cumulative_saving_m3": [0.0 for _ in years]}
+
+        return jsonify({
+            "status": "OK",
+            "horizonYears": horizon_years,
+            "series": series,
+            "seasonSource": season_source,
+            "scenario": scenario,
+            "algorithms": algos,
+            "totals": {**{a: {k: algo_results[a].get(k) for k in ["total_base_m3","total_opt_m3","annual_saving_m3","saving_15y_m3","saving_pct"]} if algo_results.get(a, {}).get("status")=="OK" else {"status":"ERROR","message":algo_results.get(a,{}).get("message","")} for a in algos},
+                       "AVG": {k: avg.get(k) for k in ["total_base_m3","annual_saving_m3","saving_15y_m3","saving_pct"]} if avg.get("status")=="OK" else {"status":"ERROR","message":avg.get("message","")}},
+            "series": series,
+            "geojson": {"type": "FeatureCollection", "features": features},
+            "howCalculated": {
+                "baseline": "Per-parcel baseline water uses data/parsel_su_kar_ozet.csv -> mevcut_su_m3 (annual).",
+                "optimized": "Per-parcel optimized water = sum_seasons(area_da * crop_su_tuketimi_m3_da) using data/urun_parametreleri_demo.csv; NADAS treated as 0.",
+                "annualSaving": "max(0, baseline - optimized)",
+                "saving15y": f"annualSaving * {horizon_years}"
+            },
+            "meta": {"timings_ms": _timing_report()},
+        })
+    except Exception as e:
+        return jsonify({"status": "ERROR", "message": str(e), "where": "api_impact15y"}), 500
+
+
+@_timed_view
+def api_profit15y():
+    """Compute 15-year profit projection per algorithm (GA/ABC/ACO) and their mean (AVG).
+
+    Baseline (current) per-parcel profit is taken from data/parsel_su_kar_ozet.csv -> mevcut_kar_tl (annual).
+    Optimized profit is computed as sum_seasons(area_da * net_profit_tl_da) using data/urun_parametreleri_demo.csv,
+    where net_profit_tl_da = beklenen_verim_kg_da * fiyat_tl_kg - maliyet_tl_da. NADAS treated as 0.
+
+    Returns totals and a GeoJSON point layer with per-algo profit15 fields.
+    """
+    try:
+        payload = request.get_json(force=True, silent=True) or {}
+        selected = payload.get("selectedParcelIds", []) or []
+        if isinstance(selected, str):
+            selected = [s.strip() for s in selected.split(",") if s.strip()]
+        elif not isinstance(selected, list):
+            selected = list(selected) if selected else []
+
+        scenario = str(payload.get("scenario", "recommended") or "recommended")
+        season_source = str(payload.get("seasonSource", "both") or "both")
+        water_budget_ratio = safe_float(payload.get("waterBudgetRatio", 1.0), 1.0)
+
+        year_raw = payload.get("year", None)
+        year_val = None if year_raw in (None, "", "none", "null") else safe_int(year_raw, 0)
+        if year_val == 0:
+            year_val = None
+
+        horizon_years = int(payload.get("horizonYears", 15) or 15)
+        horizon_years = max(1, min(30, horizon_years))
+
+        repeats = int(payload.get("repeats", 8) or 8)
+        repeats = max(1, min(30, repeats))
+
+        algos = payload.get("algorithms", None) or ["GA", "ABC", "ACO"]
+        algos = [str(a).upper() for a in algos if str(a).strip()]
+        if not algos:
+            algos = ["GA", "ABC", "ACO"]
+
+        max_seconds = payload.get("maxSeconds", 120)
+        try:
+            max_seconds = float(max_seconds)
+        except Exception:
+            max_seconds = 120.0
+        max_seconds = max(20.0, min(240.0, max_seconds))
+
+        parcels_df = load_parcels_csv().copy()
+        parcels_df["parsel_id"] = parcels_df["parsel_id"].astype(str)
+        if selected:
+            parcels_df = parcels_df[parcels_df["parsel_id"].isin(selected)].copy()
+
+        crops_df = load_crops_csv().copy()
+        crops_df["urun_adi"] = crops_df["urun_adi"].astype(str)
+
+        def _net_profit_da(row) -> float:
+            y = safe_float(row.get("beklenen_verim_kg_da", 0.0), 0.0)
+            p = safe_float(row.get("fiyat_tl_kg", 0.0), 0.0)
+            c = safe_float(row.get("maliyet_tl_da", 0.0), 0.0)
+            return float(y * p - c)
+
+        profit_per_da = {normalize_crop_key(r["urun_adi"]): _net_profit_da(r) for _, r in crops_df.iterrows()}
+        for k in ["NADAS", "FALLOW", "FALOW", "NAD"]:
+            profit_per_da[normalize_crop_key(k)] = 0.0
+
+        def _parcel_opt_profit_from_out(out: Dict[str, Any]) -> Dict[str, float]:
+            outp = {}
+            for pr in (out.get("parcels") or []):
+                pid = str(pr.get("id"))
+                rec = (((pr.get("result") or {}).get("recommended")) or [])
+                c1 = (rec[0] or {}) if len(rec) > 0 else {}
+                c2 = (rec[1] or {}) if len(rec) > 1 else {}
+                n1 = normalize_crop_key(str(c1.get("name") or ""))
+                n2 = normalize_crop_key(str(c2.get("name") or ""))
+                a1 = safe_float(c1.get("area", 0.0), 0.0)
+                a2 = safe_float(c2.get("area", 0.0), 0.0)
+                prof = profit_per_da.get(n1, 0.0) * a1 + profit_per_da.get(n2, 0.0) * a2
+                outp[pid] = float(prof)
+            return outp
+
+        def _run_algo_best(algo: str) -> Dict[str, Any]:
+            best_out = None
+            best_score = None
+            if algo == "GA":
+                speed = {"generations": 18, "popSize": 28}
+            elif algo == "ABC":
+                speed = {"cycles": 25, "foodSources": 22}
+            else:
+                speed = {"iterations": 25, "ants": 22}
+
+            def score_fn(out: Dict[str, Any]) -> float:
+                prof = safe_float(out.get("total_profit_tl", 0.0), 0.0)
+                wat = safe_float(out.get("total_water_m3", 0.0), 0.0)
+                eff = prof / wat if wat > 0 else 0.0
+                if scenario == "su_tasarruf":
+                    return eff * 1e6 + prof
+                if scenario == "maks_kar":
+                    return prof
+                return prof + eff * 1e5
+
+            per_algo_budget = max_seconds / max(1, len(algos))
+            t0 = time.perf_counter()
+            repeat_seeds = _repeat_seeds(payload.get("baseSeed"), repeats)
+            for r in range(repeats):
+                if (time.perf_counter() - t0) > per_algo_budget:
+                    break
+                seed = repeat_seeds[r]
+
+                out = optimize(
+                    selected,
+                    scenario=scenario,
+                    water_budget_ratio=water_budget_ratio,
+                    year=year_val,
+                    algorithm=algo,
+                    options={"twoSeason": True, "seasonSource": season_source, **speed, "seed": seed},
+                )
+                if not isinstance(out, dict) or out.get("status") != "OK":
+                    continue
+                sc = score_fn(out)
+                if (best_score is None) or (sc > best_score):
+                    best_score = sc
+                    best_out = out
+
+            if best_out is None:
+                best_out = optimize(
+                    selected,
+                    scenario=scenario,
+                    water_budget_ratio=water_budget_ratio,
+                    year=year_val,
+                    algorithm=algo,
+                    options={"twoSeason": True, "seasonSource": season_source, **speed},
+                )
+            return best_out if isinstance(best_out, dict) else {"status": "ERROR", "message": "No output"}
+
+        base_by_parcel = {str(r["parsel_id"]): safe_float(r.get("mevcut_kar_tl", 0.0), 0.0) for _, r in parcels_df.iterrows()}
+        total_base = float(sum(base_by_parcel.values()))
+
+        algo_results = {}
+        for algo in algos:
+            out = _run_algo_best(algo)
+            if not isinstance(out, dict) or out.get("status") != "OK":
+                algo_results[algo] = {"status": "ERROR", "message": str(out.get("message", "run failed"))}
+                continue
+
+            opt_profit_by_parcel = _parcel_opt_profit_from_out(out)
+            delta_by_parcel = {}
+            for pid, base_p in base_by_parcel.items():
+                opt_p = safe_float(opt_profit_by_parcel.get(pid, base_p), base_p)
+                delta_by_parcel[pid] = float(opt_p - base_p)
+
+            total_opt = float(sum(safe_float(opt_profit_by_parcel.get(pid, base_by_parcel[pid]), base_by_parcel[pid]) for pid in base_by_parcel.keys()))
+            total_delta = total_opt - total_base
+
+            algo_results[algo] = {
+                "status": "OK",
+                "total_base_tl": total_base,
+                "total_opt_tl": total_opt,
+                "delta_annual_tl": total_delta,
+                "delta_15y_tl": total_delta * horizon_years,
+                "parcel_opt_annual": {pid: safe_float(opt_profit_by_parcel.get(pid, base_by_parcel[pid]), base_by_parcel[pid]) for pid in base_by_parcel.keys()},
+                "parcel_delta_annual": delta_by_parcel,
+                "parcel_delta_15y": {pid: d * horizon_years for pid, d in delta_by_parcel.items()},
+            }
+
+        ok_algos = [a for a in algos if algo_results.get(a, {}).get("status") == "OK"]
+        avg = {"status": "ERROR", "message": "No successful algorithm runs"}
+        if ok_algos:
+            parcel_opt_avg = {}
+            parcel_delta_avg = {}
+            for pid, base_p in base_by_parcel.items():
+                vals_opt = [safe_float(algo_results[a]["parcel_opt_annual"].get(pid, base_p), base_p) for a in ok_algos]
+                opt_mean = float(sum(vals_opt) / len(vals_opt)) if vals_opt else float(base_p)
+                parcel_opt_avg[pid] = opt_mean
+                parcel_delta_avg[pid] = float(opt_mean - base_p)
+            total_opt_avg = float(sum(parcel_opt_avg.values()))
+            total_delta_avg = total_opt_avg - total_base
+            avg = {
+                "status": "OK",
+                "total_base_tl": total_base,
+                "total_opt_tl": total_opt_avg,
+                "delta_annual_tl": total_delta_avg,
+                "delta_15y_tl": total_delta_avg * horizon_years,
+                "parcel_opt_annual": parcel_opt_avg,
+                "parcel_delta_annual": parcel_delta_avg,
+                "parcel_delta_15y": {pid: d * horizon_years for pid, d in parcel_delta_avg.items()},
+            }
+
+        features = []
+        for _, r in parcels_df.iterrows():
+            pid = str(r["parsel_id"])
+            lat = safe_float(r.get("lat", 0.0), 0.0)
+            lon = safe_float(r.get("lon", 0.0), 0.0)
+            if lat == 0.0 and lon == 0.0:
+                continue
+            props = {
+                "parsel_id": pid,
+                "koy": str(r.get("koy", "")),
+                "ilce": str(r.get("ilce", "")),
+                "alan_da": safe_float(r.get("alan_da", 0.0), 0.0),
+                "base_profit_tl": safe_float(r.get("mevcut_kar_tl", 0.0), 0.0),
+                "horizon_years": horizon_years,
+            }
+            for algo in algos:
+                if algo_results.get(algo, {}).get("status") == "OK":
+                    props[f"profit15_{algo}_tl"] = safe_float(algo_results[algo]["parcel_delta_15y"].get(pid, 0.0), 0.0)
+                    props[f"profit_{algo}_annual_tl"] = safe_float(algo_results[algo]["parcel_opt_annual"].get(pid, 0.0), 0.0)
+                else:
+                    props[f"profit15_{algo}_tl"] = 0.0
+                    props[f"profit_{algo}_annual_tl"] = 0.0
+            if avg.get("status") == "OK":
+                props["profit15_AVG_tl"] = safe_float(avg["parcel_delta_15y"].get(pid, 0.0), 0.0)
+                props["profit_AVG_annual_tl"] = safe_float(avg["parcel_opt_annual"].get(pid, 0.0), 0.0)
+            else:
+                props["profit15_AVG_tl"] = 0.0
+                props["profit_AVG_annual_tl"] = 0.0
+
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": props,
+            })
+
+        # --- Build simple year-by-year series for UI charts (cumulative profit delta) ---
+        years = list(range(1, horizon_years + 1))
+        series = {"years": years}
+        for algo in algos:
+            if algo_results.get(algo, {}).get("status") == "OK":
+                annual = safe_float(algo_results[algo].get("delta_annual_tl", 0.0), 0.0)
+                series[algo] = {
+                    "delta_annual_tl": annual,
+                    "cumulative_delta_tl": [annual * y for y in years],
+                }
+            else:
+                series[algo] = {"delta_annual_tl": 0.0, "cumulative_delta_tl": [0.0 for _ in years]}
+        if avg.get("status") == "OK":
+            annual = safe_float(avg.get("delta_annual_tl", 0.0), 0.0)
+            series["AVG"] = {"delta_annual_tl": annual, "cumulative_delta_tl": [annual * y for y in years]}
+        else:
+            series["AVG"] = {"delta_annual_tl": 0.0, "cumulative_delta_tl": [0.0 for _ in years]}
+
+        return jsonify({
+            "status": "OK",
+            "horizonYears": horizon_years,
+            "series": series,
+            "seasonSource": season_source,
+            "scenario": scenario,
+            "algorithms": algos,
+            "totals": {**{a: {k: algo_results[a].get(k) for k in ["total_base_tl", "total_opt_tl", "delta_annual_tl", "delta_15y_tl"]} if algo_results.get(a, {}).get("status") == "OK" else {"status": "ERROR", "message": algo_results.get(a, {}).get("message", "")} for a in algos},
+                       "AVG": {k: avg.get(k) for k in ["total_base_tl", "total_opt_tl", "delta_annual_tl", "delta_15y_tl"]} if avg.get("status") == "OK" else {"status": "ERROR", "message": avg.get("message", "")}},
+            "geojson": {"type": "FeatureCollection", "features": features},
+            "howCalculated": {
+                "baseline": "Per-parcel baseline profit uses data/parsel_su_kar_ozet.csv -> mevcut_kar_tl (annual).",
+                "optimized": "Per-parcel optimized profit = sum_seasons(area_da * (beklenen_verim_kg_da*fiyat_tl_kg - maliyet_tl_da)) using data/urun_parametreleri_demo.csv; NADAS treated as 0.",
+                "deltaAnnual": "optimized - baseline",
+                "delta15y": f"deltaAnnual * {horizon_years}"
+            },
+            "meta": {"timings_ms": _timing_report()},
+        })
+    except Exception as e:
+        return jsonify({"status": "ERROR", "message": str(e), "where": "api_profit15y"}), 500
+
+
+# -----------------------------
+# Preload (app.create_app / gunicorn --preload)
+# -----------------------------
+
+def _rss_mb() -> float:
+    """Current resident set size (MB), see metrics.rss_bytes()."""
+    return metrics.rss_bytes() / (1024.0 * 1024.0)
+
+
+def preload_datasets(years: Optional[List[int]] = None, season_sources: Tuple[str, ...] = ("s1", "s2")) -> Dict[str, Any]:
+    """Eagerly build every process-wide cache and return a per-stage startup report.
+
+    Intended to run once in the gunicorn master (``preload_app = True``) so forked workers
+    share frames, parcels, catalogs and compiled matrices copy-on-write instead of each
+    worker paying the parse cost on its first request.
+
+    ``years`` defaults to the latest available year (the UI default).
+    """
+    stages: List[Dict[str, Any]] = []
+    t_all = time.perf_counter()
+
+    def _stage(name: str, fn) -> Any:
+        t0 = time.perf_counter()
+        err = None
+        out = None
+        try:
+            out = fn()
+        except Exception as e:
+            err = str(e)
+        rec = {"stage": name, "ms": round((time.perf_counter() - t0) * 1000.0, 1), "rss_mb": round(_rss_mb(), 1)}
+        if err:
+            rec["error"] = err
+        stages.append(rec)
+        return out
+
+    rss0 = _rss_mb()
+    _stage("frames", load_enhanced_frames)
+    _stage("seasons_index", load_seasons_index)
+    _stage("basin_series", load_basin_series)
+    parcels = _stage("parcels", load_parcels) or []
+    _stage("parcels_water_total", _all_parcels_water_total)
+
+    def _catalogs():
+        load_crop_catalog()
+        load_crop_family_map()
+        load_crop_irrigation_map()
+        load_irrigation_methods()
+        load_crop_suitability_map()
+        load_rotation_rules()
+        load_s1_crop_calendar_rules()
+        _load_crop_params_map()
+    _stage("catalogs", _catalogs)
+
+    yrs = list(years) if years else (available_years()[-1:] or [2024])
+
+    def _matrices():
+        for y in yrs:
+            _prev_year_family_map(int(y))
+            for src in season_sources:
+                build_candidate_matrix(parcels, year=int(y), season_source=src)
+                build_candidate_matrix_two_season(parcels, year=int(y), season_source=src)
+    _stage("matrices", _matrices)
+
+    return {
+        "pid": os.getpid(),
+        "total_ms": round((time.perf_counter() - t_all) * 1000.0, 1),
+        "rss_start_mb": round(rss0, 1),
+        "rss_end_mb": round(_rss_mb(), 1),
+        "years": [int(y) for y in yrs],
+        "parcels": len(parcels),
+        "stages": stages,
+    }
+
+
+def format_startup_report(report: Dict[str, Any]) -> str:
+    lines = [f"[Akkaya] preload {report.get('total_ms', 0):.0f} ms, RSS {report.get('rss_start_mb', 0):.1f} -> "
+             f"{report.get('rss_end_mb', 0):.1f} MB (pid {report.get('pid')}, {report.get('parcels', 0)} parcels, years {report.get('years')})"]
+    for st in report.get("stages", []):
+        extra = f"  ERROR: {st['error']}" if st.get("error") else ""
+        lines.append(f"[Akkaya]   {st['stage']:<20} {st['ms']:>9.1f} ms  RSS {st['rss_mb']:>8.1f} MB{extra}")
+    return "\n".join(lines)
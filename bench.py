@@ -0,0 +1,300 @@
+"""Offline benchmark runner: the /api/benchmark payload, run through optimize() directly.
+
+    python -m bench payload.json                          # table on stdout
+    python -m bench payload.json --json out.json --csv runs.csv
+    python -m bench payload.json --save-baseline bench_baseline.json
+    python -m bench payload.json --baseline bench_baseline.json --max-slowdown 0.25 --max-quality-loss 0.01
+    python -m bench payload.json --quality-levels 0.5,0.9,1 --json out.json   # + convergence traces
+
+The payload uses the /api/benchmark schema (selectedParcelIds, scenario, year,
+waterBudgetRatio, repeats, baseSeed, algorithms, options, maxSeconds). Missing
+hyper-parameters get the same speed defaults as the API, but nothing is clamped, and
+``maxSeconds`` only applies when it is given. ``baseSeed`` defaults to 42 so that runs can be
+compared against a baseline. ``-`` reads the payload from stdin; without a file the
+API defaults are used.
+
+Every run records a convergence trace (``"trace": false`` in the payload turns it off);
+the second table lists the median time-to-target per quality level (see
+analytics._convergence_summary), and ``--json`` adds the profiles plus the raw per-run traces.
+
+With ``--baseline`` the exit status is 1 when any algorithm's median wall time grows by more
+than ``--max-slowdown`` (a fraction), its median best fitness drops by more than
+``--max-quality-loss`` (a fraction of max(1, |baseline|)), or it has more infeasible or failed
+runs than the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import analytics
+
+ALGORITHMS = ("GA", "ABC", "ACO")
+# same as api_benchmark: applied only when the payload leaves them unset
+SPEED_DEFAULTS = {"generations": 18, "popSize": 28, "cycles": 25, "foodSources": 22, "ants": 22, "iterations": 25}
+DEFAULT_SEED = 42
+CSV_FIELDS = ["algorithm", "repeat", "seed", "status", "feasible", "wall_ms", "optimizer_ms", "fitness_evals",
+              "evals_per_s", "best_fitness", "iterations_used", "stop_reason", "total_water_m3", "total_profit_tl",
+              "efficiency_tl_per_m3", "signature"]
+
+
+def _percentile(vals: List[float], q: float) -> float:
+    if not vals:
+        return 0.0
+    v = sorted(vals)
+    k = (len(v) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(v) - 1)
+    return float(v[lo] + (v[hi] - v[lo]) * (k - lo))
+
+
+def _best_fitness(meta: Dict[str, Any]) -> Optional[float]:
+    es = meta.get("early_stop")
+    vals = [e.get("best_fitness") for e in (es if isinstance(es, list) else [es]) if isinstance(e, dict)]
+    vals = [float(v) for v in vals if v is not None]
+    return max(vals) if vals else None
+
+
+def parse_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize an /api/benchmark payload (no clamps)."""
+    selected = payload.get("selectedParcelIds") or payload.get("selected") or []
+    if isinstance(selected, str):
+        selected = [s.strip() for s in selected.split(",") if s.strip()]
+    year = payload.get("year", None)
+    year = None if year in (None, "", "none", "null") else (analytics.safe_int(year, 0) or None)
+    algos = [str(a).upper() for a in (payload.get("algorithms") or ALGORITHMS)]
+    algos = [a for a in algos if a in ALGORITHMS] or list(ALGORITHMS)
+    seed = payload.get("baseSeed", DEFAULT_SEED)
+    opts = payload.get("options") if isinstance(payload.get("options"), dict) else {}
+    opts = dict(opts)
+    for k, dv in SPEED_DEFAULTS.items():
+        if opts.get(k) in (None, "", 0):
+            opts[k] = dv
+    opts.setdefault("riskMode", "none")
+    opts.setdefault("trace", bool(payload.get("trace", True)))
+    levels = payload.get("qualityLevels", None)
+    max_seconds = payload.get("maxSeconds", None)
+    return {
+        "selected": list(selected),
+        "scenario": str(payload.get("scenario", "recommended") or "recommended"),
+        "water_budget_ratio": analytics.safe_float(payload.get("waterBudgetRatio", 1.0), 1.0),
+        "year": year,
+        "repeats": max(1, int(payload.get("repeats", 10) or 10)),
+        "base_seed": None if seed in (None, "", "none", "null") else int(seed),
+        "algorithms": algos,
+        "options": opts,
+        "max_seconds": None if max_seconds in (None, "") else float(max_seconds),
+        "quality_levels": [float(q) for q in levels if 0.0 < float(q) <= 1.0] if levels else list(analytics.QUALITY_LEVELS),
+    }
+
+
+def run_benchmark(payload: Dict[str, Any], warmup: int = 1, log=None) -> Dict[str, Any]:
+    """Run every (algorithm, repeat) of `payload`; returns {"config", "runs", "summary", "convergence"}.
+
+    `warmup` untimed runs per algorithm fill the loader/matrix caches first, so the first
+    timed repeat is not a cold start.
+    """
+    cfg = parse_payload(payload)
+    seeds = analytics._repeat_seeds(cfg["base_seed"], cfg["repeats"])
+    started = time.perf_counter()
+    runs: List[Dict[str, Any]] = []
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for algo in cfg["algorithms"]:
+        for _w in range(max(0, int(warmup))):
+            try:
+                analytics.optimize(cfg["selected"], algo, cfg["scenario"], cfg["water_budget_ratio"],
+                                   year=cfg["year"], options=dict(cfg["options"], seed=seeds[0]))
+            except Exception:
+                pass  # reported by the timed runs
+        for i in range(cfg["repeats"]):
+            if i > 0 and cfg["max_seconds"] is not None and time.perf_counter() - started > cfg["max_seconds"]:
+                break
+            opts = dict(cfg["options"])
+            if cfg["base_seed"] is not None:
+                opts["seed"] = seeds[i]
+            rec: Dict[str, Any] = {"algorithm": algo, "repeat": i, "seed": opts.get("seed")}
+            t0 = time.perf_counter()
+            try:
+                out = analytics.optimize(cfg["selected"], algo, cfg["scenario"], cfg["water_budget_ratio"],
+                                         year=cfg["year"], options=opts)
+            except Exception as e:
+                out = {"status": "ERROR", "message": f"{type(e).__name__}: {e}"}
+            wall_ms = (time.perf_counter() - t0) * 1000.0
+            meta = out.get("meta") or {}
+            tm = meta.get("timings_ms") or {}
+            es = meta.get("early_stop")
+            es0 = es[0] if isinstance(es, list) and es else (es or {})
+            evals = int(tm.get("fitness_evals", 0) or 0)
+            opt_ms = float(tm.get("optimizer", 0.0) or 0.0)
+            rec.update({
+                "status": out.get("status"),
+                "message": out.get("message"),
+                "feasible": bool(out.get("feasible", False)),
+                "wall_ms": round(wall_ms, 3),
+                "optimizer_ms": round(opt_ms, 3),
+                "fitness_evals": evals,
+                "evals_per_s": round(evals / (opt_ms / 1000.0), 1) if opt_ms > 0 else 0.0,
+                "best_fitness": _best_fitness(meta),
+                "iterations_used": es0.get("iterations_used"),
+                "stop_reason": es0.get("stop_reason"),
+                "total_water_m3": analytics.safe_float(out.get("total_water_m3"), 0.0),
+                "total_profit_tl": analytics.safe_float(out.get("total_profit_tl"), 0.0),
+                "efficiency_tl_per_m3": analytics.safe_float(out.get("efficiency_tl_per_m3"), 0.0),
+                "signature": analytics._plan_signature(out) if out.get("status") == "OK" else "",
+            })
+            tr = analytics._run_trace(meta) if rec["status"] == "OK" else None
+            if tr is not None:
+                traces.setdefault(algo, []).append(tr)
+                rec["trace"] = {k: v.tolist() for k, v in tr.items()}
+            runs.append(rec)
+            if log is not None:
+                log(f"{algo} #{i}: {rec['status']} {wall_ms:.1f} ms, fitness {rec['best_fitness']}")
+    conv = analytics._convergence_summary(traces, cfg["quality_levels"]) if traces else None
+    return {"config": cfg, "runs": runs, "summary": summarize(runs), "convergence": conv}
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for algo in dict.fromkeys(r["algorithm"] for r in runs):
+        rs = [r for r in runs if r["algorithm"] == algo]
+        ok = [r for r in rs if r["status"] == "OK"]
+        wall = [r["wall_ms"] for r in rs]
+        fit = [r["best_fitness"] for r in ok if r["best_fitness"] is not None]
+        out[algo] = {
+            "runs": len(rs),
+            "errors": len(rs) - len(ok),
+            "infeasible": sum(1 for r in ok if not r["feasible"]),
+            "wall_ms_median": round(_percentile(wall, 0.5), 3),
+            "wall_ms_p95": round(_percentile(wall, 0.95), 3),
+            "fitness_evals_mean": round(sum(r["fitness_evals"] for r in ok) / len(ok), 1) if ok else 0.0,
+            "evals_per_s_median": round(_percentile([r["evals_per_s"] for r in ok], 0.5), 1),
+            "best_fitness_median": _percentile(fit, 0.5) if fit else None,
+            "best_fitness_max": max(fit) if fit else None,
+            "water_m3_mean": round(sum(r["total_water_m3"] for r in ok) / len(ok), 1) if ok else 0.0,
+            "profit_tl_mean": round(sum(r["total_profit_tl"] for r in ok) / len(ok), 1) if ok else 0.0,
+            "unique_plans": len({r["signature"] for r in ok if r["signature"]}),
+        }
+    return out
+
+
+def compare(summary: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            max_slowdown: float, max_quality_loss: float) -> List[str]:
+    """Regression messages (empty when `summary` is within the thresholds of `baseline`)."""
+    problems: List[str] = []
+    for algo, base in baseline.items():
+        cur = summary.get(algo)
+        if cur is None:
+            continue
+        bw, cw = float(base.get("wall_ms_median") or 0.0), float(cur["wall_ms_median"])
+        if bw > 0 and cw > bw * (1.0 + max_slowdown):
+            problems.append(f"{algo}: median wall time {cw:.1f} ms vs baseline {bw:.1f} ms (+{(cw / bw - 1.0) * 100:.1f}%)")
+        bf, cf = base.get("best_fitness_median"), cur["best_fitness_median"]
+        if bf is not None and (cf is None or cf < float(bf) - max_quality_loss * max(1.0, abs(float(bf)))):
+            problems.append(f"{algo}: median best fitness {cf} vs baseline {bf}")
+        for k in ("infeasible", "errors"):
+            if int(cur[k]) > int(base.get(k, 0) or 0):
+                problems.append(f"{algo}: {k} {cur[k]} vs baseline {base.get(k, 0)}")
+    return problems
+
+
+def format_table(summary: Dict[str, Dict[str, Any]]) -> str:
+    cols = [("algo", 5), ("runs", 5), ("err", 4), ("infeas", 7), ("wall p50 ms", 12), ("wall p95 ms", 12),
+            ("evals", 9), ("evals/s", 10), ("fitness p50", 14), ("water m3", 12), ("profit TL", 13), ("plans", 6)]
+    lines = ["".join(f"{c:>{w}}" for c, w in cols)]
+    for algo, s in summary.items():
+        fit = s["best_fitness_median"]
+        vals = [algo, s["runs"], s["errors"], s["infeasible"], f"{s['wall_ms_median']:.1f}", f"{s['wall_ms_p95']:.1f}",
+                f"{s['fitness_evals_mean']:.0f}", f"{s['evals_per_s_median']:.0f}", "-" if fit is None else f"{fit:.5g}",
+                f"{s['water_m3_mean']:.0f}", f"{s['profit_tl_mean']:.0f}", s["unique_plans"]]
+        lines.append("".join(f"{str(v):>{w}}" for v, (_c, w) in zip(vals, cols)))
+    return "\n".join(lines)
+
+
+def format_convergence(conv: Optional[Dict[str, Any]]) -> str:
+    """Median time-to-target (ms) and success rate per quality level."""
+    if not conv or not conv.get("algorithms"):
+        return "no convergence traces"
+    levels = [str(q) for q in conv["levels"]]
+    lines = [f"{'algo':>5}" + "".join(f"{'q=' + q + ' ms':>15}" for q in levels) + f"{'search ev/s':>13}"]
+    for algo, c in conv["algorithms"].items():
+        cells = []
+        for q in levels:
+            t, ok = c["time_to_target_ms"][q], c["success_rate"][q]
+            cells.append(f"{'-' if t is None else f'{t:.1f}'} ({ok:.0%})")
+        lines.append(f"{algo:>5}" + "".join(f"{v:>15}" for v in cells) + f"{c['evals_per_s'] or 0:>13.0f}")
+    return "\n".join(lines)
+
+
+def write_csv(path: str, runs: List[Dict[str, Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(runs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench", description="Offline GA/ABC/ACO benchmark (the /api/benchmark payload, no clamps)")
+    ap.add_argument("payload", nargs="?", help="payload JSON file ('-' for stdin; default: API defaults)")
+    ap.add_argument("--repeats", type=int, help="override payload repeats")
+    ap.add_argument("--algorithms", help="override payload algorithms, e.g. GA,ACO")
+    ap.add_argument("--warmup", type=int, default=1, help="untimed runs per algorithm before timing (default 1)")
+    ap.add_argument("--json", dest="json_out", metavar="PATH", help="write config, runs and summary as JSON")
+    ap.add_argument("--csv", dest="csv_out", metavar="PATH", help="write one CSV row per run")
+    ap.add_argument("--baseline", metavar="PATH", help="compare with a --json/--save-baseline file")
+    ap.add_argument("--save-baseline", metavar="PATH", help="store this run's summary as the new baseline")
+    ap.add_argument("--max-slowdown", type=float, default=0.25, help="allowed median wall-time growth (fraction, default 0.25)")
+    ap.add_argument("--max-quality-loss", type=float, default=0.01,
+                    help="allowed median best-fitness drop (fraction of |baseline|, default 0.01)")
+    ap.add_argument("--quality-levels", help="comma-separated quality levels for time-to-target (default 0.5,0.9,0.99,1)")
+    ap.add_argument("--no-trace", action="store_true", help="do not record convergence traces")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no per-run progress on stderr")
+    args = ap.parse_args(argv)
+
+    payload: Dict[str, Any] = {}
+    if args.payload == "-":
+        payload = json.load(sys.stdin)
+    elif args.payload:
+        with open(args.payload, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    if args.repeats is not None:
+        payload["repeats"] = args.repeats
+    if args.algorithms:
+        payload["algorithms"] = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    if args.quality_levels:
+        payload["qualityLevels"] = [float(q) for q in args.quality_levels.split(",") if q.strip()]
+    if args.no_trace:
+        payload["trace"] = False
+
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr, flush=True))
+    result = run_benchmark(payload, warmup=args.warmup, log=log)
+    print(format_table(result["summary"]))
+    if result["convergence"] is not None:
+        print()
+        print(format_convergence(result["convergence"]))
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.csv_out:
+        write_csv(args.csv_out, result["runs"])
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": result["config"], "summary": result["summary"]}, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        problems = compare(result["summary"], base.get("summary", base), args.max_slowdown, args.max_quality_loss)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        if problems:
+            return 1
+        print("no regression against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""gunicorn settings for the Akkaya backend (``gunicorn -c gunicorn.conf.py wsgi:app``).
+
+Environment overrides: AKKAYA_BIND, AKKAYA_WORKERS, AKKAYA_THREADS, AKKAYA_TIMEOUT,
+AKKAYA_METRICS_DIR (per-worker /metrics snapshots; defaults to a directory under the system temp dir).
+"""
+import gc
+import glob
+import os
+import tempfile
+
+# /metrics sums the snapshots of all workers; must be set before metrics.py is imported
+os.environ.setdefault("AKKAYA_METRICS_DIR", os.path.join(tempfile.gettempdir(), "akkaya_metrics"))
+
+# Counters restart from zero with the server. Done here, when the config is read, because
+# preload_app loads wsgi:app before on_starting runs (and the project dir is not on sys.path yet).
+for _f in glob.glob(os.path.join(os.environ["AKKAYA_METRICS_DIR"], "akkaya_metrics_*.json")):
+    try:
+        os.remove(_f)
+    except OSError:
+        pass
+
+bind = os.environ.get("AKKAYA_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("AKKAYA_WORKERS", "2"))
+threads = int(os.environ.get("AKKAYA_THREADS", "1"))
+# /api/benchmark may run for up to 180 s (maxSeconds clamp)
+timeout = int(os.environ.get("AKKAYA_TIMEOUT", "240"))
+
+# Load wsgi:app (and therefore all datasets) in the master before forking workers.
+preload_app = True
+
+
+def when_ready(server):
+    # Move every preloaded object to the permanent generation so the cyclic GC in the
+    # workers does not touch (and thereby copy) the shared pages.
+    gc.freeze()
+    server.log.info("Akkaya datasets preloaded; %d objects frozen before fork", gc.get_freeze_count())
+
+
+def on_exit(server):
+    # Unlink shared-memory matrix segments created by the master (AKKAYA_SHARED_MEMORY=1).
+    try:
+        import shared_arrays
+        shared_arrays.release_all(unlink=True)
+    except Exception:
+        pass
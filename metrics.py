@@ -0,0 +1,245 @@
+"""Process metrics in Prometheus text format (``GET /metrics``), stdlib only.
+
+Counters, gauges and histograms live in module-level dicts guarded by one lock, so Flask
+threads can update them concurrently. With several gunicorn workers set
+``AKKAYA_METRICS_DIR``: every process writes its own snapshot there
+(``akkaya_metrics_<pid>.json``, replaced atomically after every request, or at most every
+``AKKAYA_METRICS_FLUSH_S`` seconds, and at exit) and ``render()`` sums the snapshots of all processes. Counters and
+histograms of exited workers keep counting; their gauges are dropped.
+
+Forked children (gunicorn workers, GA islands) start from an empty registry, so values
+inherited from the preloading master are not counted twice.
+"""
+from __future__ import annotations
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+METRICS_DIR = os.environ.get("AKKAYA_METRICS_DIR", "").strip() or None
+# 0: write after every request (a few KB; requests here take milliseconds to minutes)
+FLUSH_INTERVAL_S = float(os.environ.get("AKKAYA_METRICS_FLUSH_S", "0") or 0.0)
+
+# seconds; /api/benchmark may run for minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+# name -> (type, help)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "akkaya_http_requests_total": ("counter", "HTTP requests by endpoint, method and status."),
+    "akkaya_http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint."),
+    "akkaya_http_requests_in_flight": ("gauge", "Requests currently being served, by endpoint."),
+    "akkaya_optimizer_runs_total": ("counter", "Optimizer runs by algorithm."),
+    "akkaya_optimizer_evaluations_total": ("counter", "Fitness evaluations by algorithm."),
+    "akkaya_optimizer_duration_seconds": ("histogram", "Optimizer wall time by algorithm."),
+    "akkaya_cache_requests_total": ("counter", "Cache lookups by cache and result (hit|miss)."),
+    "akkaya_cache_hit_ratio": ("gauge", "hits / (hits + misses) per cache."),
+    "akkaya_process_resident_memory_bytes": ("gauge", "Resident set size per process."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+# (name, labels) -> [bucket counts..., sum, count]
+_hists: Dict[Tuple[str, Labels], List[float]] = {}
+_last_flush = [0.0]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels: Any) -> None:
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + float(value)
+
+
+def gauge_add(name: str, delta: float, **labels: Any) -> None:
+    key = (name, _labels(labels))
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0.0) + float(delta)
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    key = (name, _labels(labels))
+    v = float(value)
+    with _lock:
+        h = _hists.get(key)
+        if h is None:
+            h = _hists[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if v <= le:
+                h[i] += 1
+                break
+        h[-2] += v
+        h[-1] += 1
+
+
+def cache_event(cache: str, hit: bool, n: int = 1) -> None:
+    if n:
+        inc("akkaya_cache_requests_total", n, cache=cache, result="hit" if hit else "miss")
+
+
+def rss_bytes() -> int:
+    """Current resident set size; peak RSS via `resource` where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+        import sys
+        rss = int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        # ru_maxrss is bytes on macOS, KiB on Linux/BSD
+        return rss if sys.platform == "darwin" else rss * 1024
+    except Exception:
+        return 0
+
+
+def snapshot() -> Dict[str, Any]:
+    """This process's registry as a JSON-serializable dict."""
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "written": time.time(),
+            "counters": [[n, list(map(list, lb)), v] for (n, lb), v in _counters.items()],
+            "gauges": [[n, list(map(list, lb)), v] for (n, lb), v in _gauges.items()],
+            "hists": [[n, list(map(list, lb)), list(h)] for (n, lb), h in _hists.items()],
+            "rss": rss_bytes(),
+        }
+
+
+def flush(force: bool = False) -> None:
+    """Write this process's snapshot to METRICS_DIR (no-op without it; throttled unless `force`)."""
+    if METRICS_DIR is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush[0] < FLUSH_INTERVAL_S:
+        return
+    _last_flush[0] = now
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"akkaya_metrics_{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _snapshots() -> List[Dict[str, Any]]:
+    if METRICS_DIR is None:
+        return [snapshot()]
+    flush(force=True)
+    out = []
+    for path in sorted(glob.glob(os.path.join(METRICS_DIR, "akkaya_metrics_*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def _fmt_labels(lb: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(lb) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = lambda s: str(s).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def render() -> str:
+    """Prometheus text exposition (format 0.0.4) summed over all live snapshots."""
+    counters: Dict[Tuple[str, Labels], float] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    hists: Dict[Tuple[str, Labels], List[float]] = {}
+    me = os.getpid()
+    for snap in _snapshots():
+        pid = int(snap.get("pid", 0))
+        alive = pid == me or _pid_alive(pid)
+        for n, lb, v in snap.get("counters", []):
+            key = (n, tuple(map(tuple, lb)))
+            counters[key] = counters.get(key, 0.0) + float(v)
+        for n, lb, h in snap.get("hists", []):
+            key = (n, tuple(map(tuple, lb)))
+            acc = hists.setdefault(key, [0.0] * len(h))
+            for i, x in enumerate(h):
+                acc[i] += float(x)
+        if not alive:
+            continue
+        for n, lb, v in snap.get("gauges", []):
+            key = (n, tuple(map(tuple, lb)))
+            gauges[key] = gauges.get(key, 0.0) + float(v)
+        gauges[("akkaya_process_resident_memory_bytes", (("pid", str(pid)),))] = float(snap.get("rss", 0))
+
+    hits: Dict[str, List[float]] = {}
+    for (n, lb), v in counters.items():
+        if n == "akkaya_cache_requests_total":
+            d = dict(lb)
+            hm = hits.setdefault(d.get("cache", ""), [0.0, 0.0])
+            hm[0 if d.get("result") == "hit" else 1] += v
+    for cache, (h, m) in hits.items():
+        gauges[("akkaya_cache_hit_ratio", (("cache", cache),))] = h / (h + m) if (h + m) else 0.0
+
+    lines: List[str] = []
+    for name, (kind, help_) in METRICS.items():
+        if kind == "counter":
+            rows = sorted((lb, v) for (n, lb), v in counters.items() if n == name)
+        elif kind == "gauge":
+            rows = sorted((lb, v) for (n, lb), v in gauges.items() if n == name)
+        else:
+            rows = sorted((lb, h) for (n, lb), h in hists.items() if n == name)
+        if not rows:
+            continue
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        for lb, v in rows:
+            if kind != "histogram":
+                lines.append(f"{name}{_fmt_labels(lb)} {_num(v)}")
+                continue
+            cum = 0.0
+            for le, c in zip(LATENCY_BUCKETS, v):
+                cum += c
+                lines.append(f"{name}_bucket{_fmt_labels(lb, ('le', repr(le)))} {_num(cum)}")
+            lines.append(f"{name}_bucket{_fmt_labels(lb, ('le', '+Inf'))} {_num(v[-1])}")
+            lines.append(f"{name}_sum{_fmt_labels(lb)} {_num(v[-2])}")
+            lines.append(f"{name}_count{_fmt_labels(lb)} {_num(v[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+def _reset_after_fork() -> None:
+    global _lock
+    _lock = threading.Lock()
+    _counters.clear()
+    _gauges.clear()
+    _hists.clear()
+    _last_flush[0] = 0.0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush, True)
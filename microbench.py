@@ -0,0 +1,176 @@
+"""Microbenchmarks for the backend hot functions (stdlib timing, no extra packages).
+
+    python -m microbench                       # packaged data, selection tiled x1, x10, x100
+    python -m microbench --scales 1,50 --repeat 30 --only matrix,score
+    python -m microbench --json micro.json
+
+Every case is warmed up, then timed ``--repeat`` times: cheap calls via timeit (autoranged
+loop count, time per call), calls that need a fresh state per call (cold caches) via a
+perf_counter loop around a per-call setup. Allocation is one more call under tracemalloc (peak
+traced KB, NumPy buffers included). The table lists median/p95/min ms per call and peak KB.
+
+Scaled datasets tile the packaged parcel selection ``k`` times (same ids, so every lookup
+hits real rows); the P-dependent functions (matrix builds, scoring, payload) run at each
+scale, the per-call ones (FAO-56, risk sampling, load_parcels) on the packaged data only.
+For real parcel counts point ``AKKAYA_DATA_DIR`` at a synthetic basin and use ``--scales 1``;
+``python -m synth_basin curve`` does that for a list of basin sizes.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import analytics
+
+YEAR = 2024
+OBJECTIVE = "balanced"
+
+
+def _case(name: str, size: str, fn: Callable[[], Any], setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """`setup`, when given, runs before every timed call (outside the timing)."""
+    return {"name": name, "size": size, "fn": fn, "setup": setup}
+
+
+def _time_case(case: Dict[str, Any], repeat: int, warmup: int) -> Dict[str, Any]:
+    fn, setup = case["fn"], case["setup"]
+    for _ in range(max(0, warmup)):
+        if setup:
+            setup()
+        fn()
+    if setup is None:
+        timer = timeit.Timer(fn)
+        number, _t = timer.autorange()
+        samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    else:
+        number, samples = 1, []
+        for _ in range(repeat):
+            setup()
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _cur, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    ms = sorted(s * 1000.0 for s in samples)
+    return {
+        "name": case["name"], "size": case["size"], "repeat": len(ms), "loops": number,
+        "median_ms": statistics.median(ms),
+        "p95_ms": statistics.quantiles(ms, n=20, method="inclusive")[18] if len(ms) > 1 else ms[0],
+        "min_ms": ms[0],
+        "peak_kb": peak / 1024.0,
+    }
+
+
+def _clear_caches() -> None:
+    # everything load_parcels() and the matrix builders memoize
+    analytics._cache.clear()
+
+
+def build_cases(scales: List[int], only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Cases for `scales`; with `only` (name substrings) the setup of unmatched cases is skipped too."""
+    parcels = analytics.load_parcels()
+    cases: List[Dict[str, Any]] = []
+    want = lambda name: not only or any(k in name.lower() for k in only)
+
+    # per-call functions, packaged data
+    cases.append(_case("load_parcels (cold)", f"P={len(parcels)}", analytics.load_parcels, _clear_caches))
+    cases.append(_case("load_parcels (cached)", f"P={len(parcels)}", analytics.load_parcels))
+
+    crop_params = analytics._load_crop_params_map()
+    clim_all = analytics.load_enhanced_frames().get("monthly_climate")
+    pid = str(parcels[0]["id"])
+    clim = clim_all[(clim_all["parcel_id"].astype(str) == pid)
+                    & (clim_all["month"].astype(str).str.startswith(str(YEAR)))][["month", "et0_mm", "precip_mm"]]
+    crop = next(iter(crop_params), "BUGDAY")
+    cases.append(_case("compute_fao56_monthly_irrigation_mm", "150 days",
+                       lambda: analytics.compute_fao56_monthly_irrigation_mm(
+                           pid, crop, f"{YEAR}-04-15", f"{YEAR}-09-11", 0.75, clim, crop_params)))
+    for n in (120, 1000):
+        cases.append(_case("_risk_adjusted_profit_per_da", f"samples={n}",
+                           lambda n=n: analytics._risk_adjusted_profit_per_da(
+                               32000.0, 180.0, 1.9e6, 400.0, samples=n, risk_mode="cvar", risk_lambda=0.5)))
+
+    # P-dependent functions, tiled selections
+    for k in scales:
+        sel = parcels * int(k)
+        size = f"P={len(sel)}"
+        cases.append(_case("build_candidate_matrix (compile)", size,
+                           lambda sel=sel: analytics._compile_candidate_matrix(sel, year=YEAR, season_source="both")))
+        cases.append(_case("build_candidate_matrix_two_season (compile)", size,
+                           lambda sel=sel: analytics._compile_candidate_matrix_two_season(sel, year=YEAR, season_source="both")))
+
+        if not (want("_score_solution_two_season") or want("_to_ui_payload")):
+            continue
+        ctx = analytics.build_planning_context(sel, YEAR, OBJECTIVE)
+        rng = np.random.default_rng(0)
+        feas1 = ctx["W1"] < 1e8
+        feas2 = ctx["W2"] < 1e8
+        s1 = np.array([rng.choice(np.flatnonzero(r)) if r.any() else 0 for r in feas1])
+        s2 = np.array([rng.choice(np.flatnonzero(r)) if r.any() else 0 for r in feas2])
+        cases.append(_case("_score_solution_two_season", size,
+                           lambda ctx=ctx, s1=s1, s2=s2: analytics._score_solution_two_season(
+                               s1, s2, ctx["areas"], ctx["W1"], ctx["R1"], ctx["W2"], ctx["R2"], ctx["budget"],
+                               OBJECTIVE, ctx["crop_list"], ctx["crop_family"], ctx["rotation_rules"],
+                               month_weights=ctx["month_weights"], month_caps=ctx["month_caps"],
+                               year=YEAR, parcel_ids=ctx["parcel_ids"])))
+
+        if not want("_to_ui_payload"):
+            continue
+        raw = analytics.ga_optimize_two_season(sel, YEAR, OBJECTIVE, pop_size=12, generations=3, seed=1, ctx=ctx)
+        state: Dict[str, Any] = {}
+        cases.append(_case("_to_ui_payload", size,
+                           lambda sel=sel, ctx=ctx, state=state: analytics._to_ui_payload(
+                               state["raw"], sel, YEAR, OBJECTIVE, "both", ctx=ctx),
+                           setup=lambda raw=raw, state=state: state.__setitem__("raw", copy.deepcopy(raw))))
+    return cases
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    head = f"{'function':<46}{'size':>13}{'n':>5}{'median ms':>12}{'p95 ms':>11}{'min ms':>11}{'peak KB':>11}"
+    out = [head, "-" * len(head)]
+    for r in rows:
+        out.append(f"{r['name']:<46}{r['size']:>13}{r['repeat']:>5}{r['median_ms']:>12.4f}{r['p95_ms']:>11.4f}"
+                   f"{r['min_ms']:>11.4f}{r['peak_kb']:>11.1f}")
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m microbench", description="Microbenchmarks for the Akkaya backend hot functions")
+    ap.add_argument("--scales", default="1,10,100", help="tile factors for the parcel selection (default 1,10,100)")
+    ap.add_argument("--repeat", type=int, default=15, help="timed samples per case (default 15)")
+    ap.add_argument("--warmup", type=int, default=2, help="untimed calls per case (default 2)")
+    ap.add_argument("--only", help="comma-separated substrings; run only matching function names")
+    ap.add_argument("--json", dest="json_out", metavar="PATH", help="also write the rows as JSON")
+    args = ap.parse_args(argv)
+
+    scales = [max(1, int(x)) for x in args.scales.split(",") if x.strip()]
+    # stage timers stay off (no timing scope is opened here), so the numbers are the bare functions
+    keys = [k.strip().lower() for k in (args.only or "").split(",") if k.strip()]
+    cases = [c for c in build_cases(scales, keys) if not keys or any(k in c["name"].lower() for k in keys)]
+    rows = []
+    for c in cases:
+        rows.append(_time_case(c, max(1, args.repeat), args.warmup))
+        print(f"{c['name']} [{c['size']}] done", file=sys.stderr, flush=True)
+    print(format_table(rows))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"numpy": np.__version__, "python": sys.version.split()[0], "rows": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
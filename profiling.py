@@ -0,0 +1,127 @@
+"""On-demand request profiling (``?profile=cpu|mem``), stdlib only.
+
+``cpu`` runs the view under cProfile and reports the top functions by cumulative time;
+the raw stats are saved as ``<PROFILE_DIR>/<label>_<utc time>_<pid>.prof`` (open with
+snakeviz or ``python -m pstats``). ``mem`` runs it under tracemalloc and reports peak traced
+memory and the top allocation sites; the snapshot is saved next to it as ``.tracemalloc``
+(``tracemalloc.Snapshot.load``).
+
+Both profilers are process-global, so one profiled request runs at a time; a concurrent
+request runs unprofiled and its report says so. Work done in forked children (GA islands)
+is not seen by either profiler.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+PROFILE_DIR = os.environ.get("AKKAYA_PROFILE_DIR", "").strip() or os.path.join(tempfile.gettempdir(), "akkaya_profiles")
+PROFILE_MODES = ("cpu", "mem")
+TOP_DEFAULT = 30
+TOP_MAX = 200
+# frames kept per allocation traceback; sites are grouped by their innermost frame
+TRACE_FRAMES = 10
+
+_busy = threading.Lock()
+
+
+def _out_path(label: str, ext: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S_%f")
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in label) or "request"
+    return os.path.join(PROFILE_DIR, f"{safe}_{stamp}_{os.getpid()}.{ext}")
+
+
+def _short_path(filename: str) -> str:
+    # keep the report readable: project files relative, site-packages from the package name
+    base = os.path.dirname(os.path.abspath(__file__))
+    if filename.startswith(base + os.sep):
+        return os.path.relpath(filename, base)
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+def _cpu(fn: Callable[[], Any], top: int, label: str) -> Tuple[Any, Dict[str, Any]]:
+    import cProfile
+    import pstats
+
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    prof.enable()
+    try:
+        result = fn()
+    finally:
+        prof.disable()
+    wall = time.perf_counter() - t0
+    path = _out_path(label, "prof")
+    prof.dump_stats(path)
+    st = pstats.Stats(prof)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in st.stats.items():  # type: ignore[attr-defined]
+        rows.append((ct, tt, nc, cc, filename, line, func))
+    rows.sort(key=lambda r: -r[0])
+    return result, {
+        "mode": "cpu",
+        "wall_ms": round(wall * 1000.0, 3),
+        "total_calls": int(st.total_calls),  # type: ignore[attr-defined]
+        "file": path,
+        "top": [{"function": f"{_short_path(fn_)}:{line}({func})", "ncalls": int(nc), "primitive_calls": int(cc),
+                 "tottime_ms": round(tt * 1000.0, 3), "cumtime_ms": round(ct * 1000.0, 3)}
+                for ct, tt, nc, cc, fn_, line, func in rows[:top]],
+    }
+
+
+def _mem(fn: Callable[[], Any], top: int, label: str) -> Tuple[Any, Dict[str, Any]]:
+    import tracemalloc
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    tracemalloc.reset_peak()
+    start_cur, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+        wall = time.perf_counter() - t0
+        cur, peak = tracemalloc.get_traced_memory()
+        snap = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    snap = snap.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    path = _out_path(label, "tracemalloc")
+    snap.dump(path)
+    stats = snap.statistics("lineno")
+    return result, {
+        "mode": "mem",
+        "wall_ms": round(wall * 1000.0, 3),
+        "peak_kb": round((peak - start_cur) / 1024.0, 1),
+        "retained_kb": round((cur - start_cur) / 1024.0, 1),
+        "file": path,
+        "top": [{"site": f"{_short_path(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+                 "size_kb": round(s.size / 1024.0, 1), "count": int(s.count)}
+                for s in stats[:top]],
+    }
+
+
+def run(mode: str, fn: Callable[[], Any], top: int = TOP_DEFAULT, label: str = "request") -> Tuple[Any, Dict[str, Any]]:
+    """Call `fn()` under the `mode` profiler; returns (fn's result, report dict)."""
+    mode = str(mode or "").lower()
+    top = max(1, min(int(top or TOP_DEFAULT), TOP_MAX))
+    if mode not in PROFILE_MODES:
+        return fn(), {"mode": mode, "error": f"unknown profile mode; use one of {', '.join(PROFILE_MODES)}"}
+    if not _busy.acquire(blocking=False):
+        return fn(), {"mode": mode, "error": "another profiled request is running; this one was not profiled"}
+    try:
+        return (_cpu if mode == "cpu" else _mem)(fn, top, label)
+    finally:
+        _busy.release()
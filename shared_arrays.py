@@ -0,0 +1,196 @@
+"""Optional shared-memory store for read-only NumPy tuples (candidate matrices).
+
+Each published value is one ``multiprocessing.shared_memory`` segment::
+
+    [header: magic, ready flag, json length][json layout][64-byte aligned array data ...]
+
+The first process that builds a value publishes it under a name derived from the dataset
+version and the cache key; every other process (gunicorn worker, process-pool child) attaches
+and gets read-only ``np.ndarray`` views over the same physical pages. Non-array items
+(crop lists, ``None``) travel in the JSON layout.
+
+Segments are unlinked by the process that created them (``release_all()``, also registered
+with ``atexit``). Attaching processes never unlink.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+_MAGIC = b"AKSH"
+_HEADER = struct.Struct("<4sB3xQ")  # magic, ready flag, json length
+_ALIGN = 64
+
+# name -> SharedMemory handle; handles must stay open while views are alive
+_segments: Dict[str, shared_memory.SharedMemory] = {}
+# name -> pid of the creating process (forked workers inherit this dict but must not unlink)
+_owned: Dict[str, int] = {}
+
+
+def segment_name(version: str, key: Any) -> str:
+    """Short, portable segment name (macOS limits POSIX shm names to 31 chars)."""
+    h = hashlib.sha1(f"{version}|{key!r}".encode("utf-8")).hexdigest()[:24]
+    return f"akk_{h}"
+
+
+def _open(name: str, create: bool, size: int = 0) -> shared_memory.SharedMemory:
+    """Open a segment without resource-tracker bookkeeping; lifetime is managed here.
+
+    Before Python 3.13 every open (create *or* attach) registers the name with the resource
+    tracker, which gunicorn workers and spawn children share with the master. Letting the
+    tracker own the segments makes one process's exit unlink (or unregister) another's.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)  # 3.13+
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory) -> None:
+    try:
+        from multiprocessing import resource_tracker
+        if getattr(shm, "_track", True):
+            # SharedMemory.unlink() unregisters; re-register so the tracker's books balance
+            resource_tracker.register(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _layout(value: Tuple) -> Tuple[list, int]:
+    items = []
+    offset = 0
+    for v in value:
+        if isinstance(v, np.ndarray):
+            arr = np.ascontiguousarray(v)
+            offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+            items.append({"kind": "array", "dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset})
+            offset += arr.nbytes
+        else:
+            items.append({"kind": "json", "value": v})
+    return items, offset
+
+
+def _views(shm: shared_memory.SharedMemory) -> Tuple:
+    magic, _ready, jlen = _HEADER.unpack_from(shm.buf, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"not an Akkaya shared segment: {shm.name}")
+    layout = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + jlen]).decode("utf-8"))
+    base = (_HEADER.size + jlen + _ALIGN - 1) // _ALIGN * _ALIGN
+    out = []
+    for it in layout:
+        if it["kind"] != "array":
+            out.append(it["value"])
+            continue
+        dt = np.dtype(it["dtype"])
+        shape = tuple(it["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        arr = np.ndarray(shape, dtype=dt, buffer=shm.buf, offset=base + int(it["offset"]))
+        if count == 0:
+            arr = np.zeros(shape, dtype=dt)
+        arr.flags.writeable = False
+        out.append(arr)
+    return tuple(out)
+
+
+def publish(name: str, value: Tuple) -> Tuple:
+    """Copy `value` into a new segment and return read-only views over it.
+
+    If another process already published `name`, attach to its segment instead.
+    """
+    if name in _segments:
+        return _views(_segments[name])
+    layout, data_bytes = _layout(value)
+    meta = json.dumps(layout).encode("utf-8")
+    base = (_HEADER.size + len(meta) + _ALIGN - 1) // _ALIGN * _ALIGN
+    try:
+        shm = _open(name, create=True, size=max(1, base + data_bytes))
+    except FileExistsError:
+        hit = attach(name)
+        if hit is None:
+            raise
+        return hit
+    _HEADER.pack_into(shm.buf, 0, _MAGIC, 0, len(meta))
+    shm.buf[_HEADER.size:_HEADER.size + len(meta)] = meta
+    for v, it in zip(value, layout):
+        if it["kind"] == "array" and v.size:
+            dst = np.ndarray(v.shape, dtype=np.dtype(it["dtype"]), buffer=shm.buf, offset=base + it["offset"])
+            dst[...] = v
+    # readers wait on this flag, so set it only after all data is in place
+    _HEADER.pack_into(shm.buf, 0, _MAGIC, 1, len(meta))
+    _segments[name] = shm
+    _owned[name] = os.getpid()
+    return _views(shm)
+
+
+def attach(name: str, timeout: float = 5.0) -> Optional[Tuple]:
+    """Return read-only views over a published segment, or None when it does not exist."""
+    if name in _segments:
+        return _views(_segments[name])
+    try:
+        shm = _open(name, create=False)
+    except (FileNotFoundError, ValueError):
+        return None
+    deadline = time.monotonic() + float(timeout)
+    while True:
+        if shm.size >= _HEADER.size:
+            magic, ready, _ = _HEADER.unpack_from(shm.buf, 0)
+            if magic == _MAGIC and ready == 1:
+                break
+        if time.monotonic() > deadline:
+            shm.close()
+            return None
+        time.sleep(0.005)
+    _segments[name] = shm
+    return _views(shm)
+
+
+def release(name: str, unlink: Optional[bool] = None) -> None:
+    """Close this process's handle; unlink by default only if this process created it."""
+    shm = _segments.pop(name, None)
+    if shm is None:
+        return
+    owned = _owned.pop(name, None) == os.getpid()
+    if unlink if unlink is not None else owned:
+        # removes the name only; live mappings (here or elsewhere) stay valid
+        _unlink(shm)
+    try:
+        shm.close()
+    except BufferError:
+        # views still referenced somewhere; keep the mapping alive until they are dropped
+        _segments[name] = shm
+
+
+def release_all(unlink: bool = True) -> None:
+    """Release every handle; segments created here are unlinked when `unlink` is true."""
+    for name in list(_segments):
+        release(name, unlink=unlink and _owned.get(name) == os.getpid())
+
+
+atexit.register(release_all)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "segments": len(_segments),
+        "owned": sum(1 for pid in _owned.values() if pid == os.getpid()),
+        "bytes": int(sum(s.size for s in _segments.values())),
+    }
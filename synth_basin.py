@@ -0,0 +1,501 @@
+"""Synthetic basin generator for scaling tests (N parcels x Y years x C crops).
+
+    python -m synth_basin generate /tmp/basin_5k --parcels 5000
+    python -m synth_basin generate /tmp/basin_50k --parcels 50000 --years 10 --crops 30 --climate-years 3
+    AKKAYA_DATA_DIR=/tmp/basin_5k python -m microbench --scales 1
+    python -m synth_basin curve --sizes 15,150,1500,15000,50000 --csv curve.csv -- --only matrix,score
+    python -m synth_basin curve --sizes 15,1500 --tool bench -- payload.json --repeats 3
+
+``generate`` copies the packaged data dir and rewrites every parcel-dependent table in it:
+parcel_assumptions, senaryo1/2 seasons, monthly climate, the legacy parcel summary and the
+area overrides, plus the basin-level monthly reservoir, delivery and water-quality series.
+If C is larger than the number of crops in the real tables, crop_suitability, crop_params,
+crop_family_map and the crop catalog are extended too. Every value is resampled from the real
+rows, so the distributions and correlations of the packaged data carry over:
+
+- each synthetic parcel copies the attributes of a real template parcel (soil, capability class,
+  village, irrigation efficiency) with jittered coordinates and a log-normal area factor;
+- its season rows are the template's rows for the mapped source year. With probability ``--mix``
+  (always, when the crop is not among the C kept crops) a row is replaced by a random real row of
+  the same season type, rescaled to the parcel's cropped area;
+- crops beyond the real ones are variants ("Ispanak S2") of a real crop with their own water,
+  yield and cost multipliers;
+- climate rows are the template's months with small precipitation/temperature noise;
+- volumes in the basin series (``*m3*`` and ``*m2*`` columns) are scaled by synthetic / real total area.
+
+Years are the last Y years ending with the last real year; years before the real range cycle
+through it. The output depends only on the arguments and ``--seed``. Point the app or the
+benchmark tools at it with ``AKKAYA_DATA_DIR``.
+
+``curve`` generates (or reuses) one basin per size under ``--root`` and runs ``python -m
+microbench`` (default ``--scales 1``) or ``python -m bench`` on each, then prints one row per
+(parcel count, function/algorithm). Arguments after ``--`` go to the tool.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+SOURCE_DIR = BASE_DIR / "data"
+CSV_REL = Path("enhanced_dataset") / "csv"
+MANIFEST = "synth_basin.json"
+
+# parcels generated (and appended to the output files) per block, to bound memory at 50k parcels
+CHUNK_PARCELS = 2000
+# season-table columns that belong to the parcel, not to the crop grown on it
+PARCEL_COLS = ("season_id", "year", "parcel_id", "season", "soil_unit_code", "soil_group",
+               "land_capability_class", "class_coeff", "village", "irrig_efficiency", "area_da")
+# season-table columns proportional to the cropped area (area_da itself included)
+EXTENSIVE_COLS = ("area_da", "plants", "yield_ton", "revenue_tl", "variable_cost_tl", "profit_tl",
+                  "water_m3_baseline", "water_m3_et_gross", "water_m3_et_net", "water_m3_calib_gross",
+                  "water_m3_calib_net")
+WATER_COLS = ("water_m3_baseline", "water_m3_et_gross", "water_m3_et_net", "water_m3_calib_gross",
+              "water_m3_calib_net", "water_l_per_plant_calib")
+SEASON_FILES = {"s1": "senaryo1_backend_seasons.csv", "s2": "senaryo2_backend_seasons.csv"}
+BASIN_FILES = ("akkaya_reservoir_monthly_backend.csv", "delivery_capacity_monthly_assumed.csv",
+               "water_quality_monthly_assumed.csv")
+
+
+# -----------------------------
+# Source data
+# -----------------------------
+
+def _read_source(src: Path) -> Dict[str, Any]:
+    csv_dir = src / CSV_REL
+    parcels = pd.read_csv(csv_dir / "parcel_assumptions.csv")
+    parcels["parcel_id"] = parcels["parcel_id"].astype(str).str.strip()
+    legacy = pd.read_csv(src / "parsel_su_kar_ozet.csv")
+    legacy["parsel_id"] = legacy["parsel_id"].astype(str).str.strip()
+    ov_path = src / "excel_derived" / "parcel_area_overrides.csv"
+    overrides = pd.read_csv(ov_path) if ov_path.exists() else pd.DataFrame(columns=["parcel_id", "area_da"])
+    overrides["parcel_id"] = overrides["parcel_id"].astype(str).str.strip()
+    seasons = {}
+    for key, name in SEASON_FILES.items():
+        df = pd.read_csv(csv_dir / name)
+        df["parcel_id"] = df["parcel_id"].astype(str).str.strip()
+        df = df[df["year"].notna()].copy()
+        df["year"] = df["year"].astype(int)
+        seasons[key] = df.reset_index(drop=True)
+    climate = pd.read_csv(csv_dir / "monthly_climate_all_parcels.csv")
+    climate["parcel_id"] = climate["parcel_id"].astype(str).str.strip()
+    climate["_year"] = climate["month"].astype(str).str[:4].astype(int)
+
+    # parcel area: GeoJSON override first (what load_parcels() uses), then the legacy summary
+    area = dict(zip(legacy["parsel_id"], pd.to_numeric(legacy["alan_da"], errors="coerce")))
+    for pid, a in zip(overrides["parcel_id"], pd.to_numeric(overrides["area_da"], errors="coerce")):
+        if a == a and a > 0:
+            area[pid] = float(a)
+    parcels["area_da"] = [float(area.get(pid, 0.0) or 0.0) for pid in parcels["parcel_id"]]
+    parcels = parcels[parcels["area_da"] > 0].reset_index(drop=True)
+    years = sorted(set(seasons["s1"]["year"]) | set(seasons["s2"]["year"]))
+    return {"parcels": parcels, "legacy": legacy.set_index("parsel_id"), "seasons": seasons,
+            "climate": climate, "years": years}
+
+
+def _year_map(real_years: List[int], n_years: int) -> pd.DataFrame:
+    first, last = real_years[0], real_years[-1]
+    span = last - first + 1
+    syn = list(range(last - n_years + 1, last + 1))
+    src = [first + (y - first) % span for y in syn]
+    # gaps in the real range map to the nearest earlier real year
+    avail = np.array(real_years)
+    src = [int(avail[avail <= s].max()) if (avail <= s).any() else first for s in src]
+    return pd.DataFrame({"syn_year": syn, "src_year": src})
+
+
+def _crop_plan(seasons: Dict[str, pd.DataFrame], n_crops: int, rng: np.random.Generator) -> Dict[str, Any]:
+    """Kept real crops (most frequent first) and the variants that bring the count up to `n_crops`."""
+    counts = pd.concat([s["crop"] for s in seasons.values()]).astype(str).value_counts()
+    real = sorted(counts.index, key=lambda c: (-int(counts[c]), c))
+    kept = real[:max(1, min(n_crops, len(real)))]
+    variants: Dict[str, Dict[str, Any]] = {}
+    for i in range(max(0, n_crops - len(real))):
+        base = kept[i % len(kept)]
+        name = f"{base} S{i // len(kept) + 2}"
+        w, y, c = np.exp(rng.normal(0.0, 0.15, size=3))
+        variants[name] = {"base": base, "water": float(w), "yield": float(y), "cost": float(c)}
+    groups = {b: [b] + [v for v, m in variants.items() if m["base"] == b] for b in kept}
+    return {"kept": kept, "variants": variants, "groups": groups}
+
+
+# -----------------------------
+# Generators (one block of parcels)
+# -----------------------------
+
+def _shift_dates(dates: pd.Series, shift: np.ndarray) -> pd.Series:
+    s = dates.astype(str)
+    ok = s.str.match(r"^\d{4}-\d\d-\d\d")
+    years = pd.to_numeric(s.str[:4], errors="coerce").fillna(0).astype(int) + shift
+    rest = s.str[4:10].where(s.str[4:10] != "-02-29", "-02-28")
+    return (years.astype(str).str.zfill(4) + rest).where(ok, dates)
+
+
+def _parcel_block(src: Dict[str, Any], start: int, n: int, rng: np.random.Generator, area_sigma: float) -> pd.DataFrame:
+    real = src["parcels"]
+    t = rng.integers(0, len(real), size=n)
+    out = real.iloc[t].reset_index(drop=True).rename(columns={"parcel_id": "template"})
+    out.insert(0, "parcel_id", [f"P{i}" for i in range(start + 1, start + n + 1)])
+    out["area_factor"] = np.clip(np.exp(rng.normal(0.0, area_sigma, size=n)), 0.2, 5.0)
+    out["area_da"] = out["area_da"] * out["area_factor"]
+    for c in ("lat_deg", "lon_deg"):
+        if c in out.columns:
+            out[c] = (pd.to_numeric(out[c], errors="coerce") + rng.normal(0.0, 0.02, size=n)).round(5)
+    return out
+
+
+def _season_block(real: pd.DataFrame, plan: pd.DataFrame, ymap: pd.DataFrame, crops: Dict[str, Any],
+                  rng: np.random.Generator, mix: float, noise: float) -> pd.DataFrame:
+    grid = plan[["parcel_id", "template", "area_factor"]].assign(_pidx=np.arange(len(plan))).merge(ymap, how="cross")
+    rows = grid.merge(real.rename(columns={"parcel_id": "template", "year": "src_year"}),
+                      on=["template", "src_year"], how="inner")
+    rows = rows.sort_values(["_pidx", "syn_year", "season_id"], kind="stable").reset_index(drop=True)
+    n = len(rows)
+    if n == 0:
+        return real.iloc[:0].copy()
+    crop_cols = [c for c in real.columns if c not in PARCEL_COLS]
+    rows["_date_year"] = rows["src_year"].to_numpy()
+
+    # resample crops: rows outside the kept set always, the others with probability `mix`
+    kept = crops["kept"]
+    swap = ~rows["crop"].isin(kept).to_numpy() | (rng.random(n) < mix)
+    drop = np.zeros(n, dtype=bool)
+    for season in sorted(rows["season"].astype(str).unique()):
+        idx = np.flatnonzero(swap & (rows["season"].astype(str).to_numpy() == season))
+        if not len(idx):
+            continue
+        pool = np.flatnonzero((real["season"].astype(str) == season).to_numpy() & real["crop"].isin(kept).to_numpy())
+        if not len(pool):
+            drop[idx] = True  # no kept crop grows in this season: the parcel stays fallow
+            continue
+        donor = real.iloc[rng.choice(pool, size=len(idx))]
+        ratio = rows["area_da"].to_numpy()[idx] / donor["area_da"].replace(0, np.nan).to_numpy()
+        for c in crop_cols:
+            vals = donor[c].to_numpy()
+            col = rows[c].to_numpy(dtype=float if c in EXTENSIVE_COLS else None, copy=True)
+            col[idx] = vals * ratio if c in EXTENSIVE_COLS else vals
+            rows[c] = col
+        rows.loc[idx, "_date_year"] = donor["year"].to_numpy()
+    rows = rows[~drop].reset_index(drop=True)
+    n = len(rows)
+
+    # area, variants, noise
+    f = rows["area_factor"].to_numpy()
+    for c in EXTENSIVE_COLS:
+        if c in rows.columns:
+            rows[c] = pd.to_numeric(rows[c], errors="coerce") * f
+    wm = np.exp(rng.normal(0.0, noise, size=n))
+    ym = np.exp(rng.normal(0.0, noise, size=n))
+    cm = np.ones(n)
+    crop = rows["crop"].astype(str).to_numpy().copy()
+    pick = rng.random(n)
+    for base, names in crops["groups"].items():
+        if len(names) < 2:
+            continue
+        idx = np.flatnonzero(crop == base)
+        k = np.minimum((pick[idx] * len(names)).astype(int), len(names) - 1)
+        for j in range(1, len(names)):
+            sel = idx[k == j]
+            v = crops["variants"][names[j]]
+            crop[sel] = names[j]
+            wm[sel] *= v["water"]
+            ym[sel] *= v["yield"]
+            cm[sel] *= v["cost"]
+    rows["crop"] = crop
+    for c in WATER_COLS:
+        if c in rows.columns:
+            rows[c] = pd.to_numeric(rows[c], errors="coerce") * wm
+    for c in ("yield_ton", "revenue_tl"):
+        rows[c] = pd.to_numeric(rows[c], errors="coerce") * ym
+    rows["variable_cost_tl"] = pd.to_numeric(rows["variable_cost_tl"], errors="coerce") * cm
+    rows["profit_tl"] = rows["revenue_tl"] - rows["variable_cost_tl"]
+    rows["plants"] = pd.to_numeric(rows["plants"], errors="coerce").round().astype("Int64")
+
+    shift = rows["syn_year"].to_numpy() - rows["_date_year"].to_numpy().astype(int)
+    for c in ("planting_date", "harvest_date"):
+        rows[c] = _shift_dates(rows[c], shift)
+    rows["year"] = rows["syn_year"]
+    return rows[list(real.columns)]
+
+
+def _climate_block(real: pd.DataFrame, plan: pd.DataFrame, ymap: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    grid = plan[["parcel_id", "template"]].assign(_pidx=np.arange(len(plan))).merge(ymap, how="cross")
+    cols = [c for c in real.columns if c != "_year"]
+    rows = grid.merge(real.rename(columns={"parcel_id": "template", "_year": "src_year"}),
+                      on=["template", "src_year"], how="inner")
+    rows = rows.sort_values(["_pidx", "syn_year", "month"], kind="stable").reset_index(drop=True)
+    n = len(rows)
+    rows["month"] = rows["syn_year"].astype(str) + rows["month"].astype(str).str[4:]
+    dt = rng.normal(0.0, 0.3, size=n)
+    for c in ("tavg_c", "tmin_c", "tmax_c"):
+        if c in rows.columns:
+            rows[c] = pd.to_numeric(rows[c], errors="coerce") + dt
+    if "precip_mm" in rows.columns:
+        rows["precip_mm"] = pd.to_numeric(rows["precip_mm"], errors="coerce") * np.exp(rng.normal(0.0, 0.1, size=n))
+    if "et0_mm" in rows.columns:
+        rows["et0_mm"] = pd.to_numeric(rows["et0_mm"], errors="coerce") * np.exp(rng.normal(0.0, 0.03, size=n))
+    return rows[cols]
+
+
+def _basin_series(path: Path, ymap: pd.DataFrame, scale: float) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["_year"] = df["month"].astype(str).str[:4].astype(int)
+    out = ymap.merge(df, left_on="src_year", right_on="_year", how="inner")
+    out["month"] = out["syn_year"].astype(str) + out["month"].astype(str).str[4:]
+    for c in df.columns:
+        if c != "month" and ("m3" in c or "m2" in c) and pd.api.types.is_numeric_dtype(df[c]):
+            vals = out[c] * scale
+            out[c] = vals.round().astype(df[c].dtype) if pd.api.types.is_integer_dtype(df[c]) else vals
+    return out[[c for c in df.columns if c != "_year"]]
+
+
+def _extend_crop_tables(dst: Path, crops: Dict[str, Any]) -> None:
+    """Clone the base crop's rows in the crop-keyed tables for every variant."""
+    if not crops["variants"]:
+        return
+    tables = [(dst / CSV_REL / "crop_suitability_assumed.csv", "crop"),
+              (dst / CSV_REL / "crop_params_assumed.csv", "crop"),
+              (dst / CSV_REL / "crop_family_map.csv", "crop"),
+              (dst / "urun_parametreleri_demo.csv", "urun")]
+    for path, key in tables:
+        if not path.exists():
+            continue
+        with open(path, "rb") as fh:
+            enc = "utf-8-sig" if fh.read(3) == b"\xef\xbb\xbf" else "utf-8"
+        df = pd.read_csv(path, encoding=enc)
+        if key not in df.columns:
+            continue
+        add = []
+        for name, v in crops["variants"].items():
+            rows = df[df[key].astype(str) == v["base"]].copy()
+            rows[key] = name
+            add.append(rows)
+        pd.concat([df] + add, ignore_index=True).to_csv(path, index=False, encoding=enc)
+
+
+# -----------------------------
+# generate
+# -----------------------------
+
+def generate(out: Path, parcels: int, years: Optional[int] = None, crops: Optional[int] = None, seed: int = 0,
+             source: Path = SOURCE_DIR, mix: float = 0.25, noise: float = 0.05, area_sigma: float = 0.35,
+             climate_years: Optional[int] = None, log=None) -> Dict[str, Any]:
+    """Write a synthetic data dir to `out`; returns the manifest (also saved as out/synth_basin.json)."""
+    out, source = Path(out), Path(source)
+    if out.exists() and any(out.iterdir()) and not (out / MANIFEST).exists():
+        raise ValueError(f"{out} exists and is not a synth_basin output; refusing to overwrite it")
+    t0 = time.perf_counter()
+    src = _read_source(source)
+    n_years = max(1, int(years or len(src["years"])))
+    n_crops = max(1, int(crops or pd.concat([s["crop"] for s in src["seasons"].values()]).nunique()))
+    rng = np.random.default_rng(int(seed))
+    ymap = _year_map(src["years"], n_years)
+    cmap = ymap.tail(max(1, min(n_years, int(climate_years or n_years))))
+    crop_plan = _crop_plan(src["seasons"], n_crops, rng)
+
+    if out.exists():
+        shutil.rmtree(out)
+    shutil.copytree(source, out)
+    csv_dir = out / CSV_REL
+    legacy = src["legacy"]
+    paths = {
+        "parcels": csv_dir / "parcel_assumptions.csv",
+        "s1": csv_dir / SEASON_FILES["s1"],
+        "s2": csv_dir / SEASON_FILES["s2"],
+        "climate": csv_dir / "monthly_climate_all_parcels.csv",
+        "legacy": out / "parsel_su_kar_ozet.csv",
+        "overrides": out / "excel_derived" / "parcel_area_overrides.csv",
+    }
+    for p in paths.values():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.unlink(missing_ok=True)
+    counts = {k: 0 for k in paths}
+    total_area = 0.0
+    parcel_cols = [c for c in src["parcels"].columns if c != "area_da"]
+
+    def _append(key: str, df: pd.DataFrame) -> None:
+        # 6 decimals: shorter files and a faster writer than full float repr
+        df.round(6).to_csv(paths[key], mode="a", header=not paths[key].exists(), index=False)
+        counts[key] += len(df)
+
+    for start in range(0, int(parcels), CHUNK_PARCELS):
+        n = min(CHUNK_PARCELS, int(parcels) - start)
+        plan = _parcel_block(src, start, n, rng, area_sigma)
+        total_area += float(plan["area_da"].sum())
+        _append("parcels", plan[parcel_cols])
+        for key in ("s1", "s2"):
+            block = _season_block(src["seasons"][key], plan, ymap, crop_plan, rng, mix, noise)
+            block["season_id"] = np.arange(counts[key] + 1, counts[key] + len(block) + 1)
+            _append(key, block)
+        _append("climate", _climate_block(src["climate"], plan, cmap, rng))
+        leg = legacy.reindex(plan["template"]).reset_index(drop=True)
+        f = plan["area_factor"].to_numpy()
+        leg.insert(0, "parsel_id", plan["parcel_id"].to_numpy())
+        leg["alan_da"] = plan["area_da"].round(4).to_numpy()
+        for c in ("mevcut_su_m3", "mevcut_kar_tl"):
+            leg[c] = pd.to_numeric(leg[c], errors="coerce") * f
+        leg["lat"], leg["lon"] = plan["lat_deg"].to_numpy(), plan["lon_deg"].to_numpy()
+        _append("legacy", leg)
+        _append("overrides", pd.DataFrame({
+            "parcel_id": plan["parcel_id"], "geojson_file_no": 0, "area_m2": (plan["area_da"] * 1000.0).round(1),
+            "area_da": plan["area_da"].round(4), "area_ha": (plan["area_da"] / 10.0).round(4)}))
+        if log is not None:
+            log(f"parcels {start + n}/{parcels}")
+
+    # basin volumes follow the irrigated area
+    scale = total_area / float(src["parcels"]["area_da"].sum())
+    for name in BASIN_FILES:
+        path = csv_dir / name
+        if (source / CSV_REL / name).exists():
+            df = _basin_series(source / CSV_REL / name, ymap, scale)
+            df.to_csv(path, index=False)
+            counts[name] = len(df)
+    _extend_crop_tables(out, crop_plan)
+
+    manifest = {
+        "generator": "synth_basin",
+        "params": {"parcels": int(parcels), "years": n_years, "crops": n_crops, "seed": int(seed), "mix": mix,
+                   "noise": noise, "area_sigma": area_sigma, "climate_years": len(cmap)},
+        "source": str(source),
+        "years": [int(ymap["syn_year"].iloc[0]), int(ymap["syn_year"].iloc[-1])],
+        "crops": crop_plan["kept"] + list(crop_plan["variants"]),
+        "total_area_da": round(total_area, 3),
+        "basin_scale": round(scale, 6),
+        "rows": counts,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    with open(out / MANIFEST, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    return manifest
+
+
+# -----------------------------
+# curve
+# -----------------------------
+
+def _run_tool(tool: str, data_dir: Path, extra: List[str], log=None) -> Tuple[Dict[str, Any], float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        out_json = os.path.join(tmp, "out.json")
+        cmd = [sys.executable, "-m", tool] + list(extra)
+        if tool == "microbench" and "--scales" not in extra:
+            cmd += ["--scales", "1"]
+        cmd += ["--json", out_json]
+        if tool == "bench" and "-q" not in extra and "--quiet" not in extra:
+            cmd += ["-q"]
+        env = dict(os.environ, AKKAYA_DATA_DIR=str(data_dir))
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=str(BASE_DIR), env=env, stdout=subprocess.DEVNULL,
+                              stderr=None if log is not None else subprocess.DEVNULL)
+        wall = time.perf_counter() - t0
+        if not os.path.exists(out_json):
+            raise RuntimeError(f"{' '.join(cmd)} failed (exit {proc.returncode})")
+        with open(out_json, "r", encoding="utf-8") as fh:
+            return json.load(fh), wall
+
+
+def curve(sizes: List[int], root: Path, tool: str = "microbench", extra: Optional[List[str]] = None,
+          years: Optional[int] = None, crops: Optional[int] = None, seed: int = 0,
+          climate_years: Optional[int] = None, log=None) -> List[Dict[str, Any]]:
+    """Rows of (parcels, case, timings) for every size; basins are cached under `root`."""
+    rows: List[Dict[str, Any]] = []
+    for n in sizes:
+        d = Path(root) / f"basin_p{n}_y{years or 'all'}_c{crops or 'all'}_s{seed}"
+        want = {"parcels": int(n), "seed": int(seed), "years": years, "crops": crops, "climate_years": climate_years}
+        want = {k: v for k, v in want.items() if v is not None}
+        man = None
+        if (d / MANIFEST).exists():
+            with open(d / MANIFEST, "r", encoding="utf-8") as fh:
+                man = json.load(fh)
+            if any(man.get("params", {}).get(k) != v for k, v in want.items()):
+                man = None
+        if man is None:
+            if log is not None:
+                log(f"generating {d}")
+            man = generate(d, n, years=years, crops=crops, seed=seed, climate_years=climate_years, log=log)
+        if log is not None:
+            log(f"running {tool} on P={n}")
+        res, wall = _run_tool(tool, d, list(extra or []), log=log)
+        base = {"parcels": int(n), "crops": len(man.get("crops", [])), "tool_s": round(wall, 2)}
+        if tool == "microbench":
+            for r in res.get("rows", []):
+                rows.append(dict(base, case=r["name"], size=r["size"], median_ms=r["median_ms"], p95_ms=r["p95_ms"],
+                                 peak_kb=r["peak_kb"]))
+        else:
+            for algo, s in (res.get("summary") or {}).items():
+                rows.append(dict(base, case=algo, size=f"P={n}", median_ms=s["wall_ms_median"], p95_ms=s["wall_ms_p95"],
+                                 evals_per_s=s["evals_per_s_median"], best_fitness=s["best_fitness_median"]))
+    return rows
+
+
+def format_curve(rows: List[Dict[str, Any]]) -> str:
+    head = f"{'case':<46}{'parcels':>9}{'median ms':>13}{'p95 ms':>13}{'ms/parcel':>12}"
+    out = [head, "-" * len(head)]
+    for r in sorted(rows, key=lambda r: (r["case"], r["parcels"])):
+        out.append(f"{r['case']:<46}{r['parcels']:>9}{r['median_ms']:>13.3f}{r['p95_ms']:>13.3f}"
+                   f"{r['median_ms'] / max(1, r['parcels']):>12.5f}")
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m synth_basin", description="Synthetic Akkaya basins for scaling tests")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("generate", "curve"):
+        p = sub.add_parser(name)
+        if name == "generate":
+            p.add_argument("out", help="output data dir (use it as AKKAYA_DATA_DIR)")
+            p.add_argument("--parcels", type=int, required=True, help="number of parcels N")
+            p.add_argument("--mix", type=float, default=0.25, help="share of season rows resampled from other parcels (default 0.25)")
+            p.add_argument("--noise", type=float, default=0.05, help="log-normal sigma of the per-row water/yield noise (default 0.05)")
+            p.add_argument("--area-sigma", type=float, default=0.35, help="log-normal sigma of the parcel area factor (default 0.35)")
+        else:
+            p.add_argument("--sizes", default="15,150,1500,15000,50000", help="parcel counts (default 15,150,1500,15000,50000)")
+            p.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "akkaya_basins"),
+                           help="where the basins are generated and reused (default <tmp>/akkaya_basins)")
+            p.add_argument("--tool", choices=("microbench", "bench"), default="microbench")
+            p.add_argument("--csv", dest="csv_out", metavar="PATH", help="write the curve rows as CSV")
+            p.add_argument("--json", dest="json_out", metavar="PATH", help="write the curve rows as JSON")
+            p.add_argument("tool_args", nargs=argparse.REMAINDER, help="after --: arguments for the tool")
+        p.add_argument("--years", type=int, help="number of years Y (default: the real range)")
+        p.add_argument("--crops", type=int, help="number of crops C (default: the crops in the real tables)")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--climate-years", type=int, help="climate rows only for the last K years (default: all Y)")
+        p.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    args = ap.parse_args(argv)
+    log = None if args.quiet else (lambda m: print(m, file=sys.stderr, flush=True))
+
+    if args.cmd == "generate":
+        try:
+            man = generate(Path(args.out), args.parcels, years=args.years, crops=args.crops, seed=args.seed,
+                           mix=args.mix, noise=args.noise, area_sigma=args.area_sigma,
+                           climate_years=args.climate_years, log=log)
+        except ValueError as e:
+            ap.error(str(e))
+        print(json.dumps(man, indent=2, ensure_ascii=False))
+        return 0
+
+    extra = [a for a in args.tool_args if a != "--"]
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    rows = curve(sizes, Path(args.root), tool=args.tool, extra=extra, years=args.years, crops=args.crops,
+                 seed=args.seed, climate_years=args.climate_years, log=log)
+    print(format_curve(rows))
+    if args.csv_out:
+        pd.DataFrame(rows).to_csv(args.csv_out, index=False)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump({"tool": args.tool, "sizes": sizes, "rows": rows}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
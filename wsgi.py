@@ -0,0 +1,10 @@
+"""WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Datasets are preloaded when this module is imported; with ``preload_app = True`` that
+happens once in the gunicorn master and the workers inherit the caches copy-on-write.
+"""
+from app import create_app
+
+app = create_app(preload=True)